@@ -0,0 +1,111 @@
+"""
+**************************************************************************
+
+ BenchmarkDataConversions.py
+
+**************************************************************************
+ Description:
+
+ Compares the scalar data conversion functions, applied in a Python
+ loop, with their vectorised numpy counterparts.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ -n the number of values to convert (default 1,000,000).
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import argparse
+import timeit
+
+import numpy as np
+
+from main.src.DataConversions import *
+
+# ******************************
+#
+# BENCHMARKS
+#
+# ******************************
+
+# Pairs of (scalar function, vectorised function, units) to compare.
+BENCHMARKS = [
+    (convertFromBit, convertFromBitArray, 'Mbit'),
+    (convertToBit, convertToBitArray, 'Gbit'),
+    (convertByteToBit, convertByteToBitArray, 'GB'),
+    (convertBitToByte, convertBitToByteArray, 'TB'),
+]
+
+
+def bestOf(func, repeat=3):
+    """
+    Times a zero argument function.
+
+    Parameters
+    ----------
+    @param func: the function to time.
+    @param repeat: the number of timing runs.
+
+    Returns
+    ----------
+    @return the fastest observed run time in seconds.
+    """
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+# ******************************
+
+def run(n=1000000, seed=0):
+    """
+    Runs the benchmarks, printing one line per conversion function.
+
+    Parameters
+    ----------
+    @param n: the number of values to convert.
+    @param seed: the random seed used to generate the values.
+
+    Returns
+    ----------
+    @return a list of (function name, scalar seconds, vector seconds) tuples.
+    """
+    values = np.random.RandomState(seed).uniform(0, pow(10, 15), n)
+    values_list = values.tolist()  # The scalar functions need Python floats.
+    results = []
+
+    print('Converting ' + str(n) + ' values.')
+    for scalar, vector, units in BENCHMARKS:
+        scalar_time = bestOf(lambda: [scalar(v, units) for v in values_list])
+        vector_time = bestOf(lambda: vector(values, units))
+        results.append((scalar.__name__, scalar_time, vector_time))
+
+        print('%-18s loop: %8.4f s  vectorised: %8.4f s  speedup: %7.1fx'
+              % (scalar.__name__, scalar_time, vector_time, scalar_time / vector_time))
+
+    return results
+
+# ******************************
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the data conversion functions.')
+    parser.add_argument('-n', type=int, default=1000000, help='number of values to convert.')
+    run(parser.parse_args().n)
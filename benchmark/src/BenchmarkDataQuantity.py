@@ -0,0 +1,120 @@
+"""
+**************************************************************************
+
+ BenchmarkDataQuantity.py
+
+**************************************************************************
+ Description:
+
+ Measures the cost of creating DataQuantity objects: construction and
+ arithmetic timings, and the memory used per object.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ -n the number of objects created per measurement (default 100,000).
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import argparse
+import gc
+import timeit
+import tracemalloc
+
+from main.src.DataQuantity import DataQuantity
+
+# ******************************
+#
+# BENCHMARKS
+#
+# ******************************
+
+# Statements to time, each run in a namespace holding a, b (data
+# quantities) and x (an int).
+STATEMENTS = [
+    'DataQuantity(x)',
+    'a + b',
+    'a - b',
+    'a * 3',
+    'a * b',
+    'a / 4',
+    'a + 1.5',
+]
+
+
+def bytesPerObject(n):
+    """
+    Measures the memory allocated per DataQuantity object.
+
+    Parameters
+    ----------
+    @param n: the number of objects to create.
+
+    Returns
+    ----------
+    @return the mean number of bytes allocated per object.
+    """
+    values = list(range(1, n + 1))  # Allocated before tracing starts.
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [DataQuantity(v) for v in values]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # Exclude the list holding the objects (one pointer per object).
+    return (after - before) / float(len(objects)) - 8
+
+# ******************************
+
+def run(n=100000):
+    """
+    Runs the benchmarks, printing one line per statement.
+
+    Parameters
+    ----------
+    @param n: the number of objects created per measurement.
+
+    Returns
+    ----------
+    @return a dictionary mapping each statement (and 'bytes/object')
+            to its result.
+    """
+    namespace = {'DataQuantity': DataQuantity, 'a': DataQuantity(123456), 'b': DataQuantity(654321), 'x': 42}
+    results = {}
+
+    for statement in STATEMENTS:
+        seconds = min(timeit.repeat(statement, globals=namespace, number=n, repeat=5))
+        results[statement] = seconds / n * 1e9
+        print('%-18s %8.1f ns' % (statement, results[statement]))
+
+    results['bytes/object'] = bytesPerObject(n)
+    print('%-18s %8.1f' % ('bytes/object', results['bytes/object']))
+    return results
+
+# ******************************
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark DataQuantity allocation.')
+    parser.add_argument('-n', type=int, default=100000, help='objects created per measurement.')
+    run(parser.parse_args().n)
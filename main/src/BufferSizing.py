@@ -0,0 +1,450 @@
+"""
+**************************************************************************
+
+ BufferSizing.py
+
+**************************************************************************
+ Description:
+
+ Sizes the CSP and SDP side buffers for bursty SPOCLD delivery. The
+ notebook's SPOCLD_size * (T_scan * N_burst) * N_beam gives the volume
+ per scan, but hides how bursts cluster in time. Here SPOCLD arrivals
+ (fixed rate, Poisson, or a trace of event times per beam) are queued
+ and drained at a constant rate, and the buffer capacity needed to keep
+ the overflow probability below a target is found from the distribution
+ of the backlog.
+
+ The computation streams: arrivals are processed in time ordered
+ chunks, the queues carry their state from chunk to chunk, and the
+ backlogs are kept as histograms, so traces far larger than memory can
+ be processed.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import itertools
+import os
+
+import numpy as np
+
+from main.src.DataQuantityFunctions import spocldSize
+
+# The default number of arrivals processed at once.
+CHUNK_SIZE = 1048576
+
+# The relative width of the backlog histogram bins: capacities are
+# rounded up by at most this fraction.
+RESOLUTION = 1e-3
+
+# The number of histogram bins, enough for backlogs up to 2^100 bits.
+BINS = int(np.ceil(100 * np.log(2) / np.log1p(RESOLUTION))) + 2
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class BufferSizing(object):
+    """
+    The backlog distributions of the CSP side (per beam) and SDP side
+    (all beams) buffers, and the capacities they require.
+    """
+
+    __slots__ = ('probability', 'events', 'duration', 'cspCounts', 'sdpCounts', 'cspPeak', 'sdpPeak',
+                 'utilisation')
+
+    def __init__(self, probability, events, duration, cspCounts, sdpCounts, cspPeak, sdpPeak, utilisation):
+        self.probability = probability    # The target overflow probability.
+        self.events = events              # The number of arrivals.
+        self.duration = duration          # The time from the first to the last arrival (s).
+        self.cspCounts = cspCounts        # The histograms of the backlogs seen by arrivals...
+        self.sdpCounts = sdpCounts        # ... (see RESOLUTION and BINS).
+        self.cspPeak = cspPeak            # The largest backlogs (bits).
+        self.sdpPeak = sdpPeak
+        self.utilisation = utilisation    # The SDP side arrival rate / drain rate.
+
+    # ******************************
+
+    def capacity(self, side='sdp', probability=None):
+        """
+        Gets the buffer capacity for which the probability that an
+        arrival overflows the buffer is at most a target.
+
+        Parameters
+        ----------
+        @param side: 'csp' (each beam's buffer) or 'sdp' (the shared buffer).
+        @param probability: the target overflow probability (default: the
+                            one given to sizeBuffers()).
+
+        Returns
+        ----------
+        @return the capacity in bits (rounded up to a histogram bin edge,
+                and no larger than the peak backlog), else None if the side
+                or probability is invalid.
+        """
+        probability = self.probability if probability is None else probability
+
+        if side not in ('csp', 'sdp') or not _isNumber(probability) or not 0 <= probability < 1:
+            return None
+
+        if side == 'csp':
+            return _quantile(self.cspCounts, 1 - probability, self.cspPeak)
+        else:
+            return _quantile(self.sdpCounts, 1 - probability, self.sdpPeak)
+
+    # ******************************
+
+    @property
+    def csp(self):
+        """
+        The capacity each beam's CSP side buffer needs, in bits.
+        """
+        return self.capacity('csp')
+
+    # ******************************
+
+    @property
+    def sdp(self):
+        """
+        The capacity the shared SDP side buffer needs, in bits.
+        """
+        return self.capacity('sdp')
+
+    # ******************************
+
+    def __str__(self):
+        return ('CSP ' + '%.3f' % (self.csp / 8e9) + ' GB per beam, SDP ' + '%.3f' % (self.sdp / 8e9) +
+                ' GB, for overflow probability ' + str(self.probability) + ' (' + str(self.events) + ' arrivals)')
+
+    # ****************************************************************************************************
+
+# ******************************
+#
+# FUNCTIONS
+#
+# ******************************
+
+
+def fixedArrivals(N_burst=1, N_beam=1500, duration=3600, chunkSize=CHUNK_SIZE):
+    """
+    Generates fixed rate arrivals: every beam delivers a SPOCLD every
+    1 / N_burst seconds, all beams at the same times.
+
+    Parameters
+    ----------
+    @param N_burst: the bursts per beam per second.
+    @param N_beam: the number of beams.
+    @param duration: the length of the arrivals in seconds.
+    @param chunkSize: the (approximate) number of arrivals per chunk.
+
+    Returns
+    ----------
+    @return a generator of (times, beams) chunks of arrays in time order.
+    """
+    interval = 1.0 / N_burst
+    steps = max(chunkSize // N_beam, 1)
+    count = int(np.ceil(duration * N_burst))
+
+    for first in range(0, count, steps):
+        ticks = np.arange(first, min(first + steps, count)) * interval
+        ticks = ticks[ticks < duration]
+        yield np.repeat(ticks, N_beam), np.tile(np.arange(N_beam), ticks.size)
+
+# ******************************
+
+def poissonArrivals(N_burst=1, N_beam=1500, duration=3600, seed=0, chunkSize=CHUNK_SIZE):
+    """
+    Generates Poisson arrivals: every beam delivers SPOCLDs as an
+    independent Poisson process of N_burst bursts per second.
+
+    Parameters
+    ----------
+    @param N_burst: the mean bursts per beam per second.
+    @param N_beam: the number of beams.
+    @param duration: the length of the arrivals in seconds.
+    @param seed: the random seed.
+    @param chunkSize: the (approximate) number of arrivals per chunk.
+
+    Returns
+    ----------
+    @return a generator of (times, beams) chunks of arrays in time order.
+    """
+    rng = np.random.default_rng(seed)
+    span = chunkSize / float(N_burst * N_beam)
+
+    for start in itertools.count():
+        first = start * span
+        if first >= duration:
+            return
+
+        last = min(first + span, duration)
+        counts = rng.poisson(N_burst * (last - first), N_beam)
+        times = rng.uniform(first, last, counts.sum())
+        order = np.argsort(times, kind='stable')
+        yield times[order], np.repeat(np.arange(N_beam), counts)[order]
+
+# ******************************
+
+def traceArrivals(path, chunkSize=CHUNK_SIZE):
+    """
+    Reads arrivals from a trace file, in time order. A .npy file holds an
+    array of shape (n, 2) of times and beam numbers, and is memory mapped.
+    Any other file is text, with a time and a beam number per line,
+    separated by a comma or white space; lines starting with # are ignored.
+
+    Parameters
+    ----------
+    @param path: the path of the trace file.
+    @param chunkSize: the number of arrivals per chunk.
+
+    Returns
+    ----------
+    @return a generator of (times, beams) chunks of arrays in time order
+            (nothing if the file cannot be read).
+    """
+    if os.path.splitext(str(path))[1].lower() == '.npy':
+        try:
+            trace = np.load(path, mmap_mode='r')
+        except (IOError, OSError, ValueError):
+            return
+
+        if trace.ndim != 2 or trace.shape[1] != 2:
+            return
+
+        for first in range(0, trace.shape[0], chunkSize):
+            chunk = np.asarray(trace[first:first + chunkSize], dtype=np.float64)
+            yield chunk[:, 0], chunk[:, 1].astype(np.int64)
+        return
+
+    try:
+        traceFile = open(path)
+    except (IOError, OSError):
+        return
+
+    with traceFile:
+        while True:
+            lines = [line.replace(',', ' ') for line in itertools.islice(traceFile, chunkSize)]
+            if not lines:
+                return
+
+            chunk = np.loadtxt(lines, ndmin=2)
+            if chunk.size:
+                yield chunk[:, 0], chunk[:, 1].astype(np.int64)
+
+# ******************************
+
+def sizeBuffers(arrivals, drain, size=None, beamDrain=None, N_beam=1500, probability=1e-3):
+    """
+    Finds the buffer capacities needed for SPOCLD delivery.
+
+    Each beam's SPOCLDs queue in a CSP side buffer, drained at beamDrain.
+    All beams' SPOCLDs, as they arrive, also queue in a shared SDP side
+    buffer drained at the ingest rate. This ignores the smoothing of the
+    CSP side buffers, so the SDP side capacity is conservative.
+
+    The backlog seen by each arrival (including itself) follows Lindley's
+    recursion, W_n = max(0, W_n-1 - rate * (t_n - t_n-1)) + size. Within
+    a chunk it is found without a loop: the backlog before an arrival is
+    the cumulative sum of the increments, minus its running minimum
+    (started from the backlog carried from the previous chunk).
+
+    Parameters
+    ----------
+    @param arrivals: an iterable of (times, beams) chunks of arrays, in
+                     time order (e.g. from poissonArrivals() or
+                     traceArrivals()). Beams are numbered from 0.
+    @param drain: the SDP side drain (ingest) rate in bits per second.
+    @param size: the SPOCLD size in bits (default: spocldSize()).
+    @param beamDrain: each beam's CSP side drain rate in bits per second
+                      (default: an equal share of the drain rate).
+    @param N_beam: the number of beams, used for the default beamDrain.
+    @param probability: the target overflow probability: the fraction of
+                        arrivals that may find the buffer full.
+
+    Returns
+    ----------
+    @return a BufferSizing, else None if a parameter or chunk is invalid,
+            a beam is negative, or the arrivals are not in time order.
+
+    Examples
+    ----------
+    >>> sizing = sizeBuffers(poissonArrivals(duration=600), 100e9)
+    >>> print sizing
+    >>> CSP 0.011 GB per beam, SDP 0.011 GB, for overflow probability 0.001 (899750 arrivals)
+    """
+    size = spocldSize() if size is None else size
+    beamDrain = drain / float(N_beam) if beamDrain is None and _isNumber(drain) and _isNumber(N_beam) and N_beam > 0 \
+        else beamDrain
+
+    for value in (drain, size, beamDrain):
+        if not _isNumber(value) or value <= 0:
+            return None
+
+    if not _isNumber(probability) or not 0 <= probability < 1:
+        return None
+
+    size = float(size)
+    cspCounts = np.zeros(BINS, dtype=np.int64)
+    sdpCounts = np.zeros(BINS, dtype=np.int64)
+    cspPeak = 0.0
+    sdpPeak = 0.0
+    events = 0
+    first = None
+
+    # The queue states: the time of, and the backlog after, the last arrival.
+    sdpTime = None
+    sdpBacklog = 0.0
+    beamTimes = np.zeros(0)
+    beamBacklogs = np.zeros(0)
+
+    chunks = iter(arrivals)
+
+    while True:
+        try:
+            times, beams = next(chunks)
+            times = np.asarray(times, dtype=np.float64)
+            beams = np.asarray(beams, dtype=np.int64)
+        except StopIteration:
+            break
+        except (TypeError, ValueError):
+            # A malformed chunk, e.g. an unreadable line of a trace file.
+            return None
+
+        if times.size == 0:
+            continue
+
+        if times.shape != beams.shape or (beams < 0).any() or (np.diff(times) < 0).any():
+            return None
+
+        if sdpTime is not None and times[0] < sdpTime:
+            return None
+
+        if first is None:
+            first = times[0]
+
+        # The shared SDP side buffer.
+        backlogs = _lindley(times, size, drain, sdpTime, sdpBacklog)
+        sdpTime, sdpBacklog = times[-1], backlogs[-1]
+        sdpPeak = max(sdpPeak, backlogs.max())
+        sdpCounts += _histogram(backlogs)
+
+        # The CSP side buffer of each beam in the chunk.
+        if beams.max() >= beamTimes.size:
+            grown = beams.max() + 1 - beamTimes.size
+            beamTimes = np.concatenate((beamTimes, np.full(grown, np.nan)))
+            beamBacklogs = np.concatenate((beamBacklogs, np.zeros(grown)))
+
+        order = np.argsort(beams, kind='stable')
+        present, starts = np.unique(beams[order], return_index=True)
+        ends = np.append(starts[1:], order.size)
+
+        for beam, start, end in zip(present.tolist(), starts.tolist(), ends.tolist()):
+            last = beamTimes[beam]
+            backlogs = _lindley(times[order[start:end]], size, beamDrain, None if last != last else last,
+                                beamBacklogs[beam])
+            beamTimes[beam] = times[order[end - 1]]
+            beamBacklogs[beam] = backlogs[-1]
+            cspPeak = max(cspPeak, backlogs.max())
+            cspCounts += _histogram(backlogs)
+
+        events += times.size
+
+    if events == 0:
+        return BufferSizing(probability, 0, 0.0, cspCounts, sdpCounts, 0.0, 0.0, 0.0)
+
+    duration = sdpTime - first
+    utilisation = events * size / (drain * duration) if duration > 0 else float('inf')
+
+    return BufferSizing(probability, events, duration, cspCounts, sdpCounts, float(cspPeak), float(sdpPeak),
+                        utilisation)
+
+# ******************************
+#
+# INTERNAL HELPERS
+#
+# ******************************
+
+
+def _lindley(times, size, drain, lastTime, lastBacklog):
+    """
+    Computes the backlogs of a queue seen by a run of arrivals.
+
+    Parameters
+    ----------
+    @param times: the arrival times, in order.
+    @param size: the size of each arrival in bits.
+    @param drain: the drain rate in bits per second.
+    @param lastTime: the time of the previous arrival, else None.
+    @param lastBacklog: the backlog just after the previous arrival.
+
+    Returns
+    ----------
+    @return the float64 array of backlogs just after each arrival.
+    """
+    gaps = np.diff(times, prepend=times[0] if lastTime is None else lastTime)
+
+    # The increments of the backlog before each arrival; the first starts
+    # from the backlog after the previous arrival (or an empty queue).
+    increments = size - drain * gaps
+    increments[0] = (lastBacklog if lastTime is not None else 0.0) - drain * gaps[0]
+    sums = np.cumsum(increments)
+
+    # Before each arrival: the sums, less their running minimum (or zero,
+    # if the queue has not emptied). The arrival then adds its size.
+    lowest = np.minimum.accumulate(np.minimum(sums, 0.0))
+    return sums - lowest + size
+
+# ******************************
+
+def _histogram(backlogs):
+    """
+    Counts backlogs in logarithmic bins: bin 0 holds backlogs below 1 bit,
+    bin i holds those below (1 + RESOLUTION)^i bits.
+    """
+    bins = np.zeros(backlogs.shape, dtype=np.int64)
+    large = backlogs >= 1
+    bins[large] = np.minimum(np.floor(np.log(backlogs[large]) / np.log1p(RESOLUTION)) + 1, BINS - 1)
+    return np.bincount(bins, minlength=BINS)
+
+# ******************************
+
+def _quantile(counts, fraction, peak):
+    """
+    Gets an upper bound of a quantile of the backlogs in a histogram.
+
+    Returns
+    ----------
+    @return the upper edge of the bin holding the quantile, capped at the
+            peak backlog.
+    """
+    total = counts.sum()
+
+    if total == 0:
+        return 0.0
+
+    index = int(np.searchsorted(np.cumsum(counts), fraction * total, side='left'))
+    return min(float(np.power(1 + RESOLUTION, index)) if index > 0 else 1.0, peak)
+
+# ******************************
+
+def _isNumber(value):
+    """
+    Checks that a value is a real number (not a bool).
+    """
+    return type(value) in (int, float) or (isinstance(value, np.number) and value.dtype.kind in ('i', 'u', 'f'))
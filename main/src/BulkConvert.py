@@ -0,0 +1,281 @@
+"""
+**************************************************************************
+
+ BulkConvert.py
+
+**************************************************************************
+ Description:
+
+ Streams a delimited (CSV/TSV) file in fixed size chunks, converting the
+ chosen columns between any two valid bit/byte units with vectorised
+ numpy arithmetic. Output is written incrementally, so memory use stays
+ flat whatever the size of the input file.
+
+ Example:
+
+ python -m main.src.BulkConvert volumes.csv volumes_TB.csv -c volume -f bit -t TB
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ input       the file to convert ('-' for stdin).
+ output      the file to write ('-' for stdout).
+ -c          a column to convert, by header name or 0-based index
+             (may be repeated).
+ -f          the current unit of the column values, e.g. bit.
+ -t          the desired unit of the column values, e.g. TB.
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ -d          the delimiter (default: tab for .tsv files, else comma).
+ --chunk     the number of rows converted at a time (default 100000).
+ --no-header the input file has no header row.
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import argparse
+import csv
+import sys
+import time
+from itertools import islice
+
+import numpy as np
+
+from main.src.DataConversions import convertArray, isUnitValid
+
+# The number of rows converted at a time by default.
+DEFAULT_CHUNK_SIZE = 100000
+
+
+def _openFile(path, mode):
+    """
+    Opens a file for csv reading/writing, where '-' means stdin/stdout.
+
+    Parameters
+    ----------
+    @param path: the file path.
+    @param mode: 'r' or 'w'.
+
+    Returns
+    ----------
+    @return the open file object.
+    """
+    if path == '-':
+        return sys.stdin if mode == 'r' else sys.stdout
+    else:
+        return open(path, mode, newline='')
+
+# ******************************
+
+def _resolveColumns(columns, header):
+    """
+    Converts column names or 0-based index strings to column indexes.
+
+    Parameters
+    ----------
+    @param columns: the column names/indexes.
+    @param header: the header row, or None if there is no header.
+
+    Returns
+    ----------
+    @return a list of column indexes, else None if a column is unknown.
+    """
+    indexes = []
+    for column in columns:
+        if header is not None and column in header:
+            indexes.append(header.index(column))
+        else:
+            try:
+                indexes.append(int(column))
+            except ValueError:
+                return None
+    return indexes
+
+# ******************************
+
+def _toFloatArray(values):
+    """
+    Converts a list of strings to a float numpy array. Empty or non
+    numeric strings become NaN.
+
+    Parameters
+    ----------
+    @param values: the strings to convert.
+
+    Returns
+    ----------
+    @return a float numpy array.
+    """
+    try:
+        return np.array(values, dtype=np.float64)
+    except ValueError:
+        array = np.empty(len(values), dtype=np.float64)
+        for i, value in enumerate(values):
+            try:
+                array[i] = float(value)
+            except ValueError:
+                array[i] = np.nan
+        return array
+
+# ******************************
+
+def convertChunk(rows, indexes, src, dst):
+    """
+    Converts the chosen columns of a chunk of rows in place, one
+    vectorised conversion per column. Values that are missing, not
+    numeric or negative are written as empty fields.
+
+    Parameters
+    ----------
+    @param rows: the rows (lists of strings) to convert.
+    @param indexes: the indexes of the columns to convert.
+    @param src: the current unit of the column values.
+    @param dst: the desired unit of the column values.
+
+    Returns
+    ----------
+    @return the converted rows.
+    """
+    for index in indexes:
+        values = _toFloatArray([row[index] if index < len(row) else '' for row in rows])
+        converted = convertArray(values, src, dst).tolist()
+
+        for row, value in zip(rows, converted):
+            if index < len(row):
+                row[index] = '' if value != value else repr(value)  # NaN -> ''
+
+    return rows
+
+# ******************************
+
+def convertFile(input_path, output_path, columns, src, dst, delimiter=None,
+                chunk_size=DEFAULT_CHUNK_SIZE, header=True):
+    """
+    Converts the chosen columns of a delimited file between two bit or
+    byte units. The file is streamed chunk_size rows at a time, and each
+    chunk is written out as soon as it has been converted.
+
+    Parameters
+    ----------
+    @param input_path: the file to convert ('-' for stdin).
+    @param output_path: the file to write ('-' for stdout).
+    @param columns: the column names or 0-based indexes to convert.
+    @param src: the current unit of the column values.
+    @param dst: the desired unit of the column values.
+    @param delimiter: the field delimiter. If None, tab is used for
+                      .tsv files, and comma otherwise.
+    @param chunk_size: the number of rows converted at a time.
+    @param header: True if the first row is a header.
+
+    Returns
+    ----------
+    @return a tuple containing the number of rows converted and the
+            elapsed time in seconds, else None if a unit or column is
+            invalid.
+
+    Examples
+    ----------
+    >>> rows, seconds = convertFile('in.csv', 'out.csv', ['volume'], 'bit', 'TB')
+    """
+    if not isUnitValid(src) or not isUnitValid(dst) or chunk_size < 1:
+        return None
+
+    if delimiter is None:
+        delimiter = '\t' if str(input_path).lower().endswith('.tsv') else ','
+
+    start = time.time()
+    rows_converted = 0
+    input_file = _openFile(input_path, 'r')
+
+    try:
+        reader = csv.reader(input_file, delimiter=delimiter)
+        header_row = next(reader, None) if header else None
+        indexes = _resolveColumns(columns, header_row)
+
+        if indexes is None:
+            return None
+
+        output_file = _openFile(output_path, 'w')
+        try:
+            writer = csv.writer(output_file, delimiter=delimiter, lineterminator='\n')
+            if header_row is not None:
+                writer.writerow(header_row)
+
+            while True:
+                rows = list(islice(reader, chunk_size))
+                if not rows:
+                    break
+                writer.writerows(convertChunk(rows, indexes, src, dst))
+                rows_converted += len(rows)
+        finally:
+            if output_file is not sys.stdout:
+                output_file.close()
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+
+    return rows_converted, time.time() - start
+
+# ******************************
+#
+# MAIN METHOD AND ENTRY POINT.
+#
+# ******************************
+
+def main(argv=None):
+    """
+    Command line entry point. Reports the rows converted per second
+    to stderr.
+
+    Parameters
+    ----------
+    @param argv: the command line arguments (defaults to sys.argv).
+
+    Returns
+    ----------
+    @return the exit code, 0 on success.
+    """
+    parser = argparse.ArgumentParser(description='Convert columns of a CSV/TSV file between bit/byte units.')
+    parser.add_argument('input', help="the file to convert ('-' for stdin).")
+    parser.add_argument('output', help="the file to write ('-' for stdout).")
+    parser.add_argument('-c', dest='columns', action='append', required=True,
+                        help='a column to convert, by header name or 0-based index.')
+    parser.add_argument('-f', dest='src', required=True, help='the current unit, e.g. bit.')
+    parser.add_argument('-t', dest='dst', required=True, help='the desired unit, e.g. TB.')
+    parser.add_argument('-d', dest='delimiter', default=None, help='the field delimiter.')
+    parser.add_argument('--chunk', type=int, default=DEFAULT_CHUNK_SIZE, help='rows converted at a time.')
+    parser.add_argument('--no-header', dest='header', action='store_false', help='the input has no header row.')
+    args = parser.parse_args(argv)
+
+    result = convertFile(args.input, args.output, args.columns, args.src, args.dst,
+                         args.delimiter, args.chunk, args.header)
+
+    if result is None:
+        sys.stderr.write('Invalid unit, column or chunk size.\n')
+        return 1
+
+    rows, seconds = result
+    rate = rows / seconds if seconds > 0 else float('inf')
+    sys.stderr.write('Converted ' + str(rows) + ' rows in ' + ('%.3f' % seconds) + ' s ('
+                     + ('%.0f' % rate) + ' rows/s).\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,321 @@
+"""
+**************************************************************************
+
+ CapacitySolver.py
+
+**************************************************************************
+ Description:
+
+ Runs the product size models backwards for capacity planning: given a
+ link rate (or a volume) budget, finds the largest value of one chosen
+ parameter (N_cand, N_beam, N_burst, N_chan, ...) that fits, with the
+ other parameters fixed. The size formulas are linear in each of their
+ parameters, so most problems are solved in closed form; any that are
+ not (e.g. custom size functions) fall back to vectorised bisection.
+ Budgets and fixed parameters may be numpy arrays, so thousands of
+ problems are solved in one call.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import inspect
+
+import numpy as np
+
+from main.src.MonteCarlo import MODELS, T_SCAN
+
+# The largest parameter value searched for. Larger feasible values are
+# reported as unbounded (inf).
+LIMIT = float(pow(2, 53))
+
+# ******************************
+#
+# FUNCTIONS
+#
+# ******************************
+
+
+def scanVolumeOf(product, **parameters):
+    """
+    Computes the volume of a data product produced per scan, across all
+    beams, as used by the solver. For the SPOCLD this includes the
+    N_burst bursts per second over T_scan seconds.
+
+    Parameters
+    ----------
+    @param product: 'OCLD', 'SPOCLD', 'PTD' or 'DSD'.
+    @param parameters: the size formula parameters, plus N_beam, T_scan
+                       and (for the SPOCLD) N_burst.
+
+    Returns
+    ----------
+    @return the volume per scan in bits, else None if the product or a
+            parameter is unknown.
+    """
+    if product not in MODELS or not set(parameters) <= _names(product):
+        return None
+
+    return _scanVolume(product, parameters)
+
+# ******************************
+
+def maxParameter(product, parameter, rate=None, volume=None, integer=True, **parameters):
+    """
+    Finds the largest value of a parameter for which a data product fits
+    a budget, with the other parameters fixed (at the notebook's values
+    unless given). The budget is either a rate in bits per second, the
+    volume per scan divided by T_scan, or a volume in bits per scan.
+
+    The models are assumed to grow with the parameter, as all the size
+    formulas do. They are linear in each parameter, so the answer is
+    normally found in closed form, and checked exactly against the model;
+    anything the closed form gets wrong is solved by bisection.
+
+    Parameters
+    ----------
+    @param product: 'OCLD', 'SPOCLD', 'PTD' or 'DSD'.
+    @param parameter: the name of the parameter to solve for, e.g. 'N_cand'.
+    @param rate: the rate budget in bits per second (number or array).
+    @param volume: the volume budget in bits per scan (number or array),
+                   used if no rate is given.
+    @param integer: True if the parameter only takes whole values.
+    @param parameters: the fixed parameters (numbers or arrays), including
+                       N_beam, T_scan and (for the SPOCLD) N_burst.
+
+    Returns
+    ----------
+    @return the largest feasible value (a float, or a float64 array with
+            the broadcast shape of the budget and parameters), NaN where
+            even a value of 0 does not fit, and inf where any value fits.
+            Else None if the product, a parameter or the budget is invalid.
+
+    Examples
+    ----------
+    >>> # How many OCLD candidates per beam fit a 100 Gbit/s link?
+    >>> print maxParameter('OCLD', 'N_cand', rate=100e9)
+    >>> 1397.0
+    """
+    names = _names(product)
+
+    if names is None or parameter not in names or parameter in parameters:
+        return None
+
+    if not set(parameters) <= names:
+        return None
+
+    T_scan = parameters.get('T_scan', T_SCAN)
+
+    if rate is not None:
+        # A longer scan lowers the rate, so T_scan cannot be solved for.
+        if parameter == 'T_scan':
+            return None
+        budget = _asArray(rate)
+        if budget is None:
+            return None
+        budget = budget * T_scan
+    elif volume is not None:
+        budget = _asArray(volume)
+        if budget is None:
+            return None
+    else:
+        return None
+
+    return solve(lambda value: _scanVolume(product, dict(parameters, **{parameter: value})), budget, integer)
+
+# ******************************
+
+def solve(function, budget, integer=True):
+    """
+    Finds the largest x >= 0 for which function(x) <= budget, for a
+    function that is non-decreasing in x and accepts numpy arrays. A
+    closed form solution is tried first, assuming the function is linear
+    in x, and checked; problems it does not solve are bisected.
+
+    Parameters
+    ----------
+    @param function: the function, e.g. a volume per scan.
+    @param budget: the budget (number or array); the function's result
+                   may broadcast against it.
+    @param integer: True to find the largest whole number x.
+
+    Returns
+    ----------
+    @return the largest x (a float, or float64 array), NaN where no x fits,
+            and inf where every x fits.
+    """
+    budget = np.asarray(budget, dtype=np.float64)
+
+    f0 = np.asarray(function(0), dtype=np.float64)
+    f1 = np.asarray(function(1), dtype=np.float64)
+    shape = np.broadcast_shapes(budget.shape, f0.shape, f1.shape)
+
+    budget = np.broadcast_to(budget, shape)
+    f0 = np.broadcast_to(f0, shape)
+    slope = np.broadcast_to(f1, shape) - f0
+
+    result = np.full(shape, np.nan)
+    feasible = f0 <= budget
+
+    # Closed form: f(x) = f(0) + slope * x.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        guess = np.where(slope > 0, (budget - f0) / slope, np.inf)
+
+    guess = np.where(feasible, guess, np.nan)
+    if integer:
+        guess = np.floor(guess)
+    guess = np.where(guess > LIMIT, np.inf, guess)
+
+    solved = _check(function, guess, budget, feasible, integer)
+    result[solved] = guess[solved]
+
+    unsolved = feasible & ~solved
+    if unsolved.any():
+        result[unsolved] = _bisect(function, budget, unsolved, integer)[unsolved]
+
+    return float(result) if result.ndim == 0 else result
+
+# ******************************
+#
+# INTERNAL HELPERS
+#
+# ******************************
+
+
+def _names(product):
+    """
+    Gets the parameter names of a product model.
+
+    Returns
+    ----------
+    @return the set of names, else None if the product is unknown.
+    """
+    if product not in MODELS:
+        return None
+
+    names = set(inspect.signature(MODELS[product][0]).parameters) | {'N_beam', 'T_scan'}
+    if product == 'SPOCLD':
+        names.add('N_burst')
+    return names
+
+# ******************************
+
+def _scanVolume(product, parameters):
+    """
+    Computes the volume per scan of a product.
+    """
+    function, N_beam = MODELS[product]
+    arguments = dict(parameters)
+    N_beam = arguments.pop('N_beam', N_beam)
+    T_scan = arguments.pop('T_scan', T_SCAN)
+    N_burst = arguments.pop('N_burst', 1)
+
+    volume = function(**arguments)
+    if product == 'SPOCLD':
+        volume = volume * (T_scan * N_burst)
+
+    return volume * N_beam
+
+# ******************************
+
+def _asArray(budget):
+    """
+    Converts a budget to a float64 array.
+
+    Returns
+    ----------
+    @return the array, else None if the budget is not numeric.
+    """
+    array = np.asarray(budget)
+
+    if array.dtype.kind not in ('i', 'u', 'f'):
+        return None
+
+    return array.astype(np.float64)
+
+# ******************************
+
+def _check(function, guess, budget, feasible, integer):
+    """
+    Checks closed form solutions against the function itself.
+
+    Returns
+    ----------
+    @return a boolean array, True where the guess is the solution.
+    """
+    finite = feasible & np.isfinite(guess)
+    x = np.where(finite, guess, 0.0)
+
+    fits = np.asarray(function(x)) <= budget
+
+    if integer:
+        above = np.asarray(function(x + 1)) > budget
+    else:
+        # The next representable value must not fit.
+        above = np.asarray(function(np.nextafter(x, np.inf))) > budget
+
+    checked = finite & fits & above
+
+    # An unbounded guess (zero slope) is right if a large value still fits.
+    unbounded = feasible & np.isinf(guess)
+    if unbounded.any():
+        checked |= unbounded & (np.asarray(function(LIMIT)) <= budget)
+
+    return checked
+
+# ******************************
+
+def _bisect(function, budget, mask, integer):
+    """
+    Solves problems by vectorised bisection: all problems are bracketed
+    and halved together, so each step is a single call of the function.
+
+    Parameters
+    ----------
+    @param function: the non-decreasing function.
+    @param budget: the budget array.
+    @param mask: True for the problems to solve (where x = 0 fits).
+    @param integer: True to find the largest whole number x.
+
+    Returns
+    ----------
+    @return an array of solutions (valid where mask is True).
+    """
+    low = np.zeros(budget.shape)
+    high = np.ones(budget.shape)
+
+    # Bracket: double the upper bound until it no longer fits.
+    fits = mask & (np.asarray(function(high)) <= budget)
+    while fits.any():
+        low = np.where(fits, high, low)
+        high = np.where(fits, high * 2, high)
+        fits &= high <= LIMIT
+        fits &= np.broadcast_to(np.asarray(function(high)) <= budget, fits.shape)
+
+    unbounded = mask & (high > LIMIT)
+
+    # Halve the bracket [low, high), where low fits and high does not.
+    for step in range(128):
+        active = mask & ~unbounded & ((high - low > 1) if integer else (high - low > 1e-12 * high))
+        if not active.any():
+            break
+
+        middle = np.floor((low + high) / 2) if integer else (low + high) / 2
+        fits = np.asarray(function(middle)) <= budget
+        low = np.where(active & fits, middle, low)
+        high = np.where(active & ~fits, middle, high)
+
+    return np.where(unbounded, np.inf, low)
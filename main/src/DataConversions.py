@@ -25,6 +25,82 @@
 **************************************************************************
 """
 
+import re
+from fractions import Fraction
+from functools import lru_cache
+
+import numpy as np
+
+# ******************************
+#
+# UNIT REGISTRY
+#
+# ******************************
+
+# The number of bits in one of each supported bit unit. SI prefixes
+# are powers of 10, IEC binary prefixes are powers of 2.
+BIT_UNITS = {
+    'bit': 1,
+    'kbit': pow(10, 3),
+    'Mbit': pow(10, 6),
+    'Gbit': pow(10, 9),
+    'Tbit': pow(10, 12),
+    'Pbit': pow(10, 15),
+    'Kibit': pow(2, 10),
+    'Mibit': pow(2, 20),
+    'Gibit': pow(2, 30),
+    'Tibit': pow(2, 40),
+    'Pibit': pow(2, 50)
+}
+
+# The number of bits in one of each supported byte unit.
+BYTE_UNITS = {
+    'B': 8,
+    'kB': 8 * pow(10, 3),
+    'MB': 8 * pow(10, 6),
+    'GB': 8 * pow(10, 9),
+    'TB': 8 * pow(10, 12),
+    'PB': 8 * pow(10, 15),
+    'KiB': 8 * pow(2, 10),
+    'MiB': 8 * pow(2, 20),
+    'GiB': 8 * pow(2, 30),
+    'TiB': 8 * pow(2, 40),
+    'PiB': 8 * pow(2, 50)
+}
+
+# Every supported unit, bit or byte.
+UNITS = dict(BIT_UNITS)
+UNITS.update(BYTE_UNITS)
+
+
+def _buildConversionTable():
+    """
+    Precomputes the conversion between every pair of supported units.
+    Each entry is a (factor, divide) tuple. Where one unit is an exact
+    multiple of the other the factor is an integer, and divide says
+    whether the value should be divided (rather than multiplied) by it.
+    This keeps conversions such as 1000 bit -> kbit exact. Mixed SI/IEC
+    pairs use a float ratio.
+
+    Returns
+    ----------
+    @return a dictionary keyed by (from unit, to unit) tuples.
+    """
+    table = {}
+    for src, src_bits in UNITS.items():
+        for dst, dst_bits in UNITS.items():
+            if src_bits % dst_bits == 0:
+                table[(src, dst)] = (src_bits // dst_bits, False)
+            elif dst_bits % src_bits == 0:
+                table[(src, dst)] = (dst_bits // src_bits, True)
+            else:
+                table[(src, dst)] = (float(src_bits) / dst_bits, False)
+    return table
+
+_CONVERSIONS = _buildConversionTable()
+
+# ******************************
+
 
 def bitsToBytes(bits):
     """
@@ -109,6 +185,9 @@ def isBitUnitValid(units):
     Tbit    - terabit, 10^12 bits.
     Pbit    - petabit, 10^15 bits.
 
+    The IEC binary units Kibit, Mibit, Gibit, Tibit and Pibit
+    (powers of 2^10) are also valid.
+
     Parameters
     ----------
     @param units: the desired format for the data.
@@ -128,24 +207,7 @@ def isBitUnitValid(units):
     >>> print isBitUnitValid('GB')
     >>> False
     """
-    if type(units) == str:
-
-        if units == 'bit':
-            return True
-        elif units == 'kbit':
-            return True
-        elif units == 'Mbit':
-            return True
-        elif units == 'Gbit':
-            return True
-        elif units == 'Tbit':
-            return True
-        elif units == 'Pbit':
-            return True
-        else:
-            return False
-    else:
-        return False
+    return type(units) == str and units in BIT_UNITS
 
 # ******************************
 
@@ -164,6 +226,9 @@ def isByteUnitValid(units):
     TP      - terabyte, 10^12 bytes (or 8 x 10^12 bits).
     PB      - petabyte, 10^15 bytes (or 8 x 10^15 bits).
 
+    The IEC binary units KiB, MiB, GiB, TiB and PiB (powers
+    of 2^10 bytes) are also valid.
+
     Parameters
     ----------
     @param units: the desired format for the data.
@@ -181,24 +246,7 @@ def isByteUnitValid(units):
     >>> print isByteUnitValid('MB')
     >>> True
     """
-    if type(units) == str:
-
-        if units == 'B':
-            return True
-        elif units == 'kB':
-            return True
-        elif units == 'MB':
-            return True
-        elif units == 'GB':
-            return True
-        elif units == 'TB':
-            return True
-        elif units == 'PB':
-            return True
-        else:
-            return False
-    else:
-        return False
+    return type(units) == str and units in BYTE_UNITS
 
 # ******************************
 
@@ -219,6 +267,9 @@ def convertFromBit(bits, units='None'):
     Tbit    - terabit, 10^12 bits.
     Pbit    - petabit, 10^15 bits.
 
+    The IEC binary units Kibit, Mibit, Gibit, Tibit and Pibit
+    are also supported.
+
     Conversion examples:
 
     -------------------------
@@ -259,28 +310,17 @@ def convertFromBit(bits, units='None'):
     >>> 1000000.0
     """
     if (type(bits) == int or type(bits) == float) and type(units) == str:
-        if isBitUnitValid(units):
-            if bits == 0:
-                return 0
-            elif bits < 0:
-                return None
-            elif bits > 0:
-                if units == 'bit':
-                    return bits
-                elif units == 'kbit':
-                    return float(bits) / pow(10, 3)
-                elif units == 'Mbit':
-                    return float(bits) / pow(10, 6)
-                elif units == 'Gbit':
-                    return float(bits) / pow(10, 9)
-                elif units == 'Tbit':
-                    return float(bits) / pow(10, 12)
-                elif str(units) == 'Pbit':
-                    return float(bits) / pow(10, 15)
-                else:
-                    return None
-        else:
+        scale = BIT_UNITS.get(units)
+        if scale is None:
+            return None
+        elif bits == 0:
+            return 0
+        elif bits < 0:
             return None
+        elif scale == 1:
+            return bits
+        else:
+            return float(bits) / scale
     else:
         return None
 
@@ -302,6 +342,9 @@ def convertToBit(nonbits, units='None'):
     Tbit    - terabit, 10^12 bits.
     Pbit    - petabit, 10^15 bits.
 
+    The IEC binary units Kibit, Mibit, Gibit, Tibit and Pibit
+    are also supported.
+
     to bits. For example, 1 Kbit would be converted to
     1000 bits.
 
@@ -345,28 +388,17 @@ def convertToBit(nonbits, units='None'):
     >>> 0.001
     """
     if (type(nonbits) == int or type(nonbits) == float) and type(units) == str:
-        if isBitUnitValid(units):
-            if nonbits == 0:
-                return 0
-            elif nonbits < 0:
-                return None
-            elif nonbits > 0:
-                if units == 'bit':
-                    return nonbits
-                elif units == 'kbit':
-                    return float(nonbits) * pow(10, 3)
-                elif units == 'Mbit':
-                    return float(nonbits) * pow(10, 6)
-                elif units == 'Gbit':
-                    return float(nonbits) * pow(10, 9)
-                elif units == 'Tbit':
-                    return float(nonbits) * pow(10, 12)
-                elif str(units) == 'Pbit':
-                    return float(nonbits) * pow(10, 15)
-                else:
-                    return None
-        else:
+        scale = BIT_UNITS.get(units)
+        if scale is None:
+            return None
+        elif nonbits == 0:
+            return 0
+        elif nonbits < 0:
             return None
+        elif scale == 1:
+            return nonbits
+        else:
+            return float(nonbits) * scale
     else:
         return None
 
@@ -389,6 +421,9 @@ def convertByteToBit(byte, units='None'):
     TB   - terabyte.
     PB   - petabyte.
 
+    The IEC binary units KiB, MiB, GiB, TiB and PiB are also
+    supported.
+
     Conversion examples:
 
     ------------------------------------------------------------
@@ -427,28 +462,15 @@ def convertByteToBit(byte, units='None'):
     >>> 8000.0
     """
     if (type(byte) == int or type(byte) == float) and type(units) == str:
-        if isByteUnitValid(units):
-            if byte == 0:
-                return 0
-            elif byte < 0:
-                return None
-            elif byte > 0:
-                if units == 'B':
-                    return float(byte) * 8
-                elif units == 'kB':
-                    return (float(byte) * 8) * pow(10, 3)
-                elif units == 'MB':
-                    return (float(byte) * 8) * pow(10, 6)
-                elif units == 'GB':
-                    return (float(byte) * 8) * pow(10, 9)
-                elif units == 'TB':
-                    return (float(byte) * 8) * pow(10, 12)
-                elif str(units) == 'PB':
-                    return (float(byte) * 8) * pow(10, 15)
-                else:
-                    return None
-        else:
+        scale = BYTE_UNITS.get(units)
+        if scale is None:
+            return None
+        elif byte == 0:
+            return 0
+        elif byte < 0:
             return None
+        else:
+            return float(byte) * scale
     else:
         return None
 
@@ -469,6 +491,9 @@ def convertBitToByte(bits, units='None'):
     TB   - terabyte.
     PB   - petabyte.
 
+    The IEC binary units KiB, MiB, GiB, TiB and PiB are also
+    supported.
+
     Conversion examples:
 
     ------------------------------------------------------------
@@ -507,29 +532,538 @@ def convertBitToByte(bits, units='None'):
     >>> 1.0
     """
     if (type(bits) == int or type(bits) == float) and type(units) == str:
-        if isByteUnitValid(units):
-            if bits == 0:
-                return 0
-            elif bits < 0:
-                return None
-            elif bits > 0:
-                if units == 'B':
-                    return float(bits) / 8
-                elif units == 'kB':
-                    return (float(bits) / 8) / pow(10, 3)
-                elif units == 'MB':
-                    return (float(bits) / 8) / pow(10, 6)
-                elif units == 'GB':
-                    return (float(bits) / 8) / pow(10, 9)
-                elif units == 'TB':
-                    return (float(bits) / 8) / pow(10, 12)
-                elif str(units) == 'PB':
-                    return (float(bits) / 8) / pow(10, 15)
-                else:
-                    return None
-        else:
+        scale = BYTE_UNITS.get(units)
+        if scale is None:
+            return None
+        elif bits == 0:
+            return 0
+        elif bits < 0:
             return None
+        else:
+            return float(bits) / scale
+    else:
+        return None
+
+# ******************************
+
+def isUnitValid(units):
+    """
+    Checks the validity of a user specified bit or byte unit,
+    in a single dictionary lookup. Both SI (kbit, MB, ...) and
+    IEC binary (Kibit, MiB, ...) units are valid.
+
+    Parameters
+    ----------
+    @param units: the unit to check.
+
+    Returns
+    ----------
+    True if the unit is valid, else False.
+
+    Examples
+    ----------
+    >>> print isUnitValid('MiB')
+    >>> True
+    >>> print isUnitValid('Kbit')
+    >>> False
+    """
+    return type(units) == str and units in UNITS
+
+# ******************************
+
+def convert(value, src='bit', dst='bit'):
+    """
+    Converts an int/float value between any two supported bit or
+    byte units, e.g. GB to Mbit, or MiB to kB. The conversion factor
+    for every unit pair is precomputed, so a conversion costs one
+    dictionary lookup and one multiplication (or division, where the
+    destination unit is an exact multiple of the source unit).
+
+    If the value is negative, or not an integer/float, None is
+    returned. If either unit is invalid, None is returned. Zero
+    stays zero.
+
+    Parameters
+    ----------
+    @param value: the integer/float value to be converted.
+    @param src: the current unit of the value.
+    @param dst: the desired unit of the value.
+
+    Returns
+    ----------
+    @return the converted value.
+
+    Examples
+    ----------
+    >>> print convert(2, 'GB', 'Mbit')
+    >>> 16000
+    >>> print convert(1, 'MiB', 'KiB')
+    >>> 1024
+    >>> print convert(1000, 'bit', 'kbit')
+    >>> 1.0
+    """
+    if type(value) != int and type(value) != float:
+        return None
+
+    try:
+        factor, divide = _CONVERSIONS[(src, dst)]
+    except (KeyError, TypeError):  # Invalid or unhashable units.
+        return None
+
+    if value == 0:
+        return 0
+    elif value < 0:
+        return None
+    elif divide:
+        return value / float(factor)
     else:
+        return value * factor
+
+# ******************************
+#
+# PARSING
+#
+# ******************************
+
+# Matches strings such as '2.1 GB', '1,000 bits' or '11.96 Mbit/s'. Thousands
+# separators must group the digits in threes.
+_QUANTITY_PATTERN = re.compile(
+    r'^\s*([-+]?(?:(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?)\s*([A-Za-z]+)\s*(/\s*s)?\s*$')
+
+# Unit spellings accepted by the parser in addition to the registry units.
+_UNIT_ALIASES = {'bits': 'bit'}
+
+# The number of distinct strings remembered by the parser.
+PARSE_CACHE_SIZE = 65536
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse(text):
+    """
+    Parses a data quantity or rate string. The result is cached per
+    input string, as the same literals recur across scenario files.
+
+    Parameters
+    ----------
+    @param text: the string to parse, e.g. '2.1 GB' or '11.96 Mbit/s'.
+
+    Returns
+    ----------
+    @return a tuple containing the exact number of bits (an int or
+            Fraction) and a flag that is True if the string is a rate,
+            else None if the string cannot be parsed.
+    """
+    match = _QUANTITY_PATTERN.match(text)
+
+    if match is None:
+        return None
+
+    number, units, per_second = match.groups()
+    units = _UNIT_ALIASES.get(units, units)
+
+    if units not in UNITS:
+        return None
+
+    try:
+        bits = Fraction(number.replace(',', '')) * UNITS[units]
+    except ValueError:
+        return None
+
+    if bits < 0:
+        return None
+    elif bits.denominator == 1:
+        bits = bits.numerator
+
+    return bits, per_second is not None
+
+# ******************************
+
+def _parseAs(text, rate, exact):
+    """
+    Parses a string that must be either a data quantity or a data rate.
+
+    Parameters
+    ----------
+    @param text: the string to parse.
+    @param rate: True if the string must be a rate, False if it must not.
+    @param exact: if True return an int/Fraction, else an int/float.
+
+    Returns
+    ----------
+    @return the number of bits (per second, for a rate), else None if
+            the string is invalid.
+    """
+    if type(text) != str:
+        return None
+
+    parsed = _parse(text)
+
+    if parsed is None or parsed[1] != rate:
         return None
+    elif exact or type(parsed[0]) == int:
+        return parsed[0]
+    else:
+        return float(parsed[0])
+
+# ******************************
+
+def parseBits(text, exact=False):
+    """
+    Parses a string describing a data quantity in any supported bit or
+    byte unit, and returns the number of bits it represents. Commas
+    may be used as thousands separators, and 'bits' is accepted for
+    'bit'. The decimal magnitude is converted exactly, so '2.1 GB' is
+    exactly 16800000000 bits. Results are cached per string.
+
+    Parameters
+    ----------
+    @param text: the string to parse, e.g. '2.1 GB'.
+    @param exact: if True return an int/Fraction rather than an int/float.
+
+    Returns
+    ----------
+    @return the number of bits, else None if the string is not a valid,
+            non-negative data quantity (rates are rejected).
+
+    Examples
+    ----------
+    >>> print parseBits('2.1 GB')
+    >>> 16800000000
+    >>> print parseBits('0.5 bit')
+    >>> 0.5
+    >>> print parseBits('2.1 GB/s')
+    >>> None
+    """
+    return _parseAs(text, False, exact)
 
+# ******************************
+
+def parseBitRate(text, exact=False):
+    """
+    Parses a string describing a data rate, i.e. a data quantity in any
+    supported bit or byte unit followed by '/s', and returns the number
+    of bits per second it represents. Results are cached per string.
+
+    Parameters
+    ----------
+    @param text: the string to parse, e.g. '11.96 Mbit/s'.
+    @param exact: if True return an int/Fraction rather than an int/float.
+
+    Returns
+    ----------
+    @return the number of bits per second, else None if the string is
+            not a valid, non-negative data rate.
+
+    Examples
+    ----------
+    >>> print parseBitRate('11.96 Mbit/s')
+    >>> 11960000
+    >>> print parseBitRate('11.96 Mbit')
+    >>> None
+    """
+    return _parseAs(text, True, exact)
+
+# ******************************
+
+def parseCacheInfo():
+    """
+    Gets the hit/miss statistics of the parser cache.
+
+    Returns
+    ----------
+    @return the cache statistics, as returned by functools.lru_cache.
+    """
+    return _parse.cache_info()
+
+# ******************************
+#
+# VECTORISED CONVERSIONS
+#
+# ******************************
+
+def _asNumericArray(values):
+    """
+    Converts the supplied values to a numpy array, provided they are
+    numeric (integer, unsigned integer or float). Scalars, lists,
+    tuples and numpy arrays (including numpy scalars) are accepted.
+
+    Parameters
+    ----------
+    @param values: the values to be converted.
+
+    Returns
+    ----------
+    @return a numpy array view of the values, else None if the values
+            are not numeric.
+    """
+    try:
+        array = np.asarray(values)
+    except (TypeError, ValueError):
+        return None
+
+    if array.dtype.kind in ('i', 'u', 'f'):
+        return array
+    else:
+        return None
+
+# ******************************
+
+def bitsToBytesArray(bits):
+    """
+    Vectorised version of bitsToBytes(). Converts an array of bits
+    to bytes in a single operation. As with the scalar version,
+    negative values are converted to zero bytes.
+
+    Parameters
+    ----------
+    @param bits: the int/float bit values to be converted (array like).
+
+    Returns
+    ----------
+    @return a float numpy array of bytes, else None if the bits
+            are not numeric.
+
+    Examples
+    ----------
+    >>> print bitsToBytesArray([1, 8, -1])
+    >>> [ 0.125  1.     0.   ]
+    """
+    array = _asNumericArray(bits)
+
+    if array is None:
+        return None
+
+    return np.where(array <= 0, 0.0, array / 8.0)
+
+# ******************************
+
+def bytesToBitsArray(byte):
+    """
+    Vectorised version of bytesToBits(). Converts an array of bytes
+    to bits in a single operation. As with the scalar version,
+    negative values are converted to zero bits.
+
+    Parameters
+    ----------
+    @param byte: the int/float byte values to be converted (array like).
+
+    Returns
+    ----------
+    @return a float numpy array of bits, else None if the bytes
+            are not numeric.
+
+    Examples
+    ----------
+    >>> print bytesToBitsArray([1, 2, -1])
+    >>> [  8.  16.   0.]
+    """
+    array = _asNumericArray(byte)
+
+    if array is None:
+        return None
+
+    return np.where(array <= 0, 0.0, array * 8.0)
+
+# ******************************
+
+def convertFromBitArray(bits, units='None'):
+    """
+    Vectorised version of convertFromBit(). Converts an array of
+    bit values to the desired bit unit in a single operation.
+    Negative values become NaN (the scalar version returns None),
+    zero stays zero.
+
+    Parameters
+    ----------
+    @param bits: the int/float bit values to be converted (array like).
+    @param units: the desired format for the data.
+
+    Returns
+    ----------
+    @return a float numpy array of converted values, else None if
+            the bits are not numeric or the unit is invalid.
+
+    Examples
+    ----------
+    >>> print convertFromBitArray([1000, 0, -1], 'kbit')
+    >>> [  1.   0.  nan]
+    """
+    array = _asNumericArray(bits)
+
+    if array is None or not isBitUnitValid(units):
+        return None
+
+    scale = BIT_UNITS[units]
+    return np.where(array < 0, np.nan, array / float(scale))
+
+# ******************************
+
+def convertToBitArray(nonbits, units='None'):
+    """
+    Vectorised version of convertToBit(). Converts an array of
+    values in the supplied bit unit, to bits in a single operation.
+    Negative values become NaN (the scalar version returns None),
+    zero stays zero.
+
+    Parameters
+    ----------
+    @param nonbits: the int/float values to be converted (array like).
+    @param units: the current format of the data.
+
+    Returns
+    ----------
+    @return a float numpy array of bits, else None if the values
+            are not numeric or the unit is invalid.
+
+    Examples
+    ----------
+    >>> print convertToBitArray([1, 0, -1], 'kbit')
+    >>> [ 1000.     0.   nan]
+    """
+    array = _asNumericArray(nonbits)
+
+    if array is None or not isBitUnitValid(units):
+        return None
+
+    scale = BIT_UNITS[units]
+    return np.where(array < 0, np.nan, array * float(scale))
+
+# ******************************
+
+def convertByteToBitArray(byte, units='None'):
+    """
+    Vectorised version of convertByteToBit(). Converts an array of
+    values in the supplied byte unit, to bits in a single operation.
+    Negative values become NaN (the scalar version returns None),
+    zero stays zero.
+
+    Parameters
+    ----------
+    @param byte: the int/float values to be converted (array like).
+    @param units: the current format of the data.
+
+    Returns
+    ----------
+    @return a float numpy array of bits, else None if the values
+            are not numeric or the unit is invalid.
+
+    Examples
+    ----------
+    >>> print convertByteToBitArray([1, 0, -1], 'kB')
+    >>> [ 8000.     0.   nan]
+    """
+    array = _asNumericArray(byte)
+
+    if array is None or not isByteUnitValid(units):
+        return None
+
+    scale = BYTE_UNITS[units]
+    return np.where(array < 0, np.nan, array * float(scale))
+
+# ******************************
+
+def convertBitToByteArray(bits, units='None'):
+    """
+    Vectorised version of convertBitToByte(). Converts an array of
+    bit values to the desired byte unit in a single operation.
+    Negative values become NaN (the scalar version returns None),
+    zero stays zero.
+
+    Parameters
+    ----------
+    @param bits: the int/float bit values to be converted (array like).
+    @param units: the desired format for the data.
+
+    Returns
+    ----------
+    @return a float numpy array of converted values, else None if
+            the bits are not numeric or the unit is invalid.
+
+    Examples
+    ----------
+    >>> print convertBitToByteArray([8000, 0, -1], 'kB')
+    >>> [  1.   0.  nan]
+    """
+    array = _asNumericArray(bits)
+
+    if array is None or not isByteUnitValid(units):
+        return None
+
+    scale = BYTE_UNITS[units]
+    return np.where(array < 0, np.nan, array / float(scale))
+
+# ******************************
+
+def convertArray(values, src='bit', dst='bit'):
+    """
+    Vectorised version of convert(). Converts an array of values
+    between any two supported bit or byte units in a single operation.
+    Negative values become NaN, zero stays zero.
+
+    Parameters
+    ----------
+    @param values: the int/float values to be converted (array like).
+    @param src: the current unit of the values.
+    @param dst: the desired unit of the values.
+
+    Returns
+    ----------
+    @return a float numpy array of converted values, else None if
+            the values are not numeric or a unit is invalid.
+
+    Examples
+    ----------
+    >>> print convertArray([1, 0, -1], 'GB', 'Mbit')
+    >>> [ 8000.     0.   nan]
+    """
+    array = _asNumericArray(values)
+
+    if array is None or not isUnitValid(src) or not isUnitValid(dst):
+        return None
+
+    factor, divide = _CONVERSIONS[(src, dst)]
+    if divide:
+        converted = array / float(factor)
+    else:
+        converted = array * float(factor)
+
+    return np.where(array < 0, np.nan, converted)
+
+# ******************************
+
+def parseBitsArray(texts, rate=False):
+    """
+    Vectorised version of parseBits()/parseBitRate(). Parses a whole
+    column of strings into a numpy array of bits in a single pass.
+    Repeated strings are parsed once.
+
+    Parameters
+    ----------
+    @param texts: the strings to parse (array like).
+    @param rate: if True the strings must be rates ('11.96 Mbit/s'),
+                 else data quantities ('2.1 GB').
+
+    Returns
+    ----------
+    @return a float numpy array with the number of bits (per second)
+            for each string, NaN where a string is invalid.
+
+    Examples
+    ----------
+    >>> print parseBitsArray(['1 kbit', '2.1 GB', 'x'])
+    >>> [  1.00000000e+03   1.68000000e+10              nan]
+    """
+    texts = np.asarray(texts, dtype=object)
+    parsed = {}
+
+    def lookup(text):
+        value = parsed.get(text)
+        if value is None:
+            value = _parseAs(text, rate, False) if type(text) == str else None
+            value = np.nan if value is None else float(value)
+            parsed[text] = value
+        return value
+
+    bits = np.fromiter((lookup(text) for text in texts.flat), dtype=np.float64, count=texts.size)
+    return bits.reshape(texts.shape)
 
@@ -0,0 +1,308 @@
+"""
+**************************************************************************
+
+ DataFormatter.py
+
+**************************************************************************
+ Description:
+
+ Formats data quantities and rates for reports, automatically choosing
+ the most readable SI (kB, MB, ...) or IEC (KiB, MiB, ...) unit for each
+ value. Includes a bulk formatter that formats whole numpy arrays of
+ bits in a single vectorised pass.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+from bisect import bisect_right
+from fractions import Fraction
+from functools import lru_cache
+
+import numpy as np
+
+from main.src.DataConversions import BIT_UNITS, BYTE_UNITS
+
+# The units that may be chosen, smallest first, for each unit system
+# ('SI' or 'IEC') and whether bit or byte units are wanted.
+SCALES = {
+    ('SI', False): ('bit', 'kbit', 'Mbit', 'Gbit', 'Tbit', 'Pbit'),
+    ('SI', True): ('B', 'kB', 'MB', 'GB', 'TB', 'PB'),
+    ('IEC', False): ('bit', 'Kibit', 'Mibit', 'Gibit', 'Tibit', 'Pibit'),
+    ('IEC', True): ('B', 'KiB', 'MiB', 'GiB', 'TiB', 'PiB'),
+}
+
+# Numbers below this are formatted by table lookup in the bulk formatter.
+_TABLE_SIZE = 10000
+
+# Scaled values at or above this do not fit in an int64.
+_INT64_LIMIT = float(pow(2, 63))
+
+
+@lru_cache(maxsize=None)
+def _scale(system, byteUnits, precision):
+    """
+    Gets the units, their sizes in bits, and the thresholds (in bits)
+    at which each unit is chosen. A threshold sits just below the unit
+    size, at the point where the value in the next smaller unit would
+    round up to a whole step (e.g. 999.999 kB is shown as 1.00 MB
+    rather than 1000.00 kB at two decimal places).
+
+    Parameters
+    ----------
+    @param system: 'SI' or 'IEC'.
+    @param byteUnits: True for byte units, False for bit units.
+    @param precision: the number of decimal places.
+
+    Returns
+    ----------
+    @return a tuple containing the unit names, the unit sizes and the
+            thresholds, else None if the unit system is invalid.
+    """
+    units = SCALES.get((system, bool(byteUnits)))
+
+    if units is None:
+        return None
+
+    sizes = [BYTE_UNITS[unit] if byteUnits else BIT_UNITS[unit] for unit in units]
+    half_step = 0.5 * pow(10.0, -precision)
+    thresholds = [0.0] + [sizes[i] - sizes[i - 1] * half_step for i in range(1, len(sizes))]
+
+    return units, sizes, thresholds
+
+# ******************************
+
+def _isPrecisionValid(precision):
+    """
+    Checks whether a number of decimal places is valid.
+
+    Parameters
+    ----------
+    @param precision: the number of decimal places.
+
+    Returns
+    ----------
+    True if the precision is an int from 0 to 15, else False.
+    """
+    return type(precision) == int and 0 <= precision <= 15
+
+# ******************************
+
+def bestUnit(bits, system='SI', byteUnits=False, precision=2):
+    """
+    Finds the most readable unit for a number of bits, i.e. the largest
+    unit in which the value is at least 1, via a threshold lookup.
+
+    Parameters
+    ----------
+    @param bits: the int/float number of bits.
+    @param system: 'SI' (powers of 1000) or 'IEC' (powers of 1024).
+    @param byteUnits: True to choose a byte unit, False for a bit unit.
+    @param precision: the number of decimal places the value will be shown to.
+
+    Returns
+    ----------
+    @return the name of the unit, else None if the bits, unit system or
+            precision are invalid.
+
+    Examples
+    ----------
+    >>> print bestUnit(16800000000, byteUnits=True)
+    >>> GB
+    """
+    if type(bits) != int and type(bits) != float or not _isPrecisionValid(precision):
+        return None
+
+    scale = _scale(system, byteUnits, precision)
+
+    if scale is None or not bits >= 0:
+        return None
+
+    units, sizes, thresholds = scale
+    return units[max(bisect_right(thresholds, bits) - 1, 0)]
+
+# ******************************
+
+def formatBits(bits, precision=2, system='SI', byteUnits=False, rate=False):
+    """
+    Formats a number of bits (or bits per second) in the most readable
+    unit, to a fixed number of decimal places.
+
+    Parameters
+    ----------
+    @param bits: the int/float/Fraction number of bits.
+    @param precision: the number of decimal places.
+    @param system: 'SI' (powers of 1000) or 'IEC' (powers of 1024).
+    @param byteUnits: True to use byte units, False for bit units.
+    @param rate: True if the bits are per second, adding a '/s' suffix.
+
+    Returns
+    ----------
+    @return the formatted string, else None if the bits are negative or
+            not a finite number, or the unit system or precision are invalid.
+
+    Examples
+    ----------
+    >>> print formatBits(16800000000, byteUnits=True)
+    >>> 2.10 GB
+    >>> print formatBits(11960000, precision=1, rate=True)
+    >>> 12.0 Mbit/s
+    >>> print formatBits(pow(2, 30), system='IEC', byteUnits=True)
+    >>> 128.00 MiB
+    """
+    if type(bits) == int or type(bits) == Fraction:
+        bits = float(bits)
+    elif type(bits) != float:
+        return None
+
+    if not _isPrecisionValid(precision):
+        return None
+
+    scale = _scale(system, byteUnits, precision)
+
+    if scale is None or not 0 <= bits < float('inf'):
+        return None
+
+    units, sizes, thresholds = scale
+    index = max(bisect_right(thresholds, bits) - 1, 0)
+
+    # Round in the same way as formatBitsArray(), so both give identical strings.
+    step = pow(10, precision)
+    rounded = int(round(bits / sizes[index] * step))
+    whole, fraction = divmod(rounded, step)
+
+    text = str(whole) + ('.%0*d' % (precision, fraction) if precision else '')
+    return text + ' ' + units[index] + ('/s' if rate else '')
+
+# ******************************
+
+@lru_cache(maxsize=None)
+def _digitTable(width, prefix):
+    """
+    Gets a lookup table of the strings for 0 to 9999, zero padded to a
+    width and with a prefix, e.g. ('.05', '.06', ...).
+
+    Parameters
+    ----------
+    @param width: the zero padded width.
+    @param prefix: the prefix string.
+
+    Returns
+    ----------
+    @return a numpy string array.
+    """
+    return np.array([prefix + '%0*d' % (width, i) for i in range(_TABLE_SIZE)])
+
+# ******************************
+
+def _digitStrings(values, width=0, prefix=''):
+    """
+    Converts an array of non-negative ints to strings, using table
+    lookup when every value is small enough (the fast path).
+
+    Parameters
+    ----------
+    @param values: the int64 numpy array.
+    @param width: the zero padded width.
+    @param prefix: a prefix for every string.
+
+    Returns
+    ----------
+    @return a numpy string array.
+    """
+    if values.size == 0 or values.max() < _TABLE_SIZE:
+        return _digitTable(width, prefix)[values]
+
+    strings = values.astype(str)
+    if width:
+        strings = np.char.zfill(strings, width)
+    return np.char.add(prefix, strings) if prefix else strings
+
+# ******************************
+
+def formatBitsArray(bits, precision=2, system='SI', byteUnits=False, rate=False):
+    """
+    Vectorised version of formatBits(). Formats a whole array of bits,
+    choosing the most readable unit for each value, in a single pass.
+    The strings are identical to those produced by formatBits().
+
+    Parameters
+    ----------
+    @param bits: the int/float numbers of bits (array like).
+    @param precision: the number of decimal places.
+    @param system: 'SI' (powers of 1000) or 'IEC' (powers of 1024).
+    @param byteUnits: True to use byte units, False for bit units.
+    @param rate: True if the bits are per second, adding a '/s' suffix.
+
+    Returns
+    ----------
+    @return a numpy string array with the same shape as bits, containing
+            '' where a value is negative or not a finite number, else None
+            if the bits are not numeric, or the unit system or precision
+            are invalid.
+
+    Examples
+    ----------
+    >>> print formatBitsArray([1000, 16800000000, -1], byteUnits=True)
+    >>> ['125.00 B' '2.10 GB' '']
+    """
+    try:
+        array = np.asarray(bits)
+    except ValueError:
+        return None
+
+    if array.dtype.kind not in ('i', 'u', 'f') or not _isPrecisionValid(precision):
+        return None
+
+    scale = _scale(system, byteUnits, precision)
+
+    if scale is None:
+        return None
+
+    units, sizes, thresholds = scale
+    shape = array.shape
+    array = array.astype(np.float64).ravel()
+
+    valid = np.isfinite(array) & (array >= 0)
+    array = np.where(valid, array, 0.0)
+
+    index = np.searchsorted(np.array(thresholds), array, side='right') - 1
+    np.maximum(index, 0, out=index)
+
+    step = pow(10, precision)
+    scaled = np.rint(array / np.array(sizes, dtype=np.float64)[index] * step)
+
+    # Values too large for int64 (beyond ~10^18 of the largest unit) are
+    # formatted one at a time with Python ints.
+    huge = scaled >= _INT64_LIMIT
+    scaled[huge] = 0
+    whole, fraction = np.divmod(scaled.astype(np.int64), step)
+
+    text = _digitStrings(whole)
+    if precision:
+        text = np.char.add(text, _digitStrings(fraction, precision, '.'))
+
+    suffix = np.array([' ' + unit + ('/s' if rate else '') for unit in units])
+    text = np.char.add(text, suffix[index])
+
+    if huge.any():
+        text = text.astype(object)
+        for i in np.flatnonzero(huge).tolist():
+            text[i] = formatBits(float(array[i]), precision, system, byteUnits, rate)
+        text = text.astype(str)
+
+    text[~valid] = ''
+    return text.reshape(shape)
@@ -25,7 +25,12 @@
 **************************************************************************
 """
 
-from DataConversions import *
+from datetime import timedelta
+from fractions import Fraction
+
+from main.src.DataConversions import *
+from main.src.DataFormatter import formatBits
+from main.src.ExactArithmetic import exactConvert, exactDivide, toExact
 
 
 # ******************************
@@ -39,15 +44,29 @@ class DataQuantity(object):
     """
     The data quantity object. Represents a quantity
     of information in bits.
+
+    By default bits are stored as whatever int/float was supplied.
+    In exact mode (exact=True) bits are always stored as a Python int,
+    or a Fraction after an inexact division, so arithmetic on very
+    large quantities (beyond 2^53 bits) does not lose precision. Any
+    arithmetic involving an exact quantity produces an exact quantity.
+    Exact mode is opt-in: default mode quantities stay ints/floats
+    however large they become.
+
+    Data quantities are immutable values: they use __slots__ rather
+    than a __dict__, can be hashed, compared and sorted, and arithmetic
+    always returns a new object.
     """
 
+    __slots__ = ('_bits', '_exact')
+
     # ******************************
     #
     # Constructor.
     #
     # ******************************
 
-    def __init__(self, bits=0):
+    def __init__(self, bits=0, exact=False):
         """
         Default constructor for the base class.
 
@@ -55,21 +74,141 @@ class DataQuantity(object):
         ----------
         @param bits: the number of bits being represented
                      by the data quantity.
+        @param exact: if True, store the bits exactly as an
+                      int or Fraction (see toExact()).
 
         Examples
         --------
         >>> dq = DataQuantity(1)
         >>> print dq
         >>> 1 bit
+        >>> dq = DataQuantity(2.5, exact=True)
+        >>> print dq
+        >>> 5/2 bits
         """
 
-        if type(bits) == int or type(bits) == float:
+        self._exact = exact
+
+        if exact:
+            if type(bits) == int or type(bits) == float or type(bits) == Fraction:
+                bits = toExact(bits)
+            else:
+                bits = None
+
+            if bits is None or bits <= 0:
+                self._bits = 0
+            else:
+                self._bits = bits
+        elif type(bits) == int or type(bits) == float:
             if bits <= 0:
-                self.bits = 0
+                self._bits = 0
             else:
-                self.bits = bits
+                self._bits = bits
+        else:
+            self._bits = 0
+
+    # ******************************
+
+    @staticmethod
+    def _trusted(bits, exact=False):
+        """
+        Internal constructor that skips validation. Only for use where
+        the bits are already known to be valid, i.e. a non-negative
+        int/float (or int/Fraction in exact mode), as is the case for
+        the results of arithmetic on data quantities.
+
+        Parameters
+        ----------
+        @param bits: the valid number of bits.
+        @param exact: True if the bits are exact (int/Fraction).
+
+        Returns
+        ----------
+        @return a new data quantity.
+        """
+        dq = _new(DataQuantity)
+        dq._bits = bits
+        dq._exact = exact
+        return dq
+
+    # ******************************
+
+    @property
+    def bits(self):
+        """
+        The number of bits represented (read only).
+        """
+        return self._bits
+
+    # ******************************
+
+    @property
+    def exact(self):
+        """
+        True if this is an exact mode data quantity (read only).
+        """
+        return self._exact
+
+    # ******************************
+
+    @staticmethod
+    def parse(text, exact=False):
+        """
+        Creates a data quantity from a string such as '2.1 GB' or
+        '1,000 bits'. Any bit or byte unit in the unit registry may be
+        used. Parsing is cached per string (see parseBits()).
+
+        Parameters
+        ----------
+        @param text: the string to parse.
+        @param exact: if True create an exact mode data quantity.
+
+        Returns
+        ----------
+        @return a data quantity, else None if the string is invalid.
+
+        Examples
+        --------
+        >>> print DataQuantity.parse('2.1 GB')
+        >>> 16800000000 bits
+        """
+        bits = parseBits(text, exact)
+
+        if bits is None:
+            return None
+        else:
+            return DataQuantity(bits, exact)
+
+    # ******************************
+
+    @staticmethod
+    def parseRate(text, exact=False):
+        """
+        Creates a data quantity from a rate string such as
+        '11.96 Mbit/s'. The data quantity represents the number
+        of bits transferred per second.
+
+        Parameters
+        ----------
+        @param text: the string to parse.
+        @param exact: if True create an exact mode data quantity.
+
+        Returns
+        ----------
+        @return a data quantity holding the bits per second, else None
+                if the string is not a valid rate.
+
+        Examples
+        --------
+        >>> print DataQuantity.parseRate('11.96 Mbit/s')
+        >>> 11960000 bits
+        """
+        bits = parseBitRate(text, exact)
+
+        if bits is None:
+            return None
         else:
-            self.bits = 0
+            return DataQuantity(bits, exact)
 
     # ******************************
 
@@ -89,19 +228,99 @@ class DataQuantity(object):
         >>> 1 bit
         """
 
-        if self.bits <= 0:
+        if self._bits <= 0:
             return '0 bits'
-        elif self.bits == 1:
+        elif self._bits == 1:
             return '1 bit'
         else:
-            return str(self.bits) + ' bits'
+            return str(self._bits) + ' bits'
+
+    # ******************************
+
+    def __repr__(self):
+        """
+        Overridden representation method.
+
+        Returns
+        ----------
+        @return a string that recreates this object when evaluated.
+        """
+        if self._exact:
+            return 'DataQuantity(' + repr(self._bits) + ', exact=True)'
+        else:
+            return 'DataQuantity(' + repr(self._bits) + ')'
+
+    # ******************************
+
+    def __hash__(self):
+        """
+        Hashes the data quantity by its number of bits, so equal
+        quantities (e.g. 1 and 1.0 bits) have equal hashes.
+
+        Returns
+        ----------
+        @return the hash value.
+        """
+        return hash(self._bits)
+
+    # ******************************
+
+    def __eq__(self, otherdq):
+        """
+        Data quantities are equal if they represent the same number of
+        bits. Comparisons with other types are not supported.
+
+        Parameters
+        ----------
+        @param otherdq: the data quantity to compare with.
+
+        Returns
+        ----------
+        @return True if the quantities are equal, else False.
+        """
+        if type(otherdq) is DataQuantity:
+            return self._bits == otherdq._bits
+        else:
+            return NotImplemented
+
+    def __ne__(self, otherdq):
+        if type(otherdq) is DataQuantity:
+            return self._bits != otherdq._bits
+        else:
+            return NotImplemented
+
+    def __lt__(self, otherdq):
+        if type(otherdq) is DataQuantity:
+            return self._bits < otherdq._bits
+        else:
+            return NotImplemented
+
+    def __le__(self, otherdq):
+        if type(otherdq) is DataQuantity:
+            return self._bits <= otherdq._bits
+        else:
+            return NotImplemented
+
+    def __gt__(self, otherdq):
+        if type(otherdq) is DataQuantity:
+            return self._bits > otherdq._bits
+        else:
+            return NotImplemented
+
+    def __ge__(self, otherdq):
+        if type(otherdq) is DataQuantity:
+            return self._bits >= otherdq._bits
+        else:
+            return NotImplemented
 
     # ******************************
 
     def get(self, units='bits'):
         """
         Gets a textual description of the data quantity,
-        according to the user specified units.
+        according to the user specified units. Any bit or
+        byte unit in the unit registry may be used, including
+        the IEC binary units (KiB, Mibit, ...).
 
         Parameters
         ----------
@@ -120,40 +339,17 @@ class DataQuantity(object):
         >>> print dq.get('kbit')
         >>> 0.1 kbit
         """
-        if type(units) == str:
-            if isByteUnitValid(units):
-                if units == 'B':
-                    return str(convertBitToByte(self.bits, 'B')) + ' B'
-                elif units == 'kB':
-                    return str(convertBitToByte(self.bits, 'kB')) + ' kB'
-                elif units == 'MB':
-                    return str(convertBitToByte(self.bits, 'MB')) + ' MB'
-                elif units == 'GB':
-                    return str(convertBitToByte(self.bits, 'GB')) + ' GB'
-                elif units == 'TB':
-                    return str(convertBitToByte(self.bits, 'TB')) + ' TB'
-                elif units == 'PB':
-                    return str(convertBitToByte(self.bits, 'PB')) + ' PB'
-                else:
-                    return str(self.bits) + " bits"
-
-            elif isBitUnitValid(units):
-                if units == 'bit':
-                    return str(convertFromBit(self.bits, 'bit')) + ' bit'
-                elif units == 'kbit':
-                    return str(convertFromBit(self.bits, 'kbit')) + ' kbit'
-                elif units == 'Mbit':
-                    return str(convertFromBit(self.bits, 'Mbit')) + ' Mbit'
-                elif units == 'Gbit':
-                    return str(convertFromBit(self.bits, 'Gbit')) + ' Gbit'
-                elif units == 'Tbit':
-                    return str(convertFromBit(self.bits, 'Tbit')) + ' Tbit'
-                elif units == 'Pbit':
-                    return str(convertFromBit(self.bits, 'Pbit')) + ' Pbit'
-                else:
-                    return str(self.bits) + " bits"
+        if self._exact:
+            value = exactConvert(self._bits, 'bit', units)
+            if type(value) == Fraction:
+                value = float(value)
         else:
-            return str(self.bits) + " bits"
+            value = convert(self._bits, 'bit', units)
+
+        if value is None:
+            return str(self._bits) + " bits"
+        else:
+            return str(value) + ' ' + units
 
     # ******************************
 
@@ -185,40 +381,79 @@ class DataQuantity(object):
         if seconds <= 0:
             return 'Number of seconds invalid.'
 
-        if type(units) == str:
-            if isByteUnitValid(units):
-                if units == 'B':
-                    return str(convertBitToByte(self.bits, 'B') / float(seconds)) + ' B/s'
-                elif units == 'kB':
-                    return str(convertBitToByte(self.bits, 'kB') / float(seconds)) + ' kB/s'
-                elif units == 'MB':
-                    return str(convertBitToByte(self.bits, 'MB') / float(seconds)) + ' MB/s'
-                elif units == 'GB':
-                    return str(convertBitToByte(self.bits, 'GB') / float(seconds)) + ' GB/s'
-                elif units == 'TB':
-                    return str(convertBitToByte(self.bits, 'TB') / float(seconds)) + ' TB/s'
-                elif units == 'PB':
-                    return str(convertBitToByte(self.bits, 'PB') / float(seconds)) + ' PB/s'
-                else:
-                    return str(self.bits) + " bits"
-
-            elif isBitUnitValid(units):
-                if units == 'bit':
-                    return str(convertFromBit(self.bits, 'bit') / float(seconds)) + ' bit/s'
-                elif units == 'kbit':
-                    return str(convertFromBit(self.bits, 'kbit') / float(seconds)) + ' kbit/s'
-                elif units == 'Mbit':
-                    return str(convertFromBit(self.bits, 'Mbit') / float(seconds)) + ' Mbit/s'
-                elif units == 'Gbit':
-                    return str(convertFromBit(self.bits, 'Gbit') / float(seconds)) + ' Gbit/s'
-                elif units == 'Tbit':
-                    return str(convertFromBit(self.bits, 'Tbit') / float(seconds)) + ' Tbit/s'
-                elif units == 'Pbit':
-                    return str(convertFromBit(self.bits, 'Pbit') / float(seconds)) + ' Pbit/s'
-                else:
-                    return str(self.bits) + " bits"
+        if self._exact:
+            value = exactConvert(self._bits, 'bit', units)
+            if value is not None:
+                value = float(exactDivide(value, toExact(seconds)))
+        else:
+            value = convert(self._bits, 'bit', units)
+            if value is not None:
+                value = value / float(seconds)
+
+        if value is None:
+            return str(self._bits) + " bits"
+        else:
+            return str(value) + ' ' + units + '/s'
+
+    # ******************************
+
+    def format(self, precision=2, system='SI', byteUnits=False):
+        """
+        Gets a textual description of the data quantity in the most
+        readable unit, chosen automatically.
+
+        Parameters
+        ----------
+        @param precision: the number of decimal places.
+        @param system: 'SI' (kbit, Mbit, ...) or 'IEC' (Kibit, Mibit, ...).
+        @param byteUnits: True to describe the data in bytes.
+
+        Returns
+        ----------
+        @return the description, else None if the unit system or
+                precision are invalid.
+
+        Examples
+        --------
+        >>> dq = DataQuantity(16800000000)
+        >>> print dq.format(byteUnits=True)
+        >>> 2.10 GB
+        """
+        return formatBits(self._bits, precision, system, byteUnits)
+
+    # ******************************
+
+    def toRate(self, seconds=1.0):
+        """
+        Gets the numeric data rate at which this quantity is produced
+        over the given time. Unlike getRate(), no string is built.
+
+        Parameters
+        ----------
+        @param seconds: the time over which the data is produced, as a
+                        number of seconds or a timedelta.
+
+        Returns
+        ----------
+        @return a DataRate, else None if the time is invalid or not positive.
+
+        Examples
+        --------
+        >>> dq = DataQuantity(1000)
+        >>> print dq.toRate(2)
+        >>> 500.0 bits/s
+        >>> print dq / timedelta(seconds=2)
+        >>> 500.0 bits/s
+        """
+        if type(seconds) is timedelta:
+            seconds = seconds.total_seconds()
+        elif type(seconds) is not int and type(seconds) is not float:
+            return None
+
+        if seconds > 0:
+            return _rates.DataRate(float(self._bits) / seconds)
         else:
-            return str(self.bits) + " bits"
+            return None
 
     # ******************************
 
@@ -242,14 +477,20 @@ class DataQuantity(object):
         >>> print dq1 + dq2
         >>> 2 bits
         """
-        if type(otherdq) == DataQuantity:
-            bit_sum = self.bits + otherdq.bits
-            return DataQuantity(bit_sum)
-        elif type(otherdq) == int or type(otherdq) == float:
-            bit_sum = self.bits + otherdq
-            return DataQuantity(bit_sum)
+        if self._exact or (type(otherdq) is DataQuantity and otherdq._exact):
+            operands = self._exactOperands(otherdq)
+            if operands is None:
+                return self._unsupported(otherdq)
+            return _exactResult(operands[0] + operands[1])
+
+        if type(otherdq) is DataQuantity:
+            bit_sum = self._bits + otherdq._bits
+        elif type(otherdq) is int or type(otherdq) is float:
+            bit_sum = self._bits + otherdq
         else:
-            return self
+            return self._unsupported(otherdq)
+
+        return _trusted(0 if bit_sum <= 0 else bit_sum, False)
 
     __radd__ = __add__
 
@@ -271,19 +512,37 @@ class DataQuantity(object):
         Examples
         --------
         >>> dq1 = DataQuantity(1)
-        >>> print 1 - dq1
+        >>> print dq1 - 1
         >>> 0 bits
         """
-        if type(otherdq) == DataQuantity:
-            bit_sub = self.bits - otherdq.bits
-            return DataQuantity(bit_sub)
-        elif type(otherdq) == int or type(otherdq) == float:
-            bit_sub = self.bits - otherdq
-            return DataQuantity(bit_sub)
+        if self._exact or (type(otherdq) is DataQuantity and otherdq._exact):
+            operands = self._exactOperands(otherdq)
+            if operands is None:
+                return self._unsupported(otherdq)
+            return _exactResult(operands[0] - operands[1])
+
+        if type(otherdq) is DataQuantity:
+            bit_sub = self._bits - otherdq._bits
+        elif type(otherdq) is int or type(otherdq) is float:
+            bit_sub = self._bits - otherdq
         else:
-            return self
+            return self._unsupported(otherdq)
+
+        return _trusted(0 if bit_sub <= 0 else bit_sub, False)
+
+    # ******************************
 
-    __rsub__ = __sub__
+    def __rsub__(self, otherdq):
+        """
+        Subtracts this object from a number. A number minus a data
+        quantity is not a data quantity, so this is not supported, and
+        Python raises a TypeError.
+
+        Returns
+        ----------
+        @return NotImplemented.
+        """
+        return NotImplemented
 
     # ******************************
 
@@ -307,14 +566,20 @@ class DataQuantity(object):
         >>> print dq1 * dq2
         >>> 4 bits
         """
-        if type(otherdq) == DataQuantity:
-            bit_mul = self.bits * otherdq.bits
-            return DataQuantity(bit_mul)
-        elif type(otherdq) == int or type(otherdq) == float:
-            bit_mul = self.bits * otherdq
-            return DataQuantity(bit_mul)
+        if self._exact or (type(otherdq) is DataQuantity and otherdq._exact):
+            operands = self._exactOperands(otherdq)
+            if operands is None:
+                return self._unsupported(otherdq)
+            return _exactResult(operands[0] * operands[1])
+
+        if type(otherdq) is DataQuantity:
+            bit_mul = self._bits * otherdq._bits
+        elif type(otherdq) is int or type(otherdq) is float:
+            bit_mul = self._bits * otherdq
         else:
-            return self
+            return self._unsupported(otherdq)
+
+        return _trusted(0 if bit_mul <= 0 else bit_mul, False)
 
     __rmul__ = __mul__
 
@@ -331,7 +596,8 @@ class DataQuantity(object):
         Returns
         ----------
         @return a data quantity representing the division of this object
-                and the otherdq object.
+                and the otherdq object. Dividing by a timedelta gives the
+                DataRate at which this quantity is produced over that time.
 
         Examples
         --------
@@ -340,20 +606,27 @@ class DataQuantity(object):
         >>> print dq1 / dq2
         >>> 2.5 bits
         """
-        if type(otherdq) == DataQuantity:
-            if otherdq.bits > 0:
-                bit_mul = float(self.bits) / float(otherdq.bits)
-                return DataQuantity(bit_mul)
-            else:
-                return None
-        elif type(otherdq) == int or type(otherdq) == float:
-            if otherdq > 0:
-                bit_mul = float(self.bits) / float(otherdq)
-                return DataQuantity(bit_mul)
+        if self._exact or (type(otherdq) is DataQuantity and otherdq._exact):
+            operands = self._exactOperands(otherdq)
+            if operands is None:
+                return self._divideOther(otherdq)
+            elif operands[1] > 0:
+                return _exactResult(exactDivide(operands[0], operands[1]))
             else:
                 return None
+
+        if type(otherdq) is DataQuantity:
+            divisor = otherdq._bits
+        elif type(otherdq) is int or type(otherdq) is float:
+            divisor = otherdq
         else:
-            return self
+            return self._divideOther(otherdq)
+
+        if divisor > 0:
+            bit_mul = float(self._bits) / float(divisor)
+            return _trusted(0 if bit_mul <= 0 else bit_mul, False)
+        else:
+            return None
 
     def __floordiv__(self, otherdq):
         """
@@ -376,19 +649,142 @@ class DataQuantity(object):
         >>> print dq1 // dq2
         >>> 2.0 bits
         """
-        if type(otherdq) == DataQuantity:
-            bit_mul = self.bits // otherdq.bits
-            return DataQuantity(bit_mul)
-        elif type(otherdq) == int or type(otherdq) == float:
-            bit_mul = self.bits // otherdq
-            return DataQuantity(bit_mul)
+        if self._exact or (type(otherdq) is DataQuantity and otherdq._exact):
+            operands = self._exactOperands(otherdq)
+            if operands is None:
+                return self._unsupported(otherdq)
+            return _exactResult(operands[0] // operands[1])
+
+        if type(otherdq) is DataQuantity:
+            bit_mul = self._bits // otherdq._bits
+        elif type(otherdq) is int or type(otherdq) is float:
+            bit_mul = self._bits // otherdq
+        else:
+            return self._unsupported(otherdq)
+
+        return _trusted(0 if bit_mul <= 0 else bit_mul, False)
+
+    # ******************************
+
+    def __rdiv__(self, otherdq):
+        """
+        Divides a number by this object. A number divided by a data
+        quantity is not a data quantity, so this is not supported, and
+        Python raises a TypeError.
+
+        Returns
+        ----------
+        @return NotImplemented.
+        """
+        return NotImplemented
+
+    __rfloordiv__ = __rdiv__
+    __truediv__ = __div__
+    __rtruediv__ = __rdiv__
+
+    # ******************************
+
+    def _divideOther(self, otherdq):
+        """
+        Divides this object by an operand that is not a number or data
+        quantity. Dividing by a timedelta gives a DataRate.
+
+        Parameters
+        ----------
+        @param otherdq: the operand to divide by.
+
+        Returns
+        ----------
+        @return a DataRate if otherdq is a timedelta, else the result of
+                arithmetic with an unsupported type.
+        """
+        if type(otherdq) is timedelta:
+            return self.toRate(otherdq)
+        else:
+            return self._unsupported(otherdq)
+
+    # ******************************
+
+    def _unsupported(self, otherdq):
+        """
+        Gets the result of arithmetic with an unsupported type. Types
+        that provide their own data quantity arithmetic (marked with a
+        true _dataQuantityOperand attribute, e.g. DataQuantityArray) are
+        deferred to, anything else leaves this object unchanged.
+
+        Parameters
+        ----------
+        @param otherdq: the unsupported operand.
+
+        Returns
+        ----------
+        @return NotImplemented for types to defer to, else this object.
+        """
+        if getattr(type(otherdq), '_dataQuantityOperand', False):
+            return NotImplemented
         else:
             return self
 
-    __rdiv__ = __div__
-    __rfloordiv__ = __floordiv__
+    # ******************************
+
+    def _exactOperands(self, otherdq):
+        """
+        Gets exact (int/Fraction) versions of the bits of this
+        object and the other operand, for exact mode arithmetic.
+
+        Parameters
+        ----------
+        @param otherdq: the data quantity or number being combined
+                        with this object.
+
+        Returns
+        ----------
+        @return a tuple containing the two exact operands, else None if
+                the other operand is not a data quantity or number.
+        """
+        if type(otherdq) is DataQuantity:
+            other = otherdq._bits
+        elif type(otherdq) is int or type(otherdq) is float or type(otherdq) is Fraction:
+            other = otherdq
+        else:
+            return None
+
+        other = toExact(other)
+        if other is None:
+            return None
+
+        return toExact(self._bits), other
 
     # ****************************************************************************************************
 
 
+# ******************************
+#
+# INTERNAL CONSTRUCTORS
+#
+# ******************************
+
+_new = object.__new__
+_trusted = DataQuantity._trusted
+
+
+def _exactResult(bits):
+    """
+    Creates an exact data quantity from the int/Fraction result of
+    exact arithmetic, normalising it and clamping negatives to zero.
+
+    Parameters
+    ----------
+    @param bits: the int/Fraction number of bits.
+
+    Returns
+    ----------
+    @return a new exact data quantity.
+    """
+    bits = toExact(bits)
+    return _trusted(0 if bits <= 0 else bits, True)
+
+# ******************************
 
+# DataRate depends on DataQuantity, so its module is bound last.
+import main.src.DataRate as _rates
@@ -0,0 +1,709 @@
+"""
+**************************************************************************
+
+ DataQuantityArray.py
+
+**************************************************************************
+ Description:
+
+ Represents many data quantities at once, as a contiguous numpy array
+ of bits. Supports the same arithmetic semantics as DataQuantity
+ (negative results are clamped to zero bits), vectorised unit
+ conversion and compensated summation, without creating a Python object
+ per value.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import numpy as np
+
+from main.src.DataConversions import UNITS, convert, convertArray, isUnitValid
+from main.src.DataFormatter import formatBitsArray
+from main.src.DataQuantity import DataQuantity
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class DataQuantityArray(object):
+    """
+    An array of data quantities, stored as a read only float64 numpy
+    array of bits. Negative values are clamped to zero bits, exactly as
+    for DataQuantity. Exact mode is not supported; exact data quantities
+    are converted to floats when combined with an array.
+
+    Arithmetic (+, -, *, /, //) works element-wise with ints, floats,
+    numpy arrays, DataQuantity objects and other DataQuantityArrays.
+    As for DataQuantity, a number minus (or divided by) data quantities
+    is not supported.
+    Basic slicing returns a view of the same bits, without copying.
+    """
+
+    __slots__ = ('_bits',)
+
+    # Make numpy and DataQuantity defer to the reflected operators of this class.
+    __array_ufunc__ = None
+    _dataQuantityOperand = True
+
+    # ******************************
+    #
+    # Constructor.
+    #
+    # ******************************
+
+    def __init__(self, bits=()):
+        """
+        Default constructor.
+
+        Parameters
+        ----------
+        @param bits: the number of bits in each data quantity (array like), or
+                     a list of DataQuantity objects, or another DataQuantityArray.
+                     Values that are not numeric are treated as zero bits.
+
+        Returns
+        ----------
+        N/A
+        """
+        if type(bits) == DataQuantityArray:
+            self._bits = bits._bits
+            return
+
+        if isinstance(bits, (list, tuple)) and any(type(b) == DataQuantity for b in bits):
+            bits = [float(b.bits) if type(b) == DataQuantity else b for b in bits]
+
+        try:
+            array = np.asarray(bits)
+        except ValueError:
+            array = np.zeros(0)
+
+        if array.dtype.kind in ('i', 'u', 'f'):
+            array = np.array(array, dtype=np.float64)
+        else:
+            array = np.zeros(array.shape, dtype=np.float64)
+
+        array = _clamp(array)
+        array.flags.writeable = False
+        self._bits = array
+
+    # ******************************
+
+    @staticmethod
+    def _trusted(bits):
+        """
+        Internal constructor that skips validation and copying. Only for
+        use where bits is known to be a float64 numpy array holding no
+        negative values, e.g. a slice of an existing DataQuantityArray.
+
+        Parameters
+        ----------
+        @param bits: the float64 numpy array of bits.
+
+        Returns
+        ----------
+        @return a new data quantity array.
+        """
+        dqa = _new(DataQuantityArray)
+        bits.flags.writeable = False
+        dqa._bits = bits
+        return dqa
+
+    # ******************************
+
+    @staticmethod
+    def fromQuantities(quantities):
+        """
+        Creates a data quantity array from data quantity objects.
+
+        Parameters
+        ----------
+        @param quantities: an iterable of DataQuantity objects.
+
+        Returns
+        ----------
+        @return a new data quantity array.
+        """
+        return _trusted(np.fromiter((float(dq.bits) for dq in quantities), dtype=np.float64))
+
+    # ******************************
+
+    def toQuantities(self):
+        """
+        Converts the array to a list of DataQuantity objects.
+
+        Returns
+        ----------
+        @return a list of data quantities, one per element.
+        """
+        return [_trustedQuantity(bits, False) for bits in self._bits.ravel().tolist()]
+
+    # ******************************
+
+    @property
+    def bits(self):
+        """
+        The read only numpy array of bits.
+        """
+        return self._bits
+
+    @property
+    def shape(self):
+        """
+        The shape of the array.
+        """
+        return self._bits.shape
+
+    # ******************************
+
+    def __len__(self):
+        return len(self._bits)
+
+    def __iter__(self):
+        for bits in self._bits.tolist():
+            yield _trustedQuantity(bits, False)
+
+    def __getitem__(self, key):
+        """
+        Gets a single data quantity, or a view of part of the array.
+
+        Parameters
+        ----------
+        @param key: an index, slice or numpy index array.
+
+        Returns
+        ----------
+        @return a DataQuantity if the key selects a single element, else
+                a DataQuantityArray. Basic slices share the same memory.
+        """
+        selected = self._bits[key]
+
+        if type(selected) == np.float64:
+            return _trustedQuantity(float(selected), False)
+        else:
+            return _trusted(selected)
+
+    # ******************************
+
+    def __str__(self):
+        """
+        Overridden method that provides a neater string representation.
+
+        Returns
+        ----------
+        @return a string describing the number of bits in each element.
+        """
+        return str(self._bits) + ' bits'
+
+    def __repr__(self):
+        return 'DataQuantityArray(' + repr(self._bits.tolist()) + ')'
+
+    # ******************************
+
+    def get(self, units='bits', asString=False):
+        """
+        Gets the data quantities in the user specified units.
+
+        Parameters
+        ----------
+        @param units: the units used to describe the bit values.
+        @param asString: if True, a numpy array of formatted strings is
+                         returned (as DataQuantity.get() would return).
+
+        Returns
+        ----------
+        @return a float numpy array of values in the desired units, else
+                None if the unit is invalid. If asString is True, a string
+                array, where an invalid unit gives values in bits.
+
+        Examples
+        --------
+        >>> dqa = DataQuantityArray([100, 2000])
+        >>> print dqa.get('kbit')
+        >>> [ 0.1  2. ]
+        >>> print dqa.get('kbit', asString=True)
+        >>> ['0.1 kbit' '2.0 kbit']
+        """
+        values = convertArray(self._bits, 'bit', units) if isUnitValid(units) else None
+
+        if not asString:
+            return values
+        else:
+            return _formatBits(self._bits, units)
+
+    # ******************************
+
+    def getRate(self, seconds=1.0, units='bits', asString=False):
+        """
+        Gets the data rates in the user specified units, given the
+        number of seconds in which the data quantities are produced.
+
+        Parameters
+        ----------
+        @param seconds: the number of seconds (a number, or an array that
+                        broadcasts against this array).
+        @param units: the units used to describe the rates.
+        @param asString: if True, a numpy array of formatted strings is
+                         returned (as DataQuantity.getRate() would return).
+
+        Returns
+        ----------
+        @return a float numpy array of rates in the desired units per second,
+                else None if the unit is invalid or a single number of seconds
+                is not positive. Rates for non-positive elements of an array
+                of seconds are NaN.
+
+        Examples
+        --------
+        >>> dqa = DataQuantityArray([100, 2000])
+        >>> print dqa.getRate(10, 'bit')
+        >>> [  10.  200.]
+        """
+        seconds = np.asarray(seconds, dtype=np.float64)
+
+        if seconds.ndim == 0 and not seconds > 0:
+            return None
+
+        seconds = np.where(seconds > 0, seconds, np.nan)
+        valid = isUnitValid(units)
+
+        if valid:
+            values = convertArray(self._bits, 'bit', units) / seconds
+        else:
+            values = self._bits / seconds
+
+        if not asString:
+            return values if valid else None
+        elif valid:
+            return _format(values, units + '/s')
+        else:
+            return _format(values, 'bits/s')
+
+    def format(self, precision=2, system='SI', byteUnits=False):
+        """
+        Formats every data quantity in its most readable unit, chosen
+        automatically per value, in a single vectorised pass.
+
+        Parameters
+        ----------
+        @param precision: the number of decimal places.
+        @param system: 'SI' (kbit, Mbit, ...) or 'IEC' (Kibit, Mibit, ...).
+        @param byteUnits: True to describe the data in bytes.
+
+        Returns
+        ----------
+        @return a numpy string array, else None if the unit system or
+                precision are invalid.
+
+        Examples
+        --------
+        >>> dqa = DataQuantityArray([8000, 16800000000])
+        >>> print dqa.format(byteUnits=True)
+        >>> ['1.00 kB' '2.10 GB']
+        """
+        return formatBitsArray(self._bits, precision, system, byteUnits)
+
+    # ******************************
+    #
+    # Reductions.
+    #
+    # ******************************
+
+    def sum(self):
+        """
+        Sums the data quantities using compensated summation, so totals
+        over millions of values do not accumulate rounding error.
+
+        Returns
+        ----------
+        @return the total as a DataQuantity.
+        """
+        if self._bits.size == 0:
+            return _trustedQuantity(0, False)
+
+        partial, error = _compensatedCumsum(self._bits.ravel())
+        return _trustedQuantity(float(partial[-1] + error.sum()), False)
+
+    # ******************************
+
+    def cumsum(self):
+        """
+        Computes the running total of the (flattened) data quantities,
+        using compensated summation.
+
+        Returns
+        ----------
+        @return the running totals as a DataQuantityArray.
+        """
+        if self._bits.size == 0:
+            return _trusted(np.zeros(0))
+
+        partial, error = _compensatedCumsum(self._bits.ravel())
+        return _trusted(partial + np.cumsum(error))
+
+    # ******************************
+
+    def max(self):
+        """
+        Finds the largest data quantity.
+
+        Returns
+        ----------
+        @return the largest data quantity, or zero bits if the array is empty.
+        """
+        return _trustedQuantity(float(np.max(self._bits, initial=0.0)), False)
+
+    # ******************************
+    #
+    # Arithmetic.
+    #
+    # ******************************
+
+    def __add__(self, other):
+        other = _operand(other)
+        if other is None:
+            return self
+        return _trusted(_clamp(self._bits + other))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        other = _operand(other)
+        if other is None:
+            return self
+        return _trusted(_clamp(self._bits - other))
+
+    def __rsub__(self, other):
+        """
+        Subtracts the data quantities from a DataQuantity. As for
+        DataQuantity, a number minus a data quantity is not supported.
+        """
+        if type(other) != DataQuantity:
+            return NotImplemented
+        return _trusted(_clamp(float(other.bits) - self._bits))
+
+    def __mul__(self, other):
+        other = _operand(other)
+        if other is None:
+            return self
+        return _trusted(_clamp(self._bits * other))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        """
+        Divides the data quantities element-wise. As for DataQuantity,
+        None is returned when dividing by a single non-positive number;
+        elements divided by a non-positive array element become NaN.
+        """
+        other = _operand(other)
+        if other is None:
+            return self
+        divisor = _divisor(other)
+        if divisor is None:
+            return None
+        return _trusted(_clamp(self._bits / divisor))
+
+    def __floordiv__(self, other):
+        """
+        Floor divides the data quantities element-wise, with the same
+        handling of non-positive divisors as division.
+        """
+        other = _operand(other)
+        if other is None:
+            return self
+        divisor = _divisor(other)
+        if divisor is None:
+            return None
+        return _trusted(_clamp(self._bits // divisor))
+
+    def __rtruediv__(self, other):
+        """
+        Divides a DataQuantity by the data quantities. As for
+        DataQuantity, a number divided by a data quantity is not supported.
+        """
+        if type(other) != DataQuantity:
+            return NotImplemented
+        return _trusted(_clamp(float(other.bits) / np.where(self._bits > 0, self._bits, np.nan)))
+
+    def __rfloordiv__(self, other):
+        if type(other) != DataQuantity:
+            return NotImplemented
+        return _trusted(_clamp(float(other.bits) // np.where(self._bits > 0, self._bits, np.nan)))
+
+    __div__ = __truediv__
+    __rdiv__ = __rtruediv__
+
+    # ****************************************************************************************************
+
+
+# ******************************
+#
+# FUNCTIONS
+#
+# ******************************
+
+def resultingRate(times, quantities, units='bit'):
+    """
+    Computes the data rates that result from transferring one or more
+    data quantities in each of several transfer times, in one broadcast
+    division. This replaces the notebook's resulting_rate(), which looped
+    over the times and only supported bit units.
+
+    Parameters
+    ----------
+    @param times: the transfer times in seconds (array like).
+    @param quantities: a DataQuantity, a number of bits, or a list, array
+                       or DataQuantityArray of them (e.g. one per product).
+    @param units: any bit or byte unit; rates are in units per second.
+
+    Returns
+    ----------
+    @return a float numpy array of shape (number of quantities, number of
+            times), where element [i, j] is quantity i divided by time j.
+            Rates for non-positive times are NaN. Else None if the times
+            are not numeric, a quantity is not a DataQuantity or number,
+            the quantities are not one dimensional, or the unit is invalid.
+
+    Examples
+    ----------
+    >>> print resultingRate([1, 2, 4], [DataQuantity(8000), DataQuantity(16000)], 'kB')
+    >>> [[ 1.     0.5    0.25]
+    >>>  [ 2.     1.     0.5 ]]
+    """
+    if not isUnitValid(units):
+        return None
+
+    try:
+        times = np.asarray(times)
+    except (TypeError, ValueError):
+        return None
+
+    if times.dtype.kind not in ('i', 'u', 'f') or times.ndim > 1:
+        return None
+
+    if type(quantities) == DataQuantity:
+        quantities = [quantities]
+
+    if type(quantities) != DataQuantityArray:
+        quantities = _quantityBits(quantities)
+        if quantities is None:
+            return None
+
+    bits = DataQuantityArray(quantities)._bits
+
+    if bits.ndim > 1:
+        return None
+
+    seconds = np.where(times > 0, times * float(UNITS[units]), np.nan)
+    return np.atleast_1d(bits)[:, np.newaxis] / np.atleast_1d(seconds)[np.newaxis, :]
+
+
+# ******************************
+#
+# INTERNAL HELPERS
+#
+# ******************************
+
+_new = object.__new__
+_trusted = DataQuantityArray._trusted
+_trustedQuantity = DataQuantity._trusted
+
+
+def _clamp(array):
+    """
+    Clamps negative values (and -0.0) to zero bits in place. NaN is kept,
+    as for DataQuantity.
+
+    Parameters
+    ----------
+    @param array: a float64 numpy array that may be modified.
+
+    Returns
+    ----------
+    @return the clamped array.
+    """
+    if array.ndim == 0:
+        array = array.reshape(1)
+    return np.maximum(array, 0.0, out=array)
+
+# ******************************
+
+def _quantityBits(quantities):
+    """
+    Validates quantities given as numbers of bits or DataQuantity objects.
+    Lists and object arrays holding DataQuantity objects are converted
+    element by element.
+
+    Parameters
+    ----------
+    @param quantities: a number, or an array like of numbers and
+                       DataQuantity objects.
+
+    Returns
+    ----------
+    @return a numeric numpy array of bits, else None if a quantity is not
+            a DataQuantity or number.
+    """
+    try:
+        array = np.asarray(quantities)
+    except (TypeError, ValueError):
+        return None
+
+    if array.dtype.kind in ('i', 'u', 'f'):
+        return array
+    elif array.dtype.kind != 'O':
+        return None
+
+    bits = np.empty(array.shape)
+    for index, value in np.ndenumerate(array):
+        if type(value) == DataQuantity:
+            bits[index] = float(value.bits)
+        elif type(value) in (int, float) or isinstance(value, (np.integer, np.floating)):
+            bits[index] = value
+        else:
+            return None
+
+    return bits
+
+# ******************************
+
+def _format(values, units):
+    """
+    Formats numeric values as strings with a unit suffix.
+
+    Parameters
+    ----------
+    @param values: the float numpy array to format.
+    @param units: the unit suffix, e.g. 'kbit/s'.
+
+    Returns
+    ----------
+    @return a numpy array of strings such as '0.1 kbit/s'.
+    """
+    return np.char.add(values.astype(str), ' ' + units)
+
+# ******************************
+
+def _formatBits(bits, units):
+    """
+    Formats numbers of bits in the user specified units, exactly as
+    DataQuantity.get() formats a single data quantity. Whole numbers of
+    bits are formatted as ints, so 1000 bits is '1000 bit' and not
+    '1000.0 bit'.
+
+    Parameters
+    ----------
+    @param bits: the float numpy array of bits to format.
+    @param units: the units used to describe the bits.
+
+    Returns
+    ----------
+    @return a numpy array of strings such as '0.1 kbit', in bits if the
+            unit is invalid.
+    """
+    strings = np.empty(bits.shape, dtype=object)
+
+    for index, value in np.ndenumerate(bits):
+        value = float(value)
+        if value.is_integer():
+            value = int(value)
+
+        converted = convert(value, 'bit', units)
+        if converted is None:
+            strings[index] = str(value) + ' bits'
+        else:
+            strings[index] = str(converted) + ' ' + units
+
+    return strings.astype(str)
+
+# ******************************
+
+def _operand(other):
+    """
+    Converts the other operand of an arithmetic operation to bits.
+
+    Parameters
+    ----------
+    @param other: an int, float, DataQuantity, DataQuantityArray or
+                  numeric array like.
+
+    Returns
+    ----------
+    @return a float or float numpy array, else None if unsupported.
+    """
+    if type(other) == int or type(other) == float:
+        return float(other)
+    elif type(other) == DataQuantity:
+        return float(other.bits)
+    elif type(other) == DataQuantityArray:
+        return other._bits
+    elif isinstance(other, (np.ndarray, np.number, list, tuple)):
+        array = np.asarray(other)
+        if array.dtype.kind in ('i', 'u', 'f'):
+            return array.astype(np.float64, copy=False)
+
+    return None
+
+# ******************************
+
+def _divisor(other):
+    """
+    Prepares a divisor, replacing non-positive array elements with NaN.
+
+    Parameters
+    ----------
+    @param other: a float or float numpy array.
+
+    Returns
+    ----------
+    @return the divisor, else None if a single divisor is not positive.
+    """
+    if type(other) == float:
+        return other if other > 0 else None
+    elif other.ndim == 0:
+        return float(other) if other > 0 else None
+    else:
+        return np.where(other > 0, other, np.nan)
+
+# ******************************
+
+def _compensatedCumsum(values):
+    """
+    Computes a running sum along with the exact rounding error of each
+    addition (the TwoSum error-free transformation, applied to the whole
+    array at once). Adding the cumulative error to the running sum gives
+    a compensated result, equivalent to Kahan-Babuska summation.
+
+    Parameters
+    ----------
+    @param values: a 1-D float64 numpy array.
+
+    Returns
+    ----------
+    @return a tuple containing the running sum and the error of each step.
+    """
+    partial = np.cumsum(values)
+    previous = np.concatenate(([0.0], partial[:-1]))
+
+    value_part = partial - previous
+    previous_part = partial - value_part
+    error = (previous - previous_part) + (values - value_part)
+
+    return partial, error
@@ -0,0 +1,701 @@
+"""
+**************************************************************************
+
+ DataQuantityFunctions.py
+
+**************************************************************************
+ Description:
+
+ Size formulas for the NIP data products, as derived in the notebook:
+ the OCLD, SPOCLD, PTD and DSD products, and the averaged, TOA list,
+ timing residual and alert intermediate products. Every size function
+ returns a number of bits, and every product also has a components
+ function that breaks its size down into attributes, list, cube, sheets
+ and metadata. Parameters may be scalars or
+ numpy arrays that broadcast together, so a whole grid of parameter
+ values can be evaluated in a single call. Default parameter values
+ are those used in the notebook.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import numpy as np
+
+from main.src.ExactArithmetic import checkedProduct
+
+# ******************************
+#
+# ATTRIBUTE SIZES (bits)
+#
+# ******************************
+
+# Size of a string attribute (12 characters).
+STRING_BITS = 96
+
+# Size of an int attribute.
+INT_BITS = 32
+
+# Size of a float attribute.
+FLOAT_BITS = 64
+
+# Size of a bool attribute.
+BOOL_BITS = 1
+
+# Size of one candidate list entry: Candidate ID and Beam ID (strings),
+# S/N, DM, Period, Pulse Width, Acceleration and Location (floats),
+# Sifted? and Duplicate? (bools).
+LIST_ENTRY_BITS = (STRING_BITS * 2) + (FLOAT_BITS * 6) + (BOOL_BITS * 2)
+
+# Size of candidate list attributes: Scheduling Block ID, Program Block ID,
+# Scan ID and Beam ID (strings) and Candidate count (int).
+CANDIDATE_LIST_ATTRIBUTE_BITS = (STRING_BITS * 4) + INT_BITS
+
+# Size of PTD/DSD attributes: Scheduling Block ID, Program Block ID,
+# Scan ID, Beam ID and Pulsar ID (strings).
+TIMING_ATTRIBUTE_BITS = STRING_BITS * 5
+
+# Naive metadata estimate: 10 attributes, each 96 bits in size.
+METADATA_BITS = 960
+
+# Size of an alert message (500 characters).
+MESSAGE_BITS = 4000
+
+# Size of alert attributes: Scheduling Block ID, Program Block ID, Scan ID,
+# Beam ID and Pulsar/Candidate ID (strings), Message and Level (int).
+ALERT_ATTRIBUTE_BITS = (STRING_BITS * 5) + MESSAGE_BITS + INT_BITS
+
+# The components every size breakdown contains, in order.
+COMPONENTS = ('attributes', 'list', 'cube', 'sheets', 'metadata')
+
+# ******************************
+#
+# OCLD
+#
+# ******************************
+
+def listSize(N_list=1000):
+    """
+    Computes the size of a candidate list (as used by the OCLD and SPOCLD).
+
+    Parameters
+    ----------
+    @param N_list: the number of entries in the list.
+
+    Returns
+    ----------
+    @return the list size in bits.
+
+    Examples
+    ----------
+    >>> print listSize(1000)
+    >>> 578000
+    """
+    return LIST_ENTRY_BITS * N_list
+
+# ******************************
+
+def searchCubeSize(N_chan=128, N_bin=128, N_sub=64, N_bit=8):
+    """
+    Computes the size of an OCLD (periodicity search) candidate data cube.
+
+    Parameters
+    ----------
+    @param N_chan: the number of frequency channels.
+    @param N_bin: the number of phase bins.
+    @param N_sub: the number of sub-integrations.
+    @param N_bit: the number of bits per data cube sample.
+
+    Returns
+    ----------
+    @return the data cube size in bits.
+    """
+    return _product(N_chan, N_bin, N_sub, N_bit)
+
+# ******************************
+
+def sheetSize(N_sheet=3, r=256, c=256):
+    """
+    Computes the size of the sheets stored with a candidate.
+
+    Parameters
+    ----------
+    @param N_sheet: the number of sheets.
+    @param r: the number of rows in each sheet.
+    @param c: the number of columns in each sheet.
+
+    Returns
+    ----------
+    @return the sheet volume in bits.
+    """
+    return N_sheet * (r * c)
+
+# ******************************
+
+def candidateDataSize(C_size, S_size, M_size=METADATA_BITS):
+    """
+    Computes the size of one candidate data entity, i.e. its Candidate ID
+    attribute, data cube, sheets and metadata.
+
+    Parameters
+    ----------
+    @param C_size: the data cube size in bits.
+    @param S_size: the sheet volume in bits.
+    @param M_size: the metadata size in bits.
+
+    Returns
+    ----------
+    @return the candidate data size in bits.
+    """
+    return STRING_BITS + C_size + S_size + M_size
+
+# ******************************
+
+def ocldSize(N_cand=1000, N_list=1000, N_chan=128, N_bin=128, N_sub=64, N_bit=8,
+             N_sheet=3, r=256, c=256, M_size=METADATA_BITS):
+    """
+    Computes the size of an Optimised Candidate List and Data (OCLD)
+    product, produced per beam by the periodicity search:
+
+    OCLD_size = ocld_att_vol + L_size + (N_cand * D_size)
+
+    Parameters
+    ----------
+    @param N_cand: the number of candidate data cubes.
+    @param N_list: the number of entries in the candidate list.
+    @param N_chan: the number of frequency channels.
+    @param N_bin: the number of phase bins.
+    @param N_sub: the number of sub-integrations.
+    @param N_bit: the number of bits per data cube sample.
+    @param N_sheet: the number of sheets.
+    @param r: the number of rows in each sheet.
+    @param c: the number of columns in each sheet.
+    @param M_size: the metadata size per candidate in bits.
+
+    Returns
+    ----------
+    @return the OCLD size in bits.
+
+    Examples
+    ----------
+    >>> print ocldSize()
+    >>> 8586850416
+    """
+    D_size = candidateDataSize(searchCubeSize(N_chan, N_bin, N_sub, N_bit), sheetSize(N_sheet, r, c), M_size)
+    return CANDIDATE_LIST_ATTRIBUTE_BITS + listSize(N_list) + _product(N_cand, D_size)
+
+# ******************************
+
+def ocldComponents(N_cand=1000, N_list=1000, N_chan=128, N_bin=128, N_sub=64, N_bit=8,
+                   N_sheet=3, r=256, c=256, M_size=METADATA_BITS):
+    """
+    Breaks the size of an OCLD down into its components. The attributes
+    include the Candidate ID of every candidate data entity.
+
+    Parameters
+    ----------
+    The same as ocldSize().
+
+    Returns
+    ----------
+    @return a dictionary of the component sizes in bits, keyed on the
+            names in COMPONENTS. The sizes sum to ocldSize().
+    """
+    return _components(CANDIDATE_LIST_ATTRIBUTE_BITS + (N_cand * STRING_BITS), listSize(N_list),
+                       _product(N_cand, searchCubeSize(N_chan, N_bin, N_sub, N_bit)), N_cand * sheetSize(N_sheet, r, c),
+                       N_cand * M_size)
+
+# ******************************
+#
+# SPOCLD
+#
+# ******************************
+
+def singlePulseCubeSize(N_samp=640, N_chan=1024, N_pol=4, N_bit=8):
+    """
+    Computes the size of an SPOCLD (single pulse search) candidate data cube.
+
+    Parameters
+    ----------
+    @param N_samp: the number of time samples.
+    @param N_chan: the number of frequency channels.
+    @param N_pol: the number of polarisations.
+    @param N_bit: the number of bits per data cube sample.
+
+    Returns
+    ----------
+    @return the data cube size in bits.
+    """
+    return _product(N_samp, N_chan, N_pol, N_bit)
+
+# ******************************
+
+def spocldSize(N_cand=1, N_list=1000, N_samp=640, N_chan=1024, N_pol=4, N_bit=8,
+               N_sheet=2, r=1, c=1024, M_size=METADATA_BITS):
+    """
+    Computes the size of a Single Pulse Optimised Candidate List and Data
+    (SPOCLD) product, produced per detected burst:
+
+    SPOCLD_size = spocld_att_vol + L_size + (N_cand * D_size)
+
+    Parameters
+    ----------
+    @param N_cand: the number of candidate data cubes.
+    @param N_list: the number of entries in the candidate list.
+    @param N_samp: the number of time samples.
+    @param N_chan: the number of frequency channels.
+    @param N_pol: the number of polarisations.
+    @param N_bit: the number of bits per data cube sample.
+    @param N_sheet: the number of sheets.
+    @param r: the number of rows in each sheet.
+    @param c: the number of columns in each sheet.
+    @param M_size: the metadata size per candidate in bits.
+
+    Returns
+    ----------
+    @return the SPOCLD size in bits.
+
+    Examples
+    ----------
+    >>> print spocldSize()
+    >>> 21553040
+    """
+    D_size = candidateDataSize(singlePulseCubeSize(N_samp, N_chan, N_pol, N_bit), sheetSize(N_sheet, r, c), M_size)
+    return CANDIDATE_LIST_ATTRIBUTE_BITS + listSize(N_list) + _product(N_cand, D_size)
+
+# ******************************
+
+def spocldComponents(N_cand=1, N_list=1000, N_samp=640, N_chan=1024, N_pol=4, N_bit=8,
+                     N_sheet=2, r=1, c=1024, M_size=METADATA_BITS):
+    """
+    Breaks the size of an SPOCLD down into its components. The attributes
+    include the Candidate ID of every candidate data entity.
+
+    Parameters
+    ----------
+    The same as spocldSize().
+
+    Returns
+    ----------
+    @return a dictionary of the component sizes in bits, keyed on the
+            names in COMPONENTS. The sizes sum to spocldSize().
+    """
+    return _components(CANDIDATE_LIST_ATTRIBUTE_BITS + (N_cand * STRING_BITS), listSize(N_list),
+                       _product(N_cand, singlePulseCubeSize(N_samp, N_chan, N_pol, N_bit)),
+                       N_cand * sheetSize(N_sheet, r, c),
+                       N_cand * M_size)
+
+# ******************************
+
+def spocldBeamVolume(SPOCLD_size, N_burst=1, T_scan=180):
+    """
+    Computes the SPOCLD volume produced per beam, per scan, given the
+    single pulse event rate.
+
+    Parameters
+    ----------
+    @param SPOCLD_size: the size of one SPOCLD in bits.
+    @param N_burst: the number of single pulse events per second.
+    @param T_scan: the observation length in seconds.
+
+    Returns
+    ----------
+    @return the volume in bits.
+    """
+    return SPOCLD_size * (T_scan * N_burst)
+
+# ******************************
+#
+# PTD
+#
+# ******************************
+
+def timingCubeSize(N_chan=4096, N_bin=2048, N_sub=180, N_pol=4, N_bit=64):
+    """
+    Computes the size of a PTD/DSD timing data cube.
+
+    Parameters
+    ----------
+    @param N_chan: the number of frequency channels.
+    @param N_bin: the number of phase bins.
+    @param N_sub: the number of sub-integrations.
+    @param N_pol: the number of polarisations.
+    @param N_bit: the number of bits per data cube sample.
+
+    Returns
+    ----------
+    @return the data cube size in bits.
+    """
+    return _product(N_chan, N_bin, N_sub, N_pol, N_bit)
+
+# ******************************
+
+def ptdSize(N_chan=4096, N_bin=2048, N_sub=180, N_pol=4, N_bit=64, M_size=METADATA_BITS):
+    """
+    Computes the size of a Pulsar Timing Data (PTD) product, i.e. its
+    attributes plus one timing data entity (Pulsar ID, cube and metadata):
+
+    PTD_size = ptd_att_vol + TD_att_vol + C_time_size + M_time_size
+
+    Parameters
+    ----------
+    @param N_chan: the number of frequency channels.
+    @param N_bin: the number of phase bins.
+    @param N_sub: the number of sub-integrations.
+    @param N_pol: the number of polarisations.
+    @param N_bit: the number of bits per data cube sample.
+    @param M_size: the timing data metadata size in bits.
+
+    Returns
+    ----------
+    @return the PTD size in bits.
+
+    Examples
+    ----------
+    >>> print ptdSize()
+    >>> 386547058176
+    """
+    return TIMING_ATTRIBUTE_BITS + STRING_BITS + timingCubeSize(N_chan, N_bin, N_sub, N_pol, N_bit) + M_size
+
+# ******************************
+
+def ptdComponents(N_chan=4096, N_bin=2048, N_sub=180, N_pol=4, N_bit=64, M_size=METADATA_BITS):
+    """
+    Breaks the size of a PTD down into its components. The attributes
+    include the Pulsar ID of the timing data entity.
+
+    Parameters
+    ----------
+    The same as ptdSize().
+
+    Returns
+    ----------
+    @return a dictionary of the component sizes in bits, keyed on the
+            names in COMPONENTS. The sizes sum to ptdSize().
+    """
+    return _components(TIMING_ATTRIBUTE_BITS + STRING_BITS, 0, timingCubeSize(N_chan, N_bin, N_sub, N_pol, N_bit),
+                       0, M_size)
+
+# ******************************
+#
+# DSD
+#
+# ******************************
+
+def dsdSize(N_chan=4096, N_bin=2048, N_sub=180, N_pol=4, N_bit=64, M_size=METADATA_BITS):
+    """
+    Computes the size of a Dynamic Spectra Data (DSD) product. The DSD is
+    identical to the PTD in structure and physical size.
+
+    Parameters
+    ----------
+    The same as ptdSize().
+
+    Returns
+    ----------
+    @return the DSD size in bits.
+    """
+    return ptdSize(N_chan, N_bin, N_sub, N_pol, N_bit, M_size)
+
+# ******************************
+
+def dsdComponents(N_chan=4096, N_bin=2048, N_sub=180, N_pol=4, N_bit=64, M_size=METADATA_BITS):
+    """
+    Breaks the size of a DSD down into its components, as ptdComponents().
+
+    Returns
+    ----------
+    @return a dictionary of the component sizes in bits, keyed on the
+            names in COMPONENTS. The sizes sum to dsdSize().
+    """
+    return ptdComponents(N_chan, N_bin, N_sub, N_pol, N_bit, M_size)
+
+# ******************************
+#
+# AVERAGED DATA PRODUCT
+#
+# ******************************
+
+def averagedCubeSize(N_chan=4096, N_bin=2048, N_sub=180, N_pol=4, N_bit=64, frequency=False, subints=False):
+    """
+    Computes the size of an averaged timing data cube (Table 12). Averaging
+    over frequency or sub-integrations reduces that dimension to 1. A
+    partly averaged cube is described by passing the reduced number of
+    channels or sub-integrations instead.
+
+    Parameters
+    ----------
+    @param N_chan: the number of frequency channels.
+    @param N_bin: the number of phase bins.
+    @param N_sub: the number of sub-integrations.
+    @param N_pol: the number of polarisations.
+    @param N_bit: the number of bits per data cube sample.
+    @param frequency: True if the cube is averaged over frequency (or a
+                      numpy array of flags).
+    @param subints: True if the cube is averaged over sub-integrations
+                    (or a numpy array of flags).
+
+    Returns
+    ----------
+    @return the averaged data cube size in bits.
+
+    Examples
+    ----------
+    >>> print averagedCubeSize(frequency=True, subints=True)
+    >>> 524288
+    """
+    # The flags may be arrays on a grid, where each point is averaged or not.
+    if isinstance(frequency, np.ndarray):
+        N_chan = np.where(frequency, 1, N_chan)
+    elif frequency:
+        N_chan = 1
+
+    if isinstance(subints, np.ndarray):
+        N_sub = np.where(subints, 1, N_sub)
+    elif subints:
+        N_sub = 1
+
+    return timingCubeSize(N_chan, N_bin, N_sub, N_pol, N_bit)
+
+# ******************************
+
+def avgSize(N_chan=4096, N_bin=2048, N_sub=180, N_pol=4, N_bit=64, frequency=False, subints=False,
+            M_size=METADATA_BITS):
+    """
+    Computes the size of an averaged intermediate data product (Eq. 25):
+
+    AVG_size = avg_att_vol + C_avg + M_size
+
+    Parameters
+    ----------
+    The same as averagedCubeSize(), plus:
+    @param M_size: the averaged data product metadata size in bits.
+
+    Returns
+    ----------
+    @return the averaged data product size in bits.
+
+    Examples
+    ----------
+    >>> print avgSize(frequency=True, subints=True)
+    >>> 525728
+    """
+    return TIMING_ATTRIBUTE_BITS + averagedCubeSize(N_chan, N_bin, N_sub, N_pol, N_bit, frequency, subints) + M_size
+
+# ******************************
+
+def avgComponents(N_chan=4096, N_bin=2048, N_sub=180, N_pol=4, N_bit=64, frequency=False, subints=False,
+                  M_size=METADATA_BITS):
+    """
+    Breaks the size of an averaged data product down into its components.
+
+    Returns
+    ----------
+    @return a dictionary of the component sizes in bits, keyed on the
+            names in COMPONENTS. The sizes sum to avgSize().
+    """
+    return _components(TIMING_ATTRIBUTE_BITS, 0,
+                       averagedCubeSize(N_chan, N_bin, N_sub, N_pol, N_bit, frequency, subints), 0, M_size)
+
+# ******************************
+#
+# TOA LIST & TIMING RESIDUALS
+#
+# ******************************
+
+def toaListSize(N_chan=4096, TOA_bits=1, M_size=METADATA_BITS):
+    """
+    Computes the size of a TOA list (Eq. 24), which holds one TOA per
+    frequency channel:
+
+    TOA_size = toa_att_vol + (TOA_bits * N_chan) + M_size
+
+    Parameters
+    ----------
+    @param N_chan: the number of frequency channels.
+    @param TOA_bits: the size of each TOA in bits (1 in Eq. 24).
+    @param M_size: the TOA metadata size in bits.
+
+    Returns
+    ----------
+    @return the TOA list size in bits.
+
+    Examples
+    ----------
+    >>> print toaListSize()
+    >>> 5536
+    """
+    return TIMING_ATTRIBUTE_BITS + (TOA_bits * N_chan) + M_size
+
+# ******************************
+
+def toaListComponents(N_chan=4096, TOA_bits=1, M_size=METADATA_BITS):
+    """
+    Breaks the size of a TOA list down into its components.
+
+    Returns
+    ----------
+    @return a dictionary of the component sizes in bits, keyed on the
+            names in COMPONENTS. The sizes sum to toaListSize().
+    """
+    return _components(TIMING_ATTRIBUTE_BITS, TOA_bits * N_chan, 0, 0, M_size)
+
+# ******************************
+
+def residualsSize(N_chan=4096, RES_bits=1, M_size=METADATA_BITS):
+    """
+    Computes the size of the timing residuals, which have the same
+    structure as the TOA list, with one residual per frequency channel.
+
+    Parameters
+    ----------
+    @param N_chan: the number of frequency channels.
+    @param RES_bits: the size of each residual in bits.
+    @param M_size: the timing residual metadata size in bits.
+
+    Returns
+    ----------
+    @return the timing residuals size in bits.
+    """
+    return toaListSize(N_chan, RES_bits, M_size)
+
+# ******************************
+
+def residualsComponents(N_chan=4096, RES_bits=1, M_size=METADATA_BITS):
+    """
+    Breaks the size of the timing residuals down into its components.
+
+    Returns
+    ----------
+    @return a dictionary of the component sizes in bits, keyed on the
+            names in COMPONENTS. The sizes sum to residualsSize().
+    """
+    return toaListComponents(N_chan, RES_bits, M_size)
+
+# ******************************
+#
+# ALERT
+#
+# ******************************
+
+def alertSize(M_size=METADATA_BITS):
+    """
+    Computes the size of an NIP alert (Eq. 26):
+
+    Alert_size = alert_att_vol + M_size
+
+    Parameters
+    ----------
+    @param M_size: the alert metadata size in bits.
+
+    Returns
+    ----------
+    @return the alert size in bits.
+
+    Examples
+    ----------
+    >>> print alertSize()
+    >>> 5472
+    """
+    return ALERT_ATTRIBUTE_BITS + M_size
+
+# ******************************
+
+def alertComponents(M_size=METADATA_BITS):
+    """
+    Breaks the size of an alert down into its components.
+
+    Returns
+    ----------
+    @return a dictionary of the component sizes in bits, keyed on the
+            names in COMPONENTS. The sizes sum to alertSize().
+    """
+    return _components(ALERT_ATTRIBUTE_BITS, 0, 0, 0, M_size)
+
+# ******************************
+#
+# VOLUMES
+#
+# ******************************
+
+def scanVolume(size, N_beam=1500):
+    """
+    Computes the volume of a data product produced per scan, across beams.
+
+    Parameters
+    ----------
+    @param size: the volume produced per beam in bits.
+    @param N_beam: the number of beams (1500 for search, 16 for timing).
+
+    Returns
+    ----------
+    @return the volume per scan in bits.
+    """
+    return _product(size, N_beam)
+
+# ******************************
+#
+# INTERNAL HELPERS
+#
+# ******************************
+
+def _components(attributes, L_size, C_size, S_size, M_size):
+    """
+    Collects the components of a product size.
+
+    Parameters
+    ----------
+    @param attributes: the attribute volume in bits.
+    @param L_size: the list size in bits.
+    @param C_size: the data cube volume in bits.
+    @param S_size: the sheet volume in bits.
+    @param M_size: the metadata volume in bits.
+
+    Returns
+    ----------
+    @return a dictionary of the sizes, keyed on the names in COMPONENTS.
+    """
+    return {'attributes': attributes, 'list': L_size, 'cube': C_size, 'sheets': S_size, 'metadata': M_size}
+
+# ******************************
+
+def _product(*factors):
+    """
+    Multiplies the factors of a size, e.g. the dimensions of a data cube.
+    If any factor is an integer numpy array or scalar, the product is
+    computed by checkedProduct(), so a product past the int64 limit is
+    returned as exact Python ints (an object array) rather than silently
+    wrapping around. Python ints are exact already, and floats cannot
+    overflow, so any other factors are simply multiplied.
+
+    Parameters
+    ----------
+    @param factors: the scalar or numpy array factors.
+
+    Returns
+    ----------
+    @return the product.
+    """
+    if any(isinstance(factor, (np.ndarray, np.integer)) and factor.dtype.kind in ('i', 'u') for factor in factors):
+        product = checkedProduct(*factors)
+        if product is not None:
+            return product if product.ndim else product[()]
+
+    product = factors[0]
+    for factor in factors[1:]:
+        product = product * factor
+
+    return product
@@ -0,0 +1,449 @@
+"""
+**************************************************************************
+
+ DataRate.py
+
+**************************************************************************
+ Description:
+
+ Represents a data rate in bits per second. Rates can be added, scaled,
+ compared and summed numerically, converted to any bit or byte per
+ second unit, and multiplied by a duration to give a data quantity.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import math
+from datetime import timedelta
+
+from main.src.DataConversions import convert, parseBitRate
+from main.src.DataFormatter import formatBits
+from main.src.DataQuantity import DataQuantity
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class DataRate(object):
+    """
+    The data rate object. Represents a rate of information in bits per
+    second. Like DataQuantity, data rates are immutable values that can
+    be hashed, compared and sorted, and negative rates become zero.
+
+    Adding or subtracting ints/floats treats them as bits per second,
+    so the built in sum() works on lists of rates. Multiplying a rate by
+    a timedelta (or calling over()) gives the DataQuantity produced in
+    that time, and dividing one rate by another gives their ratio.
+    """
+
+    __slots__ = ('_bitsPerSecond',)
+
+    # ******************************
+    #
+    # Constructor.
+    #
+    # ******************************
+
+    def __init__(self, bitsPerSecond=0):
+        """
+        Default constructor.
+
+        Parameters
+        ----------
+        @param bitsPerSecond: the number of bits per second.
+
+        Returns
+        ----------
+        N/A
+        """
+        if type(bitsPerSecond) == int or type(bitsPerSecond) == float:
+            self._bitsPerSecond = 0 if bitsPerSecond <= 0 else bitsPerSecond
+        else:
+            self._bitsPerSecond = 0
+
+    # ******************************
+
+    @staticmethod
+    def _trusted(bitsPerSecond):
+        """
+        Internal constructor that skips validation. Only for use where
+        the rate is already known to be a non-negative int/float.
+
+        Parameters
+        ----------
+        @param bitsPerSecond: the valid number of bits per second.
+
+        Returns
+        ----------
+        @return a new data rate.
+        """
+        rate = _new(DataRate)
+        rate._bitsPerSecond = bitsPerSecond
+        return rate
+
+    # ******************************
+
+    @staticmethod
+    def parse(text):
+        """
+        Creates a data rate from a string such as '11.96 Mbit/s'. Uses
+        the cached parser in DataConversions.
+
+        Parameters
+        ----------
+        @param text: the string to parse.
+
+        Returns
+        ----------
+        @return a new data rate, else None if the string is not a valid rate.
+
+        Examples
+        --------
+        >>> print DataRate.parse('11.96 Mbit/s')
+        >>> 11960000.0 bits/s
+        """
+        bitsPerSecond = parseBitRate(text)
+
+        if bitsPerSecond is None:
+            return None
+        else:
+            return DataRate(bitsPerSecond)
+
+    # ******************************
+
+    @staticmethod
+    def total(rates):
+        """
+        Sums data rates with correctly rounded (math.fsum) summation,
+        e.g. the aggregate rate of 1500 beams.
+
+        Parameters
+        ----------
+        @param rates: an iterable of DataRate objects.
+
+        Returns
+        ----------
+        @return the total rate.
+        """
+        return DataRate(math.fsum(rate._bitsPerSecond for rate in rates))
+
+    # ******************************
+
+    @property
+    def bitsPerSecond(self):
+        """
+        The number of bits per second (read only).
+        """
+        return self._bitsPerSecond
+
+    # ******************************
+
+    def __str__(self):
+        """
+        Overridden method that provides a neater string representation.
+
+        Returns
+        ----------
+        @return a string describing the number of bits per second.
+        """
+        return str(self._bitsPerSecond) + ' bits/s'
+
+    def __repr__(self):
+        return 'DataRate(' + repr(self._bitsPerSecond) + ')'
+
+    # ******************************
+
+    def value(self, units='bit'):
+        """
+        Gets the rate as a number, in the user specified units per second.
+        Units may be given with or without the '/s' suffix.
+
+        Parameters
+        ----------
+        @param units: any bit or byte unit, e.g. 'Mbit' or 'GB/s'.
+
+        Returns
+        ----------
+        @return the rate in the desired units per second, else None if
+                the unit is invalid.
+
+        Examples
+        --------
+        >>> rate = DataRate(11960000)
+        >>> print rate.value('Mbit/s')
+        >>> 11.96
+        """
+        if type(units) == str and units.endswith('/s'):
+            units = units[:-2]
+
+        return convert(self._bitsPerSecond, 'bit', units)
+
+    # ******************************
+
+    def get(self, units='bit'):
+        """
+        Gets a textual description of the rate, according to the user
+        specified units, as DataQuantity.getRate() does.
+
+        Parameters
+        ----------
+        @param units: any bit or byte unit, e.g. 'Mbit'.
+
+        Returns
+        ----------
+        @return a string describing the rate, e.g. '11.96 Mbit/s'. If the
+                unit is invalid, the rate is described in bits per second.
+        """
+        value = self.value(units)
+
+        if value is None:
+            return str(self)
+        elif units.endswith('/s'):
+            return str(value) + ' ' + units
+        else:
+            return str(value) + ' ' + units + '/s'
+
+    # ******************************
+
+    def format(self, precision=2, system='SI', byteUnits=False):
+        """
+        Gets a textual description of the rate in the most readable
+        unit, chosen automatically.
+
+        Parameters
+        ----------
+        @param precision: the number of decimal places.
+        @param system: 'SI' (kbit/s, Mbit/s, ...) or 'IEC' (Kibit/s, ...).
+        @param byteUnits: True to describe the rate in bytes per second.
+
+        Returns
+        ----------
+        @return the description, e.g. '11.96 Mbit/s', else None if the
+                unit system or precision are invalid.
+        """
+        return formatBits(self._bitsPerSecond, precision, system, byteUnits, rate=True)
+
+    # ******************************
+
+    def over(self, seconds):
+        """
+        Gets the data quantity produced at this rate over a duration.
+
+        Parameters
+        ----------
+        @param seconds: the duration, as a number of seconds or a timedelta.
+
+        Returns
+        ----------
+        @return the data quantity, else None if the duration is invalid
+                or negative.
+
+        Examples
+        --------
+        >>> print DataRate(100).over(60)
+        >>> 6000 bits
+        """
+        seconds = _seconds(seconds)
+
+        if seconds is None or seconds < 0:
+            return None
+        else:
+            return DataQuantity(self._bitsPerSecond * seconds)
+
+    # ******************************
+    #
+    # Comparison.
+    #
+    # ******************************
+
+    def __hash__(self):
+        return hash(self._bitsPerSecond)
+
+    def __eq__(self, other):
+        if type(other) is DataRate:
+            return self._bitsPerSecond == other._bitsPerSecond
+        else:
+            return NotImplemented
+
+    def __ne__(self, other):
+        if type(other) is DataRate:
+            return self._bitsPerSecond != other._bitsPerSecond
+        else:
+            return NotImplemented
+
+    def __lt__(self, other):
+        if type(other) is DataRate:
+            return self._bitsPerSecond < other._bitsPerSecond
+        else:
+            return NotImplemented
+
+    def __le__(self, other):
+        if type(other) is DataRate:
+            return self._bitsPerSecond <= other._bitsPerSecond
+        else:
+            return NotImplemented
+
+    def __gt__(self, other):
+        if type(other) is DataRate:
+            return self._bitsPerSecond > other._bitsPerSecond
+        else:
+            return NotImplemented
+
+    def __ge__(self, other):
+        if type(other) is DataRate:
+            return self._bitsPerSecond >= other._bitsPerSecond
+        else:
+            return NotImplemented
+
+    # ******************************
+    #
+    # Arithmetic.
+    #
+    # ******************************
+
+    def __add__(self, other):
+        """
+        Adds a data rate, or a number of bits per second, to this rate.
+
+        Parameters
+        ----------
+        @param other: the DataRate/int/float to add.
+
+        Returns
+        ----------
+        @return a new data rate, else this rate if other is unsupported.
+        """
+        if type(other) is DataRate:
+            bitsPerSecond = self._bitsPerSecond + other._bitsPerSecond
+        elif type(other) is int or type(other) is float:
+            bitsPerSecond = self._bitsPerSecond + other
+        else:
+            return self
+
+        return _trusted(0 if bitsPerSecond <= 0 else bitsPerSecond)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        """
+        Subtracts a data rate, or a number of bits per second, from this
+        rate. Negative results become zero.
+
+        Parameters
+        ----------
+        @param other: the DataRate/int/float to subtract.
+
+        Returns
+        ----------
+        @return a new data rate, else this rate if other is unsupported.
+        """
+        if type(other) is DataRate:
+            bitsPerSecond = self._bitsPerSecond - other._bitsPerSecond
+        elif type(other) is int or type(other) is float:
+            bitsPerSecond = self._bitsPerSecond - other
+        else:
+            return self
+
+        return _trusted(0 if bitsPerSecond <= 0 else bitsPerSecond)
+
+    def __mul__(self, other):
+        """
+        Multiplies this rate by a number (giving a rate) or a timedelta
+        (giving the data quantity produced in that time).
+
+        Parameters
+        ----------
+        @param other: the int/float/timedelta to multiply by.
+
+        Returns
+        ----------
+        @return a new data rate or data quantity, else this rate if other
+                is unsupported.
+        """
+        if type(other) is int or type(other) is float:
+            bitsPerSecond = self._bitsPerSecond * other
+            return _trusted(0 if bitsPerSecond <= 0 else bitsPerSecond)
+        elif type(other) is timedelta:
+            return self.over(other)
+        else:
+            return self
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        """
+        Divides this rate by a number (giving a rate), or by another rate
+        (giving their ratio, e.g. the fraction of a link's capacity used).
+
+        Parameters
+        ----------
+        @param other: the int/float/DataRate to divide by.
+
+        Returns
+        ----------
+        @return a new data rate, or a float ratio, else None if other is not
+                positive, or this rate if other is unsupported.
+        """
+        if type(other) is DataRate:
+            if other._bitsPerSecond > 0:
+                return float(self._bitsPerSecond) / other._bitsPerSecond
+            else:
+                return None
+        elif type(other) is int or type(other) is float:
+            if other > 0:
+                return _trusted(float(self._bitsPerSecond) / other)
+            else:
+                return None
+        else:
+            return self
+
+    __div__ = __truediv__
+
+    # ****************************************************************************************************
+
+
+# ******************************
+#
+# INTERNAL HELPERS
+#
+# ******************************
+
+_new = object.__new__
+_trusted = DataRate._trusted
+
+
+def _seconds(duration):
+    """
+    Converts a duration to a number of seconds.
+
+    Parameters
+    ----------
+    @param duration: an int, float or timedelta.
+
+    Returns
+    ----------
+    @return the number of seconds, else None if the duration is unsupported.
+    """
+    if type(duration) is int or type(duration) is float:
+        return duration
+    elif type(duration) is timedelta:
+        return duration.total_seconds()
+    else:
+        return None
@@ -0,0 +1,454 @@
+"""
+**************************************************************************
+
+ DeliverySimulator.py
+
+**************************************************************************
+ Description:
+
+ A discrete event simulator of CSP to SDP data product delivery. The
+ notebook assumes a product of size X sent over T seconds gives a rate
+ of X / T; here products from many beams and modes (OCLDs at the end of
+ each scan, SPOCLD bursts, PTD and DSD deliveries) contend for a finite
+ number of ingest links. Products wait in a bounded buffer for a free
+ link, and arrivals that do not fit are dropped, or held back upstream
+ (backpressure). The simulator records each product's latency, the
+ buffer occupancy over time, and every drop and backpressure event.
+
+ Events are kept in a binary heap, and arrivals are generated lazily,
+ so the heap only holds one pending arrival per stream and one
+ completion per busy link.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import heapq
+import itertools
+import time
+from collections import deque
+
+import numpy as np
+
+from main.src.MonteCarlo import MODELS, T_SCAN
+
+# What happens to an arrival that does not fit in the buffer: it is
+# dropped, or held back until there is space.
+POLICIES = ('drop', 'block')
+
+# The number of Poisson arrival times drawn at once.
+BATCH = 65536
+
+# The event kinds.
+_ARRIVAL = 0
+_COMPLETE = 1
+
+# ******************************
+#
+# CLASS DEFINITIONS
+#
+# ******************************
+
+
+class Stream(object):
+    """
+    A stream of data product arrivals: count products of the same size
+    arrive together, either every interval seconds, or at the times of
+    a Poisson process with a mean interval.
+    """
+
+    __slots__ = ('product', 'size', 'interval', 'count', 'poisson', 'start')
+
+    def __init__(self, product, size, interval, count=1, poisson=False, start=0.0):
+        """
+        Default constructor.
+
+        Parameters
+        ----------
+        @param product: the product name.
+        @param size: the size of each product in bits.
+        @param interval: the (mean) time between arrivals in seconds.
+        @param count: the number of products per arrival, e.g. N_beam.
+        @param poisson: True for a Poisson process, False for periodic arrivals.
+        @param start: the time of the first (periodic) arrival, or from
+                      which the (Poisson) arrivals start, in seconds.
+        """
+        self.product = product
+        self.size = size
+        self.interval = interval
+        self.count = count
+        self.poisson = poisson
+        self.start = start
+
+    def isValid(self):
+        return (type(self.product) == str and _isNumber(self.size) and self.size > 0 and
+                _isNumber(self.interval) and self.interval > 0 and type(self.count) == int and
+                self.count >= 1 and _isNumber(self.start) and self.start >= 0)
+
+    def __repr__(self):
+        return ('Stream(' + repr(self.product) + ', ' + repr(self.size) + ', ' + repr(self.interval) +
+                ', count=' + repr(self.count) + ', poisson=' + repr(self.poisson) + ', start=' +
+                repr(self.start) + ')')
+
+# ******************************
+
+
+class DeliveryResult(object):
+    """
+    The outcome of a delivery simulation.
+    """
+
+    __slots__ = ('latencies', 'times', 'occupancy', 'drops', 'blocked', 'waits', 'events', 'seconds', 'end')
+
+    def __init__(self, latencies, times, occupancy, drops, blocked, waits, events, seconds, end):
+        self.latencies = latencies    # Product names mapped to arrays of latencies (s).
+        self.times = times            # The times (s) at which the buffer occupancy changed...
+        self.occupancy = occupancy    # ... and the occupancy (bits) from each of those times.
+        self.drops = drops            # Product names mapped to arrays of drop times (s).
+        self.blocked = blocked        # Product names mapped to arrays of times held back (s)...
+        self.waits = waits            # ... and how long each was held back (s).
+        self.events = events          # The number of events simulated.
+        self.seconds = seconds        # The wall clock time of the simulation.
+        self.end = end                # The simulated time the last delivery completed.
+
+    # ******************************
+
+    def percentiles(self, product, percentiles=(50, 95, 99)):
+        """
+        Gets percentiles of a product's latency distribution.
+
+        Parameters
+        ----------
+        @param product: the product name.
+        @param percentiles: the percentiles to compute (0 to 100).
+
+        Returns
+        ----------
+        @return a dictionary mapping each percentile to a latency in
+                seconds, else None if no product was delivered.
+        """
+        latencies = self.latencies.get(product)
+
+        if latencies is None or latencies.size == 0:
+            return None
+
+        return dict(zip(percentiles, np.percentile(latencies, percentiles).tolist()))
+
+    # ******************************
+
+    @property
+    def peakOccupancy(self):
+        """
+        The largest buffer occupancy in bits.
+        """
+        return float(self.occupancy.max()) if self.occupancy.size else 0.0
+
+    # ******************************
+
+    @property
+    def eventRate(self):
+        """
+        The number of events simulated per second of wall clock time.
+        """
+        return self.events / self.seconds if self.seconds > 0 else float('inf')
+
+    # ******************************
+
+    def __str__(self):
+        delivered = sum(latencies.size for latencies in self.latencies.values())
+        dropped = sum(drops.size for drops in self.drops.values())
+        blocked = sum(times.size for times in self.blocked.values())
+        return (str(delivered) + ' delivered, ' + str(dropped) + ' dropped, ' + str(blocked) + ' held back, ' +
+                str(self.events) + ' events in ' + '%.3f' % self.seconds + ' s')
+
+    # ****************************************************************************************************
+
+# ******************************
+#
+# FUNCTIONS
+#
+# ******************************
+
+
+def productStreams(T_scan=T_SCAN, N_burst=1, beams=None, parameters=None, products=('OCLD', 'SPOCLD', 'PTD', 'DSD')):
+    """
+    Creates the arrival streams of the notebook's data products, sized
+    with the size models. Each beam's OCLD, PTD and DSD arrive at the end
+    of every scan; each beam's SPOCLDs arrive as a Poisson process of
+    N_burst bursts per second.
+
+    Parameters
+    ----------
+    @param T_scan: the scan length in seconds.
+    @param N_burst: the mean number of single pulse bursts per beam per second.
+    @param beams: a dictionary mapping products to their number of beams
+                  (default: 1500 for the OCLD and SPOCLD, 16 for the PTD and DSD).
+    @param parameters: a dictionary mapping products to dictionaries of
+                       size model parameters.
+    @param products: the products to include.
+
+    Returns
+    ----------
+    @return a list of Streams, else None if a product or a parameter is invalid.
+
+    Examples
+    ----------
+    >>> print productStreams(products=('PTD',))
+    >>> [Stream('PTD', 386547058176, 180, count=16, poisson=False, start=180)]
+    """
+    beams = beams if beams is not None else {}
+    parameters = parameters if parameters is not None else {}
+
+    if not _isNumber(T_scan) or T_scan <= 0 or not _isNumber(N_burst) or N_burst <= 0:
+        return None
+
+    streams = []
+    for product in products:
+        if product not in MODELS:
+            return None
+
+        function, N_beam = MODELS[product]
+        N_beam = beams.get(product, N_beam)
+
+        try:
+            size = function(**parameters.get(product, {}))
+        except TypeError:
+            return None
+
+        if product == 'SPOCLD':
+            stream = Stream(product, size, 1.0 / (N_burst * N_beam), poisson=True)
+        else:
+            stream = Stream(product, size, T_scan, count=N_beam, start=T_scan)
+
+        if not stream.isValid():
+            return None
+
+        streams.append(stream)
+
+    return streams
+
+# ******************************
+
+def simulateDelivery(streams, links=1, capacity=100e9, buffer=float('inf'), overhead=0.0, policy='drop',
+                     duration=86400.0, seed=0):
+    """
+    Simulates the delivery of data products over shared ingest links.
+
+    Arriving products enter a bounded buffer, and wait in arrival order
+    for the first free link. A product is sent in overhead + size /
+    capacity seconds, and leaves the buffer when it has been sent. An
+    arrival that does not fit in the buffer is dropped, or (with the
+    'block' policy) held back upstream until enough space is freed;
+    products held back are admitted in arrival order. Products larger
+    than the whole buffer are always dropped. Arrivals stop at the end
+    of the simulation, and the products in the buffer are then drained.
+
+    Parameters
+    ----------
+    @param streams: a list of Streams (e.g. from productStreams()).
+    @param links: the number of links.
+    @param capacity: the capacity of each link in bits per second.
+    @param buffer: the buffer capacity in bits.
+    @param overhead: the per product overhead in seconds (e.g. connection
+                     set up and acknowledgement), as a number or a
+                     dictionary mapping product names to numbers.
+    @param policy: 'drop' or 'block' (see POLICIES).
+    @param duration: the time over which products arrive, in seconds.
+    @param seed: the seed of the Poisson arrival streams.
+
+    Returns
+    ----------
+    @return a DeliveryResult, else None if a parameter is invalid.
+
+    Examples
+    ----------
+    >>> streams = productStreams(N_burst=0.05)
+    >>> result = simulateDelivery(streams, links=4, capacity=40e9, buffer=8e12, duration=3600)
+    >>> print result.percentiles('OCLD')
+    >>> {50: 25.12, 95: 47.66, 99: 49.59}
+    """
+    if type(streams) != list or not all(type(stream) == Stream and stream.isValid() for stream in streams):
+        return None
+
+    if type(links) != int or links < 1 or not _isNumber(capacity) or capacity <= 0:
+        return None
+
+    if not _isNumber(buffer) or buffer <= 0 or policy not in POLICIES or not _isNumber(duration) or duration < 0:
+        return None
+
+    names = sorted(set(stream.product for stream in streams))
+    overheads = _overheads(overhead, names)
+
+    if overheads is None:
+        return None
+
+    started = time.perf_counter()
+
+    # The per product records, indexed as names.
+    latencies = [[] for name in names]
+    drops = [[] for name in names]
+    blocked = [[] for name in names]
+    waits = [[] for name in names]
+    times = [0.0]
+    occupancy = [0.0]
+
+    heap = []
+    counter = itertools.count()
+    arrivals = []
+    for i, stream in enumerate(streams):
+        rng = np.random.default_rng(np.random.SeedSequence([seed, i]))
+        arrivals.append(_arrivals(stream, duration, rng))
+        first = next(arrivals[i], None)
+        if first is not None:
+            heap.append((first, next(counter), _ARRIVAL, i))
+
+    heapq.heapify(heap)
+
+    kinds = [(names.index(stream.product), float(stream.size), stream.count) for stream in streams]
+    queue = deque()
+    held = deque()
+    free = links
+    used = 0.0
+    events = 0
+    now = 0.0
+    block = policy == 'block'
+
+    push = heapq.heappush
+    pop = heapq.heappop
+
+    while heap:
+        now, sequence, kind, data = pop(heap)
+        events += 1
+
+        if kind == _ARRIVAL:
+            following = next(arrivals[data], None)
+            if following is not None:
+                push(heap, (following, next(counter), _ARRIVAL, data))
+
+            product, size, count = kinds[data]
+
+            if size > buffer:
+                drops[product].extend([now] * count)
+                continue
+
+            for n in range(count):
+                if held or used + size > buffer:
+                    if block:
+                        held.append((product, size, now))
+                        blocked[product].append(now)
+                    else:
+                        drops[product].append(now)
+                else:
+                    used += size
+                    queue.append((product, size, now))
+        else:
+            product, size, arrived = data
+            latencies[product].append(now - arrived)
+            used -= size
+            free += 1
+
+            # Admit the products held back, in order, while they fit.
+            while held and used + held[0][1] <= buffer:
+                item = held.popleft()
+                waits[item[0]].append(now - item[2])
+                used += item[1]
+                queue.append(item)
+
+        # Start sending on the free links.
+        while free and queue:
+            item = queue.popleft()
+            free -= 1
+            push(heap, (now + overheads[item[0]] + item[1] / capacity, next(counter), _COMPLETE, item))
+
+        if used != occupancy[-1]:
+            times.append(now)
+            occupancy.append(used)
+
+    return DeliveryResult({name: np.array(latencies[i]) for i, name in enumerate(names)},
+                          np.array(times), np.array(occupancy),
+                          {name: np.array(drops[i]) for i, name in enumerate(names)},
+                          {name: np.array(blocked[i]) for i, name in enumerate(names)},
+                          {name: np.array(waits[i]) for i, name in enumerate(names)},
+                          events, time.perf_counter() - started, now)
+
+# ******************************
+#
+# INTERNAL HELPERS
+#
+# ******************************
+
+
+def _arrivals(stream, duration, rng):
+    """
+    Generates a stream's arrival times before the end of the simulation.
+
+    Parameters
+    ----------
+    @param stream: the Stream.
+    @param duration: the end of the arrivals in seconds.
+    @param rng: the random number generator, for Poisson streams.
+
+    Returns
+    ----------
+    @return a generator of increasing arrival times in seconds.
+    """
+    if not stream.poisson:
+        # Multiples of the interval, so the times do not drift.
+        for n in itertools.count():
+            arrival = stream.start + n * stream.interval
+            if arrival >= duration:
+                return
+            yield arrival
+
+    last = float(stream.start)
+    while True:
+        batch = last + np.cumsum(rng.exponential(stream.interval, BATCH))
+        for arrival in batch.tolist():
+            if arrival >= duration:
+                return
+            yield arrival
+        last = batch[-1]
+
+# ******************************
+
+def _overheads(overhead, names):
+    """
+    Gets the per product overheads.
+
+    Returns
+    ----------
+    @return a list of overheads in seconds, indexed as names, else None
+            if an overhead is invalid.
+    """
+    if type(overhead) == dict:
+        if not set(overhead) <= set(names):
+            return None
+        overheads = [overhead.get(name, 0.0) for name in names]
+    else:
+        overheads = [overhead] * len(names)
+
+    if not all(_isNumber(value) and value >= 0 for value in overheads):
+        return None
+
+    return [float(value) for value in overheads]
+
+# ******************************
+
+def _isNumber(value):
+    """
+    Checks that a value is a real number (not a bool).
+    """
+    return type(value) in (int, float) or (isinstance(value, np.number) and value.dtype.kind in ('i', 'u', 'f'))
@@ -0,0 +1,285 @@
+"""
+**************************************************************************
+
+ ExactArithmetic.py
+
+**************************************************************************
+ Description:
+
+ Exact integer/rational arithmetic on bit counts. Bit counts are kept
+ as Python ints, or Fractions where a division is not exact, so totals
+ at petabit scale (and beyond 2^53, where floats can no longer represent
+ every integer) do not lose precision. Also provides int64 overflow
+ checked numpy products and sums.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+from fractions import Fraction
+
+import numpy as np
+
+from main.src.DataConversions import UNITS
+
+# The largest value an int64 numpy array can hold.
+INT64_MAX = int(np.iinfo(np.int64).max)
+
+
+def toExact(value):
+    """
+    Converts a number to an exact int or Fraction. Ints are returned
+    unchanged (the fast path), and Fractions with a denominator of 1
+    become ints. Integral floats become ints; other floats are read
+    via their shortest decimal representation, so 0.1 becomes 1/10
+    rather than the binary approximation of 0.1. Decimal strings such
+    as '2.1' and numpy scalars are also accepted.
+
+    Parameters
+    ----------
+    @param value: the int/float/Fraction/string value to convert.
+
+    Returns
+    ----------
+    @return the value as an int or Fraction, else None if the value
+            is not a finite number.
+
+    Examples
+    ----------
+    >>> print toExact(2.0)
+    >>> 2
+    >>> print toExact(0.1)
+    >>> 1/10
+    >>> print toExact(Fraction(4, 2))
+    >>> 2
+    """
+    if type(value) == int:
+        return value
+    elif type(value) == Fraction:
+        return value.numerator if value.denominator == 1 else value
+    elif isinstance(value, (bool, np.bool_)):
+        return None
+    elif isinstance(value, (int, np.integer)):
+        return int(value)
+    elif isinstance(value, (float, np.floating)):
+        value = float(value)
+        if value != value or value in (float('inf'), float('-inf')):
+            return None
+        elif value.is_integer():
+            return int(value)
+        else:
+            return Fraction(repr(value))
+    elif isinstance(value, str):
+        try:
+            return toExact(Fraction(value.strip()))
+        except (ValueError, ZeroDivisionError):
+            return None
+    else:
+        return None
+
+# ******************************
+
+def exactDivide(numerator, denominator):
+    """
+    Divides two exact values. The result is an int when the division
+    is exact, else a Fraction.
+
+    Parameters
+    ----------
+    @param numerator: the int/Fraction value to divide.
+    @param denominator: the non-zero int/Fraction value to divide by.
+
+    Returns
+    ----------
+    @return the quotient as an int or Fraction.
+
+    Examples
+    ----------
+    >>> print exactDivide(10, 5)
+    >>> 2
+    >>> print exactDivide(10, 4)
+    >>> 5/2
+    """
+    if type(numerator) == int and type(denominator) == int:
+        if numerator % denominator == 0:
+            return numerator // denominator
+        else:
+            return Fraction(numerator, denominator)
+    else:
+        return toExact(Fraction(numerator) / Fraction(denominator))
+
+# ******************************
+
+def exactConvert(value, src='bit', dst='bit'):
+    """
+    Exact version of DataConversions.convert(). Converts a value
+    between any two supported bit or byte units without rounding.
+    Passing the value as a decimal string (e.g. '2.1') avoids float
+    representation error entirely.
+
+    Parameters
+    ----------
+    @param value: the int/float/Fraction/string value to convert.
+    @param src: the current unit of the value.
+    @param dst: the desired unit of the value.
+
+    Returns
+    ----------
+    @return the converted value as an int or Fraction, else None if
+            the value is invalid or negative, or a unit is invalid.
+
+    Examples
+    ----------
+    >>> print exactConvert('2.1', 'GB', 'bit')
+    >>> 16800000000
+    >>> print exactConvert(1, 'bit', 'kbit')
+    >>> 1/1000
+    """
+    exact = toExact(value)
+
+    try:
+        src_bits = UNITS[src]
+        dst_bits = UNITS[dst]
+    except (KeyError, TypeError):
+        return None
+
+    if exact is None or exact < 0:
+        return None
+
+    return exactDivide(exact * src_bits, dst_bits)
+
+# ******************************
+
+def checkedProduct(*factors):
+    """
+    Computes the element-wise product of integer factors (scalars or
+    broadcastable numpy arrays) with int64 overflow detection, e.g.
+    N_chan * N_bin * N_sub * N_pol * N_bit. The product is computed in
+    int64, the fast path: if the product of the factors' largest
+    magnitudes fits in an int64, no element can overflow and the factors
+    are simply multiplied. Otherwise, before each multiplication the
+    operands are checked against INT64_MAX; if any element would
+    overflow, the product is recomputed with Python ints and returned as
+    an object array, so it is always exact and never silently wraps
+    around.
+
+    Parameters
+    ----------
+    @param factors: the integer factors to multiply.
+
+    Returns
+    ----------
+    @return an int64 numpy array if the product fits, else an object
+            numpy array of exact Python ints. None is returned if any
+            factor is not an integer.
+
+    Examples
+    ----------
+    >>> print checkedProduct(4096, 2048, 180, 4, 64).dtype
+    >>> int64
+    >>> print checkedProduct(pow(2, 40), [1, pow(2, 30)])
+    >>> [1099511627776 1180591620717411303424]
+    """
+    arrays = [np.asarray(factor) for factor in factors]
+
+    for array in arrays:
+        if array.dtype.kind not in ('i', 'u', 'O'):
+            return None
+
+    if any(array.dtype.kind == 'O' or (array.dtype.kind == 'u' and array.size and array.max() > INT64_MAX)
+           for array in arrays):
+        return _objectProduct(arrays)
+
+    # If the product of the largest magnitudes fits, no element can overflow.
+    bound = 1
+    for array in arrays:
+        if array.size:
+            bound *= max(abs(int(array.max())), abs(int(array.min())))
+    if bound <= INT64_MAX:
+        product = np.asarray(arrays[0], dtype=np.int64)
+        for array in arrays[1:]:
+            product = product * np.asarray(array, dtype=np.int64)
+        return product
+
+    product = np.asarray(arrays[0], dtype=np.int64)
+    for array in arrays[1:]:
+        array = np.asarray(array, dtype=np.int64)
+        limit = np.abs(array)
+        unsafe = np.abs(product) > (INT64_MAX // np.where(limit == 0, 1, limit))
+        if np.any(unsafe):
+            return _objectProduct(arrays)
+        product = product * array
+
+    return product
+
+# ******************************
+
+def _objectProduct(arrays):
+    """
+    Computes the exact product of integer arrays using Python ints.
+
+    Parameters
+    ----------
+    @param arrays: the numpy arrays to multiply.
+
+    Returns
+    ----------
+    @return an object numpy array of Python ints.
+    """
+    product = np.asarray(arrays[0]).astype(object)
+    for array in arrays[1:]:
+        product = np.multiply(product, np.asarray(array).astype(object), dtype=object)
+
+    return np.asarray(product, dtype=object)
+
+# ******************************
+
+def exactSum(values):
+    """
+    Sums integer (or exact) values without loss of precision. Integer
+    numpy arrays whose worst case total fits in an int64 are summed in
+    numpy (the fast path); anything else is summed with Python ints and
+    Fractions.
+
+    Parameters
+    ----------
+    @param values: the values to sum (array like).
+
+    Returns
+    ----------
+    @return the exact total as an int or Fraction, else None if any
+            value is not a finite number.
+
+    Examples
+    ----------
+    >>> print exactSum([pow(2, 62), pow(2, 62), 1])
+    >>> 9223372036854775809
+    """
+    array = np.asarray(values)
+
+    if array.dtype.kind in ('i', 'u') and array.size > 0:
+        worst = max(abs(int(array.max())), abs(int(array.min())))
+        if worst * array.size <= INT64_MAX:
+            return int(array.sum(dtype=np.int64))
+
+    total = 0
+    for value in array.ravel().tolist():
+        exact = toExact(value)
+        if exact is None:
+            return None
+        total += exact
+
+    return toExact(total)
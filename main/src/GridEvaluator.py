@@ -0,0 +1,422 @@
+"""
+**************************************************************************
+
+ GridEvaluator.py
+
+**************************************************************************
+ Description:
+
+ Evaluates data product sizes over dense parameter grids (e.g. N_chan x
+ N_bin x N_sub x N_pol x N_bit x N_cand x N_beam) that are too large to
+ hold in memory. The Cartesian product is walked in cache sized chunks,
+ each chunk is computed by broadcasting, and the results are written
+ straight into memory mapped .npy files, one per size component. Peak
+ memory is bounded by the chunk size, not the grid size.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import inspect
+import itertools
+import os
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from main.src.DataQuantityFunctions import *
+from main.src.ExactArithmetic import INT64_MAX
+
+# For each product: the size function and the components function.
+PRODUCTS = {
+    'OCLD': (ocldSize, ocldComponents),
+    'SPOCLD': (spocldSize, spocldComponents),
+    'PTD': (ptdSize, ptdComponents),
+    'DSD': (dsdSize, dsdComponents),
+    'AVG': (avgSize, avgComponents),
+    'TOA': (toaListSize, toaListComponents),
+    'RES': (residualsSize, residualsComponents),
+    'ALERT': (alertSize, alertComponents),
+}
+
+# The default number of grid points per chunk (512 KB per float64 array,
+# so a chunk's working arrays stay in cache).
+CHUNK_SIZE = 65536
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class GridPlan(object):
+    """
+    A validated grid evaluation: the size functions, the axes and fixed
+    parameters, and the outputs to produce. Created by planGrid().
+    """
+
+    __slots__ = ('function', 'components', 'values', 'parameters', 'chunkSize', 'shape', 'size', 'dtype',
+                 'outputs', 'perScan')
+
+    def __init__(self, function, components, values, parameters, chunkSize, dtype):
+        self.function = function
+        self.components = components
+        self.values = values            # The axes, in grid order.
+        self.parameters = parameters    # The fixed parameter values.
+        self.chunkSize = chunkSize
+        self.shape = tuple(axis.size for axis in values.values())
+        self.size = int(np.prod(self.shape, dtype=np.int64))
+        self.perScan = 'N_beam' in values or 'N_beam' in parameters
+        self.dtype = dtype              # The output dtype, int64 or float64.
+
+        self.outputs = list(COMPONENTS) if components is not None else []
+        self.outputs.append('total')
+        if self.perScan:
+            self.outputs.append('scan')
+
+    # ******************************
+
+    def chunks(self):
+        """
+        Splits the grid into chunks, as chunks() does.
+        """
+        return chunks(self.shape, self.chunkSize)
+
+    # ******************************
+
+    def evaluate(self, index):
+        """
+        Computes the outputs for one chunk by broadcasting.
+
+        Parameters
+        ----------
+        @param index: the chunk index, as given by chunks().
+
+        Returns
+        ----------
+        @return a dictionary mapping output names to arrays (or scalars)
+                that broadcast to the chunk's shape.
+        """
+        # A scalar for each fixed axis, and an open mesh over the others.
+        arguments = dict(self.parameters)
+        ndim = len(index) - sum(1 for i in index if type(i) == int)
+        position = 0
+
+        for name, i in zip(self.values, index):
+            values = self.values[name][i]
+            if self.dtype.kind == 'f':
+                values = values.astype(np.float64)
+
+            if type(i) == int:
+                arguments[name] = values
+            else:
+                mesh = [1] * ndim
+                mesh[position] = -1
+                arguments[name] = values.reshape(mesh)
+                position += 1
+
+        N_beam = arguments.pop('N_beam', None)
+        sizes = self.components(**arguments) if self.components is not None else {}
+        sizes['total'] = self.function(**arguments)
+        if self.perScan:
+            sizes['scan'] = scanVolume(sizes['total'], N_beam)
+
+        return sizes
+
+    # ******************************
+
+    def write(self, index, arrays):
+        """
+        Computes one chunk and writes it into output arrays.
+
+        Parameters
+        ----------
+        @param index: the chunk index, as given by chunks().
+        @param arrays: a dictionary mapping output names to arrays with
+                       the grid shape.
+
+        Returns
+        ----------
+        @return the number of grid points written.
+        """
+        sizes = self.evaluate(index)
+        count = 0
+
+        for name in self.outputs:
+            view = arrays[name][index]
+            view[...] = sizes[name]
+            count = view.size
+
+        return count
+
+    # ****************************************************************************************************
+
+# ******************************
+#
+# FUNCTIONS
+#
+# ******************************
+
+
+def chunks(shape, chunkSize=CHUNK_SIZE):
+    """
+    Splits a grid into chunks of at most chunkSize points. Each chunk
+    fixes the leading axes to single indices, takes a slice of one axis,
+    and spans every trailing axis in full, so it covers a contiguous
+    range of the flattened (C order) grid and can be computed by
+    broadcasting.
+
+    Parameters
+    ----------
+    @param shape: the grid shape.
+    @param chunkSize: the maximum number of points per chunk.
+
+    Returns
+    ----------
+    @return a generator of (start, index) tuples, where start is the
+            flat index of the chunk's first point and index is a tuple of
+            ints (leading axes), a slice, and full slices (trailing axes).
+    """
+    shape = tuple(shape)
+
+    if not shape:
+        yield 0, ()
+        return
+
+    # Find the first axis whose trailing block fits in a chunk.
+    axis = len(shape) - 1
+    inner = 1
+    while axis > 0 and inner * shape[axis] <= chunkSize:
+        inner *= shape[axis]
+        axis -= 1
+
+    run = max(chunkSize // inner, 1)
+    trailing = (slice(None),) * (len(shape) - axis - 1)
+    start = 0
+
+    for leading in itertools.product(*[range(n) for n in shape[:axis]]):
+        for first in range(0, shape[axis], run):
+            last = min(first + run, shape[axis])
+            yield start, leading + (slice(first, last),) + trailing
+            start += (last - first) * inner
+
+# ******************************
+
+def planGrid(product, axes, chunkSize=CHUNK_SIZE, **parameters):
+    """
+    Validates a grid evaluation and prepares the plan used to compute it
+    chunk by chunk.
+
+    Parameters
+    ----------
+    The same as evaluateGrid(), without the directory and progress function.
+
+    Returns
+    ----------
+    @return the GridPlan, else None if the product, an axis, a parameter
+            or the chunk size is invalid. The outputs are int64 if every
+            axis and parameter is an integer and no output can pass the
+            int64 limit, else float64 (so sizes past 2^53 are rounded).
+    """
+    if type(chunkSize) != int or chunkSize < 1 or type(axes) != dict:
+        return None
+
+    if product in PRODUCTS:
+        function, components = PRODUCTS[product]
+    elif callable(product):
+        function, components = product, None
+    else:
+        return None
+
+    names = _parameterNames(function)
+
+    values = {}
+    for name, axis in axes.items():
+        axis = np.asarray(axis)
+        if axis.ndim != 1 or axis.size == 0 or axis.dtype.kind not in ('i', 'u', 'f'):
+            return None
+        values[name] = axis
+
+    for name in list(values) + list(parameters):
+        if name != 'N_beam' and names is not None and name not in names:
+            return None
+
+    # Integer grids are written as (exact) int64, unless an output could
+    # overflow it, and anything else as float64.
+    kinds = [axis.dtype.kind for axis in values.values()]
+    kinds += [np.asarray(value).dtype.kind for value in parameters.values()]
+    integer = 'f' not in kinds and _fitsInt64(function, components, values, parameters)
+
+    return GridPlan(function, components, values, parameters, chunkSize, np.dtype(np.int64 if integer else np.float64))
+
+# ******************************
+
+def evaluateGrid(product, axes, directory, chunkSize=CHUNK_SIZE, progress=None, **parameters):
+    """
+    Evaluates a product size over the Cartesian product of parameter axes,
+    writing each size component, the total size, and (if N_beam is given)
+    the volume per scan into memory mapped .npy files in a directory.
+    The grid axes follow the order of the axes dictionary.
+
+    Parameters
+    ----------
+    @param product: a product name in PRODUCTS (e.g. 'OCLD'), or any size
+                    function (e.g. a compiled schema evaluator), for which
+                    only the total is written.
+    @param axes: a dictionary mapping parameter names to 1-D arrays of values.
+    @param directory: the output directory (created if needed).
+    @param chunkSize: the maximum number of grid points computed at once.
+    @param progress: an optional function called as progress(done, total)
+                     after every chunk.
+    @param parameters: fixed parameter values.
+
+    Returns
+    ----------
+    @return a dictionary mapping output names ('attributes', ..., 'total',
+            'scan') to read only memory mapped arrays with the grid shape,
+            else None if the product, an axis, a parameter or the chunk
+            size is invalid.
+
+    Examples
+    ----------
+    >>> axes = {'N_chan': np.arange(64, 4097, 64), 'N_cand': np.arange(1, 2001)}
+    >>> outputs = evaluateGrid('OCLD', axes, 'grid', N_beam=1500)
+    >>> print outputs['scan'].shape
+    >>> (64, 2000)
+    """
+    plan = planGrid(product, axes, chunkSize, **parameters)
+
+    if plan is None:
+        return None
+
+    os.makedirs(directory, exist_ok=True)
+    arrays = {}
+    for name in plan.outputs:
+        arrays[name] = open_memmap(os.path.join(directory, name + '.npy'), mode='w+', dtype=plan.dtype,
+                                   shape=plan.shape)
+
+    np.savez(os.path.join(directory, 'axes.npz'), **plan.values)
+
+    done = 0
+    for start, index in plan.chunks():
+        done += plan.write(index, arrays)
+        if progress is not None:
+            progress(done, plan.size)
+
+    for array in arrays.values():
+        array.flush()
+
+    del arrays
+    return {name: np.load(os.path.join(directory, name + '.npy'), mmap_mode='r') for name in plan.outputs}
+
+# ******************************
+
+def loadGrid(directory):
+    """
+    Opens the outputs of a grid evaluation, memory mapped.
+
+    Parameters
+    ----------
+    @param directory: the output directory.
+
+    Returns
+    ----------
+    @return a tuple of the axes (a dictionary of 1-D arrays, in grid order)
+            and the outputs (a dictionary of read only memory mapped
+            arrays), else None if the directory holds no grid.
+    """
+    path = os.path.join(directory, 'axes.npz')
+
+    if not os.path.isfile(path):
+        return None
+
+    with np.load(path) as archive:
+        axes = {name: archive[name] for name in archive.files}
+
+    outputs = {}
+    for name in list(COMPONENTS) + ['total', 'scan']:
+        path = os.path.join(directory, name + '.npy')
+        if os.path.isfile(path):
+            outputs[name] = np.load(path, mmap_mode='r')
+
+    return axes, outputs
+
+# ******************************
+#
+# INTERNAL HELPERS
+#
+# ******************************
+
+
+def _parameterNames(function):
+    """
+    Gets the names of a size function's parameters.
+
+    Parameters
+    ----------
+    @param function: the size function.
+
+    Returns
+    ----------
+    @return the set of names, else None if they cannot be determined
+            (in which case every name is accepted).
+    """
+    evaluator = getattr(function, 'parameters', None)
+
+    if type(evaluator) == dict:
+        return set(evaluator)
+
+    try:
+        return set(inspect.signature(function).parameters)
+    except (TypeError, ValueError):
+        return None
+
+# ******************************
+
+def _fitsInt64(function, components, values, parameters):
+    """
+    Checks whether every output of an integer grid fits in an int64. Each
+    size formula is monotonic in each of its parameters, so the largest
+    outputs lie at the corners of the grid (every axis at its smallest or
+    largest value). The outputs at all the corners are computed at once
+    with exact Python ints, in object arrays.
+
+    Parameters
+    ----------
+    @param function: the size function.
+    @param components: the components function, or None.
+    @param values: the axes, in grid order.
+    @param parameters: the fixed parameter values.
+
+    Returns
+    ----------
+    @return True if no output can pass the int64 limit, else False.
+    """
+    arguments = {name: np.asarray(value).astype(object) for name, value in parameters.items()}
+
+    for position, (name, axis) in enumerate(values.items()):
+        mesh = [1] * len(values)
+        mesh[position] = -1
+        arguments[name] = np.array([axis.min().item(), axis.max().item()], dtype=object).reshape(mesh)
+
+    N_beam = arguments.pop('N_beam', None)
+    sizes = list(components(**arguments).values()) if components is not None else []
+    sizes.append(function(**arguments))
+    if N_beam is not None:
+        sizes.append(scanVolume(sizes[-1], N_beam))
+
+    return all(abs(int(size)) <= INT64_MAX for output in sizes for size in np.ravel(output))
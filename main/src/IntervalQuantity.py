@@ -0,0 +1,561 @@
+"""
+**************************************************************************
+
+ IntervalQuantity.py
+
+**************************************************************************
+ Description:
+
+ Represents data quantities known only to lie within a range, e.g. the
+ partly averaged timing product of Table 12, which lies between
+ N_bin*1*1*N_pol*N_bit and N_bin*N_chan*N_sub*N_pol*N_bit bits. Lower
+ and upper bounds are carried together through arithmetic, and through
+ the product size formulas, in a single vectorised pass.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import numpy as np
+
+from main.src.DataConversions import convertArray
+from main.src.DataFormatter import formatBitsArray
+from main.src.DataQuantity import DataQuantity
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class IntervalQuantity(object):
+    """
+    An interval of bits, [lower, upper], or an array of such intervals.
+    The bounds are stored together as one float64 array of shape
+    (2,) + shape, so every operation updates both bounds at once.
+
+    As for DataQuantity, negative bounds are clamped to zero bits. Since
+    bounds are never negative, interval arithmetic reduces to:
+
+    [a, b] + [c, d] = [a + c, b + d]
+    [a, b] - [c, d] = [a - d, b - c]
+    [a, b] * [c, d] = [a * c, b * d]
+    [a, b] / [c, d] = [a / d, b / c]
+    [a, b] // [c, d] = [a // d, b // c]
+
+    As for DataQuantity, a number minus (or divided by) an interval is
+    not supported, though a DataQuantity minus (or divided by) an
+    interval is.
+
+    Intervals can also be used as parameters (e.g. N_chan between 1 and
+    4096) and passed through the size formulas with evaluateBounds().
+    """
+
+    __slots__ = ('_bounds',)
+
+    # Make numpy and DataQuantity defer to the reflected operators of this class.
+    __array_ufunc__ = None
+    _dataQuantityOperand = True
+
+    # ******************************
+    #
+    # Constructor.
+    #
+    # ******************************
+
+    def __init__(self, lower=0, upper=None):
+        """
+        Default constructor.
+
+        Parameters
+        ----------
+        @param lower: the lower bound in bits (a number or array like).
+        @param upper: the upper bound in bits. If None the interval is
+                      exactly the lower bound. If the bounds are given the
+                      wrong way round they are swapped.
+
+        Returns
+        ----------
+        N/A
+        """
+        lower = _asBits(lower)
+        upper = lower if upper is None else _asBits(upper)
+
+        try:
+            lower, upper = np.broadcast_arrays(lower, upper)
+        except ValueError:
+            lower = upper = np.zeros(0)
+
+        bounds = np.array([np.minimum(lower, upper), np.maximum(lower, upper)])
+        self._bounds = _clamp(bounds)
+
+    # ******************************
+
+    @staticmethod
+    def _trusted(bounds):
+        """
+        Internal constructor that skips validation. Only for use where
+        bounds is a float64 array of shape (2,) + shape holding ordered,
+        non-negative bounds.
+
+        Parameters
+        ----------
+        @param bounds: the stacked lower and upper bounds.
+
+        Returns
+        ----------
+        @return a new interval quantity.
+        """
+        interval = _new(IntervalQuantity)
+        interval._bounds = bounds
+        return interval
+
+    # ******************************
+
+    @property
+    def lower(self):
+        """
+        The lower bound in bits (a float, or an array of floats).
+        """
+        return _unwrap(self._bounds[0])
+
+    @property
+    def upper(self):
+        """
+        The upper bound in bits (a float, or an array of floats).
+        """
+        return _unwrap(self._bounds[1])
+
+    @property
+    def bounds(self):
+        """
+        The stacked bounds, a read only array of shape (2,) + shape.
+        """
+        view = self._bounds.view()
+        view.flags.writeable = False
+        return view
+
+    # ******************************
+
+    def width(self):
+        """
+        Gets the width of the interval(s), upper - lower.
+
+        Returns
+        ----------
+        @return the width in bits (a float, or an array of floats).
+        """
+        return _unwrap(self._bounds[1] - self._bounds[0])
+
+    # ******************************
+
+    def contains(self, bits):
+        """
+        Checks whether a number of bits lies within the interval(s).
+
+        Parameters
+        ----------
+        @param bits: the number of bits (a number, array like or DataQuantity).
+
+        Returns
+        ----------
+        @return True if lower <= bits <= upper (or an array of results).
+        """
+        if type(bits) == DataQuantity:
+            bits = float(bits.bits)
+
+        inside = (self._bounds[0] <= bits) & (bits <= self._bounds[1])
+        return inside.item() if inside.ndim == 0 else inside
+
+    # ******************************
+
+    def __str__(self):
+        """
+        Overridden method that provides a neater string representation.
+
+        Returns
+        ----------
+        @return a string describing the bounds in bits.
+        """
+        if self._bounds.ndim == 1:
+            return '[' + str(self.lower) + ', ' + str(self.upper) + '] bits'
+        else:
+            return '[' + str(self._bounds[0]) + ', ' + str(self._bounds[1]) + '] bits'
+
+    def __repr__(self):
+        return 'IntervalQuantity(' + repr(self._bounds[0].tolist()) + ', ' + repr(self._bounds[1].tolist()) + ')'
+
+    # ******************************
+
+    def get(self, units='bit'):
+        """
+        Gets the bounds in the user specified units.
+
+        Parameters
+        ----------
+        @param units: any bit or byte unit.
+
+        Returns
+        ----------
+        @return a tuple containing the lower and upper bounds in the desired
+                units, else None if the unit is invalid.
+
+        Examples
+        --------
+        >>> interval = IntervalQuantity(8000, 16000)
+        >>> print interval.get('kB')
+        >>> (1.0, 2.0)
+        """
+        converted = convertArray(self._bounds, 'bit', units)
+
+        if converted is None:
+            return None
+        else:
+            return _unwrap(converted[0]), _unwrap(converted[1])
+
+    # ******************************
+
+    def format(self, precision=2, system='SI', byteUnits=False):
+        """
+        Gets a textual description of the interval(s), with each bound in
+        its most readable unit.
+
+        Parameters
+        ----------
+        @param precision: the number of decimal places.
+        @param system: 'SI' or 'IEC'.
+        @param byteUnits: True to describe the data in bytes.
+
+        Returns
+        ----------
+        @return a string such as '[2.10 GB, 3.00 GB]' (or a numpy string
+                array), else None if the unit system or precision are invalid.
+        """
+        text = formatBitsArray(self._bounds, precision, system, byteUnits)
+
+        if text is None:
+            return None
+
+        text = np.char.add(np.char.add(np.char.add('[', text[0]), ', '), np.char.add(text[1], ']'))
+        return text.item() if text.ndim == 0 else text
+
+    # ******************************
+    #
+    # Arithmetic.
+    #
+    # ******************************
+
+    def __add__(self, other):
+        operands = _operands(self, other)
+        if operands is None:
+            return self
+        return _trusted(operands[0] + operands[1])
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        operands = _operands(self, other)
+        if operands is None:
+            return self
+        return _trusted(_clamp(operands[0] - _reverse(operands[1])))
+
+    def __rsub__(self, other):
+        if type(other) != DataQuantity:
+            return NotImplemented
+        bits = float(other.bits)
+        return _trusted(_clamp(bits - _reverse(self._bounds)))
+
+    def __mul__(self, other):
+        operands = _operands(self, other)
+        if operands is None:
+            return self
+        return _trusted(_clamp(operands[0] * operands[1]))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        """
+        Divides the interval(s). As for DataQuantity, None is returned if
+        a single divisor can be zero (or negative); for arrays, intervals
+        whose divisor can be zero become NaN.
+        """
+        operands = _operands(self, other)
+        if operands is None:
+            return self
+        return _divide(operands[0], operands[1], np.true_divide)
+
+    def __floordiv__(self, other):
+        """
+        Floor divides the interval(s), with the same handling of divisors
+        that can be zero as division.
+        """
+        operands = _operands(self, other)
+        if operands is None:
+            return self
+        return _divide(operands[0], operands[1], np.floor_divide)
+
+    def __rtruediv__(self, other):
+        """
+        Divides a DataQuantity by the interval(s), so the upper bound of
+        the result comes from the lower bound of the interval.
+        """
+        if type(other) != DataQuantity:
+            return NotImplemented
+        bits = np.full(self._bounds.shape, float(other.bits))
+        return _divide(bits, self._bounds, np.true_divide)
+
+    def __rfloordiv__(self, other):
+        if type(other) != DataQuantity:
+            return NotImplemented
+        bits = np.full(self._bounds.shape, float(other.bits))
+        return _divide(bits, self._bounds, np.floor_divide)
+
+    __div__ = __truediv__
+    __rdiv__ = __rtruediv__
+
+    # ****************************************************************************************************
+
+
+# ******************************
+#
+# INTERNAL HELPERS
+#
+# ******************************
+
+_new = object.__new__
+_trusted = IntervalQuantity._trusted
+
+
+def _asBits(value):
+    """
+    Converts a bound to a float64 array.
+
+    Parameters
+    ----------
+    @param value: a number, array like or DataQuantity.
+
+    Returns
+    ----------
+    @return a float64 numpy array, zero if the value is not numeric.
+    """
+    if type(value) == DataQuantity:
+        return np.asarray(float(value.bits))
+
+    try:
+        array = np.asarray(value)
+    except ValueError:
+        return np.zeros(0)
+
+    if array.dtype.kind in ('i', 'u', 'f'):
+        return array.astype(np.float64)
+    else:
+        return np.zeros(array.shape)
+
+# ******************************
+
+def _clamp(bounds):
+    """
+    Clamps negative bounds to zero in place, as for DataQuantity.
+
+    Parameters
+    ----------
+    @param bounds: a float64 numpy array that may be modified.
+
+    Returns
+    ----------
+    @return the clamped array.
+    """
+    return np.maximum(bounds, 0.0, out=bounds)
+
+# ******************************
+
+def _unwrap(array):
+    """
+    Converts a 0-d array to a float, leaving other arrays unchanged.
+
+    Parameters
+    ----------
+    @param array: a numpy array.
+
+    Returns
+    ----------
+    @return a float, or the array.
+    """
+    return float(array) if array.ndim == 0 else array
+
+# ******************************
+
+def _pad(bounds, ndim):
+    """
+    Reshapes stacked bounds so that they broadcast against bounds with
+    more dimensions, by inserting axes after the leading (lower/upper) axis.
+
+    Parameters
+    ----------
+    @param bounds: an array of shape (2,) + shape.
+    @param ndim: the number of dimensions wanted.
+
+    Returns
+    ----------
+    @return a view of the bounds with ndim dimensions.
+    """
+    padding = (1,) * (ndim - bounds.ndim)
+    return bounds.reshape((2,) + padding + bounds.shape[1:])
+
+# ******************************
+
+def _operands(interval, other):
+    """
+    Prepares the operands of an arithmetic operation, converting the
+    other operand to stacked bounds aligned with the interval's bounds.
+
+    Parameters
+    ----------
+    @param interval: the IntervalQuantity.
+    @param other: an IntervalQuantity, DataQuantity, int, float or numeric
+                  numpy array.
+
+    Returns
+    ----------
+    @return a tuple containing the interval's bounds and the other operand,
+            as a float (applying to both bounds) or aligned stacked bounds,
+            else None if the operand is unsupported.
+    """
+    if type(other) == IntervalQuantity:
+        bounds = other._bounds
+    elif type(other) == int or type(other) == float:
+        return interval._bounds, float(other)
+    elif type(other) == DataQuantity:
+        return interval._bounds, float(other.bits)
+    elif type(other) == np.ndarray and other.dtype.kind in ('i', 'u', 'f'):
+        bounds = np.broadcast_to(other.astype(np.float64, copy=False), (2,) + other.shape)
+    else:
+        return None
+
+    ndim = max(bounds.ndim, interval._bounds.ndim)
+    return _pad(interval._bounds, ndim), _pad(bounds, ndim)
+
+# ******************************
+
+def _divide(bounds, divisor, divide):
+    """
+    Divides stacked bounds by a divisor, pairing each bound with the
+    opposite bound of the divisor.
+
+    Parameters
+    ----------
+    @param bounds: the stacked bounds to divide.
+    @param divisor: aligned stacked bounds, or a float applying to both bounds.
+    @param divide: np.true_divide or np.floor_divide.
+
+    Returns
+    ----------
+    @return an IntervalQuantity, else None if a single divisor can be zero
+            (or negative). For arrays, intervals whose divisor can be zero
+            become NaN.
+    """
+    if type(divisor) == float:
+        return _trusted(divide(bounds, divisor)) if divisor > 0 else None
+
+    positive = divisor[0] > 0
+    if positive.ndim == 0:
+        return _trusted(divide(bounds, _reverse(divisor))) if positive else None
+    else:
+        return _trusted(divide(bounds, np.where(positive, _reverse(divisor), np.nan)))
+
+# ******************************
+
+def _reverse(bounds):
+    """
+    Swaps the lower and upper bounds of an operand.
+
+    Parameters
+    ----------
+    @param bounds: stacked bounds, or a float applying to both bounds.
+
+    Returns
+    ----------
+    @return the swapped bounds (a float is returned unchanged).
+    """
+    if type(bounds) == float:
+        return bounds
+    else:
+        return bounds[::-1]
+
+# ******************************
+#
+# FORMULA EVALUATION
+#
+# ******************************
+
+def evaluateBounds(function, decreasing=(), **parameters):
+    """
+    Evaluates a size formula over interval valued parameters, computing
+    the lower and upper bounds of the result in a single vectorised call.
+    Interval parameters are stacked along a new leading axis (lower
+    bounds first), so the formula sees arrays of shape (2,) + shape.
+
+    The bounds are correct for formulas that are monotone in each
+    parameter, such as every product size formula (sums and products of
+    non-negative parameters are non-decreasing). Parameters the formula
+    decreases with must be named in decreasing.
+
+    Parameters
+    ----------
+    @param function: the formula, e.g. DataQuantityFunctions.ocldSize.
+    @param decreasing: the names of parameters the formula decreases with.
+    @param parameters: the formula parameters; IntervalQuantity objects
+                       for ranges, and numbers or numpy arrays for fixed
+                       values (which broadcast as normal).
+
+    Returns
+    ----------
+    @return an IntervalQuantity containing the range of the result.
+
+    Examples
+    ----------
+    >>> N_chan = IntervalQuantity(1, 4096)
+    >>> N_sub = IntervalQuantity(1, 180)
+    >>> print evaluateBounds(timingCubeSize, N_chan=N_chan, N_sub=N_sub)
+    >>> [524288.0, 386547056640.0] bits
+    """
+    shapes = []
+    for value in parameters.values():
+        if type(value) == IntervalQuantity:
+            shapes.append(value._bounds.shape[1:])
+        else:
+            shapes.append(np.shape(value))
+
+    shape = np.broadcast_shapes(*shapes) if shapes else ()
+
+    arguments = {}
+    for name, value in parameters.items():
+        if type(value) == IntervalQuantity:
+            bounds = value._bounds
+            if name in decreasing:
+                bounds = bounds[::-1]
+            arguments[name] = _pad(bounds, len(shape) + 1)
+        else:
+            arguments[name] = value
+
+    result = np.asarray(function(**arguments))
+    if result.shape != (2,) + shape:
+        result = np.broadcast_to(result, (2,) + shape)
+
+    # The bounds of a monotone formula are already ordered, so only a
+    # conversion to float64 and clamping are needed.
+    return _trusted(_clamp(result.astype(np.float64)))
@@ -0,0 +1,552 @@
+"""
+**************************************************************************
+
+ MonteCarlo.py
+
+**************************************************************************
+ Description:
+
+ Monte Carlo estimation of data product volumes and rates. Parameters
+ that are uncertain (e.g. N_cand, the single pulse burst count or the
+ metadata size) are sampled from declared distributions, the size
+ formulas are evaluated on whole batches of samples at once, and the
+ results are summarised as percentiles of the volume and rate, per beam
+ and per scan.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import inspect
+
+import numpy as np
+
+from main.src.DataQuantity import DataQuantity
+from main.src.DataQuantityFunctions import ocldSize, spocldSize, ptdSize, dsdSize
+from main.src.DataRate import DataRate
+
+# ******************************
+#
+# DISTRIBUTIONS
+#
+# ******************************
+
+
+class Poisson(object):
+    """
+    A Poisson distribution, e.g. for the number of single pulse bursts
+    detected in a scan.
+    """
+
+    __slots__ = ('mean',)
+
+    def __init__(self, mean):
+        """
+        Default constructor.
+
+        Parameters
+        ----------
+        @param mean: the mean (expected count).
+        """
+        self.mean = mean
+
+    def isValid(self):
+        return _isNumber(self.mean) and self.mean >= 0
+
+    def sample(self, rng, size):
+        return rng.poisson(self.mean, size)
+
+    def __repr__(self):
+        return 'Poisson(' + repr(self.mean) + ')'
+
+# ******************************
+
+
+class Uniform(object):
+    """
+    A uniform distribution over [low, high]. If integer is True, only
+    whole numbers are drawn (both ends included), e.g. for N_cand.
+    """
+
+    __slots__ = ('low', 'high', 'integer')
+
+    def __init__(self, low, high, integer=False):
+        """
+        Default constructor.
+
+        Parameters
+        ----------
+        @param low: the smallest value.
+        @param high: the largest value.
+        @param integer: True to draw whole numbers only.
+        """
+        self.low = low
+        self.high = high
+        self.integer = integer
+
+    def isValid(self):
+        return _isNumber(self.low) and _isNumber(self.high) and self.low <= self.high
+
+    def sample(self, rng, size):
+        if self.integer:
+            return rng.integers(int(self.low), int(self.high), size, endpoint=True)
+        else:
+            return rng.uniform(self.low, self.high, size)
+
+    def __repr__(self):
+        return 'Uniform(' + repr(self.low) + ', ' + repr(self.high) + ', integer=' + repr(self.integer) + ')'
+
+# ******************************
+
+
+class Normal(object):
+    """
+    A normal distribution. Sizes and counts cannot be negative, so
+    negative samples are set to zero.
+    """
+
+    __slots__ = ('mean', 'sd')
+
+    def __init__(self, mean, sd):
+        """
+        Default constructor.
+
+        Parameters
+        ----------
+        @param mean: the mean.
+        @param sd: the standard deviation.
+        """
+        self.mean = mean
+        self.sd = sd
+
+    def isValid(self):
+        return _isNumber(self.mean) and _isNumber(self.sd) and self.sd >= 0
+
+    def sample(self, rng, size):
+        values = rng.normal(self.mean, self.sd, size)
+        return np.maximum(values, 0.0, out=values)
+
+    def __repr__(self):
+        return 'Normal(' + repr(self.mean) + ', ' + repr(self.sd) + ')'
+
+# ******************************
+
+
+class Empirical(object):
+    """
+    An empirical distribution, e.g. a histogram of values measured in
+    real scans. Either a list of values with their weights (counts), or
+    histogram bin edges with one weight per bin, in which case values
+    are drawn uniformly within the chosen bin.
+    """
+
+    __slots__ = ('values', 'weights', '_cdf')
+
+    def __init__(self, values, weights=None):
+        """
+        Default constructor.
+
+        Parameters
+        ----------
+        @param values: the observed values, or the histogram bin edges.
+        @param weights: the weight of each value or bin (default: equal).
+        """
+        self.values = np.asarray(values, dtype=np.float64)
+
+        if weights is None:
+            weights = np.ones(len(self.values))
+        self.weights = np.asarray(weights, dtype=np.float64)
+
+        self._cdf = None
+        if self.isValid():
+            self._cdf = np.cumsum(self.weights)
+            self._cdf /= self._cdf[-1]
+
+    def isValid(self):
+        return (self.values.ndim == 1 and self.weights.ndim == 1 and
+                len(self.values) - len(self.weights) in (0, 1) and len(self.weights) > 0 and
+                bool(np.all(self.weights >= 0)) and self.weights.sum() > 0 and
+                bool(np.all(np.isfinite(self.values))))
+
+    def sample(self, rng, size):
+        # Inverse CDF lookup, so drawing costs one binary search per sample.
+        index = np.searchsorted(self._cdf, rng.random(size), side='right')
+        np.minimum(index, len(self.weights) - 1, out=index)
+
+        if len(self.values) == len(self.weights):
+            return self.values[index]
+        else:
+            low = self.values[index]
+            return low + (self.values[index + 1] - low) * rng.random(size)
+
+    def __repr__(self):
+        return 'Empirical(' + repr(self.values.tolist()) + ', ' + repr(self.weights.tolist()) + ')'
+
+# ******************************
+#
+# MODELS
+#
+# ******************************
+
+# For each product: the size formula, and the default number of beams.
+MODELS = {
+    'OCLD': (ocldSize, 1500),
+    'SPOCLD': (spocldSize, 1500),
+    'PTD': (ptdSize, 16),
+    'DSD': (dsdSize, 16),
+}
+
+# The default observation length in seconds.
+T_SCAN = 180
+
+# The default percentiles reported.
+PERCENTILES = (5, 50, 95, 99)
+
+# The parameters shared by every beam in a scan.
+SCAN_PARAMETERS = ('N_beam', 'T_scan')
+
+# The largest number of beams whose volumes are drawn and summed one by
+# one for the volume per scan; the sum over more beams is approximated.
+EXACT_BEAMS = 64
+
+# ******************************
+#
+# RESULTS
+#
+# ******************************
+
+
+class SimulationResult(object):
+    """
+    The percentiles of a Monte Carlo simulation. The volumes are in bits,
+    the rates in bits per second; each is a numpy array with one entry
+    per percentile.
+    """
+
+    __slots__ = ('product', 'samples', 'percentiles', 'beam', 'scan', 'beamRate', 'scanRate')
+
+    def __init__(self, product, samples, percentiles, beam, scan, beamRate, scanRate):
+        self.product = product
+        self.samples = samples
+        self.percentiles = percentiles
+        self.beam = beam
+        self.scan = scan
+        self.beamRate = beamRate
+        self.scanRate = scanRate
+
+    # ******************************
+
+    def quantity(self, percentile, perScan=True):
+        """
+        Gets a volume percentile as a data quantity.
+
+        Parameters
+        ----------
+        @param percentile: one of the simulated percentiles, e.g. 99.
+        @param perScan: True for the volume per scan, False per beam.
+
+        Returns
+        ----------
+        @return the data quantity, else None if the percentile was not simulated.
+        """
+        index = self._index(percentile)
+
+        if index is None:
+            return None
+
+        return DataQuantity(float((self.scan if perScan else self.beam)[index]))
+
+    # ******************************
+
+    def rate(self, percentile, perScan=True):
+        """
+        Gets a rate percentile as a data rate.
+
+        Parameters
+        ----------
+        @param percentile: one of the simulated percentiles, e.g. 99.
+        @param perScan: True for the rate of a whole scan, False per beam.
+
+        Returns
+        ----------
+        @return the data rate, else None if the percentile was not simulated.
+        """
+        index = self._index(percentile)
+
+        if index is None:
+            return None
+
+        return DataRate(float((self.scanRate if perScan else self.beamRate)[index]))
+
+    # ******************************
+
+    def _index(self, percentile):
+        for i, p in enumerate(self.percentiles):
+            if p == percentile:
+                return i
+        return None
+
+    # ******************************
+
+    def __str__(self):
+        lines = [self.product + ' (' + str(self.samples) + ' samples)']
+        for i, p in enumerate(self.percentiles):
+            lines.append('p' + str(p) + ': ' + DataQuantity(float(self.scan[i])).format() + ' per scan, ' +
+                         DataRate(float(self.scanRate[i])).format())
+        return '\n'.join(lines)
+
+    # ****************************************************************************************************
+
+# ******************************
+#
+# SIMULATION
+#
+# ******************************
+
+
+def simulate(product, samples=1000000, percentiles=PERCENTILES, seed=0, batch=1000000, correlated=False,
+             **parameters):
+    """
+    Estimates the distribution of a data product's volume and rate by
+    Monte Carlo sampling. Each parameter may be fixed (a number) or
+    uncertain (a Poisson, Uniform, Normal or Empirical distribution).
+    The size formula is evaluated on a whole batch of samples per call.
+
+    As well as the size formula parameters, every product accepts N_beam
+    (the number of beams) and T_scan (the observation length in seconds).
+    The SPOCLD also accepts N_burst (bursts per second, default 1) and
+    N_events (the number of bursts in a scan, by default N_burst * T_scan),
+    so burst counts can be modelled directly, e.g. N_events=Poisson(180).
+
+    N_beam and T_scan are shared by every beam in a scan; the other
+    uncertain parameters are drawn independently for each beam, so the
+    volume per scan is the sum of N_beam independent volumes per beam.
+    For up to EXACT_BEAMS beams (e.g. the 16 timing beams) each beam's
+    volume is drawn and the volumes are summed. For more beams the sum
+    is drawn from a normal distribution with mean N_beam * m and
+    standard deviation sqrt(N_beam) * s, where m and s are the mean and
+    standard deviation of the simulated volumes per beam (the central
+    limit theorem). If correlated is True, every beam in a scan has the
+    same volume instead, e.g. when N_cand is driven by RFI seen by all
+    beams alike, so the volume per scan is one volume per beam times
+    N_beam, and its spread is about sqrt(N_beam) times wider.
+
+    Every distribution has its own random stream, derived from the seed
+    and the parameter name, so results are reproducible for a given seed
+    and batch size, and adding a parameter does not change the samples
+    drawn for the others.
+
+    Parameters
+    ----------
+    @param product: 'OCLD', 'SPOCLD', 'PTD' or 'DSD'.
+    @param samples: the number of samples (scans).
+    @param percentiles: the percentiles to report (0 to 100).
+    @param seed: the random seed.
+    @param batch: the maximum number of samples evaluated per call, which
+                  bounds the working memory.
+    @param correlated: True if every beam in a scan has the same volume.
+    @param parameters: fixed values or distributions for the parameters.
+
+    Returns
+    ----------
+    @return a SimulationResult, else None if the product, a parameter or
+            a distribution is invalid.
+
+    Examples
+    ----------
+    >>> result = simulate('SPOCLD', N_events=Poisson(180))
+    >>> print result.rate(99)
+    """
+    if product not in MODELS or type(samples) != int or samples < 1 or type(batch) != int or batch < 1:
+        return None
+
+    percentiles = tuple(percentiles)
+    if not all(_isNumber(p) and 0 <= p <= 100 for p in percentiles):
+        return None
+
+    function, N_beam = MODELS[product]
+
+    names = set(inspect.signature(function).parameters) | set(SCAN_PARAMETERS)
+    if product == 'SPOCLD':
+        names |= {'N_burst', 'N_events'}
+
+    values = {'N_beam': N_beam, 'T_scan': T_SCAN}
+    values.update(parameters)
+
+    for name, value in values.items():
+        if name not in names:
+            return None
+        if _isDistribution(value):
+            if not value.isValid():
+                return None
+        elif not _isNumber(value) or value < 0:
+            return None
+
+    # One independent stream per distribution, keyed on its name.
+    uncertain = sorted(name for name, value in values.items() if _isDistribution(value))
+    streams = {name: _stream(seed, name) for name in uncertain}
+    perBeam = [name for name in uncertain if name not in SCAN_PARAMETERS]
+
+    # Beams only differ if a parameter drawn per beam is uncertain. Then a
+    # fixed, small number of beams is summed exactly, and any other number
+    # by the normal approximation.
+    independent = not correlated and len(perBeam) > 0
+    beams = values['N_beam']
+    exact = independent and not _isDistribution(beams) and beams == int(beams) and 1 <= beams <= EXACT_BEAMS
+    beams = int(beams) if exact else 1
+
+    # An SPOCLD whose burst count is N_burst * T_scan scales with T_scan.
+    scaled = product == 'SPOCLD' and 'N_events' not in values
+
+    beam = np.empty(samples)
+    scan = np.empty(samples)
+    shared = {name: np.empty(samples) for name in SCAN_PARAMETERS if name in streams}
+    moments = (0, 0.0, 0.0)
+
+    for start in range(0, samples, max(batch // beams, 1)):
+        size = min(max(batch // beams, 1), samples - start)
+        end = start + size
+
+        drawn = {}
+        for name, value in values.items():
+            if name in streams:
+                count = size * beams if name in perBeam else size
+                drawn[name] = value.sample(streams[name], count).astype(np.float64)
+            else:
+                drawn[name] = float(value)
+
+        for name in shared:
+            shared[name][start:end] = drawn[name]
+
+        # The volume of every beam (one row per scan), per unit of scale.
+        volumes = np.broadcast_to(_beamVolume(function, drawn), (size * beams,)).reshape(size, beams)
+        scale = drawn['T_scan'] if scaled else 1.0
+        np.multiply(volumes[:, 0], scale, out=beam[start:end])
+
+        if not independent:
+            np.multiply(beam[start:end], drawn['N_beam'], out=scan[start:end])
+        elif exact:
+            np.multiply(volumes.sum(axis=1), scale, out=scan[start:end])
+        else:
+            moments = _moments(moments, volumes[:, 0])
+
+    if independent and not exact:
+        # The sums over beams, drawn from their normal approximation.
+        count, mean, squares = moments
+        sd = np.sqrt(squares / count)
+        stream = _stream(seed, 'scan')
+
+        for start in range(0, samples, batch):
+            end = min(start + batch, samples)
+            N = shared['N_beam'][start:end] if 'N_beam' in shared else float(values['N_beam'])
+            total = N * mean + np.sqrt(N) * sd * stream.standard_normal(end - start)
+            np.maximum(total, 0.0, out=total)
+
+            if scaled:
+                total *= shared['T_scan'][start:end] if 'T_scan' in shared else float(values['T_scan'])
+
+            scan[start:end] = total
+
+    beamPercentiles = np.percentile(beam, percentiles)
+    scanPercentiles = np.percentile(scan, percentiles)
+
+    seconds = shared.get('T_scan')
+    if seconds is None:
+        # A fixed scan length scales every sample equally, and percentiles
+        # commute with positive scaling, so the rates need no extra pass.
+        T_scan = float(values['T_scan'])
+        beamRate = beamPercentiles / T_scan if T_scan > 0 else np.full(len(percentiles), np.nan)
+        scanRate = scanPercentiles / T_scan if T_scan > 0 else np.full(len(percentiles), np.nan)
+    else:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            beamRate = np.percentile(beam / seconds, percentiles)
+            scanRate = np.percentile(scan / seconds, percentiles)
+
+    return SimulationResult(product, samples, percentiles, beamPercentiles, scanPercentiles, beamRate, scanRate)
+
+# ******************************
+#
+# INTERNAL HELPERS
+#
+# ******************************
+
+
+def _beamVolume(function, drawn):
+    """
+    Evaluates the volume produced per beam, per scan, for a batch of
+    samples. An SPOCLD's volume is given per second of the scan if its
+    burst count is N_burst * T_scan, so it must be scaled by T_scan.
+
+    Parameters
+    ----------
+    @param function: the size formula.
+    @param drawn: the parameter values (floats or float64 arrays).
+
+    Returns
+    ----------
+    @return the volumes in bits (a float if no parameter is uncertain).
+    """
+    arguments = {name: value for name, value in drawn.items()
+                 if name not in ('N_beam', 'T_scan', 'N_burst', 'N_events')}
+    volume = function(**arguments)
+
+    if function is spocldSize:
+        volume = volume * drawn.get('N_events', drawn.get('N_burst', 1.0))
+
+    return volume
+
+# ******************************
+
+def _moments(moments, values):
+    """
+    Adds a batch of values to running moments, using the pairwise update
+    of Chan et al., so the variance stays accurate over many batches.
+
+    Parameters
+    ----------
+    @param moments: the (count, mean, sum of squared deviations) so far.
+    @param values: a 1-D array of values.
+
+    Returns
+    ----------
+    @return the updated (count, mean, sum of squared deviations).
+    """
+    count, mean, squares = moments
+    size = values.size
+    batchMean = float(values.mean())
+    batchSquares = float(np.square(values - batchMean).sum())
+
+    total = count + size
+    delta = batchMean - mean
+    return (total, mean + delta * size / total, squares + batchSquares + delta * delta * count * size / total)
+
+# ******************************
+
+def _stream(seed, name):
+    """
+    Creates the random stream of a distribution, keyed on its name.
+    """
+    return np.random.default_rng(np.random.SeedSequence([seed] + [ord(character) for character in name]))
+
+# ******************************
+
+def _isNumber(value):
+    return (type(value) == int or type(value) == float) and value == value
+
+# ******************************
+
+def _isDistribution(value):
+    return type(value) in (Poisson, Uniform, Normal, Empirical)
@@ -0,0 +1,365 @@
+"""
+**************************************************************************
+
+ ObservingSchedule.py
+
+**************************************************************************
+ Description:
+
+ Builds time resolved CSP to SDP data rate series from an observing
+ schedule. A schedule is a list of scheduling blocks (an observing mode,
+ a start time and duration in seconds, a number of beams, and product
+ size parameters), loaded from JSON or CSV. Each block's products are
+ sized with the notebook's models, their volume is spread evenly over
+ the block's delivery window, and the aggregate rate is accumulated with
+ difference arrays and cumulative sums, so the cost grows with the
+ number of blocks and seconds, not their product.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import csv
+import json
+import os
+
+import numpy as np
+
+from main.src.CapacitySolver import scanVolumeOf
+from main.src.MonteCarlo import T_SCAN
+
+# The observing modes, mapped to the data products they deliver.
+MODES = {
+    'search': ('OCLD',),
+    'transient': ('SPOCLD',),
+    'timing': ('PTD', 'DSD'),
+}
+
+# The fields every scheduling block has; anything else is a parameter.
+FIELDS = ('mode', 'start', 'duration', 'beams')
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class Block(object):
+    """
+    A scheduling block: back to back scans of one observing mode.
+    """
+
+    __slots__ = ('mode', 'start', 'duration', 'beams', 'parameters')
+
+    def __init__(self, mode, start, duration, beams, parameters):
+        self.mode = mode                # A key of MODES.
+        self.start = start              # The start time in seconds.
+        self.duration = duration        # The duration in seconds.
+        self.beams = beams              # The number of beams (N_beam).
+        self.parameters = parameters    # The product size parameters, including T_scan.
+
+    # ******************************
+
+    def __str__(self):
+        return (self.mode + ' block at ' + str(self.start) + ' s for ' + str(self.duration) + ' s, ' +
+                str(self.beams) + ' beams')
+
+    # ****************************************************************************************************
+
+# ******************************
+#
+# FUNCTIONS
+#
+# ******************************
+
+
+def loadSchedule(path):
+    """
+    Loads an observing schedule from a JSON or CSV file.
+
+    A JSON schedule is a list of blocks (or an object with a 'blocks'
+    list), each an object with mode, start, duration and beams fields
+    and an optional 'parameters' object. A CSV schedule has a header row
+    with mode, start, duration and beams columns; any other column is a
+    parameter, and empty cells are left at their defaults.
+
+    Parameters
+    ----------
+    @param path: the path of the file (.json or .csv).
+
+    Returns
+    ----------
+    @return a list of Blocks, else None if the file cannot be read or a
+            block is invalid.
+
+    Examples
+    ----------
+    >>> blocks = loadSchedule('schedule.csv')
+    >>> print blocks[0]
+    >>> search block at 0 s for 3600 s, 1500 beams
+    """
+    extension = os.path.splitext(str(path))[1].lower()
+
+    try:
+        with open(path) as scheduleFile:
+            if extension == '.csv':
+                records = [_csvRecord(row) for row in csv.DictReader(scheduleFile)]
+            else:
+                records = json.load(scheduleFile)
+    except (IOError, OSError, ValueError):
+        return None
+
+    if type(records) == dict:
+        records = records.get('blocks')
+
+    return parseSchedule(records)
+
+# ******************************
+
+def parseSchedule(records):
+    """
+    Creates scheduling blocks from records, as read from a JSON schedule.
+
+    Parameters
+    ----------
+    @param records: a list of dictionaries with mode, start, duration and
+                    beams, and optionally a 'parameters' dictionary.
+                    Other keys are also taken as parameters.
+
+    Returns
+    ----------
+    @return a list of Blocks, else None if a record is invalid.
+    """
+    if type(records) != list:
+        return None
+
+    blocks = []
+    for record in records:
+        if type(record) != dict or not set(FIELDS) <= set(record):
+            return None
+
+        parameters = dict(record.get('parameters', {}))
+        parameters.update((name, value) for name, value in record.items()
+                          if name not in FIELDS and name != 'parameters')
+
+        block = Block(record['mode'], record['start'], record['duration'], record['beams'], parameters)
+
+        if not _isValid(block):
+            return None
+
+        blocks.append(block)
+
+    return blocks
+
+# ******************************
+
+def blockRates(blocks):
+    """
+    Computes the data rate of each product in each scheduling block: the
+    volume per scan divided by T_scan. Blocks with the same parameter
+    names are evaluated together, as arrays.
+
+    Parameters
+    ----------
+    @param blocks: a list of Blocks.
+
+    Returns
+    ----------
+    @return a dictionary mapping product names to float64 arrays of rates
+            in bits per second, one per block (0 if the block's mode does
+            not deliver the product), else None if a block is invalid.
+    """
+    if type(blocks) != list or not all(type(block) == Block and _isValid(block) for block in blocks):
+        return None
+
+    products = [product for mode in sorted(MODES) for product in MODES[mode]]
+    rates = {product: np.zeros(len(blocks)) for product in products}
+
+    groups = {}
+    for i, block in enumerate(blocks):
+        groups.setdefault((block.mode, tuple(sorted(block.parameters))), []).append(i)
+
+    for (mode, names), members in groups.items():
+        parameters = {name: np.array([blocks[i].parameters[name] for i in members]) for name in names}
+        parameters['N_beam'] = np.array([blocks[i].beams for i in members])
+        T_scan = parameters.get('T_scan', T_SCAN)
+
+        for product in MODES[mode]:
+            volume = scanVolumeOf(product, **parameters)
+            if volume is None:
+                return None
+            rates[product][members] = volume / T_scan
+
+    return rates
+
+# ******************************
+
+def rateSeries(blocks, length=None, resolution=1, latency=0, byProduct=False):
+    """
+    Builds the aggregate CSP to SDP data rate series of a schedule. Each
+    block delivers its products at a constant rate over its delivery
+    window, [start + latency, start + latency + duration). Each bin of
+    the series holds the mean rate over the bin, so windows that start
+    or end part way through a bin contribute in proportion.
+
+    The series is built without looping over time: every window edge
+    adds a step in the rate to a difference array (with a correction for
+    the fraction of the bin it falls in), and a cumulative sum turns the
+    steps into rates.
+
+    Parameters
+    ----------
+    @param blocks: a list of Blocks.
+    @param length: the number of bins (default: up to the end of the last
+                   delivery window). Later deliveries are dropped.
+    @param resolution: the bin width in seconds.
+    @param latency: the delay in seconds between observing and delivering
+                    the products, e.g. T_scan if each scan's products are
+                    delivered during the next scan.
+    @param byProduct: True to return a series for each product as well.
+
+    Returns
+    ----------
+    @return a float64 array of mean rates in bits per second, or if
+            byProduct is True a dictionary mapping product names and
+            'total' to such arrays, else None if a block, the length,
+            the resolution or the latency is invalid.
+
+    Examples
+    ----------
+    >>> series = rateSeries(loadSchedule('schedule.json'))
+    >>> print series.max() / 1e9
+    >>> 105.6
+    """
+    if not _isNumber(resolution) or resolution <= 0 or not _isNumber(latency) or latency < 0:
+        return None
+
+    rates = blockRates(blocks)
+
+    if rates is None:
+        return None
+
+    starts = np.array([block.start for block in blocks], dtype=np.float64) + latency
+    ends = starts + np.array([block.duration for block in blocks], dtype=np.float64)
+    starts /= resolution
+    ends /= resolution
+
+    if length is None:
+        length = int(np.ceil(ends.max())) if blocks else 0
+    elif type(length) != int or length < 0:
+        return None
+
+    # The total is accumulated from each block's total rate in one pass.
+    total = _accumulate(starts, ends, sum(rates.values()), length)
+
+    if not byProduct:
+        return total
+
+    series = {product: _accumulate(starts, ends, rate, length) for product, rate in rates.items()}
+    series['total'] = total
+    return series
+
+# ******************************
+#
+# INTERNAL HELPERS
+#
+# ******************************
+
+
+def _accumulate(starts, ends, rates, length):
+    """
+    Accumulates constant rates over windows into a series of mean rates
+    per bin, using difference arrays.
+
+    A rate r switched on at a time p adds r to every bin after the one
+    containing p, and r * (ceil(p) - p) to that bin. So the step of r at
+    ceil(p) goes into one difference array, the fraction into another,
+    and the series is the cumulative sum of the first plus the second.
+
+    Parameters
+    ----------
+    @param starts: the window start times, in bins.
+    @param ends: the window end times, in bins.
+    @param rates: the rate over each window.
+    @param length: the number of bins.
+
+    Returns
+    ----------
+    @return the float64 array of mean rates per bin.
+    """
+    times = np.clip(np.concatenate((starts, ends)), 0, length)
+    steps = np.concatenate((rates, -rates))
+
+    edges = np.ceil(times)
+    fractions = steps * (edges - times)
+    edges = edges.astype(np.int64)
+
+    series = np.cumsum(np.bincount(edges, steps, length + 1)[:length])
+
+    inside = edges > 0
+    series += np.bincount(edges[inside] - 1, fractions[inside], length)
+
+    # Rounding in the cumulative sum can leave tiny negative rates where
+    # nothing is delivered.
+    return np.maximum(series, 0, out=series)
+
+# ******************************
+
+def _csvRecord(row):
+    """
+    Converts a CSV row into a schedule record, parsing numbers and
+    dropping empty cells.
+    """
+    record = {}
+    for name, value in row.items():
+        if name is None or value is None or value.strip() == '':
+            continue
+
+        value = value.strip()
+        if name.strip() != 'mode':
+            number = float(value)
+            value = int(number) if number.is_integer() else number
+
+        record[name.strip()] = value
+
+    return record
+
+# ******************************
+
+def _isNumber(value):
+    """
+    Checks that a value is a real number (not a bool).
+    """
+    return type(value) in (int, float) or (isinstance(value, np.number) and value.dtype.kind in ('i', 'u', 'f'))
+
+# ******************************
+
+def _isValid(block):
+    """
+    Checks a scheduling block's fields. The parameters are checked when
+    the block is sized.
+    """
+    if block.mode not in MODES or type(block.parameters) != dict:
+        return False
+
+    if not all(_isNumber(value) for value in (block.start, block.duration, block.beams)):
+        return False
+
+    if not all(_isNumber(value) for value in block.parameters.values()):
+        return False
+
+    return block.start >= 0 and block.duration > 0 and block.beams >= 0
@@ -0,0 +1,289 @@
+"""
+**************************************************************************
+
+ ParallelSweep.py
+
+**************************************************************************
+ Description:
+
+ Runs parameter grid sweeps over the product size models on several
+ cores. The grid is split into chunks (as by GridEvaluator), the chunks
+ are grouped into tasks with balanced numbers of grid points, and the
+ tasks are evaluated in a process pool. Workers write their results
+ directly into a shared memory buffer, so no arrays are pickled back to
+ the parent. The chunks do not depend on the number of workers, so the
+ results are identical whatever the worker count.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from main.src.GridEvaluator import CHUNK_SIZE, planGrid
+
+# The number of tasks per worker. Several small tasks per worker balance
+# the load when some workers run slower than others.
+TASKS_PER_WORKER = 4
+
+# The state of each worker process, set by _initialise().
+_worker = {}
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class SweepResult(object):
+    """
+    The outputs of a parallel sweep, and how well it scaled.
+    """
+
+    __slots__ = ('outputs', 'workers', 'seconds', 'busy')
+
+    def __init__(self, outputs, workers, seconds, busy):
+        self.outputs = outputs    # Output names mapped to arrays with the grid shape.
+        self.workers = workers    # The number of worker processes.
+        self.seconds = seconds    # The wall clock time of the sweep.
+        self.busy = busy          # The total CPU time workers spent computing.
+
+    # ******************************
+
+    @property
+    def efficiency(self):
+        """
+        The scaling efficiency: the fraction of the workers' available
+        time (workers x wall clock time) spent computing on a core. 1.0
+        is perfect linear scaling; lower values reflect start up,
+        scheduling, load imbalance and oversubscription costs.
+        """
+        if self.seconds <= 0:
+            return 1.0
+        return min(self.busy / (self.workers * self.seconds), 1.0)
+
+    # ******************************
+
+    def __str__(self):
+        return (str(self.workers) + ' workers, ' + '%.3f' % self.seconds + ' s, efficiency ' +
+                '%.1f' % (100 * self.efficiency) + '%')
+
+    # ****************************************************************************************************
+
+# ******************************
+#
+# FUNCTIONS
+#
+# ******************************
+
+
+def parallelSweep(product, axes, workers=None, chunkSize=CHUNK_SIZE, **parameters):
+    """
+    Evaluates a product size over the Cartesian product of parameter axes
+    using a pool of worker processes. The outputs are those written by
+    GridEvaluator.evaluateGrid(), but are returned in memory.
+
+    Parameters
+    ----------
+    @param product: a product name in GridEvaluator.PRODUCTS (e.g. 'OCLD'),
+                    or a size function that can be pickled (i.e. defined at
+                    module level).
+    @param axes: a dictionary mapping parameter names to 1-D arrays of values.
+    @param workers: the number of worker processes (default: one per core).
+    @param chunkSize: the maximum number of grid points computed at once.
+    @param parameters: fixed parameter values.
+
+    Returns
+    ----------
+    @return a SweepResult, else None if the product, an axis, a parameter,
+            the chunk size or the number of workers is invalid.
+
+    Examples
+    ----------
+    >>> axes = {'N_chan': np.arange(64, 4097, 64), 'N_cand': np.arange(1, 20001)}
+    >>> result = parallelSweep('OCLD', axes, workers=8, N_beam=1500)
+    >>> print result
+    >>> 8 workers, 0.412 s, efficiency 93.1%
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if type(workers) != int or workers < 1:
+        return None
+
+    plan = planGrid(product, axes, chunkSize, **parameters)
+
+    if plan is None:
+        return None
+
+    tasks = _tasks(plan, workers * TASKS_PER_WORKER)
+    workers = min(workers, len(tasks))
+    shape = (len(plan.outputs),) + plan.shape
+
+    started = time.perf_counter()
+
+    if workers == 1:
+        # No pool: a single worker would only add start up costs.
+        buffer = np.empty(shape, dtype=plan.dtype)
+        arrays = dict(zip(plan.outputs, buffer))
+        busy = sum(_run(plan, arrays, task) for task in tasks)
+        return SweepResult(arrays, 1, time.perf_counter() - started, busy)
+
+    memory = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * plan.dtype.itemsize, 1))
+
+    try:
+        arguments = (memory.name, shape, plan.dtype.str, product, plan.values, chunkSize, parameters)
+        with ProcessPoolExecutor(workers, initializer=_initialise, initargs=arguments) as pool:
+            busy = sum(pool.map(_work, tasks))
+
+        seconds = time.perf_counter() - started
+        buffer = np.ndarray(shape, dtype=plan.dtype, buffer=memory.buf).copy()
+    finally:
+        memory.close()
+        memory.unlink()
+
+    return SweepResult(dict(zip(plan.outputs, buffer)), workers, seconds, busy)
+
+# ******************************
+
+def measureScaling(product, axes, workers=(1, 2, 4), chunkSize=CHUNK_SIZE, **parameters):
+    """
+    Measures how a sweep scales with the number of workers.
+
+    Parameters
+    ----------
+    @param product: the product name or size function.
+    @param axes: a dictionary mapping parameter names to 1-D arrays of values.
+    @param workers: the worker counts to try; the first is the baseline.
+    @param chunkSize: the maximum number of grid points computed at once.
+    @param parameters: fixed parameter values.
+
+    Returns
+    ----------
+    @return a list of (workers, seconds, speedup, efficiency) tuples, where
+            the speedup is relative to the first worker count, else None
+            if the sweep is invalid.
+    """
+    rows = []
+    baseline = None
+
+    for count in workers:
+        result = parallelSweep(product, axes, count, chunkSize, **parameters)
+
+        if result is None:
+            return None
+
+        if baseline is None:
+            baseline = result.seconds
+
+        speedup = baseline / result.seconds if result.seconds > 0 else float('inf')
+        rows.append((result.workers, result.seconds, speedup, result.efficiency))
+
+    return rows
+
+# ******************************
+#
+# INTERNAL HELPERS
+#
+# ******************************
+
+
+def _tasks(plan, count):
+    """
+    Groups a plan's chunks into tasks with roughly equal numbers of grid
+    points. The chunks themselves do not depend on the number of tasks.
+
+    Parameters
+    ----------
+    @param plan: the GridPlan.
+    @param count: the desired number of tasks.
+
+    Returns
+    ----------
+    @return a list of tasks, each a list of chunk indices.
+    """
+    target = -(-plan.size // count)
+    tasks = []
+    task = []
+    points = 0
+
+    for start, index in plan.chunks():
+        if task and points >= target:
+            tasks.append(task)
+            task = []
+            points = 0
+
+        task.append(index)
+        points += _points(plan.shape, index)
+
+    tasks.append(task)
+    return tasks
+
+# ******************************
+
+def _points(shape, index):
+    """
+    Counts the grid points in a chunk.
+    """
+    points = 1
+    for n, i in zip(shape, index):
+        if type(i) != int:
+            points *= len(range(*i.indices(n)))
+    return points
+
+# ******************************
+
+def _run(plan, arrays, task):
+    """
+    Evaluates the chunks of a task into output arrays.
+
+    Returns
+    ----------
+    @return the CPU time spent computing, in seconds.
+    """
+    started = time.process_time()
+    for index in task:
+        plan.write(index, arrays)
+    return time.process_time() - started
+
+# ******************************
+
+def _initialise(name, shape, dtype, product, values, chunkSize, parameters):
+    """
+    Prepares a worker process: attaches the shared memory buffer once,
+    and rebuilds the grid plan.
+    """
+    memory = shared_memory.SharedMemory(name=name)
+    buffer = np.ndarray(shape, dtype=np.dtype(dtype), buffer=memory.buf)
+    plan = planGrid(product, values, chunkSize, **parameters)
+
+    _worker['memory'] = memory
+    _worker['plan'] = plan
+    _worker['arrays'] = dict(zip(plan.outputs, buffer))
+
+# ******************************
+
+def _work(task):
+    """
+    Evaluates a task in a worker process.
+    """
+    return _run(_worker['plan'], _worker['arrays'], task)
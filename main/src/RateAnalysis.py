@@ -0,0 +1,390 @@
+"""
+**************************************************************************
+
+ RateAnalysis.py
+
+**************************************************************************
+ Description:
+
+ Sliding window analysis of long ingest rate (or volume) time series,
+ such as those built by ObservingSchedule.rateSeries(). Link and buffer
+ sizing depend on the worst 10 s, 60 s or 180 s windows rather than on
+ averages, so this module computes rolling sums and maxima, and finds
+ the top k peak windows (with their start times) for many window
+ lengths at once. Series are processed in chunks, so memory mapped
+ arrays of 10^8 samples or more never need to be loaded whole, and
+ each window length costs O(n).
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import numpy as np
+
+# The default window lengths in seconds.
+WINDOWS = (10, 60, 180)
+
+# The default number of window starts processed at once (32 MB per
+# float64 array).
+CHUNK_SIZE = 4194304
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class PeakWindow(object):
+    """
+    A window of a rate series, and the data delivered within it.
+    """
+
+    __slots__ = ('window', 'start', 'volume')
+
+    def __init__(self, window, start, volume):
+        self.window = window    # The window length in seconds.
+        self.start = start      # The start time of the window in seconds.
+        self.volume = volume    # The volume delivered in the window in bits.
+
+    # ******************************
+
+    @property
+    def rate(self):
+        """
+        The mean rate over the window in bits per second.
+        """
+        return self.volume / self.window
+
+    # ******************************
+
+    def __str__(self):
+        return (str(self.window) + ' s window at ' + str(self.start) + ' s: ' + '%.3f' % (self.rate / 1e9) +
+                ' Gbit/s')
+
+    # ****************************************************************************************************
+
+# ******************************
+#
+# FUNCTIONS
+#
+# ******************************
+
+
+def rollingSum(series, window, out=None, chunkSize=CHUNK_SIZE):
+    """
+    Computes the sums of every window of consecutive samples, using
+    cumulative sums over chunks of the series. Each chunk's cumulative
+    sum starts from zero, so rounding errors do not grow along the
+    series.
+
+    Parameters
+    ----------
+    @param series: a 1-D array (e.g. a memory mapped .npy file).
+    @param window: the window length in samples.
+    @param out: an optional float64 array (e.g. memory mapped) of length
+                len(series) - window + 1 for the results.
+    @param chunkSize: the number of windows computed at once.
+
+    Returns
+    ----------
+    @return the float64 array of sums, where element i is the sum of
+            samples i to i + window - 1, else None if the series, the
+            window, the output array or the chunk size is invalid.
+
+    Examples
+    ----------
+    >>> print rollingSum(np.array([1, 2, 3, 4]), 2)
+    >>> [ 3.  5.  7.]
+    """
+    series = _series(series)
+    out = _output(series, window, out, chunkSize)
+
+    if out is None:
+        return None
+
+    for first, last in _chunks(series.size - window + 1, chunkSize):
+        sums = _cumulative(series, first, last + window - 1)
+        out[first:last] = sums[window:] - sums[:-window]
+
+    return out
+
+# ******************************
+
+def rollingMax(series, window, out=None, chunkSize=CHUNK_SIZE):
+    """
+    Computes the maximum of every window of consecutive samples in O(n),
+    whatever the window length. This is the van Herk/Gil-Werman
+    algorithm, the vectorised equivalent of a monotonic deque: the
+    samples are split into blocks of the window length, and each window's
+    maximum is the larger of a suffix maximum of one block and a prefix
+    maximum of the next.
+
+    Parameters
+    ----------
+    The same as rollingSum().
+
+    Returns
+    ----------
+    @return the array of maxima (with the series' dtype), where element i
+            is the maximum of samples i to i + window - 1, else None if
+            the series, the window, the output array or the chunk size is
+            invalid.
+
+    Examples
+    ----------
+    >>> print rollingMax(np.array([1, 3, 2, 0]), 2)
+    >>> [3 3 2]
+    """
+    series = _series(series)
+    out = _output(series, window, out, chunkSize, series.dtype if series is not None else None)
+
+    if out is None:
+        return None
+
+    for first, last in _chunks(series.size - window + 1, chunkSize):
+        data = series[first:last + window - 1]
+
+        # Pad to whole blocks with the smallest value.
+        blocks = -(-data.size // window)
+        padded = np.empty(blocks * window, dtype=data.dtype)
+        padded[:data.size] = data
+        padded[data.size:] = _lowest(data.dtype)
+        padded = padded.reshape(blocks, window)
+
+        prefix = np.maximum.accumulate(padded, axis=1).ravel()
+        suffix = np.maximum.accumulate(padded[:, ::-1], axis=1)[:, ::-1].ravel()
+
+        count = last - first
+        out[first:last] = np.maximum(suffix[:count], prefix[window - 1:window - 1 + count])
+
+    return out
+
+# ******************************
+
+def peakWindows(series, windows=WINDOWS, k=1, resolution=1, start=0, volume=False, chunkSize=CHUNK_SIZE):
+    """
+    Finds the top k peak windows of a rate (or volume) series for several
+    window lengths in one pass over the series. The peaks of each length
+    do not overlap: the largest window is taken first, then the largest
+    that does not overlap it, and so on.
+
+    A peak can only be ranked behind windows that overlap the peaks
+    before it, so the k-th peak is among the largest (k - 1) * (2w - 1)
+    + 1 windows of length w. Only that many candidates are kept while
+    the series is read, however long it is.
+
+    Parameters
+    ----------
+    @param series: a 1-D array of rates in bits per second (e.g. a memory
+                   mapped .npy file), or of volumes in bits if volume is True.
+    @param windows: the window lengths in seconds, each a whole number of
+                    samples.
+    @param k: the number of peaks to find for each window length.
+    @param resolution: the time between samples in seconds.
+    @param start: the time of the first sample in seconds.
+    @param volume: True if the samples are volumes rather than rates.
+    @param chunkSize: the number of windows computed at once.
+
+    Returns
+    ----------
+    @return a dictionary mapping each window length to a list of (at most
+            k) PeakWindows in order of decreasing volume, else None if the
+            series, a window length, k, the resolution or the chunk size
+            is invalid.
+
+    Examples
+    ----------
+    >>> peaks = peakWindows(np.load('series.npy', mmap_mode='r'), k=3)
+    >>> print peaks[60][0]
+    >>> 60 s window at 86220 s: 142.871 Gbit/s
+    """
+    series = _series(series)
+
+    if series is None or type(k) != int or k < 1 or type(resolution) not in (int, float) or resolution <= 0:
+        return None
+
+    if type(chunkSize) != int or chunkSize < 1:
+        return None
+
+    lengths = {}
+    for window in windows:
+        samples = window / float(resolution) if type(window) in (int, float) else 0
+        if samples < 1 or samples != int(samples) or samples > series.size:
+            return None
+        lengths[window] = int(samples)
+
+    # The largest candidate windows found so far: (sums, window starts).
+    pools = {window: (np.empty(0), np.empty(0, dtype=np.int64)) for window in lengths}
+    longest = max(lengths.values()) if lengths else 1
+
+    for first, last in _chunks(series.size - min(lengths.values() or [1]) + 1, chunkSize):
+        sums = _cumulative(series, first, min(last + longest - 1, series.size))
+
+        for window, samples in lengths.items():
+            count = min(last, series.size - samples + 1) - first
+            if count <= 0:
+                continue
+
+            values = sums[samples:samples + count] - sums[:count]
+            keep = (k - 1) * (2 * samples - 1) + 1
+            pool, starts = pools[window]
+
+            # Once the pool is full, only windows beating its smallest
+            # candidate can enter it.
+            if pool.size == keep:
+                candidates = np.flatnonzero(values > pool.min())
+            else:
+                candidates = np.arange(count)
+
+            pools[window] = _largest(np.concatenate((pool, values[candidates])),
+                                     np.concatenate((starts, first + candidates)), keep)
+
+    scale = 1 if volume else resolution
+    peaks = {}
+    for window, samples in lengths.items():
+        peaks[window] = [PeakWindow(window, start + index * resolution, value * scale)
+                         for value, index in _select(pools[window][0], pools[window][1], samples, k)]
+
+    return peaks
+
+# ******************************
+#
+# INTERNAL HELPERS
+#
+# ******************************
+
+
+def _series(series):
+    """
+    Validates a series, without copying or loading it.
+
+    Returns
+    ----------
+    @return the series as a numpy array, else None if it is not 1-D and numeric.
+    """
+    if not isinstance(series, np.ndarray):
+        series = np.asarray(series)
+
+    if series.ndim != 1 or series.dtype.kind not in ('i', 'u', 'f'):
+        return None
+
+    return series
+
+# ******************************
+
+def _output(series, window, out, chunkSize, dtype=np.float64):
+    """
+    Validates the parameters of a rolling computation, and prepares the
+    output array.
+
+    Returns
+    ----------
+    @return the output array, else None if a parameter is invalid.
+    """
+    if series is None or type(window) != int or window < 1 or window > series.size:
+        return None
+
+    if type(chunkSize) != int or chunkSize < 1:
+        return None
+
+    count = series.size - window + 1
+
+    if out is None:
+        return np.empty(count, dtype=dtype)
+
+    if not isinstance(out, np.ndarray) or out.shape != (count,):
+        return None
+
+    return out
+
+# ******************************
+
+def _chunks(count, chunkSize):
+    """
+    Splits the window starts 0 to count - 1 into chunks.
+
+    Returns
+    ----------
+    @return a generator of (first, last) ranges of window starts.
+    """
+    for first in range(0, count, chunkSize):
+        yield first, min(first + chunkSize, count)
+
+# ******************************
+
+def _cumulative(series, first, last):
+    """
+    Computes the cumulative sums of series[first:last], from zero.
+
+    Returns
+    ----------
+    @return a float64 array of length last - first + 1, where element i
+            is the sum of the first i samples.
+    """
+    sums = np.empty(last - first + 1)
+    sums[0] = 0
+    np.cumsum(series[first:last], dtype=np.float64, out=sums[1:])
+    return sums
+
+# ******************************
+
+def _lowest(dtype):
+    """
+    Gets the smallest value of a numpy dtype.
+    """
+    return -np.inf if dtype.kind == 'f' else np.iinfo(dtype).min
+
+# ******************************
+
+def _largest(values, indices, count):
+    """
+    Keeps the largest values (and their indices). Values tied with the
+    smallest value kept are kept in order of index, so that the earliest
+    windows survive, as _select() prefers them.
+    """
+    if values.size <= count:
+        return values, indices
+
+    smallest = np.partition(values, values.size - count)[values.size - count]
+    larger = np.flatnonzero(values > smallest)
+    tied = np.flatnonzero(values == smallest)
+    tied = tied[np.argsort(indices[tied], kind='stable')[:count - larger.size]]
+
+    keep = np.concatenate((larger, tied))
+    return values[keep], indices[keep]
+
+# ******************************
+
+def _select(values, indices, window, k):
+    """
+    Selects the top k non overlapping windows from candidates, greedily.
+
+    Returns
+    ----------
+    @return a list of (value, index) tuples in order of decreasing value.
+    """
+    # Largest first; equal values by earliest start.
+    order = np.lexsort((indices, -values))
+    selected = []
+
+    for i in order:
+        if all(abs(indices[i] - index) >= window for value, index in selected):
+            selected.append((float(values[i]), int(indices[i])))
+            if len(selected) == k:
+                break
+
+    return selected
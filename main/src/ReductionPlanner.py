@@ -0,0 +1,227 @@
+"""
+**************************************************************************
+
+ ReductionPlanner.py
+
+**************************************************************************
+ Description:
+
+ Plans data reductions for scan configurations that exceed the ingest
+ budget. The reduction knobs (frequency or sub-integration averaging,
+ fewer bits per sample, fewer polarisations, fewer candidates or list
+ entries) are searched together, configurations that do not fit the
+ rate budget are discarded, and those that lose more resolution than
+ another fitting configuration are pruned. The remaining Pareto set is
+ ranked by a configurable resolution loss cost.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import numpy as np
+
+from main.src.CapacitySolver import scanVolumeOf
+from main.src.MonteCarlo import T_SCAN
+
+# For each product, the default reduction knobs: parameter names mapped
+# to their values, from full resolution down. Halving N_chan or N_sub is
+# frequency or sub-integration averaging by a factor of 2.
+KNOBS = {
+    'OCLD': {'N_chan': (128, 64, 32, 16), 'N_sub': (64, 32, 16, 8), 'N_bit': (8, 4, 2, 1),
+             'N_cand': (1000, 500, 250, 100), 'N_list': (1000, 500, 250)},
+    'SPOCLD': {'N_chan': (1024, 512, 256, 128), 'N_samp': (640, 320, 160), 'N_pol': (4, 2, 1),
+               'N_bit': (8, 4, 2, 1)},
+    'PTD': {'N_chan': (4096, 2048, 1024, 512), 'N_sub': (180, 90, 45, 18), 'N_pol': (4, 2, 1),
+            'N_bit': (64, 32, 16, 8)},
+}
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class ReductionPlan(object):
+    """
+    A reduced configuration that fits the rate budget.
+    """
+
+    __slots__ = ('parameters', 'cost', 'rate')
+
+    def __init__(self, parameters, cost, rate):
+        self.parameters = parameters    # The knob values.
+        self.cost = cost                # The resolution loss cost.
+        self.rate = rate                # The resulting rate in bits per second.
+
+    # ******************************
+
+    def __str__(self):
+        settings = ', '.join(name + '=' + str(value) for name, value in self.parameters.items())
+        return settings + ': ' + '%.3f' % (self.rate / 1e9) + ' Gbit/s, cost ' + '%.2f' % self.cost
+
+    # ****************************************************************************************************
+
+# ******************************
+#
+# FUNCTIONS
+#
+# ******************************
+
+
+def planReductions(product, rate, knobs=None, weights=None, cost=None, **parameters):
+    """
+    Finds the Pareto set of reduced configurations of a data product that
+    fit a rate budget, ranked by their resolution loss cost.
+
+    Every combination of knob values is evaluated at once, by
+    broadcasting. A fitting configuration is kept only if no single knob
+    can be moved one step back towards full resolution while still
+    fitting; as the sizes grow with every knob, this leaves exactly the
+    configurations not dominated by another fitting configuration.
+
+    By default the cost of a knob value v is weight * log2(v0 / v), where
+    v0 is the knob's full resolution value, so each halving of a knob
+    costs its weight. The cost of a configuration is the sum over knobs.
+
+    Parameters
+    ----------
+    @param product: 'OCLD', 'SPOCLD' or 'PTD'.
+    @param rate: the rate budget in bits per second (volume per scan
+                 divided by T_scan).
+    @param knobs: a dictionary mapping the parameters to reduce to their
+                  allowed values (default: KNOBS[product]). Values are
+                  sorted so that the largest is full resolution.
+    @param weights: a dictionary mapping knob names to their cost per
+                    halving (default 1).
+    @param cost: optionally, a function replacing the default cost: it is
+                 called with each knob name mapped to an array of values,
+                 and returns an array of costs that broadcasts with them.
+    @param parameters: the fixed parameters, including N_beam, T_scan and
+                       (for the SPOCLD) N_burst.
+
+    Returns
+    ----------
+    @return a list of ReductionPlans in order of increasing cost (then
+            decreasing rate), empty if nothing fits, else None if the
+            product, budget, a knob, a weight or a parameter is invalid.
+
+    Examples
+    ----------
+    >>> for plan in planReductions('PTD', 20e9)[:2]:
+    >>>     print plan
+    >>> N_chan=4096, N_sub=180, N_pol=4, N_bit=32: 17.180 Gbit/s, cost 1.00
+    >>> N_chan=4096, N_sub=180, N_pol=2, N_bit=64: 17.180 Gbit/s, cost 1.00
+    """
+    if product not in KNOBS or type(rate) not in (int, float) or rate < 0:
+        return None
+
+    if knobs is None:
+        knobs = KNOBS[product]
+
+    values = _knobValues(knobs)
+
+    if values is None or set(values) & set(parameters):
+        return None
+
+    if weights is None:
+        weights = {}
+
+    if type(weights) != dict or not set(weights) <= set(values):
+        return None
+
+    # A negative weight would make reducing a knob a gain, inverting the ranking.
+    for weight in weights.values():
+        if type(weight) not in (int, float) or not np.isfinite(weight) or weight < 0:
+            return None
+
+    # An open mesh over the knobs.
+    shape = tuple(axis.size for axis in values.values())
+    mesh = {}
+    for position, (name, axis) in enumerate(values.items()):
+        view = [1] * len(shape)
+        view[position] = -1
+        mesh[name] = axis.reshape(view)
+
+    volume = scanVolumeOf(product, **dict(parameters, **mesh))
+
+    if volume is None:
+        return None
+
+    rates = np.broadcast_to(volume / parameters.get('T_scan', T_SCAN), shape)
+    fits = rates <= rate
+
+    # Keep fitting configurations where one step back towards full
+    # resolution, along any knob, no longer fits.
+    optimal = fits.copy()
+    for axis in range(len(shape)):
+        finer = [slice(None)] * len(shape)
+        coarser = [slice(None)] * len(shape)
+        finer[axis] = slice(None, -1)
+        coarser[axis] = slice(1, None)
+        optimal[tuple(coarser)] &= ~fits[tuple(finer)]
+
+    if cost is None:
+        costs = sum(weights.get(name, 1) * np.log2(axis[0] / mesh[name]) for name, axis in values.items())
+    else:
+        costs = cost(**mesh)
+
+    costs = np.broadcast_to(np.asarray(costs, dtype=np.float64), shape)
+
+    index = np.nonzero(optimal)
+    order = np.lexsort((-rates[index], costs[index]))
+
+    plans = []
+    for i in order:
+        point = tuple(axis[i] for axis in index)
+        settings = {name: values[name][n].item() for name, n in zip(values, point)}
+        plans.append(ReductionPlan(settings, float(costs[point]), float(rates[point])))
+
+    return plans
+
+# ******************************
+#
+# INTERNAL HELPERS
+#
+# ******************************
+
+
+def _knobValues(knobs):
+    """
+    Validates reduction knobs.
+
+    Parameters
+    ----------
+    @param knobs: a dictionary mapping parameter names to sequences of values.
+
+    Returns
+    ----------
+    @return a dictionary mapping the names to arrays of unique values in
+            decreasing order, else None if a knob is invalid.
+    """
+    if type(knobs) != dict or not knobs:
+        return None
+
+    values = {}
+    for name, axis in knobs.items():
+        axis = np.asarray(axis)
+
+        if axis.ndim != 1 or axis.size == 0 or axis.dtype.kind not in ('i', 'u', 'f') or (axis <= 0).any():
+            return None
+
+        values[name] = np.unique(axis)[::-1]
+
+    return values
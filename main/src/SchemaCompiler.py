@@ -0,0 +1,498 @@
+"""
+**************************************************************************
+
+ SchemaCompiler.py
+
+**************************************************************************
+ Description:
+
+ Compiles declarative data model schemas into size evaluators. A schema
+ is a JSON document describing an entity, its attributes (with their
+ sizes in bits), and its weak entities with their cardinalities. The
+ compiler folds every constant attribute sum at compile time, leaving
+ only the parameter dependent terms, and generates a function computing
+ the entity size from its parameters. Compiled evaluators are cached
+ on the schema's hash, so a schema is only compiled once.
+
+ An example schema (the notebook's PTD):
+
+ {
+   "name": "PTD",
+   "parameters": {"N_chan": 4096, "N_bin": 2048, "N_sub": 180,
+                  "N_pol": 4, "N_bit": 64, "M_size": 960},
+   "attributes": [{"name": "Scheduling Block ID", "type": "string"},
+                  ...],
+   "entities": [{"name": "Timing Data", "cardinality": 1,
+                 "attributes": [
+                   {"name": "Pulsar ID", "type": "string"},
+                   {"name": "Data cube",
+                    "bits": ["N_chan", "N_bin", "N_sub", "N_pol", "N_bit"]},
+                   {"name": "Metadata", "bits": "M_size"}]}]
+ }
+
+ Attribute sizes are given by a "type" (see TYPES) or by "bits", and
+ sizes and cardinalities may be an int, a parameter name, or a list of
+ these to be multiplied together.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import hashlib
+import json
+import keyword
+import math
+import os
+
+import numpy as np
+
+from main.src.DataQuantityFunctions import STRING_BITS, INT_BITS, FLOAT_BITS, BOOL_BITS
+from main.src.ExactArithmetic import INT64_MAX
+
+# The sizes in bits of the attribute types a schema may use.
+TYPES = {'string': STRING_BITS, 'int': INT_BITS, 'float': FLOAT_BITS, 'bool': BOOL_BITS}
+
+# The directory containing the schemas of the notebook's data products.
+SCHEMA_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'schemas')
+
+# Compiled evaluators, keyed on schema hash.
+_CACHE = {}
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class SizeEvaluator(object):
+    """
+    A compiled size evaluator. Calling it with parameter values (scalars
+    or broadcastable numpy arrays) gives the size of the entity in bits;
+    parameters not given take the schema's default values.
+    """
+
+    __slots__ = ('name', 'parameters', 'terms', 'source', 'function')
+
+    def __init__(self, name, parameters, terms, source, function):
+        self.name = name              # The entity name.
+        self.parameters = parameters  # The parameter names and default values.
+        self.terms = terms            # The folded terms: {(parameter, ...): coefficient}.
+        self.source = source          # The generated expression.
+        self.function = function      # The generated function.
+
+    # ******************************
+
+    @property
+    def constant(self):
+        """
+        The constant part of the size in bits, i.e. the sum of every
+        attribute size that does not depend on a parameter.
+        """
+        return self.terms.get((), 0)
+
+    # ******************************
+
+    def __call__(self, **parameters):
+        """
+        Evaluates the entity size. If integer numpy array parameters
+        could make the size overflow an int64, they are converted to
+        Python ints first, so the size is exact (an object array) rather
+        than silently wrapping around, as for the size formulas.
+
+        Parameters
+        ----------
+        @param parameters: parameter values overriding the defaults.
+
+        Returns
+        ----------
+        @return the size in bits, else None if a parameter is unknown.
+        """
+        try:
+            return self.function(**_promote(self, parameters))
+        except TypeError:
+            if any(name not in self.parameters for name in parameters):
+                return None
+            raise
+
+    # ******************************
+
+    def __repr__(self):
+        return 'SizeEvaluator(' + repr(self.name) + ': ' + self.source + ')'
+
+    # ****************************************************************************************************
+
+# ******************************
+#
+# FUNCTIONS
+#
+# ******************************
+
+
+def schemaHash(schema):
+    """
+    Computes the hash of a schema, ignoring key order and formatting.
+
+    Parameters
+    ----------
+    @param schema: the schema, as a dictionary.
+
+    Returns
+    ----------
+    @return the SHA-256 hex digest.
+    """
+    text = json.dumps(schema, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+# ******************************
+
+def loadSchema(path):
+    """
+    Loads a schema from a JSON file. A bare name (e.g. 'ocld') loads one
+    of the notebook's schemas from SCHEMA_DIRECTORY.
+
+    Parameters
+    ----------
+    @param path: the path of the file, or the name of a bundled schema.
+
+    Returns
+    ----------
+    @return the schema dictionary, else None if it cannot be read.
+    """
+    if not os.path.isfile(path):
+        path = os.path.join(SCHEMA_DIRECTORY, str(path).lower() + '.json')
+
+    try:
+        with open(path) as schemaFile:
+            return json.load(schemaFile)
+    except (IOError, OSError, ValueError):
+        return None
+
+# ******************************
+
+def compileSchema(schema):
+    """
+    Compiles a schema into a size evaluator. Evaluators are cached on the
+    schema's hash, so compiling an unchanged schema again costs only the
+    hash.
+
+    Parameters
+    ----------
+    @param schema: the schema, as a dictionary or a JSON string.
+
+    Returns
+    ----------
+    @return the SizeEvaluator, else None if the schema is invalid.
+
+    Examples
+    ----------
+    >>> evaluator = compileSchema(loadSchema('ptd'))
+    >>> print evaluator()
+    >>> 386547058176
+    >>> print evaluator.source
+    >>> 576 + M_size + N_bin * N_bit * N_chan * N_pol * N_sub
+    """
+    if type(schema) == str:
+        try:
+            schema = json.loads(schema)
+        except ValueError:
+            return None
+
+    if type(schema) != dict:
+        return None
+
+    key = schemaHash(schema)
+    evaluator = _CACHE.get(key)
+
+    if evaluator is None:
+        evaluator = _compile(schema)
+        if evaluator is not None:
+            _CACHE[key] = evaluator
+
+    return evaluator
+
+# ******************************
+
+def clearCache():
+    """
+    Removes every compiled evaluator from the cache.
+    """
+    _CACHE.clear()
+
+# ******************************
+#
+# INTERNAL HELPERS
+#
+# ******************************
+
+
+def _compile(schema):
+    """
+    Compiles a schema, without using the cache.
+
+    Parameters
+    ----------
+    @param schema: the schema dictionary.
+
+    Returns
+    ----------
+    @return the SizeEvaluator, else None if the schema is invalid.
+    """
+    parameters = schema.get('parameters', {})
+
+    if type(parameters) != dict:
+        return None
+
+    # Defaults are written into the generated source, so must be finite.
+    for name, value in parameters.items():
+        if not _isParameterName(name) or type(value) not in (int, float) or not math.isfinite(value):
+            return None
+
+    terms = _entityTerms(schema, parameters)
+
+    if terms is None:
+        return None
+
+    source = _expression(list(terms.items()))
+
+    # Parameters are passed by keyword only, so their order does not matter.
+    signature = ', '.join(name + '=' + repr(value) for name, value in sorted(parameters.items()))
+    code = 'def evaluate(*, ' + signature + '):\n    return ' + source + '\n' if signature else \
+           'def evaluate():\n    return ' + source + '\n'
+
+    namespace = {}
+    exec(compile(code, '<schema ' + str(schema.get('name')) + '>', 'exec'), namespace)
+
+    return SizeEvaluator(schema.get('name'), dict(parameters), terms, source, namespace['evaluate'])
+
+# ******************************
+
+def _entityTerms(entity, parameters):
+    """
+    Computes the folded size terms of an entity, i.e. the sum of its
+    attribute sizes, plus the sizes of its weak entities multiplied by
+    their cardinalities.
+
+    Parameters
+    ----------
+    @param entity: the entity dictionary.
+    @param parameters: the declared parameters.
+
+    Returns
+    ----------
+    @return a dictionary mapping sorted tuples of parameter names to
+            integer coefficients, else None if the entity is invalid.
+    """
+    if type(entity) != dict:
+        return None
+
+    terms = {}
+
+    for attribute in entity.get('attributes', []):
+        if type(attribute) != dict:
+            return None
+
+        if 'bits' in attribute:
+            term = _factors(attribute['bits'], parameters)
+        elif attribute.get('type') in TYPES:
+            term = ((), TYPES[attribute['type']])
+        else:
+            term = None
+
+        if term is None:
+            return None
+
+        _addTerm(terms, term[0], term[1])
+
+    for child in entity.get('entities', []):
+        cardinality = _factors(child.get('cardinality', 1) if type(child) == dict else None, parameters)
+        childTerms = _entityTerms(child, parameters)
+
+        if cardinality is None or childTerms is None:
+            return None
+
+        names, coefficient = cardinality
+        for childNames, childCoefficient in childTerms.items():
+            _addTerm(terms, tuple(sorted(names + childNames)), coefficient * childCoefficient)
+
+    return terms
+
+# ******************************
+
+def _factors(value, parameters):
+    """
+    Reads a size or cardinality: an int, a parameter name, or a list of
+    these to be multiplied together.
+
+    Parameters
+    ----------
+    @param value: the size or cardinality.
+    @param parameters: the declared parameters.
+
+    Returns
+    ----------
+    @return a tuple of the sorted parameter names and the constant
+            coefficient, else None if the value is invalid.
+    """
+    values = value if type(value) == list else [value]
+    names = []
+    coefficient = 1
+
+    for factor in values:
+        if type(factor) == int and factor >= 0:
+            coefficient *= factor
+        elif type(factor) == str and factor in parameters:
+            names.append(factor)
+        else:
+            return None
+
+    return tuple(sorted(names)), coefficient
+
+# ******************************
+
+def _addTerm(terms, names, coefficient):
+    """
+    Adds a term to a set of terms, folding it into any term with the
+    same parameters.
+    """
+    if coefficient:
+        terms[names] = terms.get(names, 0) + coefficient
+
+# ******************************
+
+def _expression(terms):
+    """
+    Generates a Python expression summing a set of terms. Parameters
+    shared by several terms are factored out (e.g. N_cand * (a + b)
+    rather than N_cand * a + N_cand * b), to minimise the number of
+    multiplications.
+
+    Parameters
+    ----------
+    @param terms: a list of (parameter names, coefficient) tuples.
+
+    Returns
+    ----------
+    @return the expression.
+    """
+    if not terms:
+        return '0'
+
+    # Find the parameter shared by the most terms.
+    counts = {}
+    for names, coefficient in terms:
+        for name in set(names):
+            counts[name] = counts.get(name, 0) + 1
+
+    shared = max(sorted(counts), key=lambda name: counts[name]) if counts else None
+
+    if shared is None or counts[shared] < 2:
+        # Constants first, then the terms in order of degree.
+        terms = sorted(terms, key=lambda term: (len(term[0]), term[0]))
+        return ' + '.join(_product(names, coefficient) for names, coefficient in terms)
+
+    inner = []
+    rest = []
+    for names, coefficient in terms:
+        if shared in names:
+            names = list(names)
+            names.remove(shared)
+            inner.append((tuple(names), coefficient))
+        else:
+            rest.append((names, coefficient))
+
+    factored = shared + ' * (' + _expression(inner) + ')'
+    return _expression(rest) + ' + ' + factored if rest else factored
+
+# ******************************
+
+def _product(names, coefficient):
+    """
+    Generates a Python expression for a single term.
+    """
+    if not names:
+        return repr(coefficient)
+    elif coefficient == 1:
+        return ' * '.join(names)
+    else:
+        return repr(coefficient) + ' * ' + ' * '.join(names)
+
+# ******************************
+
+def _promote(evaluator, parameters):
+    """
+    Converts integer numpy array parameters to arrays of Python ints if
+    the size could overflow an int64. The size is bounded by evaluating
+    the terms with the largest magnitude of each parameter (at least 1, so
+    that factored sub-expressions are bounded too); if the bound fits, no
+    element can overflow and the parameters are used as they are.
+
+    Parameters
+    ----------
+    @param evaluator: the SizeEvaluator.
+    @param parameters: the parameter values overriding the defaults.
+
+    Returns
+    ----------
+    @return the parameters, with integer arrays converted if needed.
+    """
+    integers = [name for name, value in parameters.items()
+                if isinstance(value, (np.ndarray, np.integer)) and value.dtype.kind in ('i', 'u')]
+
+    if not integers or any(name not in evaluator.parameters for name in parameters):
+        return parameters
+
+    bound = 0
+    for names, coefficient in evaluator.terms.items():
+        term = coefficient
+        for name in names:
+            term *= max(_magnitude(parameters.get(name, evaluator.parameters[name])), 1)
+        bound += term
+
+    if bound <= INT64_MAX:
+        return parameters
+
+    promoted = dict(parameters)
+    for name in integers:
+        promoted[name] = np.asarray(parameters[name]).astype(object)
+
+    return promoted
+
+# ******************************
+
+def _magnitude(value):
+    """
+    Gets the largest magnitude of a parameter value, as a Python int.
+    Values that are not finite numbers are treated as past the int64 limit.
+    """
+    array = np.asarray(value)
+
+    if array.size == 0:
+        return 0
+    elif array.dtype.kind in ('i', 'u'):
+        return max(abs(int(array.max())), abs(int(array.min())))
+
+    try:
+        largest = float(np.max(np.abs(array)))
+    except (TypeError, ValueError):
+        return INT64_MAX + 1
+
+    return int(math.ceil(largest)) if math.isfinite(largest) else INT64_MAX + 1
+
+# ******************************
+
+def _isParameterName(name):
+    return type(name) == str and name.isidentifier() and not keyword.iskeyword(name)
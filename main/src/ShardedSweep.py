@@ -0,0 +1,463 @@
+"""
+**************************************************************************
+
+ ShardedSweep.py
+
+**************************************************************************
+ Description:
+
+ Sharded, resumable parameter grid sweeps. A sweep is planned once into
+ a shared directory: a manifest records the product, axes, parameters
+ and the numbered shards (contiguous runs of grid chunks) the grid is
+ divided into. Any number of processes, on any number of nodes, can then
+ run disjoint (or even overlapping) shard ranges against the directory.
+ Each shard is written atomically to its own file, so a killed run loses
+ at most the shards in progress, and rerunning skips completed shards.
+ A merge step checks that the shards cover the grid exactly, and
+ combines them into the memory mapped outputs used by GridEvaluator.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import socket
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from main.src.GridEvaluator import CHUNK_SIZE, PRODUCTS, planGrid
+
+# The default number of grid points per shard (16 MB per float64 output).
+SHARD_SIZE = 2097152
+
+# The name of the manifest file.
+MANIFEST = 'manifest.json'
+
+# ******************************
+#
+# FUNCTIONS
+#
+# ******************************
+
+
+def planShards(product, axes, directory, shardSize=SHARD_SIZE, chunkSize=CHUNK_SIZE, **parameters):
+    """
+    Plans a sharded sweep, writing its manifest into a directory. Planning
+    the same sweep again (e.g. from every node) leaves the manifest as it
+    is, but planning a different sweep into the same directory fails, so
+    shards of different sweeps can never be mixed.
+
+    Parameters
+    ----------
+    @param product: a product name in GridEvaluator.PRODUCTS (e.g. 'OCLD').
+    @param axes: a dictionary mapping parameter names to 1-D arrays of values.
+    @param directory: the shared sweep directory (created if needed).
+    @param shardSize: the approximate number of grid points per shard.
+    @param chunkSize: the maximum number of grid points computed at once.
+    @param parameters: fixed parameter values (ints or floats).
+
+    Returns
+    ----------
+    @return the manifest (a dictionary), else None if the sweep is invalid
+            or the directory holds the manifest of a different sweep.
+
+    Examples
+    ----------
+    >>> manifest = planShards('OCLD', axes, '/shared/sweep', N_beam=1500)
+    >>> print len(manifest['shards'])
+    >>> 120
+    """
+    if product not in PRODUCTS or type(shardSize) != int or shardSize < 1:
+        return None
+
+    for value in parameters.values():
+        if type(value) not in (int, float):
+            return None
+
+    plan = planGrid(product, axes, chunkSize, **parameters)
+
+    if plan is None:
+        return None
+
+    manifest = {
+        'product': product,
+        'axes': [[name, axis.dtype.str, axis.tolist()] for name, axis in plan.values.items()],
+        'parameters': parameters,
+        'chunkSize': chunkSize,
+        'shardSize': shardSize,
+        'shape': list(plan.shape),
+        'dtype': plan.dtype.str,
+        'outputs': plan.outputs,
+        'shards': _shards(plan, shardSize),
+    }
+    manifest['hash'] = _hash(manifest)
+
+    existing = loadManifest(directory)
+
+    if existing is not None:
+        return existing if existing['hash'] == manifest['hash'] else None
+
+    os.makedirs(directory, exist_ok=True)
+    _writeAtomically(os.path.join(directory, MANIFEST), lambda path: _writeJson(path, manifest))
+
+    # Another process may have planned the sweep at the same time.
+    existing = loadManifest(directory)
+    return existing if existing is not None and existing['hash'] == manifest['hash'] else None
+
+# ******************************
+
+def loadManifest(directory):
+    """
+    Loads the manifest of a sharded sweep.
+
+    Parameters
+    ----------
+    @param directory: the sweep directory.
+
+    Returns
+    ----------
+    @return the manifest, else None if there is none, or it is corrupt.
+    """
+    try:
+        with open(os.path.join(directory, MANIFEST)) as manifestFile:
+            manifest = json.load(manifestFile)
+    except (IOError, OSError, ValueError):
+        return None
+
+    if type(manifest) != dict or manifest.get('hash') != _hash(manifest):
+        return None
+
+    return manifest
+
+# ******************************
+
+def shardRange(node, nodes, count):
+    """
+    Divides shards between nodes, giving each node a contiguous range.
+
+    Parameters
+    ----------
+    @param node: the index of this node, from 0 to nodes - 1.
+    @param nodes: the number of nodes.
+    @param count: the number of shards.
+
+    Returns
+    ----------
+    @return the range of shard numbers for the node, else None if the
+            node is invalid.
+
+    Examples
+    ----------
+    >>> print shardRange(1, 4, 10)
+    >>> range(2, 5)
+    """
+    if type(node) != int or type(nodes) != int or not 0 <= node < nodes:
+        return None
+
+    return range((count * node) // nodes, (count * (node + 1)) // nodes)
+
+# ******************************
+
+def runShards(directory, shards=None, progress=None):
+    """
+    Runs shards of a planned sweep, skipping shards already completed (by
+    this or any other process). Each shard is computed in memory and then
+    written atomically, so it is either complete on disk or absent.
+
+    Parameters
+    ----------
+    @param directory: the sweep directory.
+    @param shards: the shard numbers to run (default: all of them).
+    @param progress: an optional function called as progress(shard, computed)
+                     after every shard, where computed is False for a
+                     shard that was skipped.
+
+    Returns
+    ----------
+    @return the list of shard numbers computed by this call, else None if
+            the directory holds no valid manifest or a shard number is invalid.
+    """
+    manifest = loadManifest(directory)
+
+    if manifest is None:
+        return None
+
+    records = manifest['shards']
+    shards = range(len(records)) if shards is None else list(shards)
+
+    if not all(type(shard) == int and 0 <= shard < len(records) for shard in shards):
+        return None
+
+    plan = _plan(manifest)
+    computed = []
+
+    for shard in shards:
+        path = _shardPath(directory, shard)
+
+        if _isComplete(path, manifest, records[shard]):
+            if progress is not None:
+                progress(shard, False)
+            continue
+
+        arrays = _computeShard(plan, records[shard])
+        arrays['_shard'] = np.array([shard, records[shard][0], records[shard][1]], dtype=np.int64)
+        arrays['_hash'] = np.array(manifest['hash'])
+
+        _writeAtomically(path, lambda temporary: _writeShard(temporary, arrays))
+        computed.append(shard)
+
+        if progress is not None:
+            progress(shard, True)
+
+    return computed
+
+# ******************************
+
+def shardStatus(directory):
+    """
+    Finds which shards of a sweep are complete.
+
+    Parameters
+    ----------
+    @param directory: the sweep directory.
+
+    Returns
+    ----------
+    @return a tuple of the lists of complete and missing shard numbers,
+            else None if the directory holds no valid manifest.
+    """
+    manifest = loadManifest(directory)
+
+    if manifest is None:
+        return None
+
+    complete = []
+    missing = []
+
+    for shard, record in enumerate(manifest['shards']):
+        if _isComplete(_shardPath(directory, shard), manifest, record):
+            complete.append(shard)
+        else:
+            missing.append(shard)
+
+    return complete, missing
+
+# ******************************
+
+def mergeShards(directory):
+    """
+    Merges the shards of a completed sweep into one memory mapped .npy
+    file per output (plus axes.npz), as written by GridEvaluator, so the
+    result can be opened with GridEvaluator.loadGrid(). The merge first
+    verifies that the shards belong to this sweep and cover every grid
+    point exactly once.
+
+    Parameters
+    ----------
+    @param directory: the sweep directory.
+
+    Returns
+    ----------
+    @return a dictionary mapping output names to read only memory mapped
+            arrays with the grid shape, else None if there is no valid
+            manifest or any shard is missing or invalid.
+    """
+    manifest = loadManifest(directory)
+
+    if manifest is None:
+        return None
+
+    # Coverage: the shard ranges must tile [0, size) without gaps or overlaps.
+    records = manifest['shards']
+    size = int(np.prod(manifest['shape'], dtype=np.int64))
+    position = 0
+
+    for record in records:
+        if record[0] != position or record[1] <= record[0]:
+            return None
+        position = record[1]
+
+    if position != size:
+        return None
+
+    status = shardStatus(directory)
+
+    if status[1]:
+        return None
+
+    shape = tuple(manifest['shape'])
+    outputs = {}
+    for name in manifest['outputs']:
+        outputs[name] = open_memmap(os.path.join(directory, name + '.npy'), mode='w+',
+                                    dtype=np.dtype(manifest['dtype']), shape=shape)
+
+    for shard, record in enumerate(records):
+        with np.load(_shardPath(directory, shard)) as archive:
+            for name in manifest['outputs']:
+                outputs[name].reshape(-1)[record[0]:record[1]] = archive[name]
+
+    for array in outputs.values():
+        array.flush()
+
+    np.savez(os.path.join(directory, 'axes.npz'),
+             **{name: np.array(values, dtype=np.dtype(dtype)) for name, dtype, values in manifest['axes']})
+
+    del outputs
+    return {name: np.load(os.path.join(directory, name + '.npy'), mmap_mode='r') for name in manifest['outputs']}
+
+# ******************************
+#
+# INTERNAL HELPERS
+#
+# ******************************
+
+
+def _plan(manifest):
+    """
+    Rebuilds the grid plan of a sweep from its manifest.
+    """
+    axes = {name: np.array(values, dtype=np.dtype(dtype)) for name, dtype, values in manifest['axes']}
+    return planGrid(manifest['product'], axes, manifest['chunkSize'], **manifest['parameters'])
+
+# ******************************
+
+def _shards(plan, shardSize):
+    """
+    Groups a plan's chunks into shards of about shardSize grid points.
+
+    Returns
+    ----------
+    @return a list of [start, stop, first chunk, last chunk] records, where
+            start and stop bound the shard's range of the flattened grid.
+    """
+    shards = []
+    first = 0
+    shardStart = 0
+    chunk = -1
+
+    for chunk, (start, index) in enumerate(plan.chunks()):
+        if start - shardStart >= shardSize:
+            shards.append([shardStart, start, first, chunk])
+            first = chunk
+            shardStart = start
+
+    shards.append([shardStart, plan.size, first, chunk + 1])
+    return shards
+
+# ******************************
+
+def _computeShard(plan, record):
+    """
+    Computes the outputs of one shard.
+
+    Returns
+    ----------
+    @return a dictionary mapping output names to flat arrays.
+    """
+    start, stop, first, last = record
+    arrays = {name: np.empty(stop - start, dtype=plan.dtype) for name in plan.outputs}
+
+    for chunkStart, index in itertools.islice(plan.chunks(), first, last):
+        sizes = plan.evaluate(index)
+        shape = _chunkShape(plan.shape, index)
+        offset = chunkStart - start
+        count = int(np.prod(shape, dtype=np.int64))
+
+        for name in plan.outputs:
+            arrays[name][offset:offset + count].reshape(shape)[...] = sizes[name]
+
+    return arrays
+
+# ******************************
+
+def _chunkShape(shape, index):
+    """
+    Gets the shape of a chunk, dropping the axes fixed to single indices.
+    """
+    return tuple(len(range(*i.indices(n))) for n, i in zip(shape, index) if type(i) != int)
+
+# ******************************
+
+def _isComplete(path, manifest, record):
+    """
+    Checks whether a shard file is complete, and belongs to this sweep.
+    """
+    if not os.path.isfile(path):
+        return False
+
+    try:
+        with np.load(path) as archive:
+            header = archive['_shard'].tolist()
+            return str(archive['_hash']) == manifest['hash'] and header[1:] == record[:2]
+    except (IOError, OSError, ValueError, KeyError):
+        return False
+
+# ******************************
+
+def _shardPath(directory, shard):
+    return os.path.join(directory, 'shard-%06d.npz' % shard)
+
+# ******************************
+
+def _hash(manifest):
+    """
+    Hashes a manifest, excluding its own hash.
+    """
+    content = {key: value for key, value in manifest.items() if key != 'hash'}
+    text = json.dumps(content, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+# ******************************
+
+def _writeAtomically(path, write):
+    """
+    Writes a file atomically: the content is written to a temporary file
+    unique to this process, then renamed over the final path, so readers
+    only ever see a complete file (or none at all).
+
+    Parameters
+    ----------
+    @param path: the final path.
+    @param write: a function writing the content to a given path.
+    """
+    temporary = path + '.' + socket.gethostname() + '.' + str(os.getpid()) + '.tmp'
+
+    try:
+        write(temporary)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+# ******************************
+
+def _writeJson(path, content):
+    with open(path, 'w') as jsonFile:
+        json.dump(content, jsonFile)
+        jsonFile.flush()
+        os.fsync(jsonFile.fileno())
+
+# ******************************
+
+def _writeShard(path, arrays):
+    with open(path, 'wb') as shardFile:
+        np.savez(shardFile, **arrays)
+        shardFile.flush()
+        os.fsync(shardFile.fileno())
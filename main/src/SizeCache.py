@@ -0,0 +1,386 @@
+"""
+**************************************************************************
+
+ SizeCache.py
+
+**************************************************************************
+ Description:
+
+ A bounded, least recently used (LRU) memoisation layer for the product
+ size models. Sub-entity sizes (the search cube C_search_size, the sheet
+ volume S_size, the list size L_size, the candidate data size D_size,
+ ...) are cached on their parameter tuples, so batches of what-if
+ scenarios that only vary N_cand or N_beam reuse them rather than
+ recomputing them. Hits, misses and evictions are counted, and entries
+ can be invalidated when schema constants change.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+from collections import OrderedDict
+
+
+import main.src.DataQuantityFunctions as _functions
+from main.src.DataQuantityFunctions import METADATA_BITS
+
+# The default maximum number of cached entries.
+MAX_SIZE = 4096
+
+# The sub-entities that are cached, mapped to the functions computing them.
+SUB_ENTITIES = {
+    'L_size': 'listSize',
+    'C_search_size': 'searchCubeSize',
+    'C_single_pulse_size': 'singlePulseCubeSize',
+    'C_time_size': 'timingCubeSize',
+    'S_size': 'sheetSize',
+    'D_size': 'candidateDataSize',
+}
+
+# The products whose N_cand independent parts are cached, built from the
+# sub-entities above.
+PRODUCTS = ('OCLD', 'SPOCLD', 'PTD')
+
+# Returned by lookups that find no entry, so None can be cached.
+_MISSING = object()
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class SizeCache(object):
+    """
+    A bounded LRU cache of sub-entity sizes, with product size methods
+    (ocldSize(), spocldSize(), ptdSize()) that take the same parameters
+    as those in DataQuantityFunctions and give the same results.
+
+    Entries are keyed on parameter tuples, including the parameter
+    types, since equal numbers of different types (e.g. 128, 128.0 and
+    numpy.int64(128)) give results of different types. The
+    product methods cache everything except N_cand in a single entry,
+    so a scenario that only changes N_cand costs one lookup, one
+    multiplication and one addition. Parameters that are numpy arrays
+    cannot be cached, so anything depending on one is computed directly
+    (and counted as a bypass); N_cand may still be an array.
+    """
+
+    __slots__ = ('maxSize', 'hits', 'misses', 'evictions', 'bypasses', '_entries')
+
+    # ******************************
+    #
+    # Constructor.
+    #
+    # ******************************
+
+    def __init__(self, maxSize=MAX_SIZE):
+        """
+        Default constructor.
+
+        Parameters
+        ----------
+        @param maxSize: the maximum number of cached entries (at least 1).
+
+        Returns
+        ----------
+        N/A
+        """
+        self.maxSize = maxSize if type(maxSize) == int and maxSize >= 1 else MAX_SIZE
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bypasses = 0
+        self._entries = OrderedDict()
+
+    # ******************************
+
+    def __len__(self):
+        return len(self._entries)
+
+    # ******************************
+
+    def stats(self):
+        """
+        Gets the cache counters.
+
+        Returns
+        ----------
+        @return a dictionary of the hits, misses, evictions, bypasses,
+                size, maxSize and hitRate (hits / lookups).
+        """
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'bypasses': self.bypasses, 'size': len(self._entries), 'maxSize': self.maxSize,
+                'hitRate': float(self.hits) / lookups if lookups else 0.0}
+
+    # ******************************
+
+    def resetStats(self):
+        """
+        Resets the counters, keeping the cached entries.
+        """
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bypasses = 0
+
+    # ******************************
+
+    def invalidate(self, name=None):
+        """
+        Removes cached entries, e.g. after a schema constant such as the
+        metadata size or an attribute width has changed.
+
+        Parameters
+        ----------
+        @param name: the sub-entity (a key of SUB_ENTITIES), product (in
+                     PRODUCTS) or name given to cached() to invalidate, or
+                     None to invalidate everything. Invalidating a
+                     sub-entity also invalidates the products, as their
+                     entries are built from it.
+
+        Returns
+        ----------
+        @return the number of entries removed, else None if the name is
+                not a string.
+        """
+        if name is None:
+            count = len(self._entries)
+            self._entries.clear()
+            return count
+
+        if type(name) != str:
+            return None
+
+        names = {name} | set(PRODUCTS) if name in SUB_ENTITIES else {name}
+        keys = [key for key in self._entries if key[0] in names]
+        for key in keys:
+            del self._entries[key]
+
+        return len(keys)
+
+    # ******************************
+
+    def cached(self, name, function, *parameters):
+        """
+        Gets the result of any sub-entity function from the cache, e.g. a
+        size computed with DataQuantity objects or a compiled schema
+        evaluator, computing and caching it on a miss.
+
+        Parameters
+        ----------
+        @param name: the name the results are cached under.
+        @param function: the function.
+        @param parameters: the function's (positional) parameters.
+
+        Returns
+        ----------
+        @return the function's result.
+
+        Examples
+        ----------
+        >>> cache = SizeCache()
+        >>> print cache.cached('C_search_size', searchCubeSize, 128, 128, 64, 8)
+        >>> 8388608
+        """
+        key = _key(name, parameters)
+        value = self._lookup(key)
+
+        if value is _MISSING:
+            value = self._store(key, function(*parameters))
+
+        return value
+
+    # ******************************
+    #
+    # Sub-entities.
+    #
+    # ******************************
+
+    def listSize(self, N_list=1000):
+        return self._get('L_size', (N_list,))
+
+    def searchCubeSize(self, N_chan=128, N_bin=128, N_sub=64, N_bit=8):
+        return self._get('C_search_size', (N_chan, N_bin, N_sub, N_bit))
+
+    def singlePulseCubeSize(self, N_samp=640, N_chan=1024, N_pol=4, N_bit=8):
+        return self._get('C_single_pulse_size', (N_samp, N_chan, N_pol, N_bit))
+
+    def timingCubeSize(self, N_chan=4096, N_bin=2048, N_sub=180, N_pol=4, N_bit=64):
+        return self._get('C_time_size', (N_chan, N_bin, N_sub, N_pol, N_bit))
+
+    def sheetSize(self, N_sheet=3, r=256, c=256):
+        return self._get('S_size', (N_sheet, r, c))
+
+    def candidateDataSize(self, C_size, S_size, M_size=METADATA_BITS):
+        return self._get('D_size', (C_size, S_size, M_size))
+
+    # ******************************
+    #
+    # Products.
+    #
+    # ******************************
+
+    def ocldSize(self, N_cand=1000, N_list=1000, N_chan=128, N_bin=128, N_sub=64, N_bit=8,
+                 N_sheet=3, r=256, c=256, M_size=METADATA_BITS):
+        """
+        Computes the size of an OCLD, as DataQuantityFunctions.ocldSize(),
+        using cached sub-entity sizes.
+        """
+        key = _key('OCLD', (N_list, N_chan, N_bin, N_sub, N_bit, N_sheet, r, c, M_size))
+        entry = self._lookup(key)
+
+        if entry is _MISSING:
+            D_size = self.candidateDataSize(self.searchCubeSize(N_chan, N_bin, N_sub, N_bit),
+                                            self.sheetSize(N_sheet, r, c), M_size)
+            entry = self._store(key, (_functions.CANDIDATE_LIST_ATTRIBUTE_BITS + self.listSize(N_list), D_size))
+
+        return entry[0] + _functions._product(N_cand, entry[1])
+
+    def spocldSize(self, N_cand=1, N_list=1000, N_samp=640, N_chan=1024, N_pol=4, N_bit=8,
+                   N_sheet=2, r=1, c=1024, M_size=METADATA_BITS):
+        """
+        Computes the size of an SPOCLD, as DataQuantityFunctions.spocldSize(),
+        using cached sub-entity sizes.
+        """
+        key = _key('SPOCLD', (N_list, N_samp, N_chan, N_pol, N_bit, N_sheet, r, c, M_size))
+        entry = self._lookup(key)
+
+        if entry is _MISSING:
+            D_size = self.candidateDataSize(self.singlePulseCubeSize(N_samp, N_chan, N_pol, N_bit),
+                                            self.sheetSize(N_sheet, r, c), M_size)
+            entry = self._store(key, (_functions.CANDIDATE_LIST_ATTRIBUTE_BITS + self.listSize(N_list), D_size))
+
+        return entry[0] + _functions._product(N_cand, entry[1])
+
+    def ptdSize(self, N_chan=4096, N_bin=2048, N_sub=180, N_pol=4, N_bit=64, M_size=METADATA_BITS):
+        """
+        Computes the size of a PTD, as DataQuantityFunctions.ptdSize(),
+        using the cached timing cube size.
+        """
+        key = _key('PTD', (N_chan, N_bin, N_sub, N_pol, N_bit, M_size))
+        entry = self._lookup(key)
+
+        if entry is _MISSING:
+            entry = self._store(key, _functions.TIMING_ATTRIBUTE_BITS + _functions.STRING_BITS +
+                                self.timingCubeSize(N_chan, N_bin, N_sub, N_pol, N_bit) + M_size)
+
+        return entry
+
+    # ******************************
+    #
+    # Internal.
+    #
+    # ******************************
+
+    def _get(self, name, parameters):
+        """
+        Gets a sub-entity size from the cache, computing and caching it on
+        a miss.
+
+        Parameters
+        ----------
+        @param name: the sub-entity name (a key of SUB_ENTITIES).
+        @param parameters: the tuple of parameter values.
+
+        Returns
+        ----------
+        @return the size in bits.
+        """
+        key = _key(name, parameters)
+        value = self._lookup(key)
+
+        if value is _MISSING:
+            # Looked up at call time, so changed constants are picked up
+            # after an invalidation.
+            value = self._store(key, getattr(_functions, SUB_ENTITIES[name])(*parameters))
+
+        return value
+
+    # ******************************
+
+    def _lookup(self, key):
+        """
+        Looks up an entry, marking it as the most recently used.
+
+        Returns
+        ----------
+        @return the cached value, else _MISSING on a miss, or if the key
+                cannot be cached (a bypass, e.g. if it contains an array).
+        """
+        entries = self._entries
+
+        try:
+            value = entries[key]
+        except KeyError:
+            self.misses += 1
+            return _MISSING
+        except TypeError:
+            self.bypasses += 1
+            return _MISSING
+
+        entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    # ******************************
+
+    def _store(self, key, value):
+        """
+        Caches an entry, evicting the least recently used entry if full.
+
+        Returns
+        ----------
+        @return the value.
+        """
+        try:
+            self._entries[key] = value
+        except TypeError:
+            return value
+
+        if len(self._entries) > self.maxSize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+        return value
+
+    # ****************************************************************************************************
+
+
+# ******************************
+#
+# INTERNAL HELPERS
+#
+# ******************************
+
+def _key(name, parameters):
+    """
+    Builds the key of an entry from its name, parameters and parameter
+    types, so that e.g. searchCubeSize(128.0) and searchCubeSize(128),
+    which give a float and an int, do not share an entry.
+
+    Parameters
+    ----------
+    @param name: the name the entry is cached under.
+    @param parameters: the tuple of parameter values.
+
+    Returns
+    ----------
+    @return the key, a tuple starting with the name.
+    """
+    return (name,) + parameters + tuple(type(parameter) for parameter in parameters)
@@ -0,0 +1,513 @@
+"""
+**************************************************************************
+
+ SizeGraph.py
+
+**************************************************************************
+ Description:
+
+ A lazy dependency graph for data product size formulas. Parameters
+ (N_chan, N_cand, N_beam, ...) and derived sizes (D_size, L_size,
+ OCLD_size, ...) are nodes. Derived sizes are only computed when asked
+ for, and are cached. Changing a parameter invalidates only the nodes
+ downstream of it, so what-if edits recompute the minimum needed.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import numpy as np
+
+from main.src.DataQuantity import DataQuantity
+from main.src.DataQuantityArray import DataQuantityArray
+from main.src.DataQuantityFunctions import *
+
+# Marks a derived node that has never been computed.
+_UNSET = object()
+
+# ******************************
+#
+# CLASS DEFINITIONS
+#
+# ******************************
+
+
+class _Node(object):
+    """
+    A single parameter or derived size in a SizeGraph.
+    """
+
+    __slots__ = ('name', 'function', 'inputs', 'dependents', 'value', 'changed', 'computed', 'dirty')
+
+    def __init__(self, name, function, inputs, value):
+        self.name = name
+        self.function = function      # None for parameters.
+        self.inputs = inputs          # The input nodes.
+        self.dependents = []          # The nodes that use this node.
+        self.value = value
+        self.changed = 0              # The revision at which the value last changed.
+        self.computed = -1            # The revision at which the node was last brought up to date.
+        self.dirty = function is not None
+
+# ******************************
+
+
+class SizeGraph(object):
+    """
+    A lazy dependency graph of data product sizes. Values may be numbers
+    or numpy arrays (for evaluating a grid of parameter values at once).
+
+    Setting a parameter marks its downstream nodes dirty. Getting a node
+    recomputes only dirty nodes whose inputs actually changed value, so
+    an edit that does not change an intermediate size (e.g. swapping
+    N_bin and N_sub) stops propagating at that size.
+
+    Examples
+    --------
+    >>> graph = ocldGraph()
+    >>> print graph.get('OCLD_size')
+    >>> 8586850416
+    >>> graph.set('N_cand', 10)
+    >>> print graph.get('OCLD_size')  # Only OCLD_size is recomputed.
+    >>> 86441136
+    """
+
+    # ******************************
+    #
+    # Constructor.
+    #
+    # ******************************
+
+    def __init__(self):
+        """
+        Creates an empty graph.
+        """
+        self._nodes = {}
+        self._revision = 0
+
+        # The number of times a derived node's formula has been evaluated.
+        self.evaluations = 0
+
+    # ******************************
+
+    def addParameter(self, name, value):
+        """
+        Adds a parameter node.
+
+        Parameters
+        ----------
+        @param name: the unique name of the parameter, e.g. 'N_chan'.
+        @param value: the value of the parameter (a number or numpy array).
+
+        Returns
+        ----------
+        @return True if the parameter was added, else False if the name is taken.
+        """
+        if name in self._nodes:
+            return False
+
+        self._nodes[name] = _Node(name, None, (), value)
+        return True
+
+    # ******************************
+
+    def addNode(self, name, function, inputs=()):
+        """
+        Adds a derived node, computed lazily from other nodes.
+
+        Parameters
+        ----------
+        @param name: the unique name of the node, e.g. 'D_size'.
+        @param function: the formula, called with the values of the
+                         inputs in order.
+        @param inputs: the names of the input nodes, which must already exist.
+
+        Returns
+        ----------
+        @return True if the node was added, else False if the name is taken
+                or an input does not exist.
+        """
+        if name in self._nodes or not callable(function):
+            return False
+
+        if any(i not in self._nodes for i in inputs):
+            return False
+
+        node = _Node(name, function, tuple(self._nodes[i] for i in inputs), _UNSET)
+        for input_node in node.inputs:
+            input_node.dependents.append(node)
+
+        self._nodes[name] = node
+        return True
+
+    # ******************************
+
+    def names(self):
+        """
+        Gets the names of all nodes, in the order they were added.
+
+        Returns
+        ----------
+        @return a list of node names.
+        """
+        return list(self._nodes)
+
+    # ******************************
+
+    def parameters(self):
+        """
+        Gets the current parameter values.
+
+        Returns
+        ----------
+        @return a dictionary of parameter names to values.
+        """
+        return dict((name, node.value) for name, node in self._nodes.items() if node.function is None)
+
+    # ******************************
+
+    def downstream(self, name):
+        """
+        Gets the names of the nodes that depend (directly or indirectly)
+        on a node.
+
+        Parameters
+        ----------
+        @param name: the node name.
+
+        Returns
+        ----------
+        @return a set of node names, else None if the node does not exist.
+        """
+        if name not in self._nodes:
+            return None
+
+        found = set()
+        stack = list(self._nodes[name].dependents)
+        while stack:
+            node = stack.pop()
+            if node.name not in found:
+                found.add(node.name)
+                stack.extend(node.dependents)
+
+        return found
+
+    # ******************************
+
+    def set(self, name, value):
+        """
+        Sets a parameter, marking every node downstream of it dirty.
+        Setting a parameter to its current value does nothing.
+
+        Parameters
+        ----------
+        @param name: the parameter name.
+        @param value: the new value.
+
+        Returns
+        ----------
+        @return True if the parameter was set, else False if it is not a parameter.
+        """
+        node = self._nodes.get(name)
+
+        if node is None or node.function is not None:
+            return False
+
+        if _equal(node.value, value):
+            return True
+
+        self._revision += 1
+        node.value = value
+        node.changed = self._revision
+
+        stack = list(node.dependents)
+        while stack:
+            dependent = stack.pop()
+            if not dependent.dirty:
+                dependent.dirty = True
+                stack.extend(dependent.dependents)
+
+        return True
+
+    # ******************************
+
+    def update(self, **values):
+        """
+        Sets several parameters at once.
+
+        Parameters
+        ----------
+        @param values: parameter names and their new values.
+
+        Returns
+        ----------
+        @return True if every parameter was set, else False (in which case
+                no parameter is changed).
+        """
+        for name in values:
+            node = self._nodes.get(name)
+            if node is None or node.function is not None:
+                return False
+
+        for name, value in values.items():
+            self.set(name, value)
+
+        return True
+
+    # ******************************
+
+    def get(self, name):
+        """
+        Gets the value of a node, computing it (and any dirty nodes it
+        depends on) if needed.
+
+        Parameters
+        ----------
+        @param name: the node name.
+
+        Returns
+        ----------
+        @return the value of the node in bits, else None if the node does
+                not exist.
+        """
+        node = self._nodes.get(name)
+
+        if node is None:
+            return None
+        else:
+            return self._evaluate(node)
+
+    # ******************************
+
+    def quantity(self, name):
+        """
+        Gets the value of a node as a data quantity.
+
+        Parameters
+        ----------
+        @param name: the node name.
+
+        Returns
+        ----------
+        @return a DataQuantity, or a DataQuantityArray if the value is an
+                array, else None if the node does not exist.
+        """
+        value = self.get(name)
+
+        if value is None:
+            return None
+        elif isinstance(value, np.ndarray):
+            return DataQuantityArray(value)
+        elif isinstance(value, np.generic):
+            return DataQuantity(value.item())
+        else:
+            return DataQuantity(value)
+
+    # ******************************
+
+    def _evaluate(self, node):
+        """
+        Brings a node up to date. Inputs are brought up to date first;
+        the formula is only evaluated if an input's value has changed
+        since the node was last computed.
+
+        Parameters
+        ----------
+        @param node: the node to evaluate.
+
+        Returns
+        ----------
+        @return the node value.
+        """
+        if not node.dirty:
+            return node.value
+
+        for input_node in node.inputs:
+            if input_node.dirty:
+                self._evaluate(input_node)
+
+        if node.value is _UNSET or any(i.changed > node.computed for i in node.inputs):
+            value = node.function(*[i.value for i in node.inputs])
+            self.evaluations += 1
+
+            if node.value is _UNSET or not _equal(node.value, value):
+                node.value = value
+                node.changed = self._revision
+
+        node.computed = self._revision
+        node.dirty = False
+        return node.value
+
+    # ****************************************************************************************************
+
+
+# ******************************
+#
+# HELPERS
+#
+# ******************************
+
+def _equal(a, b):
+    """
+    Checks whether two node values are equal. Arrays are equal if they
+    have the same shape and elements.
+
+    Parameters
+    ----------
+    @param a: the first value.
+    @param b: the second value.
+
+    Returns
+    ----------
+    True if the values are equal, else False.
+    """
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        return np.array_equal(a, b)
+
+    try:
+        return bool(a == b)
+    except (TypeError, ValueError):
+        return False
+
+# ******************************
+
+def _build(defaults, nodes, parameters):
+    """
+    Builds a graph from default parameter values and derived node
+    definitions.
+
+    Parameters
+    ----------
+    @param defaults: a list of (name, value) parameter pairs.
+    @param nodes: a list of (name, function, inputs) derived node tuples.
+    @param parameters: parameter values overriding the defaults.
+
+    Returns
+    ----------
+    @return the graph, else None if a parameter is unknown.
+    """
+    graph = SizeGraph()
+
+    for name, value in defaults:
+        graph.addParameter(name, value)
+
+    for name, function, inputs in nodes:
+        graph.addNode(name, function, inputs)
+
+    if not graph.update(**parameters):
+        return None
+
+    return graph
+
+# ******************************
+#
+# PRODUCT GRAPHS
+#
+# ******************************
+
+def ocldGraph(**parameters):
+    """
+    Builds the OCLD size graph, with the notebook's parameter values.
+
+    Parameters: N_cand, N_list, N_chan, N_bin, N_sub, N_bit, N_sheet, r, c,
+    M_size and N_beam. Nodes: ocld_att_vol, L_size, C_search_size, S_size,
+    D_size, OCLD_size and OCLD_scan (the volume per scan).
+
+    Parameters
+    ----------
+    @param parameters: parameter values overriding the defaults.
+
+    Returns
+    ----------
+    @return the graph, else None if a parameter is unknown.
+    """
+    defaults = [('N_cand', 1000), ('N_list', 1000), ('N_chan', 128), ('N_bin', 128), ('N_sub', 64),
+                ('N_bit', 8), ('N_sheet', 3), ('r', 256), ('c', 256), ('M_size', METADATA_BITS),
+                ('N_beam', 1500)]
+
+    nodes = [('ocld_att_vol', lambda: CANDIDATE_LIST_ATTRIBUTE_BITS, ()),
+             ('L_size', listSize, ('N_list',)),
+             ('C_search_size', searchCubeSize, ('N_chan', 'N_bin', 'N_sub', 'N_bit')),
+             ('S_size', sheetSize, ('N_sheet', 'r', 'c')),
+             ('D_size', candidateDataSize, ('C_search_size', 'S_size', 'M_size')),
+             ('OCLD_size', lambda att, L, N, D: att + L + (N * D), ('ocld_att_vol', 'L_size', 'N_cand', 'D_size')),
+             ('OCLD_scan', scanVolume, ('OCLD_size', 'N_beam'))]
+
+    return _build(defaults, nodes, parameters)
+
+# ******************************
+
+def spocldGraph(**parameters):
+    """
+    Builds the SPOCLD size graph, with the notebook's parameter values.
+
+    Parameters: N_cand, N_list, N_samp, N_chan, N_pol, N_bit, N_sheet, r, c,
+    M_size, N_burst, T_scan and N_beam. Nodes: spocld_att_vol, L_size,
+    C_search_size, S_size, D_size, SPOCLD_size, SPOCLD_beam (the volume
+    per beam, per scan) and SPOCLD_scan (the volume per scan).
+
+    Parameters
+    ----------
+    @param parameters: parameter values overriding the defaults.
+
+    Returns
+    ----------
+    @return the graph, else None if a parameter is unknown.
+    """
+    defaults = [('N_cand', 1), ('N_list', 1000), ('N_samp', 640), ('N_chan', 1024), ('N_pol', 4),
+                ('N_bit', 8), ('N_sheet', 2), ('r', 1), ('c', 1024), ('M_size', METADATA_BITS),
+                ('N_burst', 1), ('T_scan', 180), ('N_beam', 1500)]
+
+    nodes = [('spocld_att_vol', lambda: CANDIDATE_LIST_ATTRIBUTE_BITS, ()),
+             ('L_size', listSize, ('N_list',)),
+             ('C_search_size', singlePulseCubeSize, ('N_samp', 'N_chan', 'N_pol', 'N_bit')),
+             ('S_size', sheetSize, ('N_sheet', 'r', 'c')),
+             ('D_size', candidateDataSize, ('C_search_size', 'S_size', 'M_size')),
+             ('SPOCLD_size', lambda att, L, N, D: att + L + (N * D), ('spocld_att_vol', 'L_size', 'N_cand', 'D_size')),
+             ('SPOCLD_beam', spocldBeamVolume, ('SPOCLD_size', 'N_burst', 'T_scan')),
+             ('SPOCLD_scan', scanVolume, ('SPOCLD_beam', 'N_beam'))]
+
+    return _build(defaults, nodes, parameters)
+
+# ******************************
+
+def ptdGraph(**parameters):
+    """
+    Builds the PTD size graph, with the notebook's parameter values.
+
+    Parameters: N_chan, N_bin, N_sub, N_pol, N_bit, M_size and N_beam.
+    Nodes: ptd_att_vol, TD_att_vol, C_time_size, TD_size, PTD_size and
+    PTD_scan (the volume per scan).
+
+    Parameters
+    ----------
+    @param parameters: parameter values overriding the defaults.
+
+    Returns
+    ----------
+    @return the graph, else None if a parameter is unknown.
+    """
+    defaults = [('N_chan', 4096), ('N_bin', 2048), ('N_sub', 180), ('N_pol', 4), ('N_bit', 64),
+                ('M_size', METADATA_BITS), ('N_beam', 16)]
+
+    nodes = [('ptd_att_vol', lambda: TIMING_ATTRIBUTE_BITS, ()),
+             ('TD_att_vol', lambda: STRING_BITS, ()),
+             ('C_time_size', timingCubeSize, ('N_chan', 'N_bin', 'N_sub', 'N_pol', 'N_bit')),
+             ('TD_size', lambda att, C, M: att + C + M, ('TD_att_vol', 'C_time_size', 'M_size')),
+             ('PTD_size', lambda att, TD: att + TD, ('ptd_att_vol', 'TD_size')),
+             ('PTD_scan', scanVolume, ('PTD_size', 'N_beam'))]
+
+    return _build(defaults, nodes, parameters)
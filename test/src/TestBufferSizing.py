@@ -0,0 +1,200 @@
+"""
+**************************************************************************
+
+ TestBufferSizing.py
+
+**************************************************************************
+ Description:
+
+ Tests the SPOCLD buffer sizing.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import unittest
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from main.src.BufferSizing import *
+from main.src.DataQuantityFunctions import *
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class TestBufferSizing(unittest.TestCase):
+    """
+    Defines the tests for the buffer sizing.
+    """
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_arrivals(self):
+        """
+        Tests the fixed and Poisson arrival generators.
+        """
+        chunks = list(fixedArrivals(N_burst=2, N_beam=3, duration=2, chunkSize=6))
+        self.assertEqual(2, len(chunks))
+        self.assertEqual([0.0, 0.0, 0.0, 0.5, 0.5, 0.5], chunks[0][0].tolist())
+        self.assertEqual([0, 1, 2, 0, 1, 2], chunks[0][1].tolist())
+
+        times = np.concatenate([chunk[0] for chunk in poissonArrivals(N_burst=2, N_beam=50, duration=100,
+                                                                          chunkSize=1000)])
+        self.assertTrue(abs(times.size - 10000) < 400)
+        self.assertTrue((np.diff(times) >= 0).all())
+        self.assertTrue(times.max() < 100)
+
+    # ******************************
+
+    def test_sizeBuffers(self):
+        """
+        Tests the backlogs against a direct simulation of the queues.
+        """
+        rng = np.random.default_rng(0)
+        times = np.sort(rng.uniform(0, 100, 3000))
+        beams = rng.integers(0, 3, 3000)
+        size = 1e6
+        drain = 3e7
+
+        def backlogs(times, rate):
+            result = []
+            backlog = 0.0
+            for i in range(len(times)):
+                if i:
+                    backlog = max(0.0, backlog - rate * (times[i] - times[i - 1]))
+                backlog += size
+                result.append(backlog)
+            return np.array(result)
+
+        sdp = backlogs(times, drain)
+        csp = np.concatenate([backlogs(times[beams == beam], drain / 3) for beam in range(3)])
+
+        sizing = sizeBuffers([(times[:1000], beams[:1000]), (times[1000:], beams[1000:])], drain, size=size,
+                             N_beam=3, probability=0.01)
+        self.assertAlmostEqual(sdp.max(), sizing.sdpPeak)
+        self.assertAlmostEqual(csp.max(), sizing.cspPeak)
+        self.assertEqual(3000, sizing.events)
+
+        # The capacities bound the quantiles to within the bin width.
+        for capacity, backlog in ((sizing.sdp, sdp), (sizing.csp, csp)):
+            self.assertTrue((backlog > capacity).mean() <= 0.01)
+            self.assertTrue(capacity <= np.percentile(backlog, 99) * (1 + 2 * RESOLUTION))
+
+        self.assertEqual(sizing.sdpPeak, sizing.capacity('sdp', 0))
+        self.assertTrue(sizing.capacity('sdp', 0.5) < sizing.sdp)
+        self.assertAlmostEqual(3000 * size / (drain * (times[-1] - times[0])), sizing.utilisation)
+
+        # A fixed rate arrival process that the drain keeps up with.
+        sizing = sizeBuffers(fixedArrivals(N_burst=1, N_beam=10, duration=60), 20 * spocldSize(), N_beam=10)
+        self.assertEqual(10 * spocldSize(), sizing.sdp)
+        self.assertEqual(spocldSize(), sizing.csp)
+
+    # ******************************
+
+    def test_traceArrivals(self):
+        """
+        Tests trace files, and that results do not depend on the chunks.
+        """
+        directory = tempfile.mkdtemp()
+
+        try:
+            rng = np.random.default_rng(1)
+            trace = np.column_stack((np.sort(rng.uniform(0, 60, 5000)), rng.integers(0, 20, 5000)))
+
+            path = os.path.join(directory, 'trace.npy')
+            np.save(path, trace)
+            text = os.path.join(directory, 'trace.csv')
+            with open(text, 'w') as traceFile:
+                traceFile.write('# time, beam\n')
+                for time, beam in trace:
+                    traceFile.write(repr(float(time)) + ',' + str(int(beam)) + '\n')
+
+            expected = sizeBuffers([(trace[:, 0], trace[:, 1].astype(int))], 10 * spocldSize(), N_beam=20)
+
+            for arrivals in (traceArrivals(path, 333), traceArrivals(path), traceArrivals(text, 1000)):
+                sizing = sizeBuffers(arrivals, 10 * spocldSize(), N_beam=20)
+                self.assertEqual(expected.sdpCounts.tolist(), sizing.sdpCounts.tolist())
+                self.assertEqual(expected.cspCounts.tolist(), sizing.cspCounts.tolist())
+                self.assertEqual(expected.sdp, sizing.sdp)
+                self.assertEqual(expected.csp, sizing.csp)
+
+            self.assertEqual([], list(traceArrivals(os.path.join(directory, 'missing.npy'))))
+            self.assertEqual([], list(traceArrivals(os.path.join(directory, 'missing.csv'))))
+        finally:
+            shutil.rmtree(directory)
+
+    # ******************************
+
+    def test_invalid(self):
+        """
+        Tests invalid input.
+        """
+        arrivals = [(np.array([0.0, 1.0]), np.array([0, 1]))]
+        self.assertEqual(None, sizeBuffers(arrivals, 0))
+        self.assertEqual(None, sizeBuffers(arrivals, 1e9, size=0))
+        self.assertEqual(None, sizeBuffers(arrivals, 1e9, beamDrain=-1))
+        self.assertEqual(None, sizeBuffers(arrivals, 1e9, probability=1))
+        self.assertEqual(None, sizeBuffers([(np.array([1.0, 0.0]), np.array([0, 1]))], 1e9))
+        self.assertEqual(None, sizeBuffers(arrivals + [(np.array([0.5]), np.array([0]))], 1e9))
+        self.assertEqual(None, sizeBuffers([(np.array([0.0]), np.array([-1]))], 1e9))
+        self.assertEqual(None, sizeBuffers(arrivals, 1e9).capacity('xyz'))
+        self.assertEqual(None, sizeBuffers([(np.array([0.0]),)], 1e9))
+        self.assertEqual(0, sizeBuffers([], 1e9).sdp)
+
+    # ****************************************************************************************************
+
+    # ******************************
+    #
+    # Test Setup & Teardown
+    #
+    # ******************************
+
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+
+    # ****************************************************************************************************
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+
+    # ****************************************************************************************************
+
+    if __name__ == "__main__":
+        unittest.main(argv=['ignored', '-v'], exit=False)
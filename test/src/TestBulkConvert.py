@@ -0,0 +1,151 @@
+"""
+**************************************************************************
+
+ TestBulkConvert.py
+
+**************************************************************************
+ Description:
+
+ Tests the streaming bulk unit conversion command.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from main.src.BulkConvert import *
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class TestBulkConvert(unittest.TestCase):
+    """
+    Defines the tests for the bulk conversion command.
+    """
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_convert_file(self):
+        """
+        Tests converting named columns of a CSV file, using a chunk
+        size smaller than the file so several chunks are streamed.
+
+        def convertFile(input_path, output_path, columns, src, dst, ...):
+        """
+        self.write('in.csv', 'beam,volume,rate\n1,8000,1\n2,0,2\n3,-8,3\n4,x,4\n5,16e3,5\n')
+
+        result = convertFile(self.path('in.csv'), self.path('out.csv'), ['volume'], 'bit', 'kB', chunk_size=2)
+        self.assertEqual(result[0], 5)
+
+        lines = self.read('out.csv')
+        self.assertEqual(lines[0], 'beam,volume,rate')
+        self.assertEqual(lines[1], '1,1.0,1')
+        self.assertEqual(lines[2], '2,0.0,2')
+        self.assertEqual(lines[3], '3,,3')  # Negative values are invalid.
+        self.assertEqual(lines[4], '4,,4')  # So are non numeric values.
+        self.assertEqual(lines[5], '5,2.0,5')
+
+    # ******************************
+
+    def test_convert_file_options(self):
+        """
+        Tests TSV files, index columns, missing headers and invalid
+        arguments.
+        """
+        self.write('in.tsv', '1\t1\n2\t2\n')
+
+        result = convertFile(self.path('in.tsv'), self.path('out.tsv'), ['0', '1'], 'GB', 'Mbit', header=False)
+        self.assertEqual(result[0], 2)
+        self.assertEqual(self.read('out.tsv'), ['8000.0\t8000.0', '16000.0\t16000.0'])
+
+        self.assertEqual(convertFile(self.path('in.tsv'), self.path('x.tsv'), ['0'], 'GB', 'Mbits'), None)
+        self.assertEqual(convertFile(self.path('in.tsv'), self.path('x.tsv'), ['name'], 'GB', 'Mbit'), None)
+        self.assertEqual(convertFile(self.path('in.tsv'), self.path('x.tsv'), ['0'], 'GB', 'Mbit', chunk_size=0), None)
+
+    # ******************************
+
+    def test_main(self):
+        """
+        Tests the command line entry point.
+        """
+        self.write('in.csv', 'volume\n8\n')
+
+        self.assertEqual(main([self.path('in.csv'), self.path('out.csv'), '-c', 'volume', '-f', 'bit', '-t', 'B']), 0)
+        self.assertEqual(self.read('out.csv'), ['volume', '1.0'])
+        self.assertEqual(main([self.path('in.csv'), self.path('out.csv'), '-c', 'volume', '-f', 'x', '-t', 'B']), 1)
+
+    # ****************************************************************************************************
+
+    # ******************************
+    #
+    # Test Setup & Teardown
+    #
+    # ******************************
+
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+        self.directory = tempfile.mkdtemp()
+
+    # ****************************************************************************************************
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+        shutil.rmtree(self.directory)
+
+    # ****************************************************************************************************
+
+    def path(self, name):
+        """ Gets the path of a file in the test directory """
+        return os.path.join(self.directory, name)
+
+    def write(self, name, text):
+        """ Writes a file in the test directory """
+        with open(self.path(name), 'w') as f:
+            f.write(text)
+
+    def read(self, name):
+        """ Reads the lines of a file in the test directory """
+        with open(self.path(name)) as f:
+            return f.read().splitlines()
+
+    # ****************************************************************************************************
+
+    if __name__ == "__main__":
+        unittest.main(argv=['ignored', '-v'], exit=False)
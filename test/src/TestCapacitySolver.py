@@ -0,0 +1,149 @@
+"""
+**************************************************************************
+
+ TestCapacitySolver.py
+
+**************************************************************************
+ Description:
+
+ Tests the inverse capacity solver.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import unittest
+
+import numpy as np
+
+from main.src.CapacitySolver import *
+from main.src.DataQuantityFunctions import *
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class TestCapacitySolver(unittest.TestCase):
+    """
+    Defines the tests for the capacity solver.
+    """
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_maxParameter(self):
+        """
+        Tests that the largest feasible values fit the budget, and the
+        next values do not.
+        """
+        # OCLD candidates per beam on a 100 Gbit/s link, 180 s scans.
+        N_cand = maxParameter('OCLD', 'N_cand', rate=100e9)
+        self.assertEqual(1397.0, N_cand)
+        self.assertTrue(scanVolume(ocldSize(N_cand=1397), 1500) <= 100e9 * 180)
+        self.assertTrue(scanVolume(ocldSize(N_cand=1398), 1500) > 100e9 * 180)
+
+        # Volume budgets, and the other fixed parameters.
+        N_beam = maxParameter('PTD', 'N_beam', volume=10 * ptdSize(N_chan=1024) + 1, N_chan=1024)
+        self.assertEqual(10.0, N_beam)
+
+        # SPOCLD bursts per second, which need not be whole.
+        N_burst = maxParameter('SPOCLD', 'N_burst', rate=100e9, integer=False)
+        self.assertAlmostEqual(100e9 / (1500 * spocldSize()), N_burst)
+
+        # Infeasible and unbounded problems.
+        self.assertTrue(np.isnan(maxParameter('OCLD', 'N_cand', rate=1)))
+        self.assertEqual(float('inf'), maxParameter('OCLD', 'N_cand', rate=1e9, N_beam=0))
+
+        # Invalid input.
+        self.assertEqual(None, maxParameter('XYZ', 'N_cand', rate=1e9))
+        self.assertEqual(None, maxParameter('OCLD', 'N_xyz', rate=1e9))
+        self.assertEqual(None, maxParameter('OCLD', 'N_cand', rate=1e9, N_xyz=1))
+        self.assertEqual(None, maxParameter('OCLD', 'N_cand', rate=1e9, N_cand=1))
+        self.assertEqual(None, maxParameter('OCLD', 'N_cand'))
+        self.assertEqual(None, maxParameter('OCLD', 'N_cand', rate='1e9'))
+        self.assertEqual(None, maxParameter('OCLD', 'T_scan', rate=1e9))
+
+    # ******************************
+
+    def test_batched(self):
+        """
+        Tests solving many problems in one call.
+        """
+        rates = np.linspace(1e9, 1e12, 1000)
+        N_beam = np.arange(1, 1001)
+        N_cand = maxParameter('OCLD', 'N_cand', rate=rates, N_beam=N_beam)
+        self.assertEqual((1000,), N_cand.shape)
+
+        for n in (0, 1, 500, 999):
+            self.assertTrue(scanVolume(ocldSize(N_cand=int(N_cand[n])), int(N_beam[n])) <= rates[n] * 180)
+            self.assertTrue(scanVolume(ocldSize(N_cand=int(N_cand[n]) + 1), int(N_beam[n])) > rates[n] * 180)
+
+        # Budgets and parameters broadcast together.
+        N_chan = maxParameter('OCLD', 'N_chan', rate=np.array([[1e9], [1e10]]), N_cand=np.array([10, 100, 1000]))
+        self.assertEqual((2, 3), N_chan.shape)
+        self.assertTrue(N_chan[1, 0] > N_chan[0, 0] > N_chan[0, 1])
+        self.assertTrue(np.isnan(N_chan[0, 2]))
+
+    # ******************************
+
+    def test_solve(self):
+        """
+        Tests bisection, used where the closed form is wrong.
+        """
+        self.assertEqual([3.0, 10.0, 1000.0, 0.0], solve(lambda x: x * x, np.array([10, 100, 1e6, 0.5])).tolist())
+        self.assertAlmostEqual(np.sqrt(10), solve(lambda x: x * x, 10, integer=False))
+        self.assertTrue(np.isnan(solve(lambda x: x + 1, 0.5)))
+        self.assertEqual(float('inf'), solve(lambda x: 0 * x, 1))
+        self.assertEqual(3.0, solve(lambda x: 2 * x + 1, 7))
+
+    # ****************************************************************************************************
+
+    # ******************************
+    #
+    # Test Setup & Teardown
+    #
+    # ******************************
+
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+
+    # ****************************************************************************************************
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+
+    # ****************************************************************************************************
+
+    if __name__ == "__main__":
+        unittest.main(argv=['ignored', '-v'], exit=False)
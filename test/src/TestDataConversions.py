@@ -37,6 +37,9 @@
 
 import os
 import unittest
+from fractions import Fraction
+
+import numpy as np
 
 from main.src.DataConversions import *
 
@@ -372,6 +375,254 @@ class TestDataConversions(unittest.TestCase):
         # 1000 bits to GB (should be 1.25*10^-7 GB (gigabytes))
         self.assertEqual(convertBitToByte(1000, 'GB'), 1.25 * pow(10, -7))
 
+    # ******************************
+
+    def test_unit_registry(self):
+        """
+        Tests the unit registry, and the IEC binary units it adds.
+
+        def isUnitValid(units):
+
+        The registry stores the number of bits in each unit:
+
+        |-------------------------------------------|
+        |  SI unit |   Bits    | IEC unit |   Bits   |
+        |-------------------------------------------|
+        |   kbit   |   10^3    |  Kibit   |   2^10   |
+        |    MB    | 8 x 10^6  |   MiB    | 8 x 2^20 |
+        |-------------------------------------------|
+        """
+        self.assertEqual(isUnitValid('kbit'), True)
+        self.assertEqual(isUnitValid('MB'), True)
+        self.assertEqual(isUnitValid('Gibit'), True)
+        self.assertEqual(isUnitValid('KiB'), True)
+        self.assertEqual(isUnitValid('Kbit'), False)
+        self.assertEqual(isUnitValid('KB'), False)
+        self.assertEqual(isUnitValid(1), False)
+        self.assertEqual(isUnitValid(['kB']), False)
+
+        self.assertEqual(isBitUnitValid('Mibit'), True)
+        self.assertEqual(isBitUnitValid('MiB'), False)
+        self.assertEqual(isByteUnitValid('MiB'), True)
+        self.assertEqual(isByteUnitValid('Mibit'), False)
+
+        self.assertEqual(BIT_UNITS['Kibit'], 1024)
+        self.assertEqual(BYTE_UNITS['MiB'], 8 * pow(2, 20))
+
+        self.assertEqual(convertFromBit(pow(2, 30), 'Gibit'), 1.0)
+        self.assertEqual(convertToBit(1, 'Kibit'), 1024.0)
+        self.assertEqual(convertByteToBit(1, 'KiB'), 8192.0)
+        self.assertEqual(convertBitToByte(8 * pow(2, 40), 'TiB'), 1.0)
+
+    # ******************************
+
+    def test_convert(self):
+        """
+        Tests the generic unit conversion function.
+
+        def convert(value, src='bit', dst='bit'):
+        """
+        self.assertEqual(convert('a', 'bit', 'kbit'), None)
+        self.assertEqual(convert(1, 'bits', 'kbit'), None)
+        self.assertEqual(convert(1, 'bit', 'kbits'), None)
+        self.assertEqual(convert(-1, 'bit', 'kbit'), None)
+        self.assertEqual(convert(0, 'GB', 'Mbit'), 0)
+
+        # Exact integer factors are kept exact.
+        self.assertEqual(convert(2, 'GB', 'Mbit'), 16000)
+        self.assertEqual(type(convert(2, 'GB', 'Mbit')), int)
+        self.assertEqual(convert(1, 'MiB', 'KiB'), 1024)
+        self.assertEqual(convert(1, 'PB', 'bit'), 8 * pow(10, 15))
+
+        # Matches the single unit converters.
+        self.assertEqual(convert(1000, 'bit', 'kbit'), convertFromBit(1000, 'kbit'))
+        self.assertEqual(convert(1, 'bit', 'PB'), convertBitToByte(1, 'PB'))
+        self.assertEqual(convert(10, 'TB', 'bit'), convertByteToBit(10, 'TB'))
+
+        # Mixed SI/IEC conversions.
+        self.assertAlmostEqual(convert(1, 'KiB', 'kB'), 1.024)
+        self.assertAlmostEqual(convert(1, 'GB', 'GiB'), pow(10, 9) / float(pow(2, 30)))
+
+        # Round trips.
+        for src in UNITS:
+            for dst in UNITS:
+                self.assertAlmostEqual(convert(convert(3.5, src, dst), dst, src), 3.5)
+
+    # ******************************
+
+    def test_convert_array(self):
+        """
+        Tests the vectorised generic unit conversion function.
+
+        def convertArray(values, src='bit', dst='bit'):
+        """
+        self.assertEqual(convertArray([1], 'bits', 'kbit'), None)
+        self.assertEqual(convertArray(['1'], 'bit', 'kbit'), None)
+
+        values = [0, 1, 2.5, 1000, pow(10, 12)]
+
+        for src, dst in [('GB', 'Mbit'), ('bit', 'PB'), ('KiB', 'kB'), ('Tibit', 'MiB')]:
+            converted = convertArray(values, src, dst)
+            for i, value in enumerate(values):
+                self.assertEqual(converted[i], float(convert(value, src, dst)))
+
+        self.assertTrue(np.isnan(convertArray([-1], 'GB', 'Mbit')[0]))
+
+    # ******************************
+
+    def test_parse_bits(self):
+        """
+        Tests the functions that parse data quantity and rate strings.
+
+        def parseBits(text, exact=False):
+        def parseBitRate(text, exact=False):
+        """
+        self.assertEqual(parseBits(1), None)
+        self.assertEqual(parseBits(['1 kB']), None)
+        self.assertEqual(parseBits('a'), None)
+        self.assertEqual(parseBits('1'), None)
+        self.assertEqual(parseBits('1 kbits'), None)
+        self.assertEqual(parseBits('1 Kbit'), None)
+        self.assertEqual(parseBits('-1 kB'), None)
+
+        self.assertEqual(parseBits('0 GB'), 0)
+        self.assertEqual(parseBits('1 bit'), 1)
+        self.assertEqual(parseBits('100 bits'), 100)
+        self.assertEqual(parseBits('1,000 bits'), 1000)
+        self.assertEqual(parseBits('1,000,000.5 bits'), 1000000.5)
+        self.assertEqual(parseBits('1,,2 bits'), None)
+        self.assertEqual(parseBits('12,34 bits'), None)
+        self.assertEqual(parseBits('1234,567 bits'), None)
+        self.assertEqual(parseBits(',000 bits'), None)
+        self.assertEqual(parseBits('  2.1 GB '), 16800000000)
+        self.assertEqual(parseBits('2.1GB'), 16800000000)
+        self.assertEqual(parseBits('1e3 kB'), 8 * pow(10, 6))
+        self.assertEqual(parseBits('.5 KiB'), 4096)
+        self.assertEqual(parseBits('0.5 bit'), 0.5)
+        self.assertEqual(parseBits('0.3 bit', exact=True), Fraction(3, 10))
+
+        # Rates and quantities are not interchangeable.
+        self.assertEqual(parseBits('11.96 Mbit/s'), None)
+        self.assertEqual(parseBitRate('11.96 Mbit'), None)
+        self.assertEqual(parseBitRate('11.96 Mbit/s'), 11960000)
+        self.assertEqual(parseBitRate('1.5 GB / s'), 12 * pow(10, 9))
+
+        # Repeated strings are served from the cache.
+        parseBits('3.1 GB')
+        hits = parseCacheInfo().hits
+        parseBits('3.1 GB')
+        self.assertEqual(parseCacheInfo().hits, hits + 1)
+
+    # ******************************
+
+    def test_parse_bits_array(self):
+        """
+        Tests the bulk string parser.
+
+        def parseBitsArray(texts, rate=False):
+        """
+        bits = parseBitsArray(['1 kbit', '2.1 GB', 'x', None, '1 kbit', '1 B/s'])
+        self.assertEqual(bits[0], 1000)
+        self.assertEqual(bits[1], 16800000000)
+        self.assertTrue(np.isnan(bits[2]))
+        self.assertTrue(np.isnan(bits[3]))
+        self.assertEqual(bits[4], 1000)
+        self.assertTrue(np.isnan(bits[5]))
+
+        rates = parseBitsArray(np.array(['1 B/s', '1 B']), rate=True)
+        self.assertEqual(rates[0], 8)
+        self.assertTrue(np.isnan(rates[1]))
+
+        self.assertEqual(parseBitsArray([['1 B', '2 B'], ['3 B', '4 B']]).shape, (2, 2))
+
+    # ******************************
+
+    def test_bits_bytes_array(self):
+        """
+        Tests the vectorised bit/byte conversion functions.
+
+        def bitsToBytesArray(bits):
+        def bytesToBitsArray(byte):
+
+        Results must match the scalar functions element by element,
+        including the clamping of negative values to zero.
+        """
+        self.assertEqual(bitsToBytesArray('a'), None)
+        self.assertEqual(bytesToBitsArray(['1']), None)
+
+        values = [-1, 0, 1, 2, 10, 100, 1000, 1000000]
+        bytes_array = bitsToBytesArray(np.array(values))
+        bits_array = bytesToBitsArray(values)
+
+        for i, value in enumerate(values):
+            self.assertEqual(bytes_array[i], bitsToBytes(value))
+            self.assertEqual(bits_array[i], bytesToBits(value))
+
+        # Numpy scalars are rejected by the scalar version, but not here.
+        self.assertEqual(bitsToBytes(np.int64(8)), None)
+        self.assertEqual(bitsToBytesArray(np.int64(8)), 1.0)
+
+    # ******************************
+
+    def test_convert_bit_array(self):
+        """
+        Tests the vectorised bit unit conversion functions.
+
+        def convertFromBitArray(bits, units='None'):
+        def convertToBitArray(nonbits, units='None'):
+
+        Results must match the scalar functions element by element,
+        with negative values mapped to NaN rather than None.
+        """
+        self.assertEqual(convertFromBitArray([1], 'kbits'), None)
+        self.assertEqual(convertToBitArray([1], 'kB'), None)
+        self.assertEqual(convertFromBitArray('a', 'bit'), None)
+
+        values = [0, 1, 100, 1000, 2.5, pow(10, 15), pow(10, -15)]
+
+        for units in ['bit', 'kbit', 'Mbit', 'Gbit', 'Tbit', 'Pbit']:
+            from_array = convertFromBitArray(values, units)
+            to_array = convertToBitArray(np.array(values), units)
+
+            for i, value in enumerate(values):
+                self.assertEqual(from_array[i], convertFromBit(value, units))
+                self.assertEqual(to_array[i], convertToBit(value, units))
+
+        self.assertTrue(np.isnan(convertFromBitArray([-1], 'kbit')[0]))
+        self.assertTrue(np.isnan(convertToBitArray([-1], 'kbit')[0]))
+
+        # Shape is preserved.
+        grid = np.arange(12).reshape(3, 4)
+        self.assertEqual(convertFromBitArray(grid, 'kbit').shape, (3, 4))
+
+    # ******************************
+
+    def test_convert_byte_array(self):
+        """
+        Tests the vectorised byte unit conversion functions.
+
+        def convertByteToBitArray(byte, units='None'):
+        def convertBitToByteArray(bits, units='None'):
+
+        Results must match the scalar functions element by element,
+        with negative values mapped to NaN rather than None.
+        """
+        self.assertEqual(convertByteToBitArray([1], 'kbit'), None)
+        self.assertEqual(convertBitToByteArray([1], 'Kb'), None)
+
+        values = [0, 1, 10, 1000, 0.125, pow(10, 15)]
+
+        for units in ['B', 'kB', 'MB', 'GB', 'TB', 'PB']:
+            to_bits = convertByteToBitArray(values, units)
+            to_bytes = convertBitToByteArray(np.array(values), units)
+
+            for i, value in enumerate(values):
+                self.assertEqual(to_bits[i], convertByteToBit(value, units))
+                self.assertEqual(to_bytes[i], convertBitToByte(value, units))
+
+        self.assertTrue(np.isnan(convertByteToBitArray([-1], 'B')[0]))
+        self.assertTrue(np.isnan(convertBitToByteArray([-1], 'B')[0]))
+
 
     # ****************************************************************************************************
 
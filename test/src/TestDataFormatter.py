@@ -0,0 +1,177 @@
+"""
+**************************************************************************
+
+ TestDataFormatter.py
+
+**************************************************************************
+ Description:
+
+ Tests the functions that format data quantities in readable units.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import unittest
+from fractions import Fraction
+
+import numpy as np
+
+from main.src.DataFormatter import *
+from main.src.DataQuantity import DataQuantity
+from main.src.DataQuantityArray import DataQuantityArray
+from main.src.DataRate import DataRate
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class TestDataFormatter(unittest.TestCase):
+    """
+    Defines the tests for the data formatting functions.
+    """
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_best_unit(self):
+        """
+        Tests the function that chooses the most readable unit.
+
+        def bestUnit(bits, system='SI', byteUnits=False, precision=2):
+        """
+        self.assertEqual('bit', bestUnit(0))
+        self.assertEqual('bit', bestUnit(999))
+        self.assertEqual('kbit', bestUnit(1000))
+        self.assertEqual('GB', bestUnit(16800000000, byteUnits=True))
+        self.assertEqual('B', bestUnit(1, byteUnits=True))
+        self.assertEqual('Kibit', bestUnit(1024, system='IEC'))
+        self.assertEqual('bit', bestUnit(1023, system='IEC'))
+        self.assertEqual('Pbit', bestUnit(1e30))
+
+        # Values that would round up to 1000 use the next unit.
+        self.assertEqual('Mbit', bestUnit(999995))
+        self.assertEqual('kbit', bestUnit(999994))
+        self.assertEqual('kbit', bestUnit(999995, precision=3))
+
+        self.assertEqual(None, bestUnit(-1))
+        self.assertEqual(None, bestUnit('a'))
+        self.assertEqual(None, bestUnit(1, system='a'))
+        self.assertEqual(None, bestUnit(1, precision=-1))
+
+    # ******************************
+
+    def test_format_bits(self):
+        """
+        Tests the function that formats bits in the most readable unit.
+
+        def formatBits(bits, precision=2, system='SI', byteUnits=False, rate=False):
+        """
+        self.assertEqual('2.10 GB', formatBits(16800000000, byteUnits=True))
+        self.assertEqual('16.80 Gbit', formatBits(16800000000))
+        self.assertEqual('12.0 Mbit/s', formatBits(11960000, precision=1, rate=True))
+        self.assertEqual('128.00 MiB', formatBits(pow(2, 30), system='IEC', byteUnits=True))
+        self.assertEqual('1.00 Mbit', formatBits(999999))
+        self.assertEqual('999.99 kbit', formatBits(999994))
+        self.assertEqual('0.00 bit', formatBits(0))
+        self.assertEqual('5 bit', formatBits(5, precision=0))
+        self.assertEqual('0.125 B', formatBits(1, precision=3, byteUnits=True))
+        self.assertEqual('0.30 bit', formatBits(Fraction(3, 10)))
+        self.assertEqual('1000000.00 Pbit', formatBits(1e21))
+
+        self.assertEqual(None, formatBits(-1))
+        self.assertEqual(None, formatBits(float('nan')))
+        self.assertEqual(None, formatBits(float('inf')))
+        self.assertEqual(None, formatBits('1'))
+        self.assertEqual(None, formatBits(1, system='a'))
+        self.assertEqual(None, formatBits(1, precision=2.5))
+
+    # ******************************
+
+    def test_format_bits_array(self):
+        """
+        Tests the bulk formatting function.
+
+        def formatBitsArray(bits, precision=2, system='SI', byteUnits=False, rate=False):
+        """
+        self.assertEqual(['125.00 B', '2.10 GB', '', ''],
+                         formatBitsArray([1000, 16800000000, -1, np.nan], byteUnits=True).tolist())
+        self.assertEqual((2, 2), formatBitsArray(np.ones((2, 2))).shape)
+        self.assertEqual([], formatBitsArray([]).tolist())
+        self.assertEqual(None, formatBitsArray(['a']))
+        self.assertEqual(None, formatBitsArray([1], system='a'))
+        self.assertEqual(None, formatBitsArray([1], precision=-1))
+
+        # The bulk formatter gives exactly the same strings as formatBits.
+        values = np.concatenate((pow(10, np.random.default_rng(0).random(500) * 20),
+                                 [0, 1, 999994, 999995, 1e40]))
+        for precision in (0, 2, 5):
+            for system in ('SI', 'IEC'):
+                for byteUnits in (False, True):
+                    expected = [formatBits(v, precision, system, byteUnits, True) for v in values.tolist()]
+                    actual = formatBitsArray(values, precision, system, byteUnits, True).tolist()
+                    self.assertEqual(expected, actual)
+
+    # ******************************
+
+    def test_format_methods(self):
+        """
+        Tests the format methods of the data classes.
+        """
+        self.assertEqual('2.10 GB', DataQuantity(16800000000).format(byteUnits=True))
+        self.assertEqual('2.1 GB', DataQuantity(16800000000, exact=True).format(1, byteUnits=True))
+        self.assertEqual('11.96 Mbit/s', DataRate(11960000).format())
+        self.assertEqual('11.41 Mibit/s', DataRate(11960000).format(system='IEC'))
+        self.assertEqual(['1.00 kB', '2.10 GB'], DataQuantityArray([8000, 16800000000]).format(byteUnits=True).tolist())
+
+    # ****************************************************************************************************
+
+    # ******************************
+    #
+    # Test Setup & Teardown
+    #
+    # ******************************
+
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+
+    # ****************************************************************************************************
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+
+    # ****************************************************************************************************
+
+    if __name__ == "__main__":
+        unittest.main(argv=['ignored', '-v'], exit=False)
@@ -35,7 +35,11 @@
 **************************************************************************
 """
 
+import copy
+import pickle
 import unittest
+from fractions import Fraction
+
 from main.src.DataQuantity import DataQuantity
 
 # ******************************
@@ -286,33 +290,12 @@ class TestDataQuantity(unittest.TestCase):
         self.assertEqual(500, dq3.bits)
 
         # *************************************************
-        # Subtraction of quantities with ints reversed
+        # Subtraction of quantities from ints (not supported)
         # *************************************************
 
-        # Extreme conditions
-        dq1 = DataQuantity(-1)
-        dq3 = (-1) - dq1
-        self.assertEqual(1, dq3.bits)
-
-        # Extreme conditions
-        dq1 = DataQuantity(0)
-        dq3 = 0 - dq1
-        self.assertEqual(0, dq3.bits)
-
-        # Normal conditions
-        dq1 = DataQuantity(1)
-        dq3 = 0 - dq1
-        self.assertEqual(1, dq3.bits)
-
-        # Normal conditions
-        dq1 = DataQuantity(1)
-        dq3 = 1 - dq1
-        self.assertEqual(0, dq3.bits)
-
-        # Normal conditions
-        dq1 = DataQuantity(1000)
-        dq3 = 500 - dq1
-        self.assertEqual(500, dq3.bits)
+        for number in (-1, 0, 1, 500):
+            with self.assertRaises(TypeError):
+                number - DataQuantity(1)
 
         # *************************************************
         # Subtraction of quantities with floats
@@ -344,33 +327,12 @@ class TestDataQuantity(unittest.TestCase):
         self.assertEqual(500, dq3.bits)
 
         # *************************************************
-        # Subtraction of quantities with floats reversed
+        # Subtraction of quantities from floats (not supported)
         # *************************************************
 
-        # Extreme conditions
-        dq1 = DataQuantity(-1)
-        dq3 = (-1.0) - dq1
-        self.assertEqual(1, dq3.bits)
-
-        # Extreme conditions
-        dq1 = DataQuantity(0)
-        dq3 = 0.0 - dq1
-        self.assertEqual(0, dq3.bits)
-
-        # Normal conditions
-        dq1 = DataQuantity(1)
-        dq3 = 0.0 - dq1
-        self.assertEqual(1, dq3.bits)
-
-        # Normal conditions
-        dq1 = DataQuantity(1)
-        dq3 = 1.0 - dq1
-        self.assertEqual(0, dq3.bits)
-
-        # Normal conditions
-        dq1 = DataQuantity(1000)
-        dq3 = 500.0 - dq1
-        self.assertEqual(500, dq3.bits)
+        for number in (-1.0, 0.0, 1.0, 500.0):
+            with self.assertRaises(TypeError):
+                number - DataQuantity(1)
 
     # ******************************
 
@@ -604,33 +566,14 @@ class TestDataQuantity(unittest.TestCase):
         self.assertEqual(2.5, dq3.bits)
 
         # *************************************************
-        # Division of quantities with ints reversed
+        # Division of ints by quantities (not supported)
         # *************************************************
 
-        # Extreme conditions
-        dq1 = DataQuantity(-1)
-        dq3 = (-1) / dq1
-        self.assertEqual(None, dq3)  # Divide by zero effectively.
-
-        # Extreme conditions
-        dq1 = DataQuantity(0)
-        dq3 = 0 / dq1
-        self.assertEqual(None, dq3)  # Divide by zero effectively.
-
-        # Normal conditions
-        dq1 = DataQuantity(1)
-        dq3 = 0 / dq1
-        self.assertEqual(None, dq3)  # Divide by zero effectively.
-
-        # Normal conditions
-        dq1 = DataQuantity(1)
-        dq3 = 1 / dq1
-        self.assertEqual(1, dq3.bits)
-
-        # Normal conditions
-        dq1 = DataQuantity(10)
-        dq3 = 4 / dq1
-        self.assertEqual(2.5, dq3.bits)
+        for number in (-1, 0, 1, 4):
+            with self.assertRaises(TypeError):
+                number / DataQuantity(10)
+            with self.assertRaises(TypeError):
+                number // DataQuantity(10)
 
         # *************************************************
         # Division of quantities with floats
@@ -662,33 +605,150 @@ class TestDataQuantity(unittest.TestCase):
         self.assertEqual(2.5, dq3.bits)
 
         # *************************************************
-        # Division of quantities with floats reversed
+        # Division of floats by quantities (not supported)
         # *************************************************
 
-        # Extreme conditions
-        dq1 = DataQuantity(-1)
-        dq3 = (-1.0) / dq1
-        self.assertEqual(None, dq3)  # Divide by zero effectively.
+        for number in (-1.0, 0.0, 1.0, 4.0):
+            with self.assertRaises(TypeError):
+                number / DataQuantity(10)
+            with self.assertRaises(TypeError):
+                number // DataQuantity(10)
 
-        # Extreme conditions
-        dq1 = DataQuantity(0)
-        dq3 = 0.0 / dq1
-        self.assertEqual(None, dq3)  # Divide by zero effectively.
+    # ******************************
 
-        # Normal conditions
-        dq1 = DataQuantity(1)
-        dq3 = 0.0 / dq1
-        self.assertEqual(None, dq3)  # Divide by zero effectively.
+    def test_get(self):
+        """
+        Tests the methods that describe a data quantity in
+        the desired units.
+        """
+        dq = DataQuantity(100)
+        self.assertEqual('100 bit', dq.get('bit'))
+        self.assertEqual('0.1 kbit', dq.get('kbit'))
+        self.assertEqual('12.5 B', dq.get('B'))
+        self.assertEqual('100 bits', dq.get('bits'))
+        self.assertEqual('100 bits', dq.get(1))
+
+        dq = DataQuantity(8 * pow(2, 20))
+        self.assertEqual('1.0 MiB', dq.get('MiB'))
+        self.assertEqual('8.0 Mibit', dq.get('Mibit'))
+        self.assertEqual('8388.608 kbit', dq.get('kbit'))
+
+        dq = DataQuantity(0)
+        self.assertEqual('0 GB', dq.get('GB'))
+
+        dq = DataQuantity(1000)
+        self.assertEqual('500.0 bit/s', dq.getRate(2, 'bit'))
+        self.assertEqual('0.5 kbit/s', dq.getRate(2, 'kbit'))
+        self.assertEqual('62.5 B/s', dq.getRate(2, 'B'))
+        self.assertEqual('Number of seconds invalid.', dq.getRate(0, 'B'))
 
-        # Normal conditions
-        dq1 = DataQuantity(1)
-        dq3 = 1.0 / dq1
-        self.assertEqual(1, dq3.bits)
+    # ******************************
 
-        # Normal conditions
-        dq1 = DataQuantity(10)
-        dq3 = 4.0 / dq1
-        self.assertEqual(2.5, dq3.bits)
+    def test_exact(self):
+        """
+        Tests exact mode arithmetic, which keeps bits as ints or
+        Fractions so large totals do not lose precision.
+        """
+        # Invalid input still gives zero bits.
+        self.assertEqual(0, DataQuantity('a', exact=True).bits)
+        self.assertEqual(0, DataQuantity(-1, exact=True).bits)
+
+        dq = DataQuantity(2.0, exact=True)
+        self.assertEqual(2, dq.bits)
+        self.assertEqual(int, type(dq.bits))
+
+        # Division gives a Fraction where it is not exact.
+        dq = DataQuantity(10, exact=True) / 4
+        self.assertEqual(Fraction(5, 2), dq.bits)
+        self.assertEqual('5/2 bits', str(dq))
+        self.assertEqual(None, DataQuantity(10, exact=True) / 0)
+        self.assertEqual(5, (DataQuantity(10, exact=True) / DataQuantity(2)).bits)
+        self.assertEqual(3, (DataQuantity(10, exact=True) // 3).bits)
+
+        # Exactness spreads to results that involve an exact quantity.
+        dq = DataQuantity(0.5) + DataQuantity(1, exact=True)
+        self.assertEqual(True, dq.exact)
+        self.assertEqual(Fraction(3, 2), dq.bits)
+
+        # An archive total of 10^23 bits, plus one bit, divided back down.
+        total = DataQuantity(pow(10, 15), exact=True) * pow(10, 8) + 1
+        self.assertEqual(pow(10, 23) + 1, total.bits)
+        self.assertEqual(Fraction(pow(10, 23) + 1, 3), (total / 3).bits)
+        self.assertEqual(pow(10, 23) + 1, ((total / 3) * 3).bits)
+
+        # Float mode rounds the same total, and stays in float mode.
+        self.assertNotEqual(pow(10, 23) + 1, (DataQuantity(1e23) + 1).bits)
+        self.assertEqual(False, (DataQuantity(pow(2.0, 53)) + DataQuantity(1)).exact)
+        self.assertEqual(pow(2.0, 53), (DataQuantity(pow(2.0, 53)) + DataQuantity(1)).bits)
+        self.assertEqual('DataQuantity(1e+17)', repr(DataQuantity(1e17) + 0.3))
+        self.assertEqual(str(pow(2, 60) / 7) + ' bits', str(DataQuantity(pow(2, 60)) / 7))
+
+        dq = DataQuantity(16800000000, exact=True)
+        self.assertEqual('2.1 GB', dq.get('GB'))
+        self.assertEqual('1.05 GB/s', dq.getRate(2, 'GB'))
+
+    # ******************************
+
+    def test_parse(self):
+        """
+        Tests the methods that create data quantities from strings.
+        """
+        self.assertEqual(None, DataQuantity.parse('a'))
+        self.assertEqual(None, DataQuantity.parse('2.1 GB/s'))
+        self.assertEqual(None, DataQuantity.parseRate('2.1 GB'))
+
+        self.assertEqual(16800000000, DataQuantity.parse('2.1 GB').bits)
+        self.assertEqual(1000, DataQuantity.parse(str(DataQuantity(1000))).bits)
+        self.assertEqual(11960000, DataQuantity.parseRate('11.96 Mbit/s').bits)
+
+        dq = DataQuantity.parse('0.3 bit', exact=True)
+        self.assertEqual(True, dq.exact)
+        self.assertEqual(Fraction(3, 10), dq.bits)
+
+    # ******************************
+
+    def test_value_semantics(self):
+        """
+        Tests that data quantities are immutable, hashable and ordered.
+        """
+        dq = DataQuantity(8)
+        self.assertRaises(AttributeError, setattr, dq, 'bits', 16)
+        self.assertRaises(AttributeError, setattr, dq, 'other', 16)
+        self.assertFalse(hasattr(dq, '__dict__'))
+
+        # Arithmetic returns a new object and leaves the operands alone.
+        dq2 = dq + dq
+        self.assertEqual(8, dq.bits)
+        self.assertEqual(16, dq2.bits)
+
+        # Equality and hashing.
+        self.assertEqual(DataQuantity(8), dq)
+        self.assertEqual(DataQuantity(8.0), dq)
+        self.assertNotEqual(DataQuantity(9), dq)
+        self.assertNotEqual(8, dq)
+        self.assertEqual(hash(DataQuantity(8.0)), hash(dq))
+        self.assertEqual(1, len({dq, DataQuantity(8), DataQuantity(8.0)}))
+        self.assertEqual('a', {dq: 'a'}[DataQuantity(8)])
+        self.assertEqual(DataQuantity(3, exact=True), DataQuantity(3))
+
+        # Ordering.
+        values = [DataQuantity(3), DataQuantity(1.5), DataQuantity(-2), DataQuantity(10)]
+        self.assertEqual([0, 1.5, 3, 10], [v.bits for v in sorted(values)])
+        self.assertEqual(10, max(values).bits)
+        self.assertTrue(DataQuantity(1) < DataQuantity(2) <= DataQuantity(2))
+        self.assertTrue(DataQuantity(3) > DataQuantity(2) >= DataQuantity(2))
+        self.assertRaises(TypeError, lambda: DataQuantity(1) < 2)
+
+        # Results of arithmetic are still validated.
+        self.assertEqual(0, (DataQuantity(2) - 5).bits)
+        self.assertEqual(True, (DataQuantity(2, exact=True) * Fraction(1, 4)).exact)
+        self.assertEqual(Fraction(1, 2), (DataQuantity(2, exact=True) * Fraction(1, 4)).bits)
+
+        # Round trips.
+        self.assertEqual(dq, eval(repr(dq)))
+        self.assertEqual(True, eval(repr(DataQuantity(3, exact=True))).exact)
+        self.assertEqual(dq, pickle.loads(pickle.dumps(dq)))
+        self.assertEqual(dq, copy.copy(dq))
 
     # ******************************
 
@@ -0,0 +1,287 @@
+"""
+**************************************************************************
+
+ TestDataQuantityArray.py
+
+**************************************************************************
+ Description:
+
+ Tests the array class used to represent many data quantities at once.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import unittest
+
+import numpy as np
+
+from main.src.DataConversions import UNITS
+from main.src.DataQuantity import DataQuantity
+from main.src.DataQuantityArray import DataQuantityArray, resultingRate
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class TestDataQuantityArray(unittest.TestCase):
+    """
+    Defines the tests for the data quantity array class.
+    """
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_constructor(self):
+        """
+        Tests the data quantity array constructors and conversions.
+        """
+        dqa = DataQuantityArray([100, -1, 2.5])
+        self.assertEqual([100, 0, 2.5], dqa.bits.tolist())
+        self.assertEqual((3,), dqa.shape)
+        self.assertEqual(3, len(dqa))
+
+        # Invalid values
+        self.assertEqual([0.0, 0.0], DataQuantityArray(['a', 'b']).bits.tolist())
+        self.assertEqual([0.0], DataQuantityArray('1').bits.tolist())
+        self.assertEqual(0, len(DataQuantityArray()))
+
+        # Read only, and the input is copied
+        values = np.array([1.0, 2.0])
+        dqa = DataQuantityArray(values)
+        values[0] = 5.0
+        self.assertEqual(1.0, dqa.bits[0])
+        self.assertRaises(ValueError, dqa.bits.__setitem__, 0, 3.0)
+
+        # To and from data quantities
+        dqa = DataQuantityArray.fromQuantities([DataQuantity(8), DataQuantity(-8), DataQuantity(1)])
+        self.assertEqual([8, 0, 1], dqa.bits.tolist())
+        self.assertEqual([DataQuantity(8), DataQuantity(0), DataQuantity(1)], dqa.toQuantities())
+        self.assertEqual(dqa.toQuantities(), list(dqa))
+        self.assertEqual([8, 2], DataQuantityArray([DataQuantity(8), 2]).bits.tolist())
+
+    # ******************************
+
+    def test_slicing(self):
+        """
+        Tests indexing and slicing data quantity arrays.
+        """
+        dqa = DataQuantityArray(np.arange(10))
+
+        self.assertEqual(DataQuantity, type(dqa[3]))
+        self.assertEqual(3, dqa[3].bits)
+        self.assertEqual(9, dqa[-1].bits)
+
+        part = dqa[2:5]
+        self.assertEqual(DataQuantityArray, type(part))
+        self.assertEqual([2, 3, 4], part.bits.tolist())
+        self.assertTrue(np.shares_memory(part.bits, dqa.bits))
+
+        self.assertEqual([1, 8], dqa[np.array([1, 8])].bits.tolist())
+        self.assertEqual([0, 1], dqa[dqa.bits < 2].bits.tolist())
+
+    # ******************************
+
+    def test_arithmetic(self):
+        """
+        Tests element-wise arithmetic on data quantity arrays.
+        """
+        dqa = DataQuantityArray([100, 2000, 0])
+
+        self.assertEqual([101, 2001, 1], (dqa + 1).bits.tolist())
+        self.assertEqual([101, 2001, 1], (1 + dqa).bits.tolist())
+        self.assertEqual([200, 4000, 0], (dqa + dqa).bits.tolist())
+        self.assertEqual([108, 2008, 8], (dqa + DataQuantity(8)).bits.tolist())
+        self.assertEqual([108, 2008, 8], (DataQuantity(8) + dqa).bits.tolist())
+        self.assertEqual([101, 2002, 3], (dqa + np.array([1, 2, 3])).bits.tolist())
+        self.assertEqual([101, 2002, 3], (np.array([1, 2, 3]) + dqa).bits.tolist())
+
+        # Negative results are clamped to zero.
+        self.assertEqual([0, 1850, 0], (dqa - 150).bits.tolist())
+        self.assertEqual([50, 0, 150], (DataQuantity(150) - dqa).bits.tolist())
+        self.assertEqual([0, 0, 0], (dqa * -1).bits.tolist())
+        self.assertFalse(np.signbit((dqa * -1).bits).any())
+
+        self.assertEqual([200, 4000, 0], (dqa * 2).bits.tolist())
+        self.assertEqual([200, 4000, 0], (2 * dqa).bits.tolist())
+        self.assertEqual([50, 1000, 0], (dqa / 2).bits.tolist())
+        self.assertEqual([33, 666, 0], (dqa // 3).bits.tolist())
+
+        # Division by non-positive values.
+        self.assertEqual(None, dqa / 0)
+        self.assertEqual(None, dqa // DataQuantity(0))
+        result = (dqa / np.array([1, 0, 2])).bits
+        self.assertEqual(100, result[0])
+        self.assertTrue(np.isnan(result[1]))
+
+        # Numbers minus (or divided by) quantities are not supported.
+        self.assertEqual([2, 0.1], (DataQuantity(200) / DataQuantityArray([100, 2000])).bits.tolist())
+        self.assertEqual([2, 0], (DataQuantity(200) // DataQuantityArray([100, 2000])).bits.tolist())
+        for other in (10, 10.0, np.array([10, 20, 30])):
+            with self.assertRaises(TypeError):
+                other - dqa
+            with self.assertRaises(TypeError):
+                other / dqa
+            with self.assertRaises(TypeError):
+                other // dqa
+
+        # Unsupported types
+        self.assertTrue(dqa + 'a' is dqa)
+
+        # The same semantics as DataQuantity.
+        values = [0, 1, 7.5, 1000]
+        for other in (3, 2.5, DataQuantity(4)):
+            for i, value in enumerate(values):
+                dq = DataQuantity(value)
+                dqa = DataQuantityArray(values)
+                self.assertEqual((dq + other).bits, (dqa + other)[i].bits)
+                self.assertEqual((dq - other).bits, (dqa - other)[i].bits)
+                self.assertEqual((dq * other).bits, (dqa * other)[i].bits)
+                self.assertEqual((dq / other).bits, (dqa / other)[i].bits)
+                self.assertEqual((dq // other).bits, (dqa // other)[i].bits)
+
+    # ******************************
+
+    def test_get(self):
+        """
+        Tests the vectorised get and getRate methods.
+        """
+        dqa = DataQuantityArray([100, 2000])
+
+        self.assertEqual([0.1, 2.0], dqa.get('kbit').tolist())
+        self.assertEqual([12.5, 250.0], dqa.get('B').tolist())
+        self.assertEqual(None, dqa.get('a'))
+        self.assertEqual(['0.1 kbit', '2.0 kbit'], dqa.get('kbit', asString=True).tolist())
+        self.assertEqual([DataQuantity(100).get('kbit'), DataQuantity(2000).get('kbit')],
+                         dqa.get('kbit', asString=True).tolist())
+        self.assertEqual(['100 bits', '2000 bits'], dqa.get('a', asString=True).tolist())
+
+        # Formatted as DataQuantity.get() formats each quantity.
+        for units in ('bit', 'kbit', 'B', 'a'):
+            values = [0, 1000, 2.5, 1e-05]
+            self.assertEqual([DataQuantity(value).get(units) for value in values],
+                             DataQuantityArray(values).get(units, asString=True).tolist())
+
+        self.assertEqual([10.0, 200.0], dqa.getRate(10, 'bit').tolist())
+        self.assertEqual([DataQuantity(100).getRate(10, 'kbit'), DataQuantity(2000).getRate(10, 'kbit')],
+                         dqa.getRate(10, 'kbit', asString=True).tolist())
+        self.assertEqual(None, dqa.getRate(0, 'bit'))
+        self.assertEqual(None, dqa.getRate(10, 'a'))
+
+        rates = dqa.getRate(np.array([10, 0]), 'bit')
+        self.assertEqual(10, rates[0])
+        self.assertTrue(np.isnan(rates[1]))
+
+    # ******************************
+
+    def test_reductions(self):
+        """
+        Tests the sum, cumsum and max reductions.
+        """
+        dqa = DataQuantityArray([1, 2, 3, 4])
+        self.assertEqual(DataQuantity(10), dqa.sum())
+        self.assertEqual([1, 3, 6, 10], dqa.cumsum().bits.tolist())
+        self.assertEqual(DataQuantity(4), dqa.max())
+
+        self.assertEqual(DataQuantity(0), DataQuantityArray().sum())
+        self.assertEqual(0, len(DataQuantityArray().cumsum()))
+        self.assertEqual(DataQuantity(0), DataQuantityArray().max())
+
+        # Compensated summation is correctly rounded where naive summation is not.
+        dqa = DataQuantityArray(np.full(100000, 0.1))
+        self.assertEqual(10000.0, dqa.sum().bits)
+        self.assertEqual(10000.0, dqa.cumsum()[-1].bits)
+        self.assertEqual(5000.0, dqa.cumsum()[49999].bits)
+
+        dqa = DataQuantityArray([1e16, 1.0, 1.0, 1.0, 1.0])
+        self.assertEqual(1e16 + 4, dqa.sum().bits)
+
+    # ******************************
+
+    def test_resultingRate(self):
+        """
+        Tests the rates of many quantities over many transfer times.
+        """
+        rates = resultingRate([1, 2, 4], [DataQuantity(8000), DataQuantity(16000)], 'kB')
+        self.assertEqual([[1.0, 0.5, 0.25], [2.0, 1.0, 0.5]], rates.tolist())
+
+        # As the notebook's loop, for every bit and byte unit.
+        times = np.arange(1, 50)
+        for units in ('bit', 'Mbit', 'Tbit', 'Gibit', 'B', 'GB', 'PiB'):
+            expected = [1234567890.0 / t / UNITS[units] for t in times.tolist()]
+            self.assertTrue(np.allclose(expected, resultingRate(times, DataQuantity(1234567890), units)[0]))
+
+        # Single quantities and times, arrays and non-positive times.
+        self.assertEqual((1, 1), resultingRate(2, 10).shape)
+        self.assertEqual([[5.0, 2.5]], resultingRate(np.array([2.0, 4.0]), DataQuantityArray([10])).tolist())
+        rates = resultingRate([0, -1, 1], [10, 20])
+        self.assertTrue(np.isnan(rates[:, :2]).all())
+        self.assertEqual([10.0, 20.0], rates[:, 2].tolist())
+        self.assertEqual((2, 0), resultingRate([], [1, 2]).shape)
+
+        # Object arrays and mixed lists of data quantities and numbers.
+        quantities = np.array([DataQuantity(8), DataQuantity(16, exact=True)], dtype=object)
+        self.assertEqual([[8.0, 4.0], [16.0, 8.0]], resultingRate([1, 2], quantities).tolist())
+        self.assertEqual([[8.0, 4.0], [16.0, 8.0]], resultingRate([1, 2], [DataQuantity(8), 16]).tolist())
+
+        self.assertEqual(None, resultingRate([1], 10, 'xyz'))
+        self.assertEqual(None, resultingRate(['a'], 10))
+        self.assertEqual(None, resultingRate(np.ones((2, 2)), 10))
+        self.assertEqual(None, resultingRate([1], np.ones((2, 2))))
+        self.assertEqual(None, resultingRate([1, 2], ['a']))
+        self.assertEqual(None, resultingRate([1, 2], None))
+        self.assertEqual(None, resultingRate([1, 2], [True]))
+        self.assertEqual(None, resultingRate([1, 2], [DataQuantity(8), 'a']))
+        self.assertEqual(None, resultingRate([1, 2], np.array([DataQuantity(8), None], dtype=object)))
+
+    # ****************************************************************************************************
+
+    # ******************************
+    #
+    # Test Setup & Teardown
+    #
+    # ******************************
+
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+
+    # ****************************************************************************************************
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+
+    # ****************************************************************************************************
+
+    if __name__ == "__main__":
+        unittest.main(argv=['ignored', '-v'], exit=False)
@@ -0,0 +1,227 @@
+"""
+**************************************************************************
+
+ TestDataQuantityFunctions.py
+
+**************************************************************************
+ Description:
+
+ Tests the data product size formulas.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import unittest
+
+import numpy as np
+
+from main.src.DataQuantity import DataQuantity
+from main.src.DataQuantityFunctions import *
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class TestDataQuantityFunctions(unittest.TestCase):
+    """
+    Defines the tests for the data product size formulas.
+    """
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_ocld_size(self):
+        """
+        Tests the OCLD size formula against the notebook calculation.
+
+        def ocldSize(N_cand=1000, N_list=1000, N_chan=128, N_bin=128, N_sub=64, N_bit=8,
+                     N_sheet=3, r=256, c=256, M_size=METADATA_BITS):
+        """
+        # The notebook's calculation, using data quantities.
+        ocld_att_vol = DataQuantity((96 * 4) + 32)
+        L_size = DataQuantity((96 * 2) + (64 * 6) + (1 * 2)) * 1000
+        D_size = DataQuantity(96) + DataQuantity(128 * 128 * 64 * 8) + DataQuantity(3 * (256 * 256)) + DataQuantity(960)
+        OCLD_size = ocld_att_vol + L_size + (1000 * D_size)
+
+        self.assertEqual(OCLD_size.bits, ocldSize())
+        self.assertEqual((OCLD_size * 1500).bits, scanVolume(ocldSize()))
+        self.assertEqual(578000, listSize())
+        self.assertEqual(8388608, searchCubeSize())
+        self.assertEqual(196608, sheetSize())
+
+    # ******************************
+
+    def test_spocld_size(self):
+        """
+        Tests the SPOCLD size formula against the notebook calculation.
+
+        def spocldSize(N_cand=1, N_list=1000, N_samp=640, N_chan=1024, N_pol=4, N_bit=8,
+                       N_sheet=2, r=1, c=1024, M_size=METADATA_BITS):
+        """
+        spocld_att_vol = DataQuantity((96 * 4) + 32)
+        L_size = DataQuantity((96 * 2) + (64 * 6) + (1 * 2)) * 1000
+        D_size = DataQuantity(96) + DataQuantity(640 * 1024 * 4 * 8) + DataQuantity(2 * (1 * 1024)) + DataQuantity(960)
+        SPOCLD_size = spocld_att_vol + L_size + (1 * D_size)
+
+        self.assertEqual(SPOCLD_size.bits, spocldSize())
+        self.assertEqual((SPOCLD_size * (180 * 1)).bits, spocldBeamVolume(spocldSize()))
+        self.assertEqual((SPOCLD_size * (180 * 1) * 1500).bits, scanVolume(spocldBeamVolume(spocldSize())))
+
+    # ******************************
+
+    def test_ptd_size(self):
+        """
+        Tests the PTD size formula against the notebook calculation.
+
+        def ptdSize(N_chan=4096, N_bin=2048, N_sub=180, N_pol=4, N_bit=64, M_size=METADATA_BITS):
+        """
+        ptd_att_vol = DataQuantity(96 * 5)
+        TD_size = DataQuantity(96) + DataQuantity(4096 * 2048 * 180 * 4 * 64) + DataQuantity(960)
+        PTD_size = ptd_att_vol + TD_size
+
+        self.assertEqual(PTD_size.bits, ptdSize())
+        self.assertEqual((PTD_size * 16).bits, scanVolume(ptdSize(), 16))
+
+    # ******************************
+
+    def test_intermediate_sizes(self):
+        """
+        Tests the DSD, averaged, TOA list, timing residual and alert sizes.
+        """
+        self.assertEqual(ptdSize(), dsdSize())
+        self.assertEqual(ptdSize(N_sub=10), dsdSize(N_sub=10))
+
+        # Table 12.
+        self.assertEqual(timingCubeSize(), averagedCubeSize())
+        self.assertEqual(2048 * 1 * 180 * 4 * 64, averagedCubeSize(frequency=True))
+        self.assertEqual(2048 * 4096 * 1 * 4 * 64, averagedCubeSize(subints=True))
+        self.assertEqual(2048 * 1 * 1 * 4 * 64, averagedCubeSize(frequency=True, subints=True))
+        self.assertEqual(2048 * 64 * 10 * 4 * 64, averagedCubeSize(N_chan=64, N_sub=10))
+        self.assertEqual([timingCubeSize(), 2048 * 1 * 180 * 4 * 64],
+                         averagedCubeSize(frequency=np.array([False, True])).tolist())
+        self.assertEqual([[2048 * 4096 * 180 * 4 * 64], [2048 * 4096 * 1 * 4 * 64]],
+                         averagedCubeSize(subints=np.array([[0], [1]])).tolist())
+
+        # Eq. 25, 24 and 26.
+        self.assertEqual((96 * 5) + (2048 * 4 * 64) + 960, avgSize(frequency=True, subints=True))
+        self.assertEqual((96 * 5) + 4096 + 960, toaListSize())
+        self.assertEqual((96 * 5) + (4096 * 64) + 960, toaListSize(TOA_bits=64))
+        self.assertEqual(toaListSize(N_chan=1024), residualsSize(N_chan=1024))
+        self.assertEqual((96 * 5) + 4000 + 32 + 960, alertSize())
+
+    # ******************************
+
+    def test_components(self):
+        """
+        Tests that the component breakdowns sum to the product sizes.
+        """
+        pairs = [(ocldSize, ocldComponents), (spocldSize, spocldComponents), (ptdSize, ptdComponents),
+                 (dsdSize, dsdComponents), (avgSize, avgComponents), (toaListSize, toaListComponents),
+                 (residualsSize, residualsComponents), (alertSize, alertComponents)]
+
+        for size, components in pairs:
+            parts = components()
+            self.assertEqual(set(COMPONENTS), set(parts))
+            self.assertEqual(size(), sum(parts.values()))
+
+        parts = ocldComponents()
+        self.assertEqual(578000, parts['list'])
+        self.assertEqual(1000 * 8388608, parts['cube'])
+        self.assertEqual(1000 * 196608, parts['sheets'])
+        self.assertEqual(1000 * 960, parts['metadata'])
+        self.assertEqual(416 + (1000 * 96), parts['attributes'])
+
+        # Breakdowns of whole grids.
+        N_cand = np.array([1, 10, 1000])
+        parts = ocldComponents(N_cand=N_cand)
+        self.assertEqual(ocldSize(N_cand=N_cand).tolist(), sum(parts.values()).tolist())
+
+    # ******************************
+
+    def test_broadcasting(self):
+        """
+        Tests evaluating the formulas on grids of parameter values.
+        """
+        N_cand = np.array([1, 10, 1000])
+        sizes = ocldSize(N_cand=N_cand)
+        self.assertEqual([ocldSize(N_cand=n) for n in (1, 10, 1000)], sizes.tolist())
+
+        N_chan, N_bin = np.meshgrid([64, 128, 256], [64, 128])
+        sizes = ptdSize(N_chan=N_chan, N_bin=N_bin)
+        self.assertEqual((2, 3), sizes.shape)
+        self.assertEqual(ptdSize(N_chan=256, N_bin=64), sizes[0, 2])
+
+    # ******************************
+
+    def test_overflow(self):
+        """
+        Tests that integer array products past the int64 limit are exact,
+        rather than wrapping around.
+        """
+        side = np.array([pow(2, 20)])
+        cube = timingCubeSize(side, side, side, 4, 64)
+        self.assertEqual([pow(2, 68)], cube.tolist())
+        self.assertEqual(pow(2, 68) + 1536, ptdSize(side, side, side, 4, 64).tolist()[0])
+
+        sizes = ocldSize(N_cand=np.array([1000, 2 * pow(10, 6)]), N_chan=np.array([[128], [65536]]))
+        self.assertEqual(ocldSize(N_cand=2 * pow(10, 6), N_chan=65536), sizes[1, 1])
+        self.assertEqual(ocldSize(N_chan=65536) * 1500, scanVolume(sizes, np.array([1500]))[1, 0])
+        self.assertEqual(ocldSize(N_cand=2 * pow(10, 6), N_chan=65536) * 1500,
+                         scanVolume(sizes, np.array([1500]))[1, 1])
+
+        # Products that fit stay int64.
+        self.assertEqual(np.int64, timingCubeSize(np.array([4096]), 2048).dtype)
+        self.assertEqual([timingCubeSize()], timingCubeSize(np.array([4096])).tolist())
+
+    # ****************************************************************************************************
+
+    # ******************************
+    #
+    # Test Setup & Teardown
+    #
+    # ******************************
+
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+
+    # ****************************************************************************************************
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+
+    # ****************************************************************************************************
+
+    if __name__ == "__main__":
+        unittest.main(argv=['ignored', '-v'], exit=False)
@@ -0,0 +1,193 @@
+"""
+**************************************************************************
+
+ TestDataRate.py
+
+**************************************************************************
+ Description:
+
+ Tests the data class used to represent data rates.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import unittest
+from datetime import timedelta
+
+from main.src.DataQuantity import DataQuantity
+from main.src.DataRate import DataRate
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class TestDataRate(unittest.TestCase):
+    """
+    Defines the tests for the data rate class.
+    """
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_constructor(self):
+        """
+        Tests the data rate constructors.
+        """
+        self.assertEqual(100, DataRate(100).bitsPerSecond)
+        self.assertEqual(0, DataRate(-1).bitsPerSecond)
+        self.assertEqual(0, DataRate('a').bitsPerSecond)
+        self.assertEqual(0, DataRate().bitsPerSecond)
+        self.assertRaises(AttributeError, setattr, DataRate(1), 'bitsPerSecond', 2)
+
+        self.assertEqual(11960000, DataRate.parse('11.96 Mbit/s').bitsPerSecond)
+        self.assertEqual(8000, DataRate.parse('1 kB/s').bitsPerSecond)
+        self.assertEqual(None, DataRate.parse('1 kB'))
+        self.assertEqual(None, DataRate.parse('a'))
+
+    # ******************************
+
+    def test_from_quantity(self):
+        """
+        Tests creating data rates from data quantities.
+        """
+        dq = DataQuantity(1000)
+
+        self.assertEqual(DataRate(500), dq.toRate(2))
+        self.assertEqual(DataRate(500), dq.toRate(timedelta(seconds=2)))
+        self.assertEqual(DataRate(500), dq / timedelta(seconds=2))
+        self.assertEqual(DataRate(500), DataQuantity(1000, exact=True) / timedelta(seconds=2))
+        self.assertEqual(DataRate(1000), dq.toRate())
+        self.assertEqual(None, dq.toRate(0))
+        self.assertEqual(None, dq.toRate(-1))
+        self.assertEqual(None, dq.toRate('a'))
+
+        # Dividing by a number still gives a data quantity.
+        self.assertEqual(DataQuantity, type(dq / 2))
+
+        # The numeric rate matches the string produced by getRate().
+        self.assertEqual(dq.getRate(2, 'kbit'), dq.toRate(2).get('kbit'))
+
+    # ******************************
+
+    def test_conversion(self):
+        """
+        Tests converting data rates to other units.
+        """
+        rate = DataRate(11960000)
+
+        self.assertEqual(11.96, rate.value('Mbit'))
+        self.assertEqual(11.96, rate.value('Mbit/s'))
+        self.assertEqual(1495000.0, rate.value('B/s'))
+        self.assertEqual(None, rate.value('a'))
+
+        self.assertEqual('11.96 Mbit/s', rate.get('Mbit'))
+        self.assertEqual('11.96 Mbit/s', rate.get('Mbit/s'))
+        self.assertEqual('11960000 bits/s', rate.get('a'))
+        self.assertEqual('11960000 bits/s', str(rate))
+
+    # ******************************
+
+    def test_arithmetic(self):
+        """
+        Tests data rate arithmetic.
+        """
+        rate = DataRate(100)
+
+        self.assertEqual(DataRate(150), rate + DataRate(50))
+        self.assertEqual(DataRate(150), rate + 50)
+        self.assertEqual(DataRate(150), 50 + rate)
+        self.assertEqual(DataRate(50), rate - DataRate(50))
+        self.assertEqual(DataRate(0), rate - DataRate(500))
+        self.assertEqual(DataRate(300), rate * 3)
+        self.assertEqual(DataRate(300), 3 * rate)
+        self.assertEqual(DataRate(0), rate * -3)
+        self.assertEqual(DataRate(25), rate / 4)
+        self.assertEqual(0.25, rate / DataRate(400))
+        self.assertEqual(None, rate / 0)
+        self.assertEqual(None, rate / DataRate(0))
+        self.assertTrue(rate + 'a' is rate)
+
+        # Rate x duration gives a data quantity.
+        self.assertEqual(DataQuantity(6000), rate * timedelta(minutes=1))
+        self.assertEqual(DataQuantity(6000), timedelta(minutes=1) * rate)
+        self.assertEqual(DataQuantity(6000), rate.over(60))
+        self.assertEqual(None, rate.over(-1))
+        self.assertEqual(None, rate.over('a'))
+
+        # Summation across products
+        rates = [DataRate(0.1)] * 1500
+        self.assertEqual(DataRate(150.0), DataRate.total(rates))
+        self.assertAlmostEqual(150.0, sum(rates).bitsPerSecond)
+        self.assertEqual(DataRate(0), DataRate.total([]))
+
+    # ******************************
+
+    def test_comparison(self):
+        """
+        Tests comparing, hashing and sorting data rates.
+        """
+        link = DataRate.parse('10 Gbit/s')
+
+        self.assertTrue(DataRate.parse('11.96 Mbit/s') < link)
+        self.assertTrue(DataRate(10e9) <= link)
+        self.assertTrue(DataRate(10e9) >= link)
+        self.assertTrue(DataRate(1) != link)
+        self.assertFalse(DataRate(1) == 1)
+        self.assertRaises(TypeError, lambda: DataRate(1) < 1)
+
+        self.assertEqual(1, len({DataRate(8), DataRate(8.0)}))
+        self.assertEqual([1, 2, 3], [r.bitsPerSecond for r in sorted([DataRate(3), DataRate(1), DataRate(2)])])
+        self.assertEqual(DataRate(3), max([DataRate(3), DataRate(1)]))
+
+    # ****************************************************************************************************
+
+    # ******************************
+    #
+    # Test Setup & Teardown
+    #
+    # ******************************
+
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+
+    # ****************************************************************************************************
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+
+    # ****************************************************************************************************
+
+    if __name__ == "__main__":
+        unittest.main(argv=['ignored', '-v'], exit=False)
@@ -0,0 +1,192 @@
+"""
+**************************************************************************
+
+ TestDeliverySimulator.py
+
+**************************************************************************
+ Description:
+
+ Tests the data product delivery simulator.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import unittest
+
+import numpy as np
+
+from main.src.DataQuantityFunctions import *
+from main.src.DeliverySimulator import *
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class TestDeliverySimulator(unittest.TestCase):
+    """
+    Defines the tests for the delivery simulator.
+    """
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_productStreams(self):
+        """
+        Tests the streams of the notebook's products.
+        """
+        streams = productStreams()
+        self.assertEqual(['OCLD', 'SPOCLD', 'PTD', 'DSD'], [stream.product for stream in streams])
+        self.assertEqual(ocldSize(), streams[0].size)
+        self.assertEqual(1500, streams[0].count)
+        self.assertEqual(180, streams[0].start)
+        self.assertEqual(1.0 / 1500, streams[1].interval)
+        self.assertTrue(streams[1].poisson)
+        self.assertEqual(16, streams[2].count)
+
+        streams = productStreams(T_scan=60, N_burst=2, beams={'SPOCLD': 10}, parameters={'PTD': {'N_chan': 1024}},
+                                 products=('SPOCLD', 'PTD'))
+        self.assertEqual(1.0 / 20, streams[0].interval)
+        self.assertEqual(ptdSize(N_chan=1024), streams[1].size)
+        self.assertEqual(60, streams[1].interval)
+
+        self.assertEqual(None, productStreams(products=('XYZ',)))
+        self.assertEqual(None, productStreams(parameters={'PTD': {'N_xyz': 1}}))
+        self.assertEqual(None, productStreams(beams={'PTD': 0}))
+        self.assertEqual(None, productStreams(T_scan=0))
+
+    # ******************************
+
+    def test_links(self):
+        """
+        Tests latencies with contention for links.
+        """
+        # Two 1 Gbit products every 10 s: the second waits for the first.
+        streams = [Stream('A', 1e9, 10, count=2)]
+        result = simulateDelivery(streams, capacity=1e9, duration=30)
+        self.assertEqual([1.0, 2.0] * 3, result.latencies['A'].tolist())
+        self.assertEqual(22.0, result.end)
+        self.assertEqual(9, result.events)
+
+        # Two links send both at once; overheads add to each.
+        result = simulateDelivery(streams, links=2, capacity=1e9, overhead={'A': 0.5}, duration=30)
+        self.assertEqual([1.5] * 6, result.latencies['A'].tolist())
+        self.assertEqual({50: 1.5, 99: 1.5}, result.percentiles('A', (50, 99)))
+        self.assertEqual(None, result.percentiles('B'))
+
+        # The buffer holds both products until each is sent.
+        result = simulateDelivery(streams, capacity=1e9, duration=10)
+        self.assertEqual([0.0, 2e9, 1e9, 0.0], result.occupancy.tolist())
+        self.assertEqual([0.0, 0.0, 1.0, 2.0], result.times.tolist())
+        self.assertEqual(2e9, result.peakOccupancy)
+
+    # ******************************
+
+    def test_buffer(self):
+        """
+        Tests drops and backpressure when the buffer is full.
+        """
+        streams = [Stream('A', 1e9, 10, count=2), Stream('B', 4e9, 10)]
+
+        result = simulateDelivery(streams, capacity=1e9, buffer=1.5e9, duration=20)
+        self.assertEqual([0.0, 10.0], result.drops['A'].tolist())
+        self.assertEqual([0.0, 10.0], result.drops['B'].tolist())
+        self.assertEqual([1.0, 1.0], result.latencies['A'].tolist())
+        self.assertTrue(str(result).startswith('2 delivered, 4 dropped, 0 held back, 6 events in '))
+
+        # Held back until the first product is sent, then admitted.
+        result = simulateDelivery(streams, capacity=1e9, buffer=1.5e9, policy='block', duration=20)
+        self.assertEqual([0.0, 10.0], result.blocked['A'].tolist())
+        self.assertEqual([1.0, 1.0], result.waits['A'].tolist())
+        self.assertEqual([1.0, 2.0, 1.0, 2.0], result.latencies['A'].tolist())
+
+        # Products larger than the buffer are always dropped.
+        self.assertEqual(2, result.drops['B'].size)
+        self.assertEqual(1e9, result.peakOccupancy)
+
+    # ******************************
+
+    def test_poisson(self):
+        """
+        Tests Poisson arrivals and the seed.
+        """
+        streams = [Stream('A', 1e6, 0.01, poisson=True)]
+        first = simulateDelivery(streams, capacity=1e9, duration=1000, seed=1)
+        second = simulateDelivery(streams, capacity=1e9, duration=1000, seed=1)
+
+        self.assertEqual(first.latencies['A'].tolist(), second.latencies['A'].tolist())
+        self.assertTrue(abs(first.latencies['A'].size - 100000) < 1500)
+        self.assertTrue(first.latencies['A'].min() > 1e-3 - 1e-9)
+        self.assertTrue(first.eventRate > 0)
+
+        third = simulateDelivery(streams, capacity=1e9, duration=1000, seed=2)
+        self.assertNotEqual(first.latencies['A'].size, third.latencies['A'].size)
+
+    # ******************************
+
+    def test_invalid(self):
+        """
+        Tests invalid input.
+        """
+        streams = [Stream('A', 1e9, 10)]
+        self.assertEqual(None, simulateDelivery(None))
+        self.assertEqual(None, simulateDelivery([Stream('A', 0, 10)]))
+        self.assertEqual(None, simulateDelivery([Stream('A', 1e9, 10, count=0)]))
+        self.assertEqual(None, simulateDelivery(streams, links=0))
+        self.assertEqual(None, simulateDelivery(streams, capacity=0))
+        self.assertEqual(None, simulateDelivery(streams, buffer=0))
+        self.assertEqual(None, simulateDelivery(streams, policy='xyz'))
+        self.assertEqual(None, simulateDelivery(streams, overhead=-1))
+        self.assertEqual(None, simulateDelivery(streams, overhead={'B': 1}))
+
+    # ****************************************************************************************************
+
+    # ******************************
+    #
+    # Test Setup & Teardown
+    #
+    # ******************************
+
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+
+    # ****************************************************************************************************
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+
+    # ****************************************************************************************************
+
+    if __name__ == "__main__":
+        unittest.main(argv=['ignored', '-v'], exit=False)
@@ -0,0 +1,191 @@
+"""
+**************************************************************************
+
+ TestExactArithmetic.py
+
+**************************************************************************
+ Description:
+
+ Tests the exact integer/rational arithmetic functions.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import unittest
+from fractions import Fraction
+
+import numpy as np
+
+from main.src.ExactArithmetic import *
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class TestExactArithmetic(unittest.TestCase):
+    """
+    Defines the tests for the exact arithmetic functions.
+    """
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_to_exact(self):
+        """
+        Tests the function that converts numbers to ints/Fractions.
+
+        def toExact(value):
+        """
+        self.assertEqual(toExact('a'), None)
+        self.assertEqual(toExact(None), None)
+        self.assertEqual(toExact(True), None)
+        self.assertEqual(toExact(float('nan')), None)
+        self.assertEqual(toExact(float('inf')), None)
+
+        self.assertEqual(toExact(5), 5)
+        self.assertEqual(type(toExact(5.0)), int)
+        self.assertEqual(toExact(0.1), Fraction(1, 10))
+        self.assertEqual(toExact('2.1'), Fraction(21, 10))
+        self.assertEqual(type(toExact(Fraction(6, 3))), int)
+        self.assertEqual(type(toExact(np.int64(7))), int)
+        self.assertEqual(toExact(np.float64(0.25)), Fraction(1, 4))
+
+        # Floats beyond 2^53 are integral, and are kept as they are.
+        self.assertEqual(toExact(float(pow(2, 60))), pow(2, 60))
+
+    # ******************************
+
+    def test_exact_divide(self):
+        """
+        Tests exact division.
+
+        def exactDivide(numerator, denominator):
+        """
+        self.assertEqual(exactDivide(10, 5), 2)
+        self.assertEqual(type(exactDivide(10, 5)), int)
+        self.assertEqual(exactDivide(10, 4), Fraction(5, 2))
+        self.assertEqual(exactDivide(Fraction(1, 2), Fraction(1, 4)), 2)
+        self.assertEqual(type(exactDivide(Fraction(1, 2), Fraction(1, 4))), int)
+
+        # 10^18 + 1 bits cannot be divided exactly as floats.
+        big = pow(10, 18) + 1
+        self.assertEqual(exactDivide(big * 3, 3), big)
+
+    # ******************************
+
+    def test_exact_convert(self):
+        """
+        Tests exact unit conversion.
+
+        def exactConvert(value, src='bit', dst='bit'):
+        """
+        self.assertEqual(exactConvert(1, 'bits', 'kB'), None)
+        self.assertEqual(exactConvert(-1, 'bit', 'kB'), None)
+        self.assertEqual(exactConvert('x', 'bit', 'kB'), None)
+
+        self.assertEqual(exactConvert('2.1', 'GB', 'bit'), 16800000000)
+        self.assertEqual(exactConvert(1, 'bit', 'kbit'), Fraction(1, 1000))
+        self.assertEqual(exactConvert(1, 'PiB', 'KiB'), pow(2, 40))
+        self.assertEqual(exactConvert(pow(10, 18) + 1, 'bit', 'bit'), pow(10, 18) + 1)
+
+    # ******************************
+
+    def test_checked_product(self):
+        """
+        Tests the int64 overflow checked product.
+
+        def checkedProduct(*factors):
+        """
+        self.assertEqual(checkedProduct(1.5, 2), None)
+
+        # The PTD worst case cube fits in an int64.
+        cube = checkedProduct(4096, 2048, 180, 4, 64)
+        self.assertEqual(cube.dtype, np.int64)
+        self.assertEqual(int(cube), 4096 * 2048 * 180 * 4 * 64)
+
+        # Broadcasting is supported.
+        cubes = checkedProduct(np.array([128, 1024]), 128, [[64], [180]], 8)
+        self.assertEqual(cubes.shape, (2, 2))
+        self.assertEqual(int(cubes[1, 1]), 1024 * 128 * 180 * 8)
+
+        # Overflowing products are computed exactly instead of wrapping.
+        wide = checkedProduct(np.array([1, pow(2, 40)]), pow(2, 30), 64)
+        self.assertEqual(wide.dtype, object)
+        self.assertEqual(wide[0], pow(2, 36))
+        self.assertEqual(wide[1], pow(2, 76))
+        self.assertEqual(type(wide[1]), int)
+
+        negative = checkedProduct(-pow(2, 40), pow(2, 40))
+        self.assertEqual(negative[()], -pow(2, 80))
+
+    # ******************************
+
+    def test_exact_sum(self):
+        """
+        Tests exact summation.
+
+        def exactSum(values):
+        """
+        self.assertEqual(exactSum(['a']), None)
+        self.assertEqual(exactSum([]), 0)
+        self.assertEqual(exactSum(np.array([1, 2, 3])), 6)
+
+        # Would overflow an int64 sum.
+        total = exactSum(np.array([pow(2, 62), pow(2, 62), 1], dtype=np.int64))
+        self.assertEqual(total, pow(2, 63) + 1)
+
+        self.assertEqual(exactSum([0.5, 0.25, Fraction(1, 4)]), 1)
+        self.assertEqual(exactSum([pow(10, 18), 1, 1.0]), pow(10, 18) + 2)
+
+    # ****************************************************************************************************
+
+    # ******************************
+    #
+    # Test Setup & Teardown
+    #
+    # ******************************
+
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+
+    # ****************************************************************************************************
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+
+    # ****************************************************************************************************
+
+    if __name__ == "__main__":
+        unittest.main(argv=['ignored', '-v'], exit=False)
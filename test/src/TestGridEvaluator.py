@@ -0,0 +1,213 @@
+"""
+**************************************************************************
+
+ TestGridEvaluator.py
+
+**************************************************************************
+ Description:
+
+ Tests the out of core parameter grid evaluator.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import unittest
+
+import os
+import tempfile
+
+import numpy as np
+
+from main.src.DataQuantityFunctions import *
+from main.src.GridEvaluator import *
+from main.src.SchemaCompiler import compileSchema, loadSchema
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class TestGridEvaluator(unittest.TestCase):
+    """
+    Defines the tests for the grid evaluator.
+    """
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_chunks(self):
+        """
+        Tests splitting a grid into contiguous chunks.
+        """
+        for shape in [(3, 4, 5), (7,), (2, 1, 9), (1000, 3)]:
+            for chunkSize in [1, 4, 7, 20, 100000]:
+                covered = np.zeros(shape, dtype=int)
+                flat = covered.reshape(-1)
+                expected = 0
+
+                for start, index in chunks(shape, chunkSize):
+                    self.assertEqual(expected, start)
+                    block = covered[index]
+                    self.assertTrue(0 < block.size <= max(chunkSize, 1))
+                    block += 1
+
+                    # The chunk is a contiguous run of the flattened grid.
+                    self.assertTrue(np.all(flat[start:start + block.size] == 1))
+                    expected += block.size
+
+                self.assertTrue(np.all(covered == 1))
+
+        self.assertEqual([(0, ())], list(chunks(())))
+
+    # ******************************
+
+    def test_evaluate_grid(self):
+        """
+        Tests evaluating a product over a parameter grid.
+        """
+        axes = {'N_chan': np.array([64, 128, 256]), 'N_cand': np.arange(1, 11), 'N_beam': np.array([16, 1500])}
+        calls = []
+
+        with tempfile.TemporaryDirectory() as directory:
+            outputs = evaluateGrid('OCLD', axes, directory, chunkSize=4, N_bit=4,
+                                   progress=lambda done, total: calls.append((done, total)))
+
+            self.assertEqual(set(COMPONENTS) | {'total', 'scan'}, set(outputs))
+            self.assertEqual((3, 10, 2), outputs['total'].shape)
+            self.assertEqual(np.int64, outputs['total'].dtype)
+            self.assertEqual((60, 60), calls[-1])
+            self.assertEqual(sorted(calls), calls)
+
+            N_chan, N_cand, N_beam = np.meshgrid(*axes.values(), indexing='ij')
+            total = ocldSize(N_cand=N_cand, N_chan=N_chan, N_bit=4)
+            self.assertTrue(np.array_equal(total, outputs['total']))
+            self.assertTrue(np.array_equal(scanVolume(total, N_beam), outputs['scan']))
+            self.assertTrue(np.array_equal(total, sum(outputs[name] for name in COMPONENTS)))
+
+            parts = ocldComponents(N_cand=N_cand, N_chan=N_chan, N_bit=4)
+            for name in COMPONENTS:
+                self.assertTrue(np.array_equal(np.broadcast_to(parts[name], total.shape), outputs[name]))
+
+            # The same grid in one chunk.
+            single = evaluateGrid('OCLD', axes, os.path.join(directory, 'single'), N_bit=4)
+            self.assertTrue(np.array_equal(single['scan'], outputs['scan']))
+
+            # Reopening the outputs.
+            axes2, outputs2 = loadGrid(directory)
+            self.assertEqual(list(axes), list(axes2))
+            self.assertTrue(np.array_equal(outputs['scan'], outputs2['scan']))
+            self.assertEqual(None, loadGrid(os.path.join(directory, 'missing')))
+
+    # ******************************
+
+    def test_evaluate_function(self):
+        """
+        Tests evaluating a size function, such as a compiled schema.
+        """
+        axes = {'N_sub': np.array([1, 90, 180]), 'M_size': np.array([960.0, 1920.0])}
+
+        with tempfile.TemporaryDirectory() as directory:
+            outputs = evaluateGrid(compileSchema(loadSchema('ptd')), axes, directory, chunkSize=2)
+            self.assertEqual({'total'}, set(outputs))
+            self.assertEqual(np.float64, outputs['total'].dtype)
+            self.assertEqual(ptdSize(N_sub=90, M_size=1920), outputs['total'][1, 1])
+
+            # Invalid input
+            self.assertEqual(None, evaluateGrid('XYZ', axes, directory))
+            self.assertEqual(None, evaluateGrid('PTD', {'N_cand': [1, 2]}, directory))
+            self.assertEqual(None, evaluateGrid('PTD', axes, directory, N_cand=1))
+            self.assertEqual(None, evaluateGrid('PTD', {'N_sub': []}, directory))
+            self.assertEqual(None, evaluateGrid('PTD', {'N_sub': [[1]]}, directory))
+            self.assertEqual(None, evaluateGrid('PTD', axes, directory, chunkSize=0))
+
+    # ******************************
+
+    def test_overflow(self):
+        """
+        Tests that integer grids whose outputs could pass the int64 limit
+        are written as float64 rather than wrapping around.
+        """
+        limit = np.iinfo(np.int64).max
+        beams = limit // ptdSize()
+        self.assertEqual(np.int64, planGrid('PTD', {'N_beam': np.array([1, beams])}).dtype)
+        self.assertEqual(np.float64, planGrid('PTD', {'N_beam': np.array([1, beams + 1])}).dtype)
+        self.assertEqual(np.float64, planGrid('PTD', {'N_sub': np.array([180])}, N_beam=beams + 1).dtype)
+
+        # Smaller values on an axis can give larger sizes.
+        self.assertEqual(np.float64, planGrid('AVG', {'frequency': np.array([1, 0])}, N_chan=pow(2, 40)).dtype)
+        self.assertEqual(np.int64, planGrid('AVG', {'frequency': np.array([1])}, N_chan=pow(2, 40)).dtype)
+
+        axes = {'N_cand': np.array([1000, 2 * pow(10, 6)]), 'N_chan': np.array([65536])}
+        with tempfile.TemporaryDirectory() as directory:
+            outputs = evaluateGrid('OCLD', axes, directory, N_beam=1500)
+            self.assertEqual(np.float64, outputs['scan'].dtype)
+            self.assertEqual(float(ocldSize(N_cand=2 * pow(10, 6), N_chan=65536) * 1500), outputs['scan'][1, 0])
+            self.assertEqual(float(ocldSize(N_chan=65536)), outputs['total'][0, 0])
+
+    # ******************************
+
+    def test_flag_axes(self):
+        """
+        Tests grids over the averaged data product's averaging flags.
+        """
+        axes = {'frequency': np.array([0, 1]), 'subints': np.array([0, 1]), 'N_sub': np.array([10, 180])}
+
+        with tempfile.TemporaryDirectory() as directory:
+            outputs = evaluateGrid('AVG', axes, directory, chunkSize=2)
+            self.assertEqual((2, 2, 2), outputs['total'].shape)
+            self.assertEqual(avgSize(N_sub=180), outputs['total'][0, 0, 1])
+            self.assertEqual(avgSize(N_sub=10, frequency=True), outputs['total'][1, 0, 0])
+            self.assertEqual(avgSize(frequency=True, subints=True), outputs['total'][1, 1, 0])
+            self.assertEqual(outputs['total'][1, 1, 0], outputs['total'][1, 1, 1])
+
+    # ****************************************************************************************************
+
+    # ******************************
+    #
+    # Test Setup & Teardown
+    #
+    # ******************************
+
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+
+    # ****************************************************************************************************
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+
+    # ****************************************************************************************************
+
+    if __name__ == "__main__":
+        unittest.main(argv=['ignored', '-v'], exit=False)
@@ -0,0 +1,222 @@
+"""
+**************************************************************************
+
+ TestIntervalQuantity.py
+
+**************************************************************************
+ Description:
+
+ Tests the class used to represent ranges of data quantities.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import unittest
+
+import numpy as np
+
+from main.src.DataQuantity import DataQuantity
+from main.src.DataQuantityFunctions import *
+from main.src.IntervalQuantity import *
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class TestIntervalQuantity(unittest.TestCase):
+    """
+    Defines the tests for the interval quantity class.
+    """
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_constructor(self):
+        """
+        Tests the interval quantity constructor and accessors.
+        """
+        interval = IntervalQuantity(10, 20)
+        self.assertEqual(10, interval.lower)
+        self.assertEqual(20, interval.upper)
+        self.assertEqual(10, interval.width())
+        self.assertEqual('[10.0, 20.0] bits', str(interval))
+
+        # Bounds are ordered and clamped.
+        self.assertEqual([1, 5], IntervalQuantity(5, 1).bounds.tolist())
+        self.assertEqual([0, 5], IntervalQuantity(-5, 5).bounds.tolist())
+        self.assertEqual([3, 3], IntervalQuantity(3).bounds.tolist())
+        self.assertEqual([8, 16], IntervalQuantity(DataQuantity(8), DataQuantity(16)).bounds.tolist())
+        self.assertEqual([0, 0], IntervalQuantity('a').bounds.tolist())
+
+        # Arrays of intervals
+        interval = IntervalQuantity([1, 2], 10)
+        self.assertEqual([1, 2], interval.lower.tolist())
+        self.assertEqual([10, 10], interval.upper.tolist())
+
+        self.assertTrue(IntervalQuantity(10, 20).contains(15))
+        self.assertTrue(IntervalQuantity(10, 20).contains(DataQuantity(20)))
+        self.assertFalse(IntervalQuantity(10, 20).contains(21))
+        self.assertEqual([False, True], IntervalQuantity([1, 2], [3, 4]).contains(3.5).tolist())
+
+        self.assertEqual((1.0, 2.0), IntervalQuantity(8000, 16000).get('kB'))
+        self.assertEqual(None, IntervalQuantity(8000, 16000).get('a'))
+        self.assertEqual('[1.00 kB, 2.00 kB]', IntervalQuantity(8000, 16000).format(byteUnits=True))
+
+    # ******************************
+
+    def test_arithmetic(self):
+        """
+        Tests interval arithmetic.
+        """
+        a = IntervalQuantity(10, 20)
+        b = IntervalQuantity(2, 5)
+
+        self.assertEqual([12, 25], (a + b).bounds.tolist())
+        self.assertEqual([5, 18], (a - b).bounds.tolist())
+        self.assertEqual([0, 0], (b - a).bounds.tolist())
+        self.assertEqual([20, 100], (a * b).bounds.tolist())
+        self.assertEqual([2, 10], (a / b).bounds.tolist())
+
+        self.assertEqual([15, 25], (a + 5).bounds.tolist())
+        self.assertEqual([15, 25], (5 + a).bounds.tolist())
+        self.assertEqual([15, 25], (DataQuantity(5) + a).bounds.tolist())
+        self.assertEqual([80, 90], (DataQuantity(100) - a).bounds.tolist())
+        self.assertEqual([0, 0], (a * -1).bounds.tolist())
+        self.assertEqual([5, 10], (a / 2).bounds.tolist())
+        self.assertEqual([3, 6], (a // 3).bounds.tolist())
+        self.assertEqual([3, 6], (a // 3.0).bounds.tolist())
+        self.assertEqual([2, 10], (a // b).bounds.tolist())
+        self.assertEqual([1, 4], (IntervalQuantity(7, 9) // b).bounds.tolist())
+        self.assertEqual([4, 8], (DataQuantity(8) / IntervalQuantity(1, 2)).bounds.tolist())
+        self.assertEqual([5, 10], (DataQuantity(100) / a).bounds.tolist())
+        self.assertEqual([4, 8], (DataQuantity(8) // IntervalQuantity(1, 2)).bounds.tolist())
+        self.assertEqual([3, 5], (DataQuantity(16) // IntervalQuantity(3, 5)).bounds.tolist())
+        self.assertEqual([[4, 2], [8, 4]], (DataQuantity(8) / IntervalQuantity([1, 2], [2, 4])).bounds.tolist())
+
+        # As for DataQuantity, numbers minus (or divided by) intervals are not supported.
+        for other in (2, 2.0, np.array([1, 2])):
+            with self.assertRaises(TypeError):
+                other - a
+            with self.assertRaises(TypeError):
+                other / a
+            with self.assertRaises(TypeError):
+                other // a
+
+        # Division by zero
+        self.assertEqual(None, a / 0)
+        self.assertEqual(None, a / IntervalQuantity(0, 5))
+        result = IntervalQuantity([1, 2], [3, 4]) / IntervalQuantity([0, 1], [1, 2])
+        self.assertTrue(np.isnan(result.lower[0]))
+        self.assertEqual([1, 4], result.bounds[:, 1].tolist())
+        self.assertEqual(None, a // 0)
+        self.assertEqual(None, a // IntervalQuantity(0, 5))
+        self.assertEqual(None, DataQuantity(8) / IntervalQuantity(0, 5))
+        self.assertEqual(None, DataQuantity(8) // IntervalQuantity(0, 5))
+        result = DataQuantity(8) / IntervalQuantity([0, 1], [1, 2])
+        self.assertTrue(np.isnan(result.upper[0]))
+        self.assertEqual([4, 8], result.bounds[:, 1].tolist())
+
+        # Arrays broadcast against single intervals.
+        result = a + np.array([1, 2, 3])
+        self.assertEqual([[11, 12, 13], [21, 22, 23]], result.bounds.tolist())
+        result = IntervalQuantity([1, 2], [3, 4]) + a
+        self.assertEqual([[11, 12], [23, 24]], result.bounds.tolist())
+
+        self.assertTrue(a + 'a' is a)
+
+        # Every value in the operands gives a result inside the interval.
+        for x in (10, 15, 20):
+            for y in (2, 3, 5):
+                self.assertTrue((a + b).contains(x + y))
+                self.assertTrue((a - b).contains(x - y))
+                self.assertTrue((a * b).contains(x * y))
+                self.assertTrue((a / b).contains(float(x) / y))
+                self.assertTrue((a // b).contains(x // y))
+                self.assertTrue((DataQuantity(x) - b).contains(x - y))
+                self.assertTrue((DataQuantity(x) / b).contains(float(x) / y))
+                self.assertTrue((DataQuantity(x) // b).contains(x // y))
+
+    # ******************************
+
+    def test_evaluate_bounds(self):
+        """
+        Tests evaluating size formulas over interval parameters.
+
+        def evaluateBounds(function, decreasing=(), **parameters):
+        """
+        # The partly averaged timing product of Table 12.
+        result = evaluateBounds(timingCubeSize, N_chan=IntervalQuantity(1, 4096), N_sub=IntervalQuantity(1, 180))
+        self.assertEqual(timingCubeSize(N_chan=1, N_sub=1), result.lower)
+        self.assertEqual(timingCubeSize(), result.upper)
+
+        # The same as evaluating the lower and upper parameter sets separately.
+        result = evaluateBounds(ocldSize, N_cand=IntervalQuantity(500, 1500), N_chan=np.array([64, 128]))
+        self.assertEqual(ocldSize(N_cand=500, N_chan=np.array([64, 128])).tolist(), result.lower.tolist())
+        self.assertEqual(ocldSize(N_cand=1500, N_chan=np.array([64, 128])).tolist(), result.upper.tolist())
+
+        result = evaluateBounds(ocldSize, N_cand=IntervalQuantity([500, 600], [1500, 1600]),
+                                N_chan=np.array([[64], [128]]))
+        self.assertEqual((2, 2), result.lower.shape)
+        self.assertEqual(ocldSize(N_cand=1600, N_chan=128), result.upper[1, 1])
+
+        # Fixed parameters only
+        result = evaluateBounds(ocldSize)
+        self.assertEqual(0, result.width())
+        self.assertEqual(ocldSize(), result.lower)
+
+        # Decreasing parameters
+        result = evaluateBounds(lambda x, y: x / y, decreasing=('y',), x=IntervalQuantity(10, 20), y=IntervalQuantity(2, 5))
+        self.assertEqual([2, 10], result.bounds.tolist())
+
+    # ****************************************************************************************************
+
+    # ******************************
+    #
+    # Test Setup & Teardown
+    #
+    # ******************************
+
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+
+    # ****************************************************************************************************
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+
+    # ****************************************************************************************************
+
+    if __name__ == "__main__":
+        unittest.main(argv=['ignored', '-v'], exit=False)
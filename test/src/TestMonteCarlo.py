@@ -0,0 +1,196 @@
+"""
+**************************************************************************
+
+ TestMonteCarlo.py
+
+**************************************************************************
+ Description:
+
+ Tests Monte Carlo estimation of data product volumes and rates.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import unittest
+
+import numpy as np
+
+from main.src.DataQuantity import DataQuantity
+from main.src.DataQuantityFunctions import *
+from main.src.DataRate import DataRate
+from main.src.MonteCarlo import *
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class TestMonteCarlo(unittest.TestCase):
+    """
+    Defines the tests for Monte Carlo simulation.
+    """
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_fixed_parameters(self):
+        """
+        Tests that fixed parameters give the notebook's values at every percentile.
+        """
+        result = simulate('OCLD', samples=10)
+        self.assertEqual(10, result.samples)
+        self.assertEqual(PERCENTILES, result.percentiles)
+        self.assertTrue(np.all(result.beam == ocldSize()))
+        self.assertTrue(np.all(result.scan == scanVolume(ocldSize())))
+        self.assertTrue(np.all(result.scanRate == scanVolume(ocldSize()) / 180.0))
+
+        result = simulate('SPOCLD', samples=10, percentiles=(50,))
+        self.assertEqual(spocldBeamVolume(spocldSize()), result.beam[0])
+        self.assertEqual(DataQuantity(float(scanVolume(spocldBeamVolume(spocldSize())))), result.quantity(50))
+        self.assertEqual(DataRate(spocldSize() * 1.0), result.rate(50, perScan=False))
+        self.assertEqual(None, result.quantity(99))
+        self.assertEqual(None, result.rate(99))
+
+        result = simulate('PTD', samples=10, percentiles=(50,))
+        self.assertEqual(scanVolume(ptdSize(), 16), result.scan[0])
+
+    # ******************************
+
+    def test_distributions(self):
+        """
+        Tests sampling from each distribution.
+        """
+        rng = np.random.default_rng(1)
+
+        values = Poisson(180).sample(rng, 100000)
+        self.assertAlmostEqual(180, values.mean(), delta=0.5)
+
+        values = Uniform(1, 3, integer=True).sample(rng, 1000)
+        self.assertEqual({1, 2, 3}, set(values.tolist()))
+
+        values = Uniform(1, 3).sample(rng, 1000)
+        self.assertTrue(np.all((values >= 1) & (values <= 3)))
+
+        values = Normal(0, 1).sample(rng, 1000)
+        self.assertTrue(np.all(values >= 0))
+
+        values = Empirical([10, 20], [1, 3]).sample(rng, 100000)
+        self.assertEqual({10.0, 20.0}, set(values.tolist()))
+        self.assertAlmostEqual(0.75, np.mean(values == 20), delta=0.01)
+
+        # Histogram bin edges.
+        values = Empirical([0, 1, 2], [0, 1]).sample(rng, 1000)
+        self.assertTrue(np.all((values >= 1) & (values <= 2)))
+
+        self.assertFalse(Poisson(-1).isValid())
+        self.assertFalse(Uniform(2, 1).isValid())
+        self.assertFalse(Normal(1, -1).isValid())
+        self.assertFalse(Empirical([1, 2], [0, 0]).isValid())
+        self.assertFalse(Empirical([1, 2, 3, 4], [1, 1]).isValid())
+
+    # ******************************
+
+    def test_simulate(self):
+        """
+        Tests Monte Carlo simulation with uncertain parameters.
+        """
+        result = simulate('SPOCLD', samples=200000, N_events=Poisson(180))
+        median = result.percentiles.index(50)
+        self.assertAlmostEqual(180 * spocldSize(), result.beam[median], delta=spocldSize())
+        self.assertTrue(np.all(np.diff(result.scan) >= 0))
+
+        # Reproducible for a given seed, whatever the other parameters.
+        a = simulate('OCLD', samples=1000, seed=7, N_cand=Uniform(500, 1500, integer=True))
+        b = simulate('OCLD', samples=1000, seed=7, N_cand=Uniform(500, 1500, integer=True), N_bit=8)
+        c = simulate('OCLD', samples=1000, seed=8, N_cand=Uniform(500, 1500, integer=True))
+        self.assertTrue(np.array_equal(a.scan, b.scan))
+        self.assertFalse(np.array_equal(a.scan, c.scan))
+
+        # Batching bounds memory without changing the scale of the result.
+        d = simulate('OCLD', samples=1000, seed=7, batch=100, N_cand=Uniform(500, 1500, integer=True))
+        self.assertAlmostEqual(a.scan[1], d.scan[1], delta=0.05 * a.scan[1])
+
+        # Uncertain scan length.
+        result = simulate('PTD', samples=1000, percentiles=(50,), T_scan=Empirical([600, 1800], [0, 1]))
+        self.assertAlmostEqual(scanVolume(ptdSize(), 16) / 1800.0, result.scanRate[0])
+
+        # The volume per scan sums independent beams: compare the spread
+        # with direct sums over 1500 (approximated) and 16 (summed) beams.
+        rng = np.random.default_rng(1)
+        spread = lambda volumes: volumes[-1] - volumes[0]
+
+        result = simulate('OCLD', samples=20000, percentiles=(5, 50, 99), N_cand=Poisson(1000))
+        ocld = np.percentile(ocldSize(N_cand=rng.poisson(1000, (4000, 1500))).sum(axis=1), (5, 50, 99))
+        self.assertAlmostEqual(ocld[1], result.scan[1], delta=0.001 * ocld[1])
+        self.assertAlmostEqual(spread(ocld), spread(result.scan), delta=0.1 * spread(ocld))
+
+        result = simulate('PTD', samples=20000, percentiles=(5, 50, 99), N_sub=Uniform(90, 270, integer=True))
+        direct = np.percentile(ptdSize(N_sub=rng.integers(90, 270, (20000, 16), endpoint=True)).sum(axis=1),
+                               (5, 50, 99))
+        self.assertAlmostEqual(direct[1], result.scan[1], delta=0.01 * direct[1])
+        self.assertAlmostEqual(spread(direct), spread(result.scan), delta=0.1 * spread(direct))
+
+        # Correlated beams all have the same volume.
+        result = simulate('OCLD', samples=20000, percentiles=(5, 50, 99), N_cand=Poisson(1000), correlated=True)
+        self.assertTrue(np.allclose(result.beam * 1500, result.scan))
+        self.assertTrue(spread(result.scan) > 30 * spread(ocld))
+
+        # Invalid input
+        self.assertEqual(None, simulate('XYZ'))
+        self.assertEqual(None, simulate('OCLD', samples=0))
+        self.assertEqual(None, simulate('OCLD', percentiles=(101,)))
+        self.assertEqual(None, simulate('OCLD', N_events=Poisson(1)))
+        self.assertEqual(None, simulate('OCLD', N_cand=Uniform(2, 1)))
+        self.assertEqual(None, simulate('OCLD', N_cand='1000'))
+
+    # ****************************************************************************************************
+
+    # ******************************
+    #
+    # Test Setup & Teardown
+    #
+    # ******************************
+
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+
+    # ****************************************************************************************************
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+
+    # ****************************************************************************************************
+
+    if __name__ == "__main__":
+        unittest.main(argv=['ignored', '-v'], exit=False)
@@ -0,0 +1,188 @@
+"""
+**************************************************************************
+
+ TestObservingSchedule.py
+
+**************************************************************************
+ Description:
+
+ Tests the observing schedule rate series.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import unittest
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from main.src.DataQuantityFunctions import *
+from main.src.ObservingSchedule import *
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class TestObservingSchedule(unittest.TestCase):
+    """
+    Defines the tests for the observing schedule.
+    """
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_loadSchedule(self):
+        """
+        Tests loading JSON and CSV schedules.
+        """
+        directory = tempfile.mkdtemp()
+
+        try:
+            path = os.path.join(directory, 'schedule.json')
+            with open(path, 'w') as scheduleFile:
+                scheduleFile.write('{"blocks": [{"mode": "search", "start": 0, "duration": 3600, "beams": 1500},'
+                                   ' {"mode": "timing", "start": 600, "duration": 1800, "beams": 16,'
+                                   ' "parameters": {"N_chan": 1024}}]}')
+
+            blocks = loadSchedule(path)
+            self.assertEqual(2, len(blocks))
+            self.assertEqual('search block at 0 s for 3600 s, 1500 beams', str(blocks[0]))
+            self.assertEqual({'N_chan': 1024}, blocks[1].parameters)
+
+            path = os.path.join(directory, 'schedule.csv')
+            with open(path, 'w') as scheduleFile:
+                scheduleFile.write('mode,start,duration,beams,N_chan,T_scan\n'
+                                   'transient,0,600,1500,,\n'
+                                   'timing,10.5,60,16,1024,60\n')
+
+            blocks = loadSchedule(path)
+            self.assertEqual({}, blocks[0].parameters)
+            self.assertEqual(10.5, blocks[1].start)
+            self.assertEqual({'N_chan': 1024, 'T_scan': 60}, blocks[1].parameters)
+
+            self.assertEqual(None, loadSchedule(os.path.join(directory, 'missing.json')))
+        finally:
+            shutil.rmtree(directory)
+
+        self.assertEqual(None, parseSchedule({}))
+        self.assertEqual(None, parseSchedule([{'mode': 'search', 'start': 0, 'duration': 10}]))
+        self.assertEqual(None, parseSchedule([{'mode': 'xyz', 'start': 0, 'duration': 10, 'beams': 1}]))
+        self.assertEqual(None, parseSchedule([{'mode': 'search', 'start': 0, 'duration': 0, 'beams': 1}]))
+        self.assertEqual(None, parseSchedule([{'mode': 'search', 'start': '0', 'duration': 1, 'beams': 1}]))
+
+    # ******************************
+
+    def test_blockRates(self):
+        """
+        Tests the rates of each product in each block.
+        """
+        blocks = parseSchedule([{'mode': 'search', 'start': 0, 'duration': 10, 'beams': 1500},
+                                {'mode': 'timing', 'start': 0, 'duration': 10, 'beams': 16, 'N_chan': 1024},
+                                {'mode': 'transient', 'start': 0, 'duration': 10, 'beams': 100,
+                                 'parameters': {'N_burst': 2, 'T_scan': 60}}])
+        rates = blockRates(blocks)
+
+        self.assertEqual([scanVolume(ocldSize(), 1500) / 180.0, 0, 0], rates['OCLD'].tolist())
+        self.assertEqual([0, scanVolume(ptdSize(N_chan=1024), 16) / 180.0, 0], rates['PTD'].tolist())
+        self.assertEqual([0, scanVolume(dsdSize(N_chan=1024), 16) / 180.0, 0], rates['DSD'].tolist())
+        self.assertEqual([0, 0, 2 * spocldSize() * 100.0], rates['SPOCLD'].tolist())
+
+        self.assertEqual(None, blockRates(parseSchedule([{'mode': 'search', 'start': 0, 'duration': 1,
+                                                          'beams': 1, 'N_xyz': 1}])))
+
+    # ******************************
+
+    def test_rateSeries(self):
+        """
+        Tests the rate series against a per second sum.
+        """
+        rng = np.random.default_rng(1)
+        records = []
+        for mode, start, duration, beams in zip(rng.choice(sorted(MODES), 50), rng.uniform(0, 5000, 50),
+                                                rng.uniform(1, 2000, 50), rng.integers(1, 1500, 50)):
+            records.append({'mode': str(mode), 'start': float(start), 'duration': float(duration),
+                            'beams': int(beams)})
+
+        blocks = parseSchedule(records)
+        series = rateSeries(blocks, byProduct=True)
+
+        total = sum(blockRates(blocks).values())
+        expected = np.zeros(len(series['total']))
+        for block, rate in zip(blocks, total):
+            end = block.start + block.duration
+            for second in range(int(block.start), int(np.ceil(end))):
+                expected[second] += rate * (min(second + 1, end) - max(second, block.start))
+
+        self.assertTrue(np.allclose(expected, series['total'], rtol=1e-9, atol=1e-6 * expected.max()))
+        self.assertTrue(np.allclose(series['total'], series['OCLD'] + series['SPOCLD'] + series['PTD'] +
+                                    series['DSD']))
+
+        # Windows that cover part of a bin, latency, resolution and length.
+        blocks = parseSchedule([{'mode': 'search', 'start': 0.5, 'duration': 2, 'beams': 1500}])
+        rate = scanVolume(ocldSize(), 1500) / 180.0
+        self.assertEqual([rate / 2, rate, rate / 2], rateSeries(blocks).tolist())
+        self.assertEqual([0, rate / 2, rate, rate / 2], rateSeries(blocks, latency=1).tolist())
+        self.assertEqual([rate * 0.75, rate * 0.25], rateSeries(blocks, resolution=2).tolist())
+        self.assertEqual([rate / 2, rate, rate / 2, 0, 0], rateSeries(blocks, length=5).tolist())
+        self.assertEqual(0, len(rateSeries([])))
+
+        self.assertEqual(None, rateSeries(blocks, resolution=0))
+        self.assertEqual(None, rateSeries(blocks, latency=-1))
+        self.assertEqual(None, rateSeries(blocks, length=2.5))
+        self.assertEqual(None, rateSeries(None))
+
+    # ****************************************************************************************************
+
+    # ******************************
+    #
+    # Test Setup & Teardown
+    #
+    # ******************************
+
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+
+    # ****************************************************************************************************
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+
+    # ****************************************************************************************************
+
+    if __name__ == "__main__":
+        unittest.main(argv=['ignored', '-v'], exit=False)
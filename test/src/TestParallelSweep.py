@@ -0,0 +1,129 @@
+"""
+**************************************************************************
+
+ TestParallelSweep.py
+
+**************************************************************************
+ Description:
+
+ Tests parallel parameter sweeps using a process pool and shared memory.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import unittest
+
+import numpy as np
+
+from main.src.DataQuantityFunctions import *
+from main.src.GridEvaluator import COMPONENTS
+from main.src.ParallelSweep import *
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class TestParallelSweep(unittest.TestCase):
+    """
+    Defines the tests for parallel sweeps.
+    """
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_parallel_sweep(self):
+        """
+        Tests that parallel sweeps match the size formulas, whatever the
+        number of workers.
+        """
+        axes = {'N_chan': np.array([64, 128, 256]), 'N_cand': np.arange(1, 101), 'N_beam': np.array([16, 1500])}
+
+        serial = parallelSweep('OCLD', axes, workers=1, chunkSize=50, N_bit=4)
+        self.assertEqual(1, serial.workers)
+        self.assertEqual(set(COMPONENTS) | {'total', 'scan'}, set(serial.outputs))
+
+        N_chan, N_cand, N_beam = np.meshgrid(*axes.values(), indexing='ij')
+        total = ocldSize(N_cand=N_cand, N_chan=N_chan, N_bit=4)
+        self.assertTrue(np.array_equal(total, serial.outputs['total']))
+        self.assertTrue(np.array_equal(scanVolume(total, N_beam), serial.outputs['scan']))
+
+        for workers in (2, 3):
+            result = parallelSweep('OCLD', axes, workers=workers, chunkSize=50, N_bit=4)
+            self.assertEqual(workers, result.workers)
+            self.assertTrue(0 <= result.efficiency <= 1)
+            for name in serial.outputs:
+                self.assertTrue(np.array_equal(serial.outputs[name], result.outputs[name]))
+
+        # Float grids are also identical.
+        axes = {'M_size': np.linspace(0, 1e4, 1000)}
+        a = parallelSweep('PTD', axes, workers=1, chunkSize=64)
+        b = parallelSweep('PTD', axes, workers=2, chunkSize=64)
+        self.assertTrue(np.array_equal(a.outputs['total'], b.outputs['total']))
+
+    # ******************************
+
+    def test_scaling(self):
+        """
+        Tests measuring scaling, and invalid sweeps.
+        """
+        rows = measureScaling('PTD', {'N_sub': np.arange(1, 1001)}, workers=(1, 2), chunkSize=100)
+        self.assertEqual([1, 2], [row[0] for row in rows])
+        self.assertEqual(1.0, rows[0][2])
+
+        self.assertEqual(None, parallelSweep('XYZ', {'N_sub': [1]}))
+        self.assertEqual(None, parallelSweep('PTD', {'N_sub': [1]}, workers=0))
+        self.assertEqual(None, parallelSweep('PTD', {'N_cand': [1]}))
+        self.assertEqual(None, measureScaling('PTD', {'N_cand': [1]}))
+
+    # ****************************************************************************************************
+
+    # ******************************
+    #
+    # Test Setup & Teardown
+    #
+    # ******************************
+
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+
+    # ****************************************************************************************************
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+
+    # ****************************************************************************************************
+
+    if __name__ == "__main__":
+        unittest.main(argv=['ignored', '-v'], exit=False)
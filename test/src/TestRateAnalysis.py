@@ -0,0 +1,193 @@
+"""
+**************************************************************************
+
+ TestRateAnalysis.py
+
+**************************************************************************
+ Description:
+
+ Tests the sliding window rate analysis.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import unittest
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from main.src.RateAnalysis import *
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class TestRateAnalysis(unittest.TestCase):
+    """
+    Defines the tests for the rate analysis.
+    """
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_rollingSum(self):
+        """
+        Tests rolling sums against direct sums, across chunk boundaries.
+        """
+        series = np.random.default_rng(0).random(1000)
+
+        for window in (1, 7, 100, 1000):
+            expected = [series[i:i + window].sum() for i in range(series.size - window + 1)]
+            self.assertTrue(np.allclose(expected, rollingSum(series, window, chunkSize=64)))
+
+        self.assertEqual([3.0, 5.0, 7.0], rollingSum([1, 2, 3, 4], 2).tolist())
+
+        self.assertEqual(None, rollingSum(series, 0))
+        self.assertEqual(None, rollingSum(series, 1001))
+        self.assertEqual(None, rollingSum(series, 2.0))
+        self.assertEqual(None, rollingSum(series, 2, out=np.empty(10)))
+        self.assertEqual(None, rollingSum(series, 2, chunkSize=0))
+        self.assertEqual(None, rollingSum(np.ones((2, 2)), 1))
+        self.assertEqual(None, rollingSum(['a', 'b'], 1))
+
+    # ******************************
+
+    def test_rollingMax(self):
+        """
+        Tests rolling maxima against direct maxima, across chunk boundaries.
+        """
+        series = np.random.default_rng(1).integers(-1000, 1000, 1000)
+
+        for window in (1, 7, 100, 1000):
+            expected = [series[i:i + window].max() for i in range(series.size - window + 1)]
+            self.assertEqual(expected, rollingMax(series, window, chunkSize=64).tolist())
+
+        self.assertEqual([3, 3, 2], rollingMax([1, 3, 2, 0], 2).tolist())
+        self.assertEqual(None, rollingMax(series, 0))
+
+    # ******************************
+
+    def test_peakWindows(self):
+        """
+        Tests the top k peak windows against an exhaustive search.
+        """
+        series = np.random.default_rng(2).random(5000) * 1e9
+        peaks = peakWindows(series, windows=(10, 60, 180), k=5, chunkSize=300)
+
+        for window in (10, 60, 180):
+            sums = np.array([series[i:i + window].sum() for i in range(series.size - window + 1)])
+            expected = []
+            for i in np.argsort(-sums, kind='stable'):
+                if all(abs(i - j) >= window for j in expected):
+                    expected.append(i)
+                if len(expected) == 5:
+                    break
+
+            self.assertEqual(expected, [peak.start for peak in peaks[window]])
+            self.assertTrue(np.isclose(sums[expected[0]], peaks[window][0].volume))
+            self.assertTrue(np.isclose(sums[expected[0]] / window, peaks[window][0].rate))
+
+        # Tied windows are reported from the earliest start.
+        series = np.ones(1000)
+        for chunkSize in (1, 7, 100, 1000):
+            peaks = peakWindows(series, windows=(1, 10), k=3, chunkSize=chunkSize)
+            self.assertEqual([0, 1, 2], [peak.start for peak in peaks[1]])
+            self.assertEqual([0, 10, 20], [peak.start for peak in peaks[10]])
+        self.assertEqual(0, peakWindows(series, windows=(10,), k=1)[10][0].start)
+
+        # Times, resolution and volume series.
+        series = np.zeros(100)
+        series[50:54] = 2.0
+        peak = peakWindows(series, windows=(2,), resolution=0.5, start=1000)[2][0]
+        self.assertEqual(1025.0, peak.start)
+        self.assertEqual(4.0, peak.volume)
+        self.assertEqual(2.0, peak.rate)
+        self.assertEqual('2 s window at 1025.0 s: 0.000 Gbit/s', str(peak))
+        self.assertEqual(8.0, peakWindows(series, windows=(2,), resolution=0.5, volume=True)[2][0].volume)
+
+        self.assertEqual(None, peakWindows(series, windows=(0,)))
+        self.assertEqual(None, peakWindows(series, windows=(1.5,)))
+        self.assertEqual(None, peakWindows(series, windows=(101,)))
+        self.assertEqual(None, peakWindows(series, k=0))
+        self.assertEqual(None, peakWindows(series, resolution=0))
+
+    # ******************************
+
+    def test_memoryMapped(self):
+        """
+        Tests memory mapped series and outputs.
+        """
+        directory = tempfile.mkdtemp()
+
+        try:
+            series = open_memmap(os.path.join(directory, 'series.npy'), mode='w+', dtype=np.float32, shape=(10000,))
+            series[:] = np.random.default_rng(3).random(10000)
+            series.flush()
+            series = np.load(os.path.join(directory, 'series.npy'), mmap_mode='r')
+
+            out = open_memmap(os.path.join(directory, 'sums.npy'), mode='w+', dtype=np.float64, shape=(9991,))
+            self.assertTrue(rollingSum(series, 10, out=out, chunkSize=1000) is out)
+            self.assertTrue(np.allclose(rollingSum(np.array(series), 10), out))
+
+            peaks = peakWindows(series, windows=(10,), k=3, chunkSize=1000)
+            self.assertAlmostEqual(out.max(), peaks[10][0].volume, places=4)
+            del out
+        finally:
+            shutil.rmtree(directory)
+
+    # ****************************************************************************************************
+
+    # ******************************
+    #
+    # Test Setup & Teardown
+    #
+    # ******************************
+
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+
+    # ****************************************************************************************************
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+
+    # ****************************************************************************************************
+
+    if __name__ == "__main__":
+        unittest.main(argv=['ignored', '-v'], exit=False)
@@ -0,0 +1,159 @@
+"""
+**************************************************************************
+
+ TestReductionPlanner.py
+
+**************************************************************************
+ Description:
+
+ Tests the data reduction planner.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import unittest
+
+import numpy as np
+
+from main.src.DataQuantityFunctions import *
+from main.src.ReductionPlanner import *
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class TestReductionPlanner(unittest.TestCase):
+    """
+    Defines the tests for the reduction planner.
+    """
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_planReductions(self):
+        """
+        Tests that the plans fit the budget, are not dominated, and are
+        ranked by cost.
+        """
+        plans = planReductions('PTD', 20e9)
+
+        # Halving any one of the four knobs is enough, at a cost of 1.
+        self.assertEqual(4, len(plans))
+        for plan in plans:
+            self.assertEqual(1.0, plan.cost)
+            self.assertEqual(scanVolume(ptdSize(**plan.parameters), 16) / 180.0, plan.rate)
+            self.assertTrue(plan.rate <= 20e9)
+
+        self.assertEqual({'N_chan': 4096, 'N_sub': 180, 'N_pol': 4, 'N_bit': 32}, plans[0].parameters)
+
+        plans = planReductions('OCLD', 30e9)
+        costs = [plan.cost for plan in plans]
+        self.assertEqual(sorted(costs), costs)
+
+        # No plan is at least as fine as another in every knob.
+        for a in plans:
+            for b in plans:
+                if a is not b:
+                    self.assertFalse(all(a.parameters[n] >= b.parameters[n] for n in KNOBS['OCLD']))
+
+        # No reduction is needed, or none is enough.
+        plans = planReductions('OCLD', 100e9)
+        self.assertEqual(1, len(plans))
+        self.assertEqual(0.0, plans[0].cost)
+        self.assertEqual([], planReductions('OCLD', 1))
+
+    # ******************************
+
+    def test_costs(self):
+        """
+        Tests the knob, weight and cost options.
+        """
+        # Polarisations weighted heavily are reduced last.
+        plans = planReductions('SPOCLD', 5e9, weights={'N_pol': 4})
+        self.assertEqual(4, plans[0].parameters['N_pol'])
+
+        # A custom cost, counting only frequency averaging.
+        plans = planReductions('PTD', 20e9, knobs={'N_chan': (4096, 2048), 'N_bit': (64, 32, 16)},
+                               cost=lambda N_chan, N_bit: 4096.0 / N_chan - 1 + 0 * N_bit)
+        self.assertEqual([0.0, 1.0], [plan.cost for plan in plans])
+        self.assertEqual({'N_chan': 4096, 'N_bit': 32}, plans[0].parameters)
+
+        # Fixed parameters.
+        plans = planReductions('PTD', 20e9, N_beam=8)
+        self.assertEqual(0.0, plans[0].cost)
+
+    # ******************************
+
+    def test_invalid(self):
+        """
+        Tests invalid input.
+        """
+        self.assertEqual(None, planReductions('DSD', 20e9))
+        self.assertEqual(None, planReductions('PTD', '20e9'))
+        self.assertEqual(None, planReductions('PTD', -1))
+        self.assertEqual(None, planReductions('PTD', 20e9, knobs={'N_xyz': (2, 1)}))
+        self.assertEqual(None, planReductions('PTD', 20e9, knobs={'N_bit': ()}))
+        self.assertEqual(None, planReductions('PTD', 20e9, knobs={'N_bit': (64, 0)}))
+        self.assertEqual(None, planReductions('PTD', 20e9, weights={'N_xyz': 2}))
+        self.assertEqual(None, planReductions('PTD', 20e9, weights={'N_chan': 'x'}))
+        self.assertEqual(None, planReductions('PTD', 20e9, weights={'N_chan': -1}))
+        self.assertEqual(None, planReductions('PTD', 20e9, weights={'N_chan': float('nan')}))
+        self.assertEqual(None, planReductions('PTD', 20e9, weights={'N_chan': None}))
+        self.assertEqual(None, planReductions('PTD', 20e9, weights=[('N_chan', 1)]))
+        self.assertEqual([str(plan) for plan in planReductions('PTD', 20e9)],
+                         [str(plan) for plan in planReductions('PTD', 20e9, weights={'N_chan': 1.0})])
+        self.assertEqual(None, planReductions('PTD', 20e9, N_bit=8))
+        self.assertEqual(None, planReductions('PTD', 20e9, N_xyz=8))
+
+    # ****************************************************************************************************
+
+    # ******************************
+    #
+    # Test Setup & Teardown
+    #
+    # ******************************
+
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+
+    # ****************************************************************************************************
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+
+    # ****************************************************************************************************
+
+    if __name__ == "__main__":
+        unittest.main(argv=['ignored', '-v'], exit=False)
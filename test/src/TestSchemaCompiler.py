@@ -0,0 +1,171 @@
+"""
+**************************************************************************
+
+ TestSchemaCompiler.py
+
+**************************************************************************
+ Description:
+
+ Tests compiling data model schemas into size evaluators.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import unittest
+
+import json
+
+import numpy as np
+
+from main.src.DataQuantityFunctions import *
+from main.src.SchemaCompiler import *
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class TestSchemaCompiler(unittest.TestCase):
+    """
+    Defines the tests for the schema compiler.
+    """
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_product_schemas(self):
+        """
+        Tests the compiled product schemas against the size formulas.
+        """
+        pairs = [('ocld', ocldSize), ('spocld', spocldSize), ('ptd', ptdSize), ('dsd', dsdSize), ('avg', avgSize),
+                 ('toa', toaListSize), ('res', residualsSize), ('alert', alertSize)]
+
+        for name, size in pairs:
+            evaluator = compileSchema(loadSchema(name))
+            self.assertEqual(size(), evaluator())
+
+        evaluator = compileSchema(loadSchema('ocld'))
+        self.assertEqual(ocldSize(N_cand=10, N_chan=64), evaluator(N_cand=10, N_chan=64))
+        self.assertEqual(None, evaluator(N_pol=4))
+
+        N_cand = np.array([1, 10, 1000])
+        self.assertEqual(ocldSize(N_cand=N_cand).tolist(), evaluator(N_cand=N_cand).tolist())
+
+        # The constant attribute sums are folded: the list attributes and
+        # the list entry size.
+        self.assertEqual(CANDIDATE_LIST_ATTRIBUTE_BITS, evaluator.constant)
+        self.assertEqual(LIST_ENTRY_BITS, evaluator.terms[('N_list',)])
+        self.assertEqual(STRING_BITS, evaluator.terms[('N_cand',)])
+
+        # Sizes past the int64 limit are exact, rather than wrapping around.
+        side = 4096
+        N_cand = np.array([pow(2, 30)])
+        sizes = evaluator(N_cand=N_cand, N_chan=side, N_bin=side, N_sub=side)
+        self.assertEqual([ocldSize(N_cand=pow(2, 30), N_chan=side, N_bin=side, N_sub=side)], sizes.tolist())
+        self.assertEqual(ocldSize(N_cand=N_cand, N_chan=side, N_bin=side, N_sub=side).tolist(), sizes.tolist())
+        sizes = evaluator(N_cand=N_cand, N_chan=np.int64(side), N_bin=side, N_sub=side)
+        self.assertEqual([ocldSize(N_cand=pow(2, 30), N_chan=side, N_bin=side, N_sub=side)], sizes.tolist())
+        self.assertEqual(np.int64, evaluator(N_cand=N_cand).dtype)
+
+        evaluator = compileSchema(loadSchema('avg'))
+        self.assertEqual(avgSize(frequency=True, subints=True), evaluator(N_chan=1, N_sub=1))
+
+    # ******************************
+
+    def test_compile(self):
+        """
+        Tests compiling schemas.
+        """
+        schema = {'name': 'Test', 'parameters': {'n': 10, 'm': 2},
+                  'attributes': [{'name': 'a', 'type': 'string'}, {'name': 'b', 'bits': 4}],
+                  'entities': [{'name': 'child', 'cardinality': ['n', 3],
+                                'attributes': [{'name': 'c', 'type': 'bool'}, {'name': 'd', 'bits': 'm'}],
+                                'entities': [{'name': 'grandchild', 'cardinality': 'n',
+                                              'attributes': [{'name': 'e', 'type': 'int'}]}]}]}
+
+        evaluator = compileSchema(schema)
+        self.assertEqual(96 + 4 + (10 * 3) * (1 + 2 + (10 * 32)), evaluator())
+        self.assertEqual(100, evaluator.constant)
+        self.assertEqual({(): 100, ('n',): 3, ('m', 'n'): 3, ('n', 'n'): 96}, evaluator.terms)
+        self.assertEqual('100 + n * (3 + 3 * m + 96 * n)', evaluator.source)
+
+        # Compiled once, then cached on the schema hash, whatever the key
+        # order or formatting.
+        self.assertTrue(evaluator is compileSchema(json.dumps(schema, indent=4)))
+        self.assertEqual(schemaHash(schema), schemaHash(json.loads(json.dumps(schema, sort_keys=True))))
+
+        changed = json.loads(json.dumps(schema))
+        changed['attributes'][1]['bits'] = 8
+        self.assertEqual(evaluator() + 4, compileSchema(changed)())
+
+        clearCache()
+        self.assertFalse(evaluator is compileSchema(schema))
+
+        # An entity without parameters or attributes.
+        self.assertEqual(0, compileSchema({'name': 'Empty'})())
+
+        # Invalid schemas
+        self.assertEqual(None, compileSchema('{'))
+        self.assertEqual(None, compileSchema([]))
+        self.assertEqual(None, compileSchema({'attributes': [{'name': 'a', 'type': 'double'}]}))
+        self.assertEqual(None, compileSchema({'attributes': [{'name': 'a', 'bits': 'x'}]}))
+        self.assertEqual(None, compileSchema({'attributes': [{'name': 'a', 'bits': -1}]}))
+        self.assertEqual(None, compileSchema({'parameters': {'import': 1}}))
+        self.assertEqual(None, compileSchema({'parameters': {'n': '1'}}))
+        self.assertEqual(None, compileSchema({'parameters': {'n': True}}))
+        self.assertEqual(None, compileSchema('{"parameters": {"n": Infinity}}'))
+        self.assertEqual(None, compileSchema('{"parameters": {"n": NaN}}'))
+        self.assertEqual(None, compileSchema({'entities': [{'cardinality': 'n'}]}))
+        self.assertEqual(None, loadSchema('missing'))
+
+    # ****************************************************************************************************
+
+    # ******************************
+    #
+    # Test Setup & Teardown
+    #
+    # ******************************
+
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+
+    # ****************************************************************************************************
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+
+    # ****************************************************************************************************
+
+    if __name__ == "__main__":
+        unittest.main(argv=['ignored', '-v'], exit=False)
@@ -0,0 +1,198 @@
+"""
+**************************************************************************
+
+ TestShardedSweep.py
+
+**************************************************************************
+ Description:
+
+ Tests sharded, resumable parameter sweeps.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import unittest
+
+import multiprocessing
+import os
+import tempfile
+
+import numpy as np
+
+from main.src.GridEvaluator import evaluateGrid, loadGrid
+from main.src.ShardedSweep import *
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class TestShardedSweep(unittest.TestCase):
+    """
+    Defines the tests for sharded sweeps.
+    """
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_plan(self):
+        """
+        Tests planning a sharded sweep.
+        """
+        axes = {'N_chan': np.array([64, 128, 256]), 'N_cand': np.arange(1, 101)}
+
+        with tempfile.TemporaryDirectory() as directory:
+            manifest = planShards('OCLD', axes, directory, shardSize=50, chunkSize=20, N_beam=16)
+            shards = manifest['shards']
+
+            # The shards tile the grid.
+            self.assertEqual(0, shards[0][0])
+            self.assertEqual(300, shards[-1][1])
+            for previous, shard in zip(shards, shards[1:]):
+                self.assertEqual(previous[1], shard[0])
+                self.assertEqual(previous[3], shard[2])
+
+            # Planning the same sweep again is harmless, a different one fails.
+            self.assertEqual(manifest, planShards('OCLD', axes, directory, shardSize=50, chunkSize=20, N_beam=16))
+            self.assertEqual(None, planShards('OCLD', axes, directory, shardSize=50, chunkSize=20, N_beam=1500))
+            self.assertEqual(manifest, loadManifest(directory))
+
+        self.assertEqual(range(2, 5), shardRange(1, 4, 10))
+        self.assertEqual(list(range(10)), [i for node in range(4) for i in shardRange(node, 4, 10)])
+        self.assertEqual(None, shardRange(4, 4, 10))
+
+        # Invalid sweeps
+        self.assertEqual(None, planShards('XYZ', axes, 'unused'))
+        self.assertEqual(None, planShards(len, axes, 'unused'))
+        self.assertEqual(None, planShards('OCLD', axes, 'unused', shardSize=0))
+        self.assertEqual(None, planShards('OCLD', axes, 'unused', N_beam=np.arange(3)))
+        self.assertEqual(None, planShards('OCLD', {'N_pol': [1]}, 'unused'))
+        self.assertEqual(None, loadManifest('unused'))
+
+    # ******************************
+
+    def test_resume_and_merge(self):
+        """
+        Tests that interrupted sweeps resume, and merge into the same
+        outputs as a single grid evaluation.
+        """
+        axes = {'N_chan': np.array([64, 128, 256]), 'N_cand': np.arange(1, 101), 'M_size': np.array([960.0, 0.5])}
+
+        with tempfile.TemporaryDirectory() as directory:
+            manifest = planShards('OCLD', axes, directory, shardSize=100, chunkSize=40, N_beam=1500)
+            count = len(manifest['shards'])
+
+            # A first run, killed part way.
+            self.assertEqual([0, 1], runShards(directory, [0, 1]))
+            self.assertEqual(([0, 1], list(range(2, count))), shardStatus(directory))
+            self.assertEqual(None, mergeShards(directory))
+
+            # Resuming skips the completed shards.
+            skipped = []
+            computed = runShards(directory, progress=lambda shard, done: skipped.append(shard) if not done else None)
+            self.assertEqual(list(range(2, count)), computed)
+            self.assertEqual([0, 1], skipped)
+            self.assertEqual([], runShards(directory))
+
+            outputs = mergeShards(directory)
+            expected = evaluateGrid('OCLD', axes, os.path.join(directory, 'expected'), N_beam=1500)
+            self.assertEqual(set(expected), set(outputs))
+            for name in expected:
+                self.assertTrue(np.array_equal(expected[name], outputs[name]))
+
+            grid, merged = loadGrid(directory)
+            self.assertEqual(list(axes), list(grid))
+            self.assertTrue(np.array_equal(expected['scan'], merged['scan']))
+
+            # A corrupt shard is rerun.
+            with open(os.path.join(directory, 'shard-000001.npz'), 'wb') as shardFile:
+                shardFile.write(b'partial')
+            self.assertEqual(([0] + list(range(2, count)), [1]), shardStatus(directory))
+            self.assertEqual([1], runShards(directory))
+
+            # Invalid shard numbers
+            self.assertEqual(None, runShards(directory, [count]))
+            self.assertEqual(None, runShards(os.path.join(directory, 'missing')))
+
+    # ******************************
+
+    def test_processes(self):
+        """
+        Tests several processes, standing in for cluster nodes, running
+        overlapping shard ranges against a shared directory.
+        """
+        axes = {'N_sub': np.arange(1, 181), 'N_bin': np.array([1024, 2048])}
+
+        with tempfile.TemporaryDirectory() as directory:
+            manifest = planShards('PTD', axes, directory, shardSize=16, chunkSize=8)
+            count = len(manifest['shards'])
+
+            processes = [multiprocessing.Process(target=runShards, args=(directory, shardRange(node, 3, count)))
+                         for node in range(3)]
+            processes.append(multiprocessing.Process(target=runShards, args=(directory, range(count // 2))))
+
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+                self.assertEqual(0, process.exitcode)
+
+            self.assertEqual((list(range(count)), []), shardStatus(directory))
+            outputs = mergeShards(directory)
+            expected = evaluateGrid('PTD', axes, os.path.join(directory, 'expected'))
+            self.assertTrue(np.array_equal(expected['total'], outputs['total']))
+
+            # No temporary files are left behind.
+            self.assertEqual([], [name for name in os.listdir(directory) if name.endswith('.tmp')])
+
+    # ****************************************************************************************************
+
+    # ******************************
+    #
+    # Test Setup & Teardown
+    #
+    # ******************************
+
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+
+    # ****************************************************************************************************
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+
+    # ****************************************************************************************************
+
+    if __name__ == "__main__":
+        unittest.main(argv=['ignored', '-v'], exit=False)
@@ -0,0 +1,196 @@
+"""
+**************************************************************************
+
+ TestSizeCache.py
+
+**************************************************************************
+ Description:
+
+ Tests the LRU memoisation of sub-entity sizes.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import unittest
+
+import numpy as np
+
+from main.src.DataQuantity import DataQuantity
+from main.src.DataQuantityFunctions import *
+from main.src.SizeCache import *
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class TestSizeCache(unittest.TestCase):
+    """
+    Defines the tests for the size cache.
+    """
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_products(self):
+        """
+        Tests that the cached product sizes match the size formulas.
+        """
+        cache = SizeCache()
+        self.assertEqual(ocldSize(), cache.ocldSize())
+        self.assertEqual(spocldSize(), cache.spocldSize())
+        self.assertEqual(ptdSize(), cache.ptdSize())
+
+        # Only N_cand varies: the OCLD, cube and candidate data sizes are
+        # computed once, then every lookup is a hit.
+        cache.resetStats()
+        for N_cand in range(1, 101):
+            self.assertEqual(ocldSize(N_cand=N_cand, N_chan=64), cache.ocldSize(N_cand=N_cand, N_chan=64))
+        self.assertEqual(3, cache.misses)
+        self.assertEqual(99 + 2, cache.hits)
+
+        # Equal numbers of different types do not share entries.
+        types = SizeCache()
+        self.assertEqual(float, type(types.searchCubeSize(128.0)))
+        self.assertEqual(int, type(types.searchCubeSize(128)))
+        self.assertEqual(np.int64, type(types.searchCubeSize(np.int64(128))))
+        self.assertEqual((0, 3), (types.hits, types.misses))
+        self.assertEqual(float, type(types.searchCubeSize(128.0)))
+        self.assertEqual(1, types.hits)
+        self.assertEqual(type(ocldSize(N_chan=64.0)), type(cache.ocldSize(N_chan=64.0)))
+        self.assertEqual(ocldSize(N_chan=64), cache.ocldSize(N_chan=64.0))
+
+        # Arrays of N_cand are cached, other arrays bypass the cache.
+        N_cand = np.array([1, 10, 1000])
+        self.assertEqual(ocldSize(N_cand=N_cand).tolist(), cache.ocldSize(N_cand=N_cand).tolist())
+        N_chan = np.array([64, 128])
+        self.assertEqual(ocldSize(N_chan=N_chan).tolist(), cache.ocldSize(N_chan=N_chan).tolist())
+        self.assertTrue(cache.bypasses > 0)
+
+        # Products past the int64 limit are exact, rather than wrapping around.
+        N_cand = np.array([pow(2, 30)])
+        self.assertEqual(ocldSize(N_cand=N_cand, N_chan=4096, N_bin=4096, N_sub=4096).tolist(),
+                         cache.ocldSize(N_cand=N_cand, N_chan=4096, N_bin=4096, N_sub=4096).tolist())
+        self.assertEqual([ocldSize(N_cand=pow(2, 30), N_chan=4096, N_bin=4096, N_sub=4096)],
+                         cache.ocldSize(N_cand=N_cand, N_chan=4096, N_bin=4096, N_sub=4096).tolist())
+        self.assertEqual(spocldSize(N_cand=N_cand, N_samp=pow(2, 20), N_chan=pow(2, 20)).tolist(),
+                         cache.spocldSize(N_cand=N_cand, N_samp=pow(2, 20), N_chan=pow(2, 20)).tolist())
+
+        # Sub-entities.
+        self.assertEqual(searchCubeSize(), cache.searchCubeSize())
+        self.assertEqual(sheetSize(), cache.sheetSize())
+        self.assertEqual(listSize(), cache.listSize())
+        self.assertEqual(timingCubeSize(), cache.timingCubeSize())
+        self.assertEqual(singlePulseCubeSize(), cache.singlePulseCubeSize())
+
+    # ******************************
+
+    def test_eviction(self):
+        """
+        Tests LRU eviction and the counters.
+        """
+        cache = SizeCache(maxSize=2)
+        cache.listSize(1)
+        cache.listSize(2)
+        cache.listSize(1)      # 1 is now the most recently used.
+        cache.listSize(3)      # Evicts 2.
+        self.assertEqual(2, len(cache))
+
+        cache.listSize(1)
+        self.assertEqual(2, cache.hits)
+        cache.listSize(2)
+        self.assertEqual({'hits': 2, 'misses': 4, 'evictions': 2, 'bypasses': 0, 'size': 2, 'maxSize': 2,
+                          'hitRate': 2.0 / 6}, cache.stats())
+
+        self.assertEqual(MAX_SIZE, SizeCache(maxSize=0).maxSize)
+        self.assertEqual(0.0, SizeCache().stats()['hitRate'])
+
+    # ******************************
+
+    def test_invalidate(self):
+        """
+        Tests invalidating entries.
+        """
+        calls = []
+
+        def D_size(N_chan):
+            calls.append(N_chan)
+            return DataQuantity(96) + DataQuantity(N_chan * 128 * 64 * 8)
+
+        cache = SizeCache()
+        self.assertEqual(D_size(64), cache.cached('D_dq', D_size, 64))
+        self.assertEqual(D_size(64), cache.cached('D_dq', D_size, 64))
+        self.assertEqual([64, 64, 64], calls)
+
+        # A result of None is cached like any other.
+        cache.resetStats()
+        self.assertEqual(None, cache.cached('none', lambda N_chan: calls.append(N_chan), 32))
+        self.assertEqual(None, cache.cached('none', lambda N_chan: calls.append(N_chan), 32))
+        self.assertEqual([64, 64, 64, 32], calls)
+        self.assertEqual((1, 1), (cache.stats()['hits'], cache.stats()['misses']))
+        self.assertEqual(1, cache.invalidate('none'))
+
+        cache.ocldSize()
+        cache.ptdSize()
+        self.assertEqual(1, cache.invalidate('D_dq'))
+        self.assertEqual(0, cache.invalidate('D_dq'))
+
+        # Invalidating a sub-entity also invalidates the products built on it.
+        self.assertEqual(4, cache.invalidate('S_size') + cache.invalidate('L_size'))
+        self.assertEqual(('C_search_size', 128, 128, 64, 8, int, int, int, int), list(cache._entries)[0])
+        self.assertEqual(None, cache.invalidate(1))
+
+        self.assertEqual(len(cache), cache.invalidate())
+        self.assertEqual(0, len(cache))
+
+    # ****************************************************************************************************
+
+    # ******************************
+    #
+    # Test Setup & Teardown
+    #
+    # ******************************
+
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+
+    # ****************************************************************************************************
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+
+    # ****************************************************************************************************
+
+    if __name__ == "__main__":
+        unittest.main(argv=['ignored', '-v'], exit=False)
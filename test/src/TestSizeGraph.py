@@ -0,0 +1,192 @@
+"""
+**************************************************************************
+
+ TestSizeGraph.py
+
+**************************************************************************
+ Description:
+
+ Tests the lazy dependency graph of data product sizes.
+
+**************************************************************************
+ Author: Rob Lyon
+ Email : robert.lyon@manchester.ac.uk
+ web   : www.scienceguyrob.com
+
+**************************************************************************
+ Required Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ Optional Command Line Arguments:
+
+ N/A
+
+**************************************************************************
+ License:
+
+ Code made available under the GPLv3 (GNU General Public License), that
+ allows you to copy, modify and redistribute the code as you see fit
+ (http://www.gnu.org/copyleft/gpl.html). Though a mention to the
+ original author using the citation above in derivative works, would be
+ very much appreciated.
+
+**************************************************************************
+"""
+
+import unittest
+
+import numpy as np
+
+from main.src.DataQuantity import DataQuantity
+from main.src.DataQuantityArray import DataQuantityArray
+from main.src.DataQuantityFunctions import *
+from main.src.SizeGraph import *
+
+# ******************************
+#
+# CLASS DEFINITION
+#
+# ******************************
+
+
+class TestSizeGraph(unittest.TestCase):
+    """
+    Defines the tests for the size graph.
+    """
+
+    # ******************************
+    #
+    # TESTS
+    #
+    # ******************************
+
+    def test_graph(self):
+        """
+        Tests building and evaluating a graph.
+        """
+        graph = SizeGraph()
+        self.assertTrue(graph.addParameter('a', 2))
+        self.assertTrue(graph.addParameter('b', 3))
+        self.assertTrue(graph.addNode('sum', lambda a, b: a + b, ('a', 'b')))
+        self.assertTrue(graph.addNode('double', lambda s: s * 2, ('sum',)))
+
+        # Invalid definitions
+        self.assertFalse(graph.addParameter('a', 1))
+        self.assertFalse(graph.addNode('sum', lambda a: a, ('a',)))
+        self.assertFalse(graph.addNode('x', lambda a: a, ('z',)))
+        self.assertFalse(graph.addNode('x', 1, ('a',)))
+
+        # Lazy evaluation
+        self.assertEqual(0, graph.evaluations)
+        self.assertEqual(10, graph.get('double'))
+        self.assertEqual(2, graph.evaluations)
+        self.assertEqual(10, graph.get('double'))
+        self.assertEqual(2, graph.evaluations)
+
+        self.assertEqual(None, graph.get('z'))
+        self.assertFalse(graph.set('z', 1))
+        self.assertFalse(graph.set('sum', 1))
+        self.assertFalse(graph.update(a=1, sum=1))
+        self.assertEqual(2, graph.get('a'))
+
+        self.assertEqual({'a': 2, 'b': 3}, graph.parameters())
+        self.assertEqual(['a', 'b', 'sum', 'double'], graph.names())
+        self.assertEqual({'sum', 'double'}, graph.downstream('a'))
+        self.assertEqual(set(), graph.downstream('double'))
+        self.assertEqual(None, graph.downstream('z'))
+
+    # ******************************
+
+    def test_incremental(self):
+        """
+        Tests that changing a parameter only recomputes downstream nodes.
+        """
+        graph = ocldGraph()
+        self.assertEqual(scanVolume(ocldSize()), graph.get('OCLD_scan'))
+        evaluations = graph.evaluations
+
+        # Only OCLD_size and OCLD_scan depend on N_cand.
+        self.assertTrue(graph.set('N_cand', 10))
+        self.assertEqual(scanVolume(ocldSize(N_cand=10)), graph.get('OCLD_scan'))
+        self.assertEqual(evaluations + 2, graph.evaluations)
+
+        # Setting the same value does nothing.
+        self.assertTrue(graph.set('N_cand', 10))
+        graph.get('OCLD_scan')
+        self.assertEqual(evaluations + 2, graph.evaluations)
+
+        # N_beam does not affect OCLD_size.
+        graph.set('N_beam', 16)
+        self.assertEqual(ocldSize(N_cand=10), graph.get('OCLD_size'))
+        self.assertEqual(evaluations + 2, graph.evaluations)
+        self.assertEqual(scanVolume(ocldSize(N_cand=10), 16), graph.get('OCLD_scan'))
+        self.assertEqual(evaluations + 3, graph.evaluations)
+
+        # Swapping N_bin and N_sub leaves the cube size unchanged, so
+        # recomputation stops there.
+        graph.update(N_bin=64, N_sub=128)
+        graph.get('OCLD_scan')
+        self.assertEqual(evaluations + 4, graph.evaluations)
+
+    # ******************************
+
+    def test_product_graphs(self):
+        """
+        Tests the product graphs against the size formulas.
+        """
+        self.assertEqual(ocldSize(), ocldGraph().get('OCLD_size'))
+        self.assertEqual(ocldSize(N_chan=64), ocldGraph(N_chan=64).get('OCLD_size'))
+        self.assertEqual(spocldSize(), spocldGraph().get('SPOCLD_size'))
+        self.assertEqual(scanVolume(spocldBeamVolume(spocldSize())), spocldGraph().get('SPOCLD_scan'))
+        self.assertEqual(ptdSize(), ptdGraph().get('PTD_size'))
+        self.assertEqual(scanVolume(ptdSize(), 16), ptdGraph().get('PTD_scan'))
+        self.assertEqual(None, ocldGraph(N_samp=1))
+
+        quantity = ptdGraph().quantity('PTD_size')
+        self.assertEqual(DataQuantity, type(quantity))
+        self.assertEqual(ptdSize(), quantity.bits)
+        self.assertEqual(None, ptdGraph().quantity('z'))
+
+    # ******************************
+
+    def test_arrays(self):
+        """
+        Tests graphs whose parameters are numpy arrays.
+        """
+        graph = ocldGraph(N_cand=np.array([1, 10, 100]))
+        self.assertEqual(ocldSize(N_cand=np.array([1, 10, 100])).tolist(), graph.get('OCLD_size').tolist())
+        self.assertEqual(DataQuantityArray, type(graph.quantity('OCLD_size')))
+
+        evaluations = graph.evaluations
+        graph.set('N_cand', np.array([1, 10, 100]))
+        graph.get('OCLD_size')
+        self.assertEqual(evaluations, graph.evaluations)
+
+        graph.set('N_cand', np.array([1, 10, 1000]))
+        self.assertEqual(ocldSize(N_cand=1000), graph.get('OCLD_size')[2])
+        self.assertEqual(evaluations + 1, graph.evaluations)
+
+    # ****************************************************************************************************
+
+    # ******************************
+    #
+    # Test Setup & Teardown
+    #
+    # ******************************
+
+    # preparing to test
+    def setUp(self):
+        """ Setting up for the test """
+
+    # ****************************************************************************************************
+
+    # ending the test
+    def tearDown(self):
+        """Cleaning up after the test"""
+
+    # ****************************************************************************************************
+
+    if __name__ == "__main__":
+        unittest.main(argv=['ignored', '-v'], exit=False)
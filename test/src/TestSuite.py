@@ -40,8 +40,28 @@ import logging
 import sys
 from unittest import TestLoader, TextTestRunner, TestSuite
 
+from test.src.TestBufferSizing import TestBufferSizing
+from test.src.TestBulkConvert import TestBulkConvert
+from test.src.TestCapacitySolver import TestCapacitySolver
 from test.src.TestDataConversions import TestDataConversions
+from test.src.TestDataFormatter import TestDataFormatter
 from test.src.TestDataQuantity import TestDataQuantity
+from test.src.TestDataQuantityArray import TestDataQuantityArray
+from test.src.TestDataQuantityFunctions import TestDataQuantityFunctions
+from test.src.TestDataRate import TestDataRate
+from test.src.TestDeliverySimulator import TestDeliverySimulator
+from test.src.TestExactArithmetic import TestExactArithmetic
+from test.src.TestGridEvaluator import TestGridEvaluator
+from test.src.TestIntervalQuantity import TestIntervalQuantity
+from test.src.TestMonteCarlo import TestMonteCarlo
+from test.src.TestObservingSchedule import TestObservingSchedule
+from test.src.TestParallelSweep import TestParallelSweep
+from test.src.TestRateAnalysis import TestRateAnalysis
+from test.src.TestReductionPlanner import TestReductionPlanner
+from test.src.TestSchemaCompiler import TestSchemaCompiler
+from test.src.TestShardedSweep import TestShardedSweep
+from test.src.TestSizeCache import TestSizeCache
+from test.src.TestSizeGraph import TestSizeGraph
 
 
 # ******************************
@@ -144,7 +164,27 @@ class TestSuiteRunner(TestSuite):
         loader = TestLoader()
         suite = TestSuite((
             loader.loadTestsFromTestCase(TestDataConversions),
-            loader.loadTestsFromTestCase(TestDataQuantity)
+            loader.loadTestsFromTestCase(TestDataFormatter),
+            loader.loadTestsFromTestCase(TestDataQuantity),
+            loader.loadTestsFromTestCase(TestDataQuantityArray),
+            loader.loadTestsFromTestCase(TestDataQuantityFunctions),
+            loader.loadTestsFromTestCase(TestDataRate),
+            loader.loadTestsFromTestCase(TestExactArithmetic),
+            loader.loadTestsFromTestCase(TestIntervalQuantity),
+            loader.loadTestsFromTestCase(TestBulkConvert),
+            loader.loadTestsFromTestCase(TestSizeGraph),
+            loader.loadTestsFromTestCase(TestMonteCarlo),
+            loader.loadTestsFromTestCase(TestSchemaCompiler),
+            loader.loadTestsFromTestCase(TestGridEvaluator),
+            loader.loadTestsFromTestCase(TestParallelSweep),
+            loader.loadTestsFromTestCase(TestShardedSweep),
+            loader.loadTestsFromTestCase(TestSizeCache),
+            loader.loadTestsFromTestCase(TestCapacitySolver),
+            loader.loadTestsFromTestCase(TestReductionPlanner),
+            loader.loadTestsFromTestCase(TestObservingSchedule),
+            loader.loadTestsFromTestCase(TestRateAnalysis),
+            loader.loadTestsFromTestCase(TestDeliverySimulator),
+            loader.loadTestsFromTestCase(TestBufferSizing)
         ))
 
         runner = TextTestRunner(verbosity=3)